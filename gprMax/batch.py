@@ -0,0 +1,133 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+from copy import copy
+from copy import deepcopy
+
+import numpy as np
+
+from gprMax.constants import floattype
+from gprMax.materials import Material
+
+
+def initialise_batch_field_arrays(nbatch, G):
+    """Initialise arrays for the electric and magnetic field components of a
+        batch of models, i.e. with a leading batch dimension.
+
+    Args:
+        nbatch (int): Number of models in the batch.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        fields (tuple): Arrays for the Ex, Ey, Ez, Hx, Hy, Hz field components.
+    """
+
+    # Field components that are always zero (in 2D models) share an array
+    shape = (nbatch,) + G.field_array_shape()
+    zeros = np.zeros(shape, dtype=floattype) if G.zero_field_components() else None
+
+    return tuple(zeros if component in G.zero_field_components() else np.zeros(shape, dtype=floattype) for component in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'))
+
+
+class Shot(object):
+    """
+    One model in a batch of models (e.g. traces of a B-scan) with the same
+        geometry that are solved in a single sweep of the grid. Holds the
+        field, dispersive and PML arrays, sources and receivers of the model,
+        which are switched into the grid to carry out the updates that are
+        specific to the model.
+    """
+
+    def __init__(self, currentmodelrun, index, fields, G):
+        """
+        Args:
+            currentmodelrun (int): Model number.
+            index (int): Position of the model in the batch.
+            fields (tuple): Arrays for the field components of the batch.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.currentmodelrun = currentmodelrun
+        self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz = (field[index] for field in fields)
+
+        if Material.maxpoles != 0:
+            self.Tx = np.zeros(G.Tx.shape, dtype=G.Tx.dtype)
+            self.Ty = np.zeros(G.Ty.shape, dtype=G.Ty.dtype)
+            self.Tz = np.zeros(G.Tz.shape, dtype=G.Tz.dtype)
+            self.phix = np.zeros(G.phix.shape, dtype=G.phix.dtype)
+            self.phiy = np.zeros(G.phiy.shape, dtype=G.phiy.dtype)
+            self.phiz = np.zeros(G.phiz.shape, dtype=G.phiz.dtype)
+
+        self.pmlfields = [tuple(np.zeros(getattr(pml, name).shape, dtype=floattype) for name in ('EPhi1', 'EPhi2', 'HPhi1', 'HPhi2')) for pml in G.pmls]
+
+        # Simple sources and receivers moved for the model number
+        self.hertziandipoles = [self.step(copy(source), G.srcsteps) for source in G.hertziandipoles]
+        self.magneticdipoles = [self.step(copy(source), G.srcsteps) for source in G.magneticdipoles]
+        self.voltagesources = [copy(source) for source in G.voltagesources]
+        self.transmissionlines = [deepcopy(tl) for tl in G.transmissionlines]
+        self.rxs = []
+        for rx in G.rxs:
+            rx = self.step(copy(rx), G.rxsteps)
+            rx.outputs = OrderedDict(rx.outputs)
+            self.rxs.append(rx)
+
+        self.snapshots = [copy(snapshot) for snapshot in G.snapshots]
+        self.snapshotseries = [copy(series) for series in G.snapshotseries]
+        self.dfts = [copy(dft) for dft in G.dfts]
+        self.ntffboxes = G.ntffboxes
+
+    def step(self, obj, steps):
+        """Move a source or receiver from its original position for the model number.
+
+        Args:
+            obj (class): Source or receiver class instance.
+            steps (list): Steps (in cells) to move by for each model.
+
+        Returns:
+            obj (class): Source or receiver class instance.
+        """
+
+        obj.xcoord = obj.xcoordorigin + (self.currentmodelrun - 1) * steps[0]
+        obj.ycoord = obj.ycoordorigin + (self.currentmodelrun - 1) * steps[1]
+        obj.zcoord = obj.zcoordorigin + (self.currentmodelrun - 1) * steps[2]
+
+        return obj
+
+    def select(self, G):
+        """Switch the arrays, sources and receivers of the model into the grid.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz = self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz
+        if Material.maxpoles != 0:
+            G.Tx, G.Ty, G.Tz = self.Tx, self.Ty, self.Tz
+            G.phix, G.phiy, G.phiz = self.phix, self.phiy, self.phiz
+        for pml, fields in zip(G.pmls, self.pmlfields):
+            pml.EPhi1, pml.EPhi2, pml.HPhi1, pml.HPhi2 = fields
+        G.hertziandipoles = self.hertziandipoles
+        G.magneticdipoles = self.magneticdipoles
+        G.voltagesources = self.voltagesources
+        G.transmissionlines = self.transmissionlines
+        G.rxs = self.rxs
+        G.snapshots = self.snapshots
+        G.snapshotseries = self.snapshotseries
+        G.dfts = self.dfts
+        G.ntffboxes = self.ntffboxes
@@ -0,0 +1,216 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import h5py
+import numpy as np
+
+from gprMax._version import __version__
+from gprMax.constants import floattype
+from gprMax.materials import Material
+from gprMax.pml import CFS
+from gprMax.pml import CFSParameter
+from gprMax.pml import PML
+
+
+class BuildCache(object):
+    """
+    On-disk cache of built models, i.e. the geometry arrays (solid, rigid and
+        ID), materials and PMLs, so that models that have been built before
+        (by any process sharing the cache directory) are not built again.
+
+    A model is identified by a hash of the processed commands in its input
+        file that affect the build, i.e. not sources, receivers, waveforms,
+        snapshots, geometry views, or the time window. Geometry arrays are
+        stored as numpy (.npy) files and memory-mapped when loaded. Materials
+        and PMLs are stored as attributes and datasets of a HDF5 file, i.e.
+        only as data, as the cache directory may be shared.
+    """
+
+    # Commands that do not affect the build of a model
+    notbuildcmds = ['#title', '#messages', '#num_threads', '#time_window', '#excitation_file', '#src_steps', '#rx_steps', '#taguchi', '#end_taguchi',
+                    '#geometry_view', '#geometry_objects_write', '#waveform', '#voltage_source', '#hertzian_dipole', '#magnetic_dipole', '#transmission_line', '#rx', '#rx_array', '#snapshot', '#snapshot_series', '#dft', '#ntff_box']
+
+    # Geometry arrays stored
+    arrays = ['solid', 'rigidE', 'rigidH', 'ID']
+
+    # Attributes and arrays of materials, PMLs and their CFS parameters stored
+    materialattrs = ['numID', 'ID', 'type', 'averagable', 'er', 'se', 'mr', 'sm', 'poles']
+    materialarrays = ['deltaer', 'tau', 'alpha']
+    pmlattrs = ['ID', 'direction', 'xs', 'xf', 'ys', 'yf', 'zs', 'zf', 'nx', 'ny', 'nz', 'd', 'thickness']
+    pmlarrays = ['ERA', 'ERB', 'ERE', 'ERF', 'HRA', 'HRB', 'HRE', 'HRF']
+    cfsattrs = ['ID', 'scaling', 'scalingprofile', 'scalingdirection', 'min', 'max']
+
+    def __init__(self, directory, processedlines, G):
+        """
+        Args:
+            directory (str): Path to the directory of the cache.
+            processedlines (list): Input commands after Python and include file commands have been processed.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.directory = os.path.abspath(directory)
+
+        # Models with randomly seeded fractal geometry are built differently every time
+        self.cacheable = True
+        digest = hashlib.sha256()
+        digest.update('{} {}\n'.format(__version__, np.dtype(floattype).name).encode('utf-8'))
+        for line in processedlines:
+            tmp = line.split()
+            if not tmp or tmp[0].rstrip(':') in self.notbuildcmds:
+                continue
+            if (tmp[0] == '#fractal_box:' and len(tmp) == 14) or (tmp[0] == '#add_surface_roughness:' and len(tmp) == 13) or (tmp[0] == '#add_grass:' and len(tmp) == 12):
+                self.cacheable = False
+            digest.update(' '.join(tmp).encode('utf-8') + b'\n')
+
+            # Contents of geometry object and materials files that are read
+            if tmp[0] == '#geometry_objects_read:' and len(tmp) == 6:
+                for filename in tmp[4:6]:
+                    if not os.path.isfile(filename):
+                        filename = os.path.abspath(os.path.join(G.inputdirectory, filename))
+                    if os.path.isfile(filename):
+                        with open(filename, 'rb') as f:
+                            for chunk in iter(lambda: f.read(1 << 20), b''):
+                                digest.update(chunk)
+
+        self.key = digest.hexdigest()
+        self.path = os.path.join(self.directory, self.key)
+
+    def load(self, G):
+        """Load a built model from the cache.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            (bool): True if the model was found in the cache.
+        """
+
+        if not self.cacheable or not os.path.isdir(self.path):
+            return False
+
+        # Arrays are copy-on-write, i.e. any changes are not written to the cache
+        for name in self.arrays:
+            setattr(G, name, np.load(os.path.join(self.path, name + '.npy'), mmap_mode='c'))
+
+        with h5py.File(os.path.join(self.path, 'build.h5'), 'r') as f:
+            Material.maxpoles = int(f.attrs['maxpoles'])
+
+            G.materials = []
+            for index in range(len(f['materials'])):
+                grp = f['materials/' + str(index)]
+                material = Material(int(grp.attrs['numID']), grp.attrs['ID'])
+                self.read_attrs(grp, material, self.materialattrs)
+                for name in self.materialarrays:
+                    setattr(material, name, grp[name][()].tolist())
+                G.materials.append(material)
+
+            G.pmls = []
+            for index in range(len(f['pmls'])):
+                grp = f['pmls/' + str(index)]
+                pml = PML.__new__(PML)
+                self.read_attrs(grp, pml, self.pmlattrs)
+                for name in self.pmlarrays:
+                    setattr(pml, name, grp[name][()])
+                pml.CFS = []
+                for cfsindex in range(len(grp['CFS'])):
+                    cfs = CFS()
+                    for parameter in ('alpha', 'kappa', 'sigma'):
+                        cfsparameter = CFSParameter()
+                        self.read_attrs(grp['CFS/' + str(cfsindex) + '/' + parameter], cfsparameter, self.cfsattrs)
+                        setattr(cfs, parameter, cfsparameter)
+                    pml.CFS.append(cfs)
+                G.pmls.append(pml)
+
+        return True
+
+    @staticmethod
+    def write_attrs(grp, obj, names):
+        """Write attributes of an object (that are set) to a HDF5 group.
+
+        Args:
+            grp (object): HDF5 group.
+            obj (object): Object, e.g. Material class instance.
+            names (list): Names of the attributes.
+        """
+
+        for name in names:
+            if getattr(obj, name) is not None:
+                grp.attrs[name] = getattr(obj, name)
+
+    @staticmethod
+    def read_attrs(grp, obj, names):
+        """Set attributes of an object from those of a HDF5 group.
+
+        Args:
+            grp (object): HDF5 group.
+            obj (object): Object, e.g. Material class instance.
+            names (list): Names of the attributes.
+        """
+
+        for name in names:
+            if name in grp.attrs:
+                value = grp.attrs[name]
+                setattr(obj, name, value.item() if isinstance(value, np.generic) else value)
+
+    def save(self, G):
+        """Save a built model to the cache.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        if not self.cacheable or os.path.isdir(self.path):
+            return
+
+        # Write to a temporary directory that is then renamed, so that other
+        # processes never see a partially written model
+        os.makedirs(self.directory, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(dir=self.directory, prefix='.' + self.key)
+        os.chmod(tmpdir, 0o755)
+        for name in self.arrays:
+            np.save(os.path.join(tmpdir, name + '.npy'), getattr(G, name))
+
+        # Materials, and PMLs without their field arrays
+        with h5py.File(os.path.join(tmpdir, 'build.h5'), 'w') as f:
+            f.attrs['gprMax'] = __version__
+            f.attrs['maxpoles'] = Material.maxpoles
+            for index, material in enumerate(G.materials):
+                grp = f.create_group('materials/' + str(index))
+                self.write_attrs(grp, material, self.materialattrs)
+                for name in self.materialarrays:
+                    grp[name] = np.array(getattr(material, name), dtype=np.float64)
+            f.create_group('pmls')
+            for index, pml in enumerate(G.pmls):
+                grp = f.create_group('pmls/' + str(index))
+                self.write_attrs(grp, pml, self.pmlattrs)
+                for name in self.pmlarrays:
+                    grp[name] = getattr(pml, name)
+                for cfsindex, cfs in enumerate(pml.CFS):
+                    for parameter in ('alpha', 'kappa', 'sigma'):
+                        self.write_attrs(grp.create_group('CFS/' + str(cfsindex) + '/' + parameter), getattr(cfs, parameter), self.cfsattrs)
+
+        try:
+            os.rename(tmpdir, self.path)
+        except OSError:
+            # Model saved by another process in the meantime
+            shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,222 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+import os
+from time import perf_counter
+
+import h5py
+import numpy as np
+
+from gprMax._version import __version__
+from gprMax.constants import floattype
+from gprMax.exceptions import GeneralError
+from gprMax.materials import Material
+
+
+class Checkpoint(object):
+    """
+    Checkpoint of the state of the solver for a model, written periodically
+        to a HDF5 file so that the model can be resumed, e.g. after a node
+        failure or when a job reaches its wall-time limit.
+
+    The state (field arrays, dispersive material arrays, PML arrays,
+        transmission line arrays and running DFTs) is written to two slots in
+        turn, so if writing is interrupted the previous checkpoint is still valid.
+        Receiver outputs and transmission line voltages and currents are
+        written incrementally, i.e. only the iterations since the previous
+        checkpoint. Receiver outputs that are written to file while solving
+        are not part of the checkpoint; that file is flushed instead, as are
+        any snapshots still being written in the background.
+    """
+
+    def __init__(self, filename, interval):
+        """
+        Args:
+            filename (str): Name of the checkpoint file.
+            interval (float): Wall-clock time (seconds) between checkpoints, or None to not write checkpoints.
+        """
+
+        self.filename = filename
+        self.interval = interval
+
+        # Iteration of the most recent checkpoint, and time it was written
+        self.iteration = 0
+        self.lastwrite = perf_counter()
+
+        # Add to the checkpoint file once it has been written, or resumed from; a
+        # checkpoint file left by a previous run is otherwise replaced
+        self.append = False
+
+    def state(self, G):
+        """Arrays describing the state of the solver.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            arrays (dict): Arrays keyed by dataset name.
+        """
+
+        arrays = OrderedDict()
+        for name in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+            arrays[name] = getattr(G, name)
+        if Material.maxpoles != 0:
+            for name in ('Tx', 'Ty', 'Tz'):
+                arrays[name] = getattr(G, name)
+        for pml in G.pmls:
+            for name in ('EPhi1', 'EPhi2', 'HPhi1', 'HPhi2'):
+                arrays['pmls/' + pml.ID + '/' + name] = getattr(pml, name)
+        for tlindex, tl in enumerate(G.transmissionlines):
+            arrays['tls/tl' + str(tlindex + 1) + '/voltage'] = tl.voltage
+            arrays['tls/tl' + str(tlindex + 1) + '/current'] = tl.current
+        for dftindex, dft in enumerate(G.dfts):
+            arrays['dfts/dft' + str(dftindex + 1)] = dft.dft
+
+        return arrays
+
+    def due(self):
+        """Check if the interval between checkpoints has elapsed.
+
+        Returns:
+            (bool): True if a checkpoint should be written.
+        """
+
+        return self.interval is not None and perf_counter() - self.lastwrite >= self.interval
+
+    def write(self, iteration, rxstores, G):
+        """Write a checkpoint of the state of the solver at the start of an iteration.
+
+        Args:
+            iteration (int): Iteration about to be carried out.
+            rxstores (list): RxStore class instances of output components for receivers.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        f = h5py.File(self.filename, 'a' if self.append else 'w')
+        self.append = True
+
+        if 'slot0' not in f:
+            f.attrs['gprMax'] = __version__
+            f.attrs['Title'] = G.title
+            f.attrs['Iterations'] = G.iterations
+            f.attrs['nx, ny, nz'] = (G.nx, G.ny, G.nz)
+            f.attrs['dt'] = G.dt
+            for n, rxstore in enumerate(rxstores):
+                if rxstore.dataset is None:
+                    f.create_dataset('/rxs/store' + str(n), shape=rxstore.buffer.shape, dtype=floattype)
+            for tlindex, tl in enumerate(G.transmissionlines):
+                f.create_dataset('/tls/tl' + str(tlindex + 1) + '/Vtotal', data=np.zeros(G.iterations, dtype=floattype))
+                f.create_dataset('/tls/tl' + str(tlindex + 1) + '/Itotal', data=np.zeros(G.iterations, dtype=floattype))
+            for slot in ('slot0', 'slot1'):
+                grp = f.create_group(slot)
+                grp.attrs['iteration'] = -1
+                for name, array in self.state(G).items():
+                    grp.create_dataset(name, shape=array.shape, dtype=array.dtype)
+                grp.create_dataset('tlabcs', shape=(len(G.transmissionlines), 2), dtype=floattype)
+
+        # Overwrite the slot holding the older checkpoint; it is marked as
+        # invalid until all of it has been written
+        grp = f['slot0'] if f['slot0'].attrs['iteration'] <= f['slot1'].attrs['iteration'] else f['slot1']
+        grp.attrs['iteration'] = -1
+        f.flush()
+
+        for name, array in self.state(G).items():
+            grp[name][...] = array
+        for tlindex, tl in enumerate(G.transmissionlines):
+            grp['tlabcs'][tlindex] = (tl.abcv0, tl.abcv1)
+
+        # Receiver outputs and transmission line voltages and currents since the previous checkpoint
+        if iteration > self.iteration:
+            for n, rxstore in enumerate(rxstores):
+                if rxstore.dataset is None:
+                    samples = np.s_[:, rxstore.count(self.iteration):rxstore.count(iteration), :]
+                    f['/rxs/store' + str(n)][samples] = rxstore.buffer[samples]
+                else:
+                    rxstore.flush()
+                    rxstore.dataset.file.flush()
+            for tlindex, tl in enumerate(G.transmissionlines):
+                f['/tls/tl' + str(tlindex + 1) + '/Vtotal'][self.iteration:iteration] = tl.Vtotal[self.iteration:iteration]
+                f['/tls/tl' + str(tlindex + 1) + '/Itotal'][self.iteration:iteration] = tl.Itotal[self.iteration:iteration]
+        f.flush()
+
+        grp.attrs['iteration'] = iteration
+        f.close()
+
+        self.iteration = iteration
+        self.lastwrite = perf_counter()
+
+    def iterations(self, G):
+        """Iterations of the valid checkpoints in the checkpoint file.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            iterations (list): Iterations of the valid checkpoints (empty if there is no checkpoint file).
+        """
+
+        if not os.path.isfile(self.filename):
+            return []
+
+        f = h5py.File(self.filename, 'r')
+        if f.attrs['Iterations'] != G.iterations or f.attrs['dt'] != G.dt:
+            f.close()
+            raise GeneralError('Checkpoint file {} is not of the same model as the input file'.format(self.filename))
+        iterations = [int(f[slot].attrs['iteration']) for slot in ('slot0', 'slot1') if f[slot].attrs['iteration'] >= 0]
+        f.close()
+
+        return iterations
+
+    def read(self, iteration, rxstores, G):
+        """Restore the state of the solver from a checkpoint.
+
+        Args:
+            iteration (int): Iteration of the checkpoint.
+            rxstores (list): RxStore class instances of output components for receivers.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        f = h5py.File(self.filename, 'r')
+        grp = f['slot0'] if f['slot0'].attrs['iteration'] == iteration else f['slot1']
+
+        for name, array in self.state(G).items():
+            if name not in grp or grp[name].shape != array.shape:
+                f.close()
+                raise GeneralError('Checkpoint file {} is not of the same model as the input file'.format(self.filename))
+            grp[name].read_direct(array)
+        for tlindex, tl in enumerate(G.transmissionlines):
+            tl.abcv0, tl.abcv1 = grp['tlabcs'][tlindex]
+
+        for n, rxstore in enumerate(rxstores):
+            if rxstore.dataset is None:
+                name = '/rxs/store' + str(n)
+                if name not in f or f[name].shape != rxstore.buffer.shape:
+                    f.close()
+                    raise GeneralError('Checkpoint file {} is not of the same model as the input file'.format(self.filename))
+                samples = np.s_[:, 0:rxstore.count(iteration), :]
+                rxstore.buffer[samples] = f[name][samples]
+            rxstore.resume(iteration)
+        for tlindex, tl in enumerate(G.transmissionlines):
+            tl.Vtotal[0:iteration] = f['/tls/tl' + str(tlindex + 1) + '/Vtotal'][0:iteration]
+            tl.Itotal[0:iteration] = f['/tls/tl' + str(tlindex + 1) + '/Itotal'][0:iteration]
+        f.close()
+
+        self.iteration = iteration
+        self.lastwrite = perf_counter()
+        self.append = True
@@ -20,7 +20,9 @@ import numpy as np
 cimport numpy as np
 
 # Data types:
-#   Solid and ID arrays use 32-bit integers (0 to 4294967295)
+#   Solid and ID arrays use 32-bit integers (0 to 4294967295) while the model
+#       is built, and are then narrowed to the smallest unsigned integer type
+#       that can hold the numeric IDs of all materials (idtype_t)
 #   Rigid arrays use 8-bit integers (the smallest available type to store true/false)
 #   Fractal and dispersive coefficient arrays use complex numbers (complextype) which are represented as two floats
 #   Main field arrays use floats (floattype) and complex numbers (complextype)
@@ -32,3 +34,9 @@ ctypedef np.complex64_t complextype_t
 # Double precision
 # ctypedef np.float64_t floattype_t
 # ctypedef np.complex128_t complextype_t
+
+# Solid and ID arrays
+ctypedef fused idtype_t:
+    np.uint8_t
+    np.uint16_t
+    np.uint32_t
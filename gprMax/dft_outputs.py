@@ -0,0 +1,98 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from gprMax.constants import complextype
+from gprMax.fields_outputs_ext import update_dft_outputs
+
+
+class DFTOutput(object):
+    """
+    Running discrete Fourier transforms (DFTs) of the electric and magnetic
+        field components at a set of frequencies, accumulated while the model
+        is solved at a point, or at points over a surface or volume, of the grid.
+
+    The DFT of a field component at frequency f is the sum over iterations n
+        of its values multiplied by exp(-j 2 pi f t), where t is n * dt for the
+        electric field components and (n - 0.5) * dt for the magnetic field
+        components, i.e. the time at which they are calculated.
+    """
+
+    # Field components that are transformed
+    components = ['Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz']
+
+    def __init__(self, xs=None, ys=None, zs=None, xf=None, yf=None, zf=None, dx=None, dy=None, dz=None, frequencies=None, ID=None, output=True):
+        """
+        Args:
+            xs, xf, ys, yf, zs, zf (int): Cell coordinates of the first and last points.
+            dx, dy, dz (int): Steps (in cells) between points.
+            frequencies (list): Frequencies (Hz) of the DFTs.
+            ID (str): Name of the output.
+            output (bool): Write the DFTs to the output file, i.e. False for
+                    those used by other outputs (see NTFFBox).
+        """
+
+        self.xs = xs
+        self.ys = ys
+        self.zs = zs
+        self.xf = xf
+        self.yf = yf
+        self.zf = zf
+        self.dx = dx
+        self.dy = dy
+        self.dz = dz
+        self.frequencies = np.array(frequencies, dtype=np.float64)
+        self.ID = ID
+        self.output = output
+        self.dft = None
+
+    def shape(self):
+        """Number of points in the x, y and z directions.
+
+        Returns:
+            (tuple): Number of points in each direction.
+        """
+
+        return len(range(self.xs, self.xf + 1, self.dx)), len(range(self.ys, self.yf + 1, self.dy)), len(range(self.zs, self.zf + 1, self.dz))
+
+    def initialise_arrays(self):
+        """Initialise array to accumulate the DFTs - field components, points (i, j, k), and frequencies."""
+
+        self.dft = np.zeros((len(DFTOutput.components),) + self.shape() + (len(self.frequencies),), dtype=np.complex128)
+
+    def update(self, iteration, Ex, Ey, Ez, Hx, Hy, Hz, G):
+        """Adds the contribution of the current field component values to the DFTs.
+
+        Args:
+            iteration (int): Current iteration number.
+            Ex, Ey, Ez, Hx, Hy, Hz (memory view): Current electric and magnetic field values.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        kernel = -2j * np.pi * self.frequencies * G.dt
+        update_dft_outputs(G.nthreads, self.xs, self.ys, self.zs, self.dx, self.dy, self.dz, np.exp(kernel * iteration), np.exp(kernel * (iteration - 0.5)), self.dft, Ex, Ey, Ez, Hx, Hy, Hz)
+
+    def outputs(self):
+        """DFTs of the field components.
+
+        Returns:
+            (dict): Arrays of DFTs (frequencies, and points (i, j, k)) keyed by field component.
+        """
+
+        return {component: np.moveaxis(self.dft[n], -1, 0).astype(complextype) for n, component in enumerate(DFTOutput.components)}
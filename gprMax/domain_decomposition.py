@@ -0,0 +1,324 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from copy import copy
+from copy import deepcopy
+
+import numpy as np
+
+from gprMax.exceptions import GeneralError
+from gprMax.materials import Material
+
+
+def decompose_x(nx, ntasks, pmlthickness):
+    """Splits the cells of the grid in the x direction between MPI tasks.
+
+    Args:
+        nx (int): Number of cells in the x direction.
+        ntasks (int): Number of MPI tasks.
+        pmlthickness (dict): Thickness of the PML slabs in cells.
+
+    Returns:
+        bounds (list): First cell of each subdomain, and nx.
+    """
+
+    bounds = [(task * nx) // ntasks for task in range(ntasks + 1)]
+
+    if min(bounds[task + 1] - bounds[task] for task in range(ntasks)) < 2:
+        raise GeneralError('Too many MPI tasks ({}) to decompose a grid with {} cells in the x direction. Each subdomain must have at least 2 cells.'.format(ntasks, nx))
+
+    # PML slabs in the x direction must not be split between subdomains
+    if ntasks > 1 and (bounds[1] <= pmlthickness['x0'] or bounds[-2] > nx - pmlthickness['xmax']):
+        raise GeneralError('Too many MPI tasks ({}) to decompose the grid in the x direction without splitting a PML slab between subdomains.'.format(ntasks))
+
+    return bounds
+
+
+class SubDomain(object):
+    """
+    Slab of cells (in the x direction) of the grid that is solved by one MPI
+        task when a single model is decomposed across several MPI tasks.
+
+    The subdomain owns the planes of field components from xs to xf (the
+        last subdomain also owns the plane at nx). Its arrays also hold the
+        plane before xs, i.e. a halo for the tangential magnetic field
+        components which is received from the subdomain to the left after
+        each magnetic field update, and the plane at xf, i.e. a halo for the
+        tangential electric field components which is received from the
+        subdomain to the right after each electric field update.
+    """
+
+    def __init__(self, comm, G):
+        """
+        Args:
+            comm (object): MPI communicator of the tasks solving the model.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        from mpi4py import MPI
+
+        self.comm = comm
+        self.rank = comm.Get_rank()
+        self.ntasks = comm.Get_size()
+
+        # Number of cells in the x direction of the entire grid
+        self.nx = G.nx
+
+        bounds = decompose_x(G.nx, self.ntasks, G.pmlthickness)
+        self.xs = bounds[self.rank]
+        self.xf = bounds[self.rank + 1]
+
+        # Global x index of the first plane held in the subdomain arrays
+        self.xoffset = self.xs - 1 if self.rank > 0 else 0
+
+        # Planes of field components owned by the subdomain
+        self.ownedplanes = (self.xs, self.xf + 1 if self.rank == self.ntasks - 1 else self.xf)
+
+        # Neighbouring tasks
+        self.left = self.rank - 1 if self.rank > 0 else MPI.PROC_NULL
+        self.right = self.rank + 1 if self.rank < self.ntasks - 1 else MPI.PROC_NULL
+
+        # Receivers and sources of the entire grid
+        self.rxs = []
+        self.voltagesources = []
+        self.hertziandipoles = []
+        self.magneticdipoles = []
+        self.transmissionlines = []
+        self.dfts = []
+
+        # Indices (in the lists of the entire grid) of receivers, transmission
+        # lines and DFT outputs (with any points) owned by the subdomain
+        self.rxindices = []
+        self.tlindices = []
+        self.dftindices = []
+
+    def owns(self, x):
+        """Check if a plane of field components is owned by the subdomain.
+
+        Args:
+            x (int): Global x index of the plane.
+
+        Returns:
+            (bool): True if the plane is owned by the subdomain.
+        """
+
+        return self.ownedplanes[0] <= x < self.ownedplanes[1]
+
+    def holds(self, x):
+        """Check if a plane of field components is held in the subdomain arrays (including the halos).
+
+        Args:
+            x (int): Global x index of the plane.
+
+        Returns:
+            (bool): True if the plane is held in the subdomain arrays.
+        """
+
+        return self.xoffset <= x <= self.xf
+
+    def localise(self, obj):
+        """Copy of a source or receiver with its x coordinate relative to the subdomain.
+
+        Args:
+            obj (class): Source or receiver class instance.
+
+        Returns:
+            local (class): Copy of the source or receiver.
+        """
+
+        local = copy(obj)
+        local.xcoord = obj.xcoord - self.xoffset
+
+        return local
+
+    def localise_dft(self, dft):
+        """Copy of a DFT output with only the points owned by the subdomain,
+            and x coordinates relative to the subdomain.
+
+        Args:
+            dft (class): DFTOutput class instance.
+
+        Returns:
+            local (class): Copy of the DFT output, or None if the subdomain owns none of its points.
+        """
+
+        owned = [x for x in range(dft.xs, dft.xf + 1, dft.dx) if self.owns(x)]
+        if not owned:
+            return None
+
+        local = copy(dft)
+        local.xs = owned[0] - self.xoffset
+        local.xf = owned[-1] - self.xoffset
+
+        return local
+
+    def decompose(self, G):
+        """
+        Replace the geometry arrays of the grid with those of the subdomain,
+            initialise the field, PML and dispersive material arrays of the
+            subdomain, and keep only the PMLs, sources and receivers in the
+            subdomain. The grid must have been built and the update
+            coefficients calculated, but the field, PML and dispersive
+            material arrays are not initialised for the entire grid.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        slab = np.s_[self.xoffset:self.xf + 1]
+        cellslab = np.s_[self.xoffset:self.xf]
+
+        # Geometry arrays
+        G.ID = np.ascontiguousarray(G.ID[:, slab])
+        G.solid = np.ascontiguousarray(G.solid[cellslab])
+        G.rigidE = np.ascontiguousarray(G.rigidE[:, cellslab])
+        G.rigidH = np.ascontiguousarray(G.rigidH[:, cellslab])
+
+        # Field and dispersive material arrays
+        G.nx = self.xf - self.xoffset
+        G.initialise_field_arrays()
+        if Material.maxpoles != 0:
+            G.find_dispersive_cells()
+            G.initialise_dispersive_temporary_arrays()
+
+        # PML slabs in the x direction stay whole in the first or last
+        # subdomain; the other slabs are cut to the x extent of the subdomain
+        pmls = []
+        for pml in G.pmls:
+            if pml.direction[0] == 'x':
+                if not (self.holds(pml.xs) and self.holds(pml.xf)):
+                    continue
+                pml.xs -= self.xoffset
+                pml.xf -= self.xoffset
+            else:
+                pml.xs = 0
+                pml.xf = G.nx
+                pml.nx = G.nx
+            pml.initialise_field_arrays()
+            pmls.append(pml)
+        G.pmls = pmls
+
+        # Sources are applied in every subdomain that holds them, so halos
+        # are consistent; transmission lines and receivers only in the
+        # subdomain that owns them as their outputs are gathered from it
+        self.rxs = G.rxs
+        self.voltagesources = G.voltagesources
+        self.hertziandipoles = G.hertziandipoles
+        self.magneticdipoles = G.magneticdipoles
+        self.transmissionlines = G.transmissionlines
+        self.rxindices = [n for n, rx in enumerate(self.rxs) if self.owns(rx.xcoord)]
+        self.tlindices = [n for n, tl in enumerate(self.transmissionlines) if self.owns(tl.xcoord)]
+        G.rxs = [self.localise(self.rxs[n]) for n in self.rxindices]
+        for rx in G.rxs:
+            rx.outputs = deepcopy(rx.outputs)
+        G.voltagesources = [self.localise(src) for src in self.voltagesources if self.holds(src.xcoord)]
+        G.hertziandipoles = [self.localise(src) for src in self.hertziandipoles if self.holds(src.xcoord)]
+        G.magneticdipoles = [self.localise(src) for src in self.magneticdipoles if self.holds(src.xcoord)]
+        G.transmissionlines = [self.localise(self.transmissionlines[n]) for n in self.tlindices]
+
+        # DFT outputs are split between the subdomains that own their points
+        self.dfts = G.dfts
+        localdfts = [self.localise_dft(dft) for dft in self.dfts]
+        self.dftindices = [n for n, dft in enumerate(localdfts) if dft is not None]
+        G.dfts = [localdfts[n] for n in self.dftindices]
+
+    def exchange_electric(self, G):
+        """Exchange the halo of tangential (to the x direction) electric field components.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for field in (G.Ey, G.Ez):
+            self.comm.Sendrecv(field[self.xs - self.xoffset], dest=self.left, recvbuf=field[G.nx], source=self.right)
+
+    def exchange_magnetic(self, G):
+        """Exchange the halo of tangential (to the x direction) magnetic field components.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for field in (G.Hy, G.Hz):
+            self.comm.Sendrecv(field[G.nx - 1], dest=self.right, recvbuf=field[0], source=self.left)
+
+    def gather_snapshot_fields(self, snapshot, G):
+        """
+        Gather the electric and magnetic field values required to write a
+            snapshot from the subdomains that own them (see Snapshot.stage_fields).
+
+        Args:
+            snapshot (class): Snapshot class instance.
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            fields (tuple): Copies of the electric and magnetic field values (None except on the root task).
+            origin (tuple): Global indices of the first cell of the copied fields.
+        """
+
+        origin = (max(snapshot.xs - 1, 0), max(snapshot.ys - 1, 0), max(snapshot.zs - 1, 0))
+        start = max(origin[0], self.ownedplanes[0])
+        finish = min(snapshot.xf + 1, self.ownedplanes[1])
+
+        part = None
+        if start < finish:
+            slab = np.s_[start - self.xoffset:finish - self.xoffset, origin[1]:snapshot.yf + 1, origin[2]:snapshot.zf + 1]
+            part = tuple(np.array(field[slab]) for field in (G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))
+        parts = [part for part in self.comm.gather(part, root=0) or [] if part is not None]
+
+        fields = None
+        if self.rank == 0:
+            fields = tuple(np.concatenate([part[n] for part in parts]) for n in range(6))
+
+        return fields, origin
+
+    def gather_outputs(self, G):
+        """
+        Restore the size, sources and receivers of the entire grid and gather
+            the outputs of receivers, transmission lines and DFT outputs on the root task.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        rxoutputs = {index: rx.outputs for index, rx in zip(self.rxindices, G.rxs)}
+        tloutputs = {index: (tl.Vtotal, tl.Itotal) for index, tl in zip(self.tlindices, G.transmissionlines)}
+        dftoutputs = {index: dft.dft for index, dft in zip(self.dftindices, G.dfts)}
+
+        G.nx = self.nx
+        G.rxs = self.rxs
+        G.voltagesources = self.voltagesources
+        G.hertziandipoles = self.hertziandipoles
+        G.magneticdipoles = self.magneticdipoles
+        G.transmissionlines = self.transmissionlines
+        G.dfts = self.dfts
+
+        gathered = self.comm.gather((rxoutputs, tloutputs, dftoutputs), root=0)
+        if self.rank == 0:
+            # DFTs of the points of each subdomain (in order of the subdomains in the x direction)
+            dftparts = [[] for dft in G.dfts]
+            for rxoutputs, tloutputs, dftoutputs in gathered:
+                for index, outputs in rxoutputs.items():
+                    G.rxs[index].outputs = outputs
+                for index, (Vtotal, Itotal) in tloutputs.items():
+                    G.transmissionlines[index].Vtotal = Vtotal
+                    G.transmissionlines[index].Itotal = Itotal
+                for index, dft in dftoutputs.items():
+                    dftparts[index].append(dft)
+            for dft, parts in zip(G.dfts, dftparts):
+                dft.dft = np.concatenate(parts, axis=1)
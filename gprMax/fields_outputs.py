@@ -23,30 +23,27 @@ import h5py
 from gprMax._version import __version__
 
 
-def store_outputs(iteration, Ex, Ey, Ez, Hx, Hy, Hz, G):
-    """Stores field component values for every receiver and transmission line.
+def store_outputs(iteration, rxstores, Ex, Ey, Ez, Hx, Hy, Hz, G):
+    """Stores field component values for every receiver and transmission line,
+        and adds them to any running discrete Fourier transforms.
 
     Args:
         iteration (int): Current iteration number.
+        rxstores (list): RxStore class instances to store output components for receivers.
         Ex, Ey, Ez, Hx, Hy, Hz (memory view): Current electric and magnetic field values.
         G (class): Grid class instance - holds essential parameters describing the model.
     """
 
-    for rx in G.rxs:
-        for output in rx.outputs:
-            # Store electric or magnetic field components
-            if 'I' not in output:
-                field = locals()[output]
-                rx.outputs[output][iteration] = field[rx.xcoord, rx.ycoord, rx.zcoord]
-            # Store current component
-            else:
-                func = globals()[output]
-                rx.outputs[output][iteration] = func(rx.xcoord, rx.ycoord, rx.zcoord, Hx, Hy, Hz, G)
+    for rxstore in rxstores:
+        rxstore.store(iteration, Ex, Ey, Ez, Hx, Hy, Hz, G)
 
     for tl in G.transmissionlines:
         tl.Vtotal[iteration] = tl.voltage[tl.antpos]
         tl.Itotal[iteration] = tl.current[tl.antpos]
 
+    for dft in G.dfts:
+        dft.update(iteration, Ex, Ey, Ez, Hx, Hy, Hz, G)
+
 
 kernel_template_store_outputs = Template("""
 
@@ -89,13 +86,14 @@ __global__ void store_outputs(int NRX, int iteration, const int* __restrict__ rx
 """)
 
 
-def write_hdf5_outputfile(outputfile, Ex, Ey, Ez, Hx, Hy, Hz, G):
+def write_hdf5_outputfile(outputfile, Ex, Ey, Ez, Hx, Hy, Hz, G, rxstores=()):
     """Write an output file in HDF5 format.
 
     Args:
         outputfile (str): Name of the output file.
         Ex, Ey, Ez, Hx, Hy, Hz (memory view): Current electric and magnetic field values.
         G (class): Grid class instance - holds essential parameters describing the model.
+        rxstores (list): RxStore class instances of receivers whose output components were written to file while solving.
     """
 
     f = h5py.File(outputfile, 'w')
@@ -138,6 +136,126 @@ def write_hdf5_outputfile(outputfile, Ex, Ey, Ez, Hx, Hy, Hz, G):
         if rx.ID:
             grp.attrs['Name'] = rx.ID
         grp.attrs['Position'] = (rx.xcoord * G.dx, rx.ycoord * G.dy, rx.zcoord * G.dz)
+        grp.attrs['Sampling'] = (rx.sampling.start, rx.sampling.stop, rx.sampling.step)
+
+        for output in rx.outputs:
+            if rx.outputs[output] is not None:
+                f['/rxs/rx' + str(rxindex + 1) + '/' + output] = rx.outputs[output]
+
+    # Output components of receivers that were written to file while solving
+    for rxstore in rxstores:
+        rxstore.write_hdf5(f)
+
+    # Create group, add positional data and frequencies, and write arrays of DFTs
+    for dftindex, dft in enumerate([dft for dft in G.dfts if dft.output]):
+        grp = f.create_group('/dfts/dft' + str(dftindex + 1))
+        write_hdf5_dft_attrs(grp, dft, G)
+        for component, output in dft.outputs().items():
+            grp[component] = output
+
+    # Create group, add positional data, angles and frequencies, and write far-field patterns of near-to-far-field transformations
+    for ntffindex, ntff in enumerate(G.ntffboxes):
+        grp = f.create_group('/ntffs/ntff' + str(ntffindex + 1))
+        write_hdf5_ntff_attrs(grp, ntff, G)
+        outputs, power = ntff.outputs(G.dfts, G)
+        for name, output in outputs.items():
+            grp[name] = output
+        grp['Power'] = power
+
+
+def write_hdf5_dft_attrs(grp, dft, G):
+    """Write the name, positional data and frequencies of a DFT output to a group of an output file.
+
+    Args:
+        grp (object): HDF5 group of the DFT output.
+        dft (class): DFTOutput class instance.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    grp.attrs['Name'] = dft.ID
+    grp.attrs['Start'] = (dft.xs * G.dx, dft.ys * G.dy, dft.zs * G.dz)
+    grp.attrs['Finish'] = (dft.xf * G.dx, dft.yf * G.dy, dft.zf * G.dz)
+    grp.attrs['Steps'] = (dft.dx * G.dx, dft.dy * G.dy, dft.dz * G.dz)
+    grp.attrs['Frequencies'] = dft.frequencies
+
 
+def write_hdf5_ntff_attrs(grp, ntff, G):
+    """Write the name, positional data, angles and frequencies of a near-to-far-field transformation to a group of an output file.
+
+    Args:
+        grp (object): HDF5 group of the near-to-far-field transformation.
+        ntff (class): NTFFBox class instance.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    grp.attrs['Name'] = ntff.ID
+    grp.attrs['Start'] = (ntff.start[0] * G.dx, ntff.start[1] * G.dy, ntff.start[2] * G.dz)
+    grp.attrs['Finish'] = (ntff.finish[0] * G.dx, ntff.finish[1] * G.dy, ntff.finish[2] * G.dz)
+    grp.attrs['Origin'] = tuple((start + finish) / 2 for start, finish in zip(grp.attrs['Start'], grp.attrs['Finish']))
+    grp.attrs['Frequencies'] = ntff.frequencies
+    grp.attrs['Theta'] = ntff.theta
+    grp.attrs['Phi'] = ntff.phi
+
+
+def write_hdf5_merged_outputfile(outputfile, trace, ntraces, rxs, transmissionlines, dfts, ntffboxes, G):
+    """Write the outputs of a model, i.e. a trace (A-scan) of a B-scan, to an
+        output file of merged traces in HDF5 format (as tools/outputfiles_merge.py).
+
+    Args:
+        outputfile (str): Name of the output file.
+        trace (int): Index of the trace.
+        ntraces (int): Number of traces in the output file.
+        rxs (list): Receivers of the model.
+        transmissionlines (list): Transmission lines of the model.
+        dfts (list): DFT outputs of the model.
+        ntffboxes (list): Near-to-far-field transformations of the model.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    # New file for the first trace
+    f = h5py.File(outputfile, 'w' if trace == 0 else 'a')
+    if trace == 0:
+        f.attrs['Title'] = G.title
+        f.attrs['gprMax'] = __version__
+        f.attrs['Iterations'] = G.iterations
+        f.attrs['dt'] = G.dt
+        f.attrs['nrx'] = len(rxs)
+        for rxindex, rx in enumerate(rxs):
+            grp = f.create_group('/rxs/rx' + str(rxindex + 1))
+            if rx.ID:
+                grp.attrs['Name'] = rx.ID
+            grp.attrs['Sampling'] = (rx.sampling.start, rx.sampling.stop, rx.sampling.step)
+            for output in rx.outputs:
+                grp.create_dataset(output, (len(rx.outputs[output]), ntraces), dtype=rx.outputs[output].dtype)
+        for tlindex, tl in enumerate(transmissionlines):
+            grp = f.create_group('/tls/tl' + str(tlindex + 1))
+            for output in ('Vinc', 'Iinc', 'Vtotal', 'Itotal'):
+                grp.create_dataset(output, (G.iterations, ntraces), dtype=getattr(tl, output).dtype)
+        for dftindex, dft in enumerate([dft for dft in dfts if dft.output]):
+            grp = f.create_group('/dfts/dft' + str(dftindex + 1))
+            write_hdf5_dft_attrs(grp, dft, G)
+            for component, output in dft.outputs().items():
+                grp.create_dataset(component, output.shape + (ntraces,), dtype=output.dtype)
+        for ntffindex, ntff in enumerate(ntffboxes):
+            grp = f.create_group('/ntffs/ntff' + str(ntffindex + 1))
+            write_hdf5_ntff_attrs(grp, ntff, G)
+
+    for rxindex, rx in enumerate(rxs):
         for output in rx.outputs:
-            f['/rxs/rx' + str(rxindex + 1) + '/' + output] = rx.outputs[output]
+            f['/rxs/rx' + str(rxindex + 1) + '/' + output][:, trace] = rx.outputs[output]
+    for tlindex, tl in enumerate(transmissionlines):
+        for output in ('Vinc', 'Iinc', 'Vtotal', 'Itotal'):
+            f['/tls/tl' + str(tlindex + 1) + '/' + output][:, trace] = getattr(tl, output)
+    for dftindex, dft in enumerate([dft for dft in dfts if dft.output]):
+        for component, output in dft.outputs().items():
+            f['/dfts/dft' + str(dftindex + 1) + '/' + component][..., trace] = output
+    for ntffindex, ntff in enumerate(ntffboxes):
+        grp = f['/ntffs/ntff' + str(ntffindex + 1)]
+        outputs, power = ntff.outputs(dfts, G)
+        outputs['Power'] = power
+        for name, output in outputs.items():
+            if name not in grp:
+                grp.create_dataset(name, output.shape + (ntraces,), dtype=output.dtype)
+            grp[name][..., trace] = output
+
+    f.close()
@@ -0,0 +1,158 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+from cython.parallel import prange
+
+from gprMax.constants cimport floattype_t
+
+
+cpdef void store_rx_outputs(
+                    int sample,
+                    int nrx,
+                    int ncomponents,
+                    double dx,
+                    double dy,
+                    double dz,
+                    int[:, ::1] rxcoords,
+                    int[::1] rxcomponents,
+                    floattype_t[:, :, ::1] rxs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function stores field component values for every receiver.
+
+    Args:
+        sample (int): Column of the array to store output components in
+        nrx (int): Number of receivers
+        ncomponents (int): Number of output components stored
+        dx, dy, dz (double): Spatial discretisation
+        rxcoords (memoryview): Access to array of receiver coordinates
+        rxcomponents (memoryview): Access to array of indices of output components (Ex, Ey, Ez, Hx, Hy, Hz, Ix, Iy, Iz)
+        rxs (memoryview): Access to array to store output components for receivers - rows are output components; columns are samples; pages are receivers
+        E, H (memoryviews): Access to field component arrays
+    """
+
+    cdef Py_ssize_t n, rx, i, j, k
+    cdef int component
+
+    for rx in range(nrx):
+        i = rxcoords[rx, 0]
+        j = rxcoords[rx, 1]
+        k = rxcoords[rx, 2]
+        for n in range(ncomponents):
+            component = rxcomponents[n]
+            # Receivers outside the field arrays, i.e. outside the plane that
+            # is solved in 2D models, record zeros
+            if i >= Ex.shape[0] or j >= Ex.shape[1] or k >= Ex.shape[2]:
+                rxs[n, sample, rx] = 0
+            elif component == 0:
+                rxs[n, sample, rx] = Ex[i, j, k]
+            elif component == 1:
+                rxs[n, sample, rx] = Ey[i, j, k]
+            elif component == 2:
+                rxs[n, sample, rx] = Ez[i, j, k]
+            elif component == 3:
+                rxs[n, sample, rx] = Hx[i, j, k]
+            elif component == 4:
+                rxs[n, sample, rx] = Hy[i, j, k]
+            elif component == 5:
+                rxs[n, sample, rx] = Hz[i, j, k]
+            # Current components
+            elif component == 6:
+                if j == 0 or k == 0:
+                    rxs[n, sample, rx] = 0
+                else:
+                    rxs[n, sample, rx] = dy * (Hy[i, j, k - 1] - Hy[i, j, k]) + dz * (Hz[i, j, k] - Hz[i, j - 1, k])
+            elif component == 7:
+                if i == 0 or k == 0:
+                    rxs[n, sample, rx] = 0
+                else:
+                    rxs[n, sample, rx] = dx * (Hx[i, j, k] - Hx[i, j, k - 1]) + dz * (Hz[i - 1, j, k] - Hz[i, j, k])
+            elif component == 8:
+                if i == 0 or j == 0:
+                    rxs[n, sample, rx] = 0
+                else:
+                    rxs[n, sample, rx] = dx * (Hx[i, j - 1, k] - Hx[i, j, k]) + dy * (Hy[i, j, k] - Hy[i - 1, j, k])
+
+
+cpdef void update_dft_outputs(
+                    int nthreads,
+                    int xs,
+                    int ys,
+                    int zs,
+                    int dx,
+                    int dy,
+                    int dz,
+                    double complex[::1] phaseE,
+                    double complex[::1] phaseH,
+                    double complex[:, :, :, :, ::1] dft,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function adds the contribution of the current field component
+        values to running discrete Fourier transforms at points of the grid.
+
+    Args:
+        nthreads (int): Number of threads to use
+        xs, ys, zs (int): Cell coordinates of the first point
+        dx, dy, dz (int): Steps (in cells) between points
+        phaseE, phaseH (memoryviews): Access to arrays of DFT kernel values at each frequency for the electric and magnetic field components
+        dft (memoryview): Access to array of DFTs - field components (Ex, Ey, Ez, Hx, Hy, Hz), points (i, j, k), and frequencies
+        E, H (memoryviews): Access to field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, f, ii, jj, kk
+    cdef int nx = dft.shape[1]
+    cdef int ny = dft.shape[2]
+    cdef int nz = dft.shape[3]
+    cdef int nfreqs = dft.shape[4]
+    cdef double ex, ey, ez, hx, hy, hz
+
+    for i in prange(nx, nogil=True, schedule='static', num_threads=nthreads):
+        ii = xs + i * dx
+        for j in range(ny):
+            jj = ys + j * dy
+            for k in range(nz):
+                kk = zs + k * dz
+                # Points outside the field arrays, i.e. outside the plane that
+                # is solved in 2D models, have field values of zero
+                if ii >= Ex.shape[0] or jj >= Ex.shape[1] or kk >= Ex.shape[2]:
+                    continue
+                ex = Ex[ii, jj, kk]
+                ey = Ey[ii, jj, kk]
+                ez = Ez[ii, jj, kk]
+                hx = Hx[ii, jj, kk]
+                hy = Hy[ii, jj, kk]
+                hz = Hz[ii, jj, kk]
+                for f in range(nfreqs):
+                    dft[0, i, j, k, f] = dft[0, i, j, k, f] + ex * phaseE[f]
+                    dft[1, i, j, k, f] = dft[1, i, j, k, f] + ey * phaseE[f]
+                    dft[2, i, j, k, f] = dft[2, i, j, k, f] + ez * phaseE[f]
+                    dft[3, i, j, k, f] = dft[3, i, j, k, f] + hx * phaseH[f]
+                    dft[4, i, j, k, f] = dft[4, i, j, k, f] + hy * phaseH[f]
+                    dft[5, i, j, k, f] = dft[5, i, j, k, f] + hz * phaseH[f]
@@ -22,6 +22,7 @@ from cython.parallel import prange
 
 from gprMax.constants cimport floattype_t
 from gprMax.constants cimport complextype_t
+from gprMax.constants cimport idtype_t
 
 
 ###############################################
@@ -33,7 +34,7 @@ cpdef void update_electric(
                     int nz,
                     int nthreads,
                     floattype_t[:, ::1] updatecoeffsE,
-                    np.uint32_t[:, :, :, ::1] ID,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
@@ -52,29 +53,30 @@ cpdef void update_electric(
     cdef Py_ssize_t i, j, k
     cdef int materialEx, materialEy, materialEz
 
+    # 2D - field components are only updated in the plane at the start of the
+    # invariant direction (the only one stored), and in parallel over rows
+    # of cells in the plane
+
     # 2D - Ex component
     if nx == 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    materialEx = ID[0, i, j, k]
-                    Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+        for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(1, nz):
+                materialEx = ID[0, 0, j, k]
+                Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
 
     # 2D - Ey component
     elif ny == 1:
         for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    materialEy = ID[1, i, j, k]
-                    Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+            for k in range(1, nz):
+                materialEy = ID[1, i, 0, k]
+                Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
 
     # 2D - Ez component
     elif nz == 1:
         for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
             for j in range(1, ny):
-                for k in range(0, nz):
-                    materialEz = ID[2, i, j, k]
-                    Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+                materialEz = ID[2, i, j, 0]
+                Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
 
     # 3D
     else:
@@ -110,142 +112,198 @@ cpdef void update_electric(
 #################################################
 # Electric field updates - dispersive materials #
 #################################################
-cpdef void update_electric_dispersive_multipole_A(
-                    int nx,
-                    int ny,
-                    int nz,
+cpdef void update_electric_dispersive_A(
                     int nthreads,
                     int maxpoles,
-                    floattype_t[:, ::1] updatecoeffsE,
                     complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    idtype_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] cellsx,
+                    np.int64_t[::1] cellsy,
+                    np.int64_t[::1] cellsz,
+                    complextype_t[:, ::1] Tx,
+                    complextype_t[:, ::1] Ty,
+                    complextype_t[:, ::1] Tz,
+                    floattype_t[::1] phix,
+                    floattype_t[::1] phiy,
+                    floattype_t[::1] phiz,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
-                    floattype_t[:, :, ::1] Ez,
-                    floattype_t[:, :, ::1] Hx,
-                    floattype_t[:, :, ::1] Hy,
-                    floattype_t[:, :, ::1] Hz
+                    floattype_t[:, :, ::1] Ez
             ):
-    """This function updates the electric field components when dispersive materials (with multiple poles) are present.
+    """This function updates the temporary dispersive material arrays, and calculates the contribution (phi) of the poles to the
+        electric field components, of the cells in dispersive materials. It must be called before the electric field components are updated.
 
     Args:
-        nx, ny, nz (int): Grid size in cells
-        maxpoles (int): Maximum number of poles
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (into flattened field arrays) of cells in dispersive materials
+        T, phi, E (memoryviews): Access to temporary, pole contribution and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k, pole
+    cdef Py_ssize_t n, pole
+    cdef np.int64_t cell
     cdef int material
     cdef float phi = 0
+    cdef idtype_t* IDEx = &ID[0, 0, 0, 0]
+    cdef idtype_t* IDEy = &ID[1, 0, 0, 0]
+    cdef idtype_t* IDEz = &ID[2, 0, 0, 0]
+    cdef floattype_t* ex = &Ex[0, 0, 0]
+    cdef floattype_t* ey = &Ey[0, 0, 0]
+    cdef floattype_t* ez = &Ez[0, 0, 0]
 
     # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tx[pole, i, j, k].real
-                        Tx[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tx[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
-                    Ex[i, j, k] = updatecoeffsE[material, 0] * Ex[i, j, k] + updatecoeffsE[material, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[material, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[material, 4] * phi
+    for n in prange(0, cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsx[n]
+        material = IDEx[cell]
+        phi = 0
+        for pole in range(maxpoles):
+            phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tx[n, pole].real
+            Tx[n, pole] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tx[n, pole] + updatecoeffsdispersive[material, 2 + (pole * 3)] * ex[cell]
+        phix[n] = phi
 
     # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Ty[pole, i, j, k].real
-                        Ty[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Ty[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
-                    Ey[i, j, k] = updatecoeffsE[material, 0] * Ey[i, j, k] + updatecoeffsE[material, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[material, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[material, 4] * phi
+    for n in prange(0, cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsy[n]
+        material = IDEy[cell]
+        phi = 0
+        for pole in range(maxpoles):
+            phi = phi + updatecoeffsdispersive[material, pole * 3].real * Ty[n, pole].real
+            Ty[n, pole] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Ty[n, pole] + updatecoeffsdispersive[material, 2 + (pole * 3)] * ey[cell]
+        phiy[n] = phi
 
     # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tz[pole, i, j, k].real
-                        Tz[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tz[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
-                    Ez[i, j, k] = updatecoeffsE[material, 0] * Ez[i, j, k] + updatecoeffsE[material, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[material, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[material, 4] * phi
+    for n in prange(0, cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsz[n]
+        material = IDEz[cell]
+        phi = 0
+        for pole in range(maxpoles):
+            phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tz[n, pole].real
+            Tz[n, pole] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tz[n, pole] + updatecoeffsdispersive[material, 2 + (pole * 3)] * ez[cell]
+        phiz[n] = phi
 
 
+cpdef void update_electric_dispersive_phi(
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] cellsx,
+                    np.int64_t[::1] cellsy,
+                    np.int64_t[::1] cellsz,
+                    floattype_t[::1] phix,
+                    floattype_t[::1] phiy,
+                    floattype_t[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function adds the contribution (phi) of the poles to the electric field components of the cells in dispersive materials.
+        It must be called after the electric field components have been updated (as for non-dispersive materials).
 
-cpdef void update_electric_dispersive_multipole_B(
-                    int nx,
-                    int ny,
-                    int nz,
+    Args:
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (into flattened field arrays) of cells in dispersive materials
+        phi, E (memoryviews): Access to pole contribution and field component arrays
+    """
+
+    cdef Py_ssize_t n
+    cdef np.int64_t cell
+    cdef int material
+    cdef idtype_t* IDEx = &ID[0, 0, 0, 0]
+    cdef idtype_t* IDEy = &ID[1, 0, 0, 0]
+    cdef idtype_t* IDEz = &ID[2, 0, 0, 0]
+    cdef floattype_t* ex = &Ex[0, 0, 0]
+    cdef floattype_t* ey = &Ey[0, 0, 0]
+    cdef floattype_t* ez = &Ez[0, 0, 0]
+
+    # Ex component
+    for n in prange(0, cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsx[n]
+        material = IDEx[cell]
+        ex[cell] = ex[cell] - updatecoeffsE[material, 4] * phix[n]
+
+    # Ey component
+    for n in prange(0, cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsy[n]
+        material = IDEy[cell]
+        ey[cell] = ey[cell] - updatecoeffsE[material, 4] * phiy[n]
+
+    # Ez component
+    for n in prange(0, cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsz[n]
+        material = IDEz[cell]
+        ez[cell] = ez[cell] - updatecoeffsE[material, 4] * phiz[n]
+
+
+cpdef void update_electric_dispersive_B(
                     int nthreads,
                     int maxpoles,
                     complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    idtype_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] cellsx,
+                    np.int64_t[::1] cellsy,
+                    np.int64_t[::1] cellsz,
+                    complextype_t[:, ::1] Tx,
+                    complextype_t[:, ::1] Ty,
+                    complextype_t[:, ::1] Tz,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez
             ):
-    """This function updates a temporary dispersive material array when disperisive materials (with multiple poles) are present.
+    """This function updates the temporary dispersive material arrays, of the cells in dispersive materials, with the updated
+        electric field components.
 
     Args:
-        nx, ny, nz (int): Grid size in cells
-        maxpoles (int): Maximum number of poles
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (into flattened field arrays) of cells in dispersive materials
+        T, E (memoryviews): Access to temporary and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k, pole
+    cdef Py_ssize_t n, pole
+    cdef np.int64_t cell
     cdef int material
+    cdef idtype_t* IDEx = &ID[0, 0, 0, 0]
+    cdef idtype_t* IDEy = &ID[1, 0, 0, 0]
+    cdef idtype_t* IDEz = &ID[2, 0, 0, 0]
+    cdef floattype_t* ex = &Ex[0, 0, 0]
+    cdef floattype_t* ey = &Ey[0, 0, 0]
+    cdef floattype_t* ez = &Ez[0, 0, 0]
 
     # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    for pole in range(maxpoles):
-                        Tx[pole, i, j, k] = Tx[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+    for n in prange(0, cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsx[n]
+        material = IDEx[cell]
+        for pole in range(maxpoles):
+            Tx[n, pole] = Tx[n, pole] - updatecoeffsdispersive[material, 2 + (pole * 3)] * ex[cell]
 
     # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    for pole in range(maxpoles):
-                        Ty[pole, i, j, k] = Ty[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+    for n in prange(0, cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsy[n]
+        material = IDEy[cell]
+        for pole in range(maxpoles):
+            Ty[n, pole] = Ty[n, pole] - updatecoeffsdispersive[material, 2 + (pole * 3)] * ey[cell]
 
     # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    for pole in range(maxpoles):
-                        Tz[pole, i, j, k] = Tz[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+    for n in prange(0, cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cellsz[n]
+        material = IDEz[cell]
+        for pole in range(maxpoles):
+            Tz[n, pole] = Tz[n, pole] - updatecoeffsdispersive[material, 2 + (pole * 3)] * ez[cell]
 
 
-cpdef void update_electric_dispersive_1pole_A(
+##########################
+# Magnetic field updates #
+##########################
+cpdef void update_magnetic(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    floattype_t[:, ::1] updatecoeffsE,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
@@ -253,109 +311,356 @@ cpdef void update_electric_dispersive_1pole_A(
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
             ):
-    """This function updates the electric field components when dispersive materials (with 1 pole) are present.
+    """This function updates the magnetic field components.
 
     Args:
         nx, ny, nz (int): Grid size in cells
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
     cdef Py_ssize_t i, j, k
-    cdef int material
-    cdef float phi = 0
+    cdef int materialHx, materialHy, materialHz
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Tx[0, i, j, k].real
-                    Tx[0, i, j, k] = updatecoeffsdispersive[material, 1] * Tx[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ex[i, j, k]
-                    Ex[i, j, k] = updatecoeffsE[material, 0] * Ex[i, j, k] + updatecoeffsE[material, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[material, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[material, 4] * phi
+    # 2D - field components are only updated in the plane at the start of the
+    # invariant direction (the only one stored), and in parallel over rows
+    # of cells in the plane. Only the electric field component normal to the
+    # plane is non-zero, so the others do not contribute to the updates.
 
-    # Ey component
-    if nx != 1 or nz != 1:
+    # 2D - Hy and Hz components
+    if nx == 1:
+        for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(0, nz):
+                materialHy = ID[4, 0, j, k]
+                Hy[0, j, k] = updatecoeffsH[materialHy, 0] * Hy[0, j, k] - updatecoeffsH[materialHy, 3] * (Ex[0, j, k + 1] - Ex[0, j, k])
+        for j in prange(0, ny, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(1, nz):
+                materialHz = ID[5, 0, j, k]
+                Hz[0, j, k] = updatecoeffsH[materialHz, 0] * Hz[0, j, k] + updatecoeffsH[materialHz, 2] * (Ex[0, j + 1, k] - Ex[0, j, k])
+
+    # 2D - Hx and Hz components
+    elif ny == 1:
         for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Ty[0, i, j, k].real
-                    Ty[0, i, j, k] = updatecoeffsdispersive[material, 1] * Ty[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ey[i, j, k]
-                    Ey[i, j, k] = updatecoeffsE[material, 0] * Ey[i, j, k] + updatecoeffsE[material, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[material, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[material, 4] * phi
+            for k in range(0, nz):
+                materialHx = ID[3, i, 0, k]
+                Hx[i, 0, k] = updatecoeffsH[materialHx, 0] * Hx[i, 0, k] + updatecoeffsH[materialHx, 3] * (Ey[i, 0, k + 1] - Ey[i, 0, k])
+        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(1, nz):
+                materialHz = ID[5, i, 0, k]
+                Hz[i, 0, k] = updatecoeffsH[materialHz, 0] * Hz[i, 0, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, 0, k] - Ey[i, 0, k])
 
-    # Ez component
-    if nx != 1 or ny != 1:
+    # 2D - Hx and Hy components
+    elif nz == 1:
         for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+            for j in range(0, ny):
+                materialHx = ID[3, i, j, 0]
+                Hx[i, j, 0] = updatecoeffsH[materialHx, 0] * Hx[i, j, 0] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, 0] - Ez[i, j, 0])
+        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
             for j in range(1, ny):
+                materialHy = ID[4, i, j, 0]
+                Hy[i, j, 0] = updatecoeffsH[materialHy, 0] * Hy[i, j, 0] + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, 0] - Ez[i, j, 0])
+
+    # 3D
+    else:
+        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+            for j in range(0, ny):
                 for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Tz[0, i, j, k].real
-                    Tz[0, i, j, k] = updatecoeffsdispersive[material, 1] * Tz[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ez[i, j, k]
-                    Ez[i, j, k] = updatecoeffsE[material, 0] * Ez[i, j, k] + updatecoeffsE[material, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[material, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[material, 4] * phi
+                    materialHx = ID[3, i + 1, j, k]
+                    materialHy = ID[4, i, j + 1, k]
+                    materialHz = ID[5, i, j, k + 1]
+                    Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+                    Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                    Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
 
 
-cpdef void update_electric_dispersive_1pole_B(
+#############################################
+# Fused magnetic and electric field updates #
+#############################################
+cpdef void update_fields_fused(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    int tilex,
+                    int tiley,
+                    int bxs,
+                    int bxf,
+                    int bys,
+                    int byf,
+                    int bzs,
+                    int bzf,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
-                    floattype_t[:, :, ::1] Ez
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
             ):
-    """This function updates a temporary dispersive material array when disperisive materials (with 1 pole) are present.
+    """This function updates the magnetic field components over the whole grid
+        and the electric field components inside a box in a single sweep. The
+        grid is split into tiles (in x and y, full extent in z) so that the
+        electric field update of a tile re-uses the magnetic field values just
+        calculated for it while they are still in cache. Electric field values
+        on the first x-plane and y-row of a tile depend on magnetic field
+        values from neighbouring tiles so they are updated in a second pass.
 
     Args:
         nx, ny, nz (int): Grid size in cells
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        tilex, tiley (int): Size of tiles in cells
+        bxs, bxf, bys, byf, bzs, bzf (int): Extent of box in which to update electric field components
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, t, i0, i1, j0, j1
+    cdef int ntilesx, ntilesy, materialEx, materialEy, materialEz, materialHx, materialHy, materialHz
+
+    ntilesx = (nx + tilex) // tilex
+    ntilesy = (ny + tiley) // tiley
+
+    # Magnetic field components everywhere and electric field components in the tile interior
+    for t in prange(0, ntilesx * ntilesy, nogil=True, schedule='dynamic', num_threads=nthreads):
+        i0 = (t // ntilesy) * tilex
+        i1 = min(i0 + tilex, nx + 1)
+        j0 = (t % ntilesy) * tiley
+        j1 = min(j0 + tiley, ny + 1)
+
+        for i in range(i0, i1):
+            for j in range(j0, j1):
+                if i >= 1 and j < ny:
+                    for k in range(0, nz):
+                        materialHx = ID[3, i, j, k]
+                        Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+                if i < nx and j >= 1:
+                    for k in range(0, nz):
+                        materialHy = ID[4, i, j, k]
+                        Hy[i, j, k] = updatecoeffsH[materialHy, 0] * Hy[i, j, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+                if i < nx and j < ny:
+                    for k in range(1, nz + 1):
+                        materialHz = ID[5, i, j, k]
+                        Hz[i, j, k] = updatecoeffsH[materialHz, 0] * Hz[i, j, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
+
+        for i in range(max(i0 + 1, bxs), min(i1, bxf)):
+            for j in range(max(j0 + 1, bys), min(j1, byf)):
+                for k in range(bzs, bzf):
+                    materialEx = ID[0, i, j, k]
+                    materialEy = ID[1, i, j, k]
+                    materialEz = ID[2, i, j, k]
+                    Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                    Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                    Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+    # Electric field components on the first x-plane and y-row of every tile
+    for t in prange(0, ntilesx * ntilesy, nogil=True, schedule='static', num_threads=nthreads):
+        i0 = (t // ntilesy) * tilex
+        i1 = min(i0 + tilex, nx + 1)
+        j0 = (t % ntilesy) * tiley
+        j1 = min(j0 + tiley, ny + 1)
+
+        for i in range(max(i0, bxs), min(i1, bxf)):
+            for j in range(max(j0, bys), min(j1, byf)):
+                if i == i0 or j == j0:
+                    for k in range(bzs, bzf):
+                        materialEx = ID[0, i, j, k]
+                        materialEy = ID[1, i, j, k]
+                        materialEz = ID[2, i, j, k]
+                        Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                        Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                        Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+
+cpdef void update_electric_outside_box(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    int bxs,
+                    int bxf,
+                    int bys,
+                    int byf,
+                    int bzs,
+                    int bzf,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the electric field components (3D) outside of the
+        box already updated by update_fields_fused.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        bxs, bxf, bys, byf, bzs, bzf (int): Extent of box to exclude from update
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
     cdef Py_ssize_t i, j, k
-    cdef int material
+    cdef int materialEx, materialEy, materialEz, ks, kf
+
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            if i >= bxs and i < bxf and j >= bys and j < byf:
+                ks = bzs
+                kf = bzf
+            else:
+                ks = nz
+                kf = nz
+            for k in range(1, nz):
+                if k < ks or k >= kf:
+                    materialEx = ID[0, i, j, k]
+                    materialEy = ID[1, i, j, k]
+                    materialEz = ID[2, i, j, k]
+                    Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                    Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                    Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    Tx[0, i, j, k] = Tx[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
 
-    # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    Ty[0, i, j, k] = Ty[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ey[i, j, k]
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
 
-    # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    Tz[0, i, j, k] = Tz[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
 
 
-##########################
-# Magnetic field updates #
-##########################
-cpdef void update_magnetic(
+cpdef void update_electric_cells(
+                    int ncells,
+                    int[:, ::1] cells,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the electric field components (3D) at a list of cells.
+
+    Args:
+        ncells (int): Number of cells
+        cells (memoryview): Access to array of cell coordinates
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t n, i, j, k
+    cdef int materialEx, materialEy, materialEz
+
+    for n in range(ncells):
+        i = cells[n, 0]
+        j = cells[n, 1]
+        k = cells[n, 2]
+        materialEx = ID[0, i, j, k]
+        materialEy = ID[1, i, j, k]
+        materialEz = ID[2, i, j, k]
+        Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+        Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+        Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+
+#########################################################
+# Electric and magnetic field updates - bricks of cells #
+#########################################################
+cpdef void update_electric_bricks(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
+                    int nbricks,
+                    int[:, ::1] bricks,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the electric field components (3D) over bricks
+        of cells. Bricks where every electric field component is of a single
+        material are updated with scalar update coefficients (no look up of
+        the ID array), other bricks are updated as standard.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        nbricks (int): Number of bricks
+        bricks (memoryview): Access to array of bricks (xs, xf, ys, yf, zs, zf, material), material is -1 if the brick is not homogeneous
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t b, i, j, k
+    cdef int material, materialEx, materialEy, materialEz
+    cdef floattype_t c0, c1, c2, c3
+
+    for b in prange(0, nbricks, nogil=True, schedule='dynamic', num_threads=nthreads):
+        material = bricks[b, 6]
+        if material >= 0:
+            c0 = updatecoeffsE[material, 0]
+            c1 = updatecoeffsE[material, 1]
+            c2 = updatecoeffsE[material, 2]
+            c3 = updatecoeffsE[material, 3]
+            for i in range(bricks[b, 0], bricks[b, 1]):
+                for j in range(bricks[b, 2], bricks[b, 3]):
+                    for k in range(bricks[b, 4], bricks[b, 5]):
+                        Ex[i, j, k] = c0 * Ex[i, j, k] + c2 * (Hz[i, j, k] - Hz[i, j - 1, k]) - c3 * (Hy[i, j, k] - Hy[i, j, k - 1])
+                        Ey[i, j, k] = c0 * Ey[i, j, k] + c3 * (Hx[i, j, k] - Hx[i, j, k - 1]) - c1 * (Hz[i, j, k] - Hz[i - 1, j, k])
+                        Ez[i, j, k] = c0 * Ez[i, j, k] + c1 * (Hy[i, j, k] - Hy[i - 1, j, k]) - c2 * (Hx[i, j, k] - Hx[i, j - 1, k])
+        else:
+            for i in range(bricks[b, 0], bricks[b, 1]):
+                for j in range(bricks[b, 2], bricks[b, 3]):
+                    for k in range(bricks[b, 4], bricks[b, 5]):
+                        materialEx = ID[0, i, j, k]
+                        materialEy = ID[1, i, j, k]
+                        materialEz = ID[2, i, j, k]
+                        Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                        Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                        Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
+
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
+
+cpdef void update_magnetic_bricks(
+                    int nthreads,
+                    int nbricks,
+                    int[:, ::1] bricks,
                     floattype_t[:, ::1] updatecoeffsH,
-                    np.uint32_t[:, :, :, ::1] ID,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
@@ -363,50 +668,150 @@ cpdef void update_magnetic(
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
             ):
-    """This function updates the magnetic field components.
+    """This function updates the magnetic field components (3D) over bricks
+        of cells. Bricks where every magnetic field component is of a single
+        material are updated with scalar update coefficients (no look up of
+        the ID array), other bricks are updated as standard.
 
     Args:
+        nthreads (int): Number of threads to use
+        nbricks (int): Number of bricks
+        bricks (memoryview): Access to array of bricks (xs, xf, ys, yf, zs, zf, material), material is -1 if the brick is not homogeneous
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t b, i, j, k
+    cdef int material, materialHx, materialHy, materialHz
+    cdef floattype_t c0, c1, c2, c3
+
+    for b in prange(0, nbricks, nogil=True, schedule='dynamic', num_threads=nthreads):
+        material = bricks[b, 6]
+        if material >= 0:
+            c0 = updatecoeffsH[material, 0]
+            c1 = updatecoeffsH[material, 1]
+            c2 = updatecoeffsH[material, 2]
+            c3 = updatecoeffsH[material, 3]
+            for i in range(bricks[b, 0], bricks[b, 1]):
+                for j in range(bricks[b, 2], bricks[b, 3]):
+                    for k in range(bricks[b, 4], bricks[b, 5]):
+                        Hx[i + 1, j, k] = c0 * Hx[i + 1, j, k] - c2 * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + c3 * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+                        Hy[i, j + 1, k] = c0 * Hy[i, j + 1, k] - c3 * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + c1 * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                        Hz[i, j, k + 1] = c0 * Hz[i, j, k + 1] - c1 * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + c2 * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+        else:
+            for i in range(bricks[b, 0], bricks[b, 1]):
+                for j in range(bricks[b, 2], bricks[b, 3]):
+                    for k in range(bricks[b, 4], bricks[b, 5]):
+                        materialHx = ID[3, i + 1, j, k]
+                        materialHy = ID[4, i, j + 1, k]
+                        materialHz = ID[5, i, j, k + 1]
+                        Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+                        Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                        Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+#########################################################
+# Electric and magnetic field updates - batch of models #
+#########################################################
+cpdef void update_electric_batch(
+                    int nbatch,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, :, ::1] Ex,
+                    floattype_t[:, :, :, ::1] Ey,
+                    floattype_t[:, :, :, ::1] Ez,
+                    floattype_t[:, :, :, ::1] Hx,
+                    floattype_t[:, :, :, ::1] Hy,
+                    floattype_t[:, :, :, ::1] Hz
+            ):
+    """This function updates the electric field components (3D) of a batch of
+        models with the same geometry, i.e. field component arrays have a
+        leading batch dimension. The material IDs and update coefficients of
+        each row of cells are re-used (from cache) for every model in the batch.
+
+    Args:
+        nbatch (int): Number of models in the batch
         nx, ny, nz (int): Grid size in cells
         nthreads (int): Number of threads to use
         updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k
-    cdef int materialHx, materialHy, materialHz
+    cdef Py_ssize_t b, i, j, k
+    cdef int materialEx, materialEy, materialEz
 
-    # 2D
-    if nx == 1 or ny == 1 or nz == 1:
-        # Hx component
-        if ny == 1 or nz == 1:
-            for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-                for j in range(0, ny):
-                    for k in range(0, nz):
-                        materialHx = ID[3, i, j, k]
-                        Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for b in range(nbatch):
+                for k in range(1, nz):
+                    materialEx = ID[0, i, j, k]
+                    materialEy = ID[1, i, j, k]
+                    materialEz = ID[2, i, j, k]
+                    Ex[b, i, j, k] = updatecoeffsE[materialEx, 0] * Ex[b, i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[b, i, j, k] - Hz[b, i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[b, i, j, k] - Hy[b, i, j, k - 1])
+                    Ey[b, i, j, k] = updatecoeffsE[materialEy, 0] * Ey[b, i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[b, i, j, k] - Hx[b, i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[b, i, j, k] - Hz[b, i - 1, j, k])
+                    Ez[b, i, j, k] = updatecoeffsE[materialEz, 0] * Ez[b, i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[b, i, j, k] - Hy[b, i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[b, i, j, k] - Hx[b, i, j - 1, k])
 
-        # Hy component
-        if nx == 1 or nz == 1:
-            for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-                for j in range(1, ny):
-                    for k in range(0, nz):
-                        materialHy = ID[4, i, j, k]
-                        Hy[i, j, k] = updatecoeffsH[materialHy, 0] * Hy[i, j, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for b in range(nbatch):
+            for k in range(1, nz):
+                materialEx = ID[0, 0, j, k]
+                Ex[b, 0, j, k] = updatecoeffsE[materialEx, 0] * Ex[b, 0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[b, 0, j, k] - Hz[b, 0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[b, 0, j, k] - Hy[b, 0, j, k - 1])
 
-        # Hz component
-        if nx == 1 or ny == 1:
-            for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-                for j in range(0, ny):
-                    for k in range(1, nz):
-                        materialHz = ID[5, i, j, k]
-                        Hz[i, j, k] = updatecoeffsH[materialHz, 0] * Hz[i, j, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
-    # 3D
-    else:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for b in range(nbatch):
+            for k in range(1, nz):
+                materialEy = ID[1, i, 0, k]
+                Ey[b, i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[b, i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[b, i, 0, k] - Hx[b, i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[b, i, 0, k] - Hz[b, i - 1, 0, k])
+
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            for b in range(nbatch):
+                Ez[b, i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[b, i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[b, i, j, 0] - Hy[b, i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[b, i, j, 0] - Hx[b, i, j - 1, 0])
+
+
+cpdef void update_magnetic_batch(
+                    int nbatch,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, :, ::1] Ex,
+                    floattype_t[:, :, :, ::1] Ey,
+                    floattype_t[:, :, :, ::1] Ez,
+                    floattype_t[:, :, :, ::1] Hx,
+                    floattype_t[:, :, :, ::1] Hy,
+                    floattype_t[:, :, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (3D) of a batch of
+        models with the same geometry, i.e. field component arrays have a
+        leading batch dimension. The material IDs and update coefficients of
+        each row of cells are re-used (from cache) for every model in the batch.
+
+    Args:
+        nbatch (int): Number of models in the batch
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t b, i, j, k
+    cdef int materialHx, materialHy, materialHz
+
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for b in range(nbatch):
                 for k in range(0, nz):
                     materialHx = ID[3, i + 1, j, k]
                     materialHy = ID[4, i, j + 1, k]
                     materialHz = ID[5, i, j, k + 1]
-                    Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
-                    Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
-                    Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+                    Hx[b, i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[b, i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[b, i + 1, j + 1, k] - Ez[b, i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[b, i + 1, j, k + 1] - Ey[b, i + 1, j, k])
+                    Hy[b, i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[b, i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[b, i, j + 1, k + 1] - Ex[b, i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[b, i + 1, j + 1, k] - Ez[b, i, j + 1, k])
+                    Hz[b, i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[b, i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[b, i + 1, j, k + 1] - Ey[b, i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[b, i, j + 1, k + 1] - Ex[b, i, j, k + 1])
@@ -16,18 +16,80 @@
 # You should have received a copy of the GNU General Public License
 # along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
+import os
+import tempfile
+
 import numpy as np
-from scipy import fftpack
+from scipy import fft
 
+from gprMax._version import __version__
 from gprMax.constants import floattype
-from gprMax.constants import complextype
 from gprMax.fractals_generate_ext import generate_fractal2D
 from gprMax.fractals_generate_ext import generate_fractal3D
+from gprMax.fractals_mask_ext import apply_rough_surface
+from gprMax.fractals_mask_ext import build_grass_blades
+from gprMax.fractals_mask_ext import build_grass_roots
 from gprMax.utilities import round_value
 
 np.seterr(divide='raise')
 
 
+def fractal_cache_key(shape, dimension, weighting, seed, nbins=0):
+    """Key of a fractal surface or volume in the fractal cache.
+
+    Args:
+        shape (tuple): Size of the fractal surface or volume in cells.
+        dimension (float): Fractal dimension that controls the fractal distribution.
+        weighting (array): Weighting vector.
+        seed (int): Seed for the random number generator.
+        nbins (int): Number of bins the fractal volume is binned into (zero for fractal surfaces).
+
+    Returns:
+        (str): Hash of the parameters that define the fractal surface or volume.
+    """
+
+    params = [__version__, np.dtype(floattype).name, tuple(shape), repr(float(dimension)), [repr(float(w)) for w in weighting], seed, nbins]
+
+    return hashlib.sha256(repr(params).encode('utf-8')).hexdigest()
+
+
+def load_cached_fractal(directory, key):
+    """Load a fractal surface or volume from the fractal cache.
+
+    Args:
+        directory (str): Path to the directory of the cache.
+        key (str): Key of the fractal surface or volume.
+
+    Returns:
+        (array): Fractal surface or volume, or None if it is not in the cache.
+    """
+
+    filename = os.path.join(directory, key + '.npy')
+    if os.path.isfile(filename):
+        return np.load(filename)
+    else:
+        return None
+
+
+def save_cached_fractal(directory, key, fractal):
+    """Save a fractal surface or volume to the fractal cache.
+
+    Args:
+        directory (str): Path to the directory of the cache.
+        key (str): Key of the fractal surface or volume.
+        fractal (array): Fractal surface or volume.
+    """
+
+    # Write to a temporary file that is then renamed, so that other
+    # processes never see a partially written fractal
+    os.makedirs(directory, exist_ok=True)
+    fd, tmpfile = tempfile.mkstemp(dir=directory, prefix='.' + key, suffix='.npy')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, fractal)
+    os.replace(tmpfile, os.path.join(directory, key + '.npy'))
+
+
 class FractalSurface(object):
     """Fractal surfaces."""
 
@@ -75,27 +137,34 @@ class FractalSurface(object):
         elif self.zs == self.zf:
             surfacedims = (self.nx, self.ny)
 
-        self.fractalsurface = np.zeros(surfacedims, dtype=complextype)
+        # Fractal surfaces with a seed are the same every time they are
+        # generated, so they can be loaded from the fractal cache
+        key = None
+        self.fractalsurface = None
+        if G.fractalcache and self.seed is not None:
+            key = fractal_cache_key(surfacedims, self.dimension, self.weighting, self.seed)
+            self.fractalsurface = load_cached_fractal(G.fractalcache, key)
 
-        # Positional vector at centre of array, scaled by weighting
-        v1 = np.array([self.weighting[0] * (surfacedims[0]) / 2, self.weighting[1] * (surfacedims[1]) / 2])
+        if self.fractalsurface is None:
+            # Positional vector at centre of array, scaled by weighting
+            v1 = np.array([self.weighting[0] * (surfacedims[0]) / 2, self.weighting[1] * (surfacedims[1]) / 2])
 
-        # 2D array of random numbers to be convolved with the fractal function
-        R = np.random.RandomState(self.seed)
-        A = R.randn(surfacedims[0], surfacedims[1])
+            # 2D array of random numbers to be convolved with the fractal function
+            R = np.random.RandomState(self.seed)
+            A = R.randn(surfacedims[0], surfacedims[1]).astype(floattype)
 
-        # 2D FFT
-        A = fftpack.fftn(A)
-        # Shift the zero frequency component to the centre of the array
-        A = fftpack.fftshift(A)
+            # 2D real FFT
+            A = fft.rfftn(A, workers=G.nthreads)
 
-        # Generate fractal
-        generate_fractal2D(surfacedims[0], surfacedims[1], G.nthreads, self.b, self.weighting, v1, A, self.fractalsurface)
+            # Generate fractal
+            generate_fractal2D(surfacedims[0], surfacedims[1], G.nthreads, self.b, self.weighting, v1, A)
+
+            # Inverse real FFT
+            self.fractalsurface = fft.irfftn(A, s=surfacedims, overwrite_x=True, workers=G.nthreads)
+
+            if key:
+                save_cached_fractal(G.fractalcache, key, self.fractalsurface)
 
-        # Shift the zero frequency component to start of the array
-        self.fractalsurface = fftpack.ifftshift(self.fractalsurface)
-        # Take the real part (numerical errors can give rise to an imaginary part) of the IFFT
-        self.fractalsurface = np.real(fftpack.ifftn(self.fractalsurface))
         # Scale the fractal volume according to requested range
         fractalmin = np.amin(self.fractalsurface)
         fractalmax = np.amax(self.fractalsurface)
@@ -157,32 +226,42 @@ class FractalVolume(object):
         # Adjust weighting to account for filter scaling
         self.weighting = np.multiply(self.weighting, filterscaling)
 
-        self.fractalvolume = np.zeros((self.nx, self.ny, self.nz), dtype=complextype)
+        # Fractal volumes with a seed are the same every time they are
+        # generated, so they can be loaded from the fractal cache
+        key = None
+        if G.fractalcache and self.seed is not None:
+            key = fractal_cache_key((self.nx, self.ny, self.nz), self.dimension, self.weighting, self.seed, self.nbins)
+            self.fractalvolume = load_cached_fractal(G.fractalcache, key)
+            if self.fractalvolume is not None:
+                return
 
         # Positional vector at centre of array, scaled by weighting
         v1 = np.array([self.weighting[0] * self.nx / 2, self.weighting[1] * self.ny / 2, self.weighting[2] * self.nz / 2])
 
-        # 3D array of random numbers to be convolved with the fractal function
+        # 3D array of random numbers to be convolved with the fractal function,
+        # drawn one slice at a time to avoid a double precision temporary array
         R = np.random.RandomState(self.seed)
-        A = R.randn(self.nx, self.ny, self.nz)
+        A = np.empty((self.nx, self.ny, self.nz), dtype=floattype)
+        for i in range(self.nx):
+            A[i, :, :] = R.randn(self.ny, self.nz)
 
-        # 3D FFT
-        A = fftpack.fftn(A)
-        # Shift the zero frequency component to the centre of the array
-        A = fftpack.fftshift(A)
+        # 3D real FFT
+        A = fft.rfftn(A, workers=G.nthreads)
 
         # Generate fractal
-        generate_fractal3D(self.nx, self.ny, self.nz, G.nthreads, self.b, self.weighting, v1, A, self.fractalvolume)
+        generate_fractal3D(self.nx, self.ny, self.nz, G.nthreads, self.b, self.weighting, v1, A)
+
+        # Inverse real FFT
+        self.fractalvolume = fft.irfftn(A, s=(self.nx, self.ny, self.nz), overwrite_x=True, workers=G.nthreads)
+        del A
 
-        # Shift the zero frequency component to the start of the array
-        self.fractalvolume = fftpack.ifftshift(self.fractalvolume)
-        # Take the real part (numerical errors can give rise to an imaginary part) of the IFFT
-        self.fractalvolume = np.real(fftpack.ifftn(self.fractalvolume))
-        # Bin fractal values
+        # Bin fractal values, one slice at a time
         bins = np.linspace(np.amin(self.fractalvolume), np.amax(self.fractalvolume), self.nbins)
-        for j in range(self.ny):
-            for k in range(self.nz):
-                self.fractalvolume[:, j, k] = np.digitize(self.fractalvolume[:, j, k], bins, right=True)
+        for i in range(self.nx):
+            self.fractalvolume[i, :, :] = np.digitize(self.fractalvolume[i, :, :], bins, right=True)
+
+        if key:
+            save_cached_fractal(G.fractalcache, key, self.fractalvolume)
 
     def generate_volume_mask(self):
         """
@@ -198,19 +277,63 @@ class FractalVolume(object):
         maskzf = (self.originalzf - self.originalzs) + maskzs
         self.mask[maskxs:maskxf, maskys:maskyf, maskzs:maskzf] = 1
 
+    def apply_fractal_surfaces(self, G):
+        """
+        Apply any rough surfaces, surface water and grass/roots to the mask.
+            Two signifies the mask is set for water, and three for grass/roots.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for surface in self.fractalsurfaces:
+            # View of the mask, start of the volume, end of the original
+            # volume, and extent of the surface, with the direction normal to
+            # the surface first
+            if surface.surfaceID in ('xminus', 'xplus'):
+                mask = self.mask
+                volumestart = (self.xs, self.ys, self.zs)
+                originalfinish = self.originalxf
+                volumefinish = self.xf
+                extent = (surface.ys, surface.yf, surface.zs, surface.zf)
+            elif surface.surfaceID in ('yminus', 'yplus'):
+                mask = self.mask.transpose(1, 0, 2)
+                volumestart = (self.ys, self.xs, self.zs)
+                originalfinish = self.originalyf
+                volumefinish = self.yf
+                extent = (surface.xs, surface.xf, surface.zs, surface.zf)
+            elif surface.surfaceID in ('zminus', 'zplus'):
+                mask = self.mask.transpose(2, 0, 1)
+                volumestart = (self.zs, self.xs, self.ys)
+                originalfinish = self.originalzf
+                volumefinish = self.zf
+                extent = (surface.xs, surface.xf, surface.ys, surface.yf)
+
+            fractalsurface = np.ascontiguousarray(surface.fractalsurface, dtype=floattype)
+            plus = surface.surfaceID.endswith('plus')
+
+            if not surface.ID:
+                apply_rough_surface(surface.fractalrange[0], surface.fractalrange[1], *extent, *volumestart, plus, surface.filldepth, fractalsurface, mask, G.nthreads)
+
+            elif surface.ID == 'grass':
+                g = surface.grass[0]
+                build_grass_blades(surface.fractalrange[1], *extent, *volumestart, fractalsurface, g.geometryparams, mask)
+                build_grass_roots(volumefinish, originalfinish, *extent, *volumestart, fractalsurface, g.geometryparams, g.R5, g.R6, mask)
+
 
 class Grass(object):
     """Geometry information for blades of grass."""
 
-    def __init__(self, numblades):
+    def __init__(self, numblades, seed=None):
         """
         Args:
             numblades (int): Number of blades of grass.
+            seed (int): Seed for the random number generators of the geometry of the grass.
         """
 
         self.numblades = numblades
         self.geometryparams = np.zeros((self.numblades, 6), dtype=floattype)
-        self.seed = None
+        self.seed = seed
 
         # Randomly defined parameters that will be used to calculate geometry
         self.R1 = np.random.RandomState(self.seed)
@@ -239,8 +362,8 @@ class Grass(object):
 
         x = self.geometryparams[blade, 2] * (height / self.geometryparams[blade, 0]) * (height / self.geometryparams[blade, 0])
         y = self.geometryparams[blade, 3] * (height / self.geometryparams[blade, 1]) * (height / self.geometryparams[blade, 1])
-        x = round_value(x)
-        y = round_value(y)
+        x = round_value(float(x))
+        y = round_value(float(y))
 
         return x, y
 
@@ -19,44 +19,63 @@
 import numpy as np
 cimport numpy as np
 from cython.parallel import prange
+from libc.math cimport sqrt
 
 from gprMax.constants cimport complextype_t
 
 
-cpdef void generate_fractal2D(int nx, int ny, int nthreads, int b, np.float64_t[:] weighting, np.float64_t[:] v1, np.complex128_t[:, ::1] A, complextype_t[:, ::1] fractalsurface):
-    """This function generates a fractal surface for a 2D array.
-        
+cpdef void generate_fractal2D(int nx, int ny, int nthreads, int b, np.float64_t[:] weighting, np.float64_t[:] v1, complextype_t[:, ::1] A):
+    """This function generates a fractal surface for a 2D array by filtering,
+        in place, the FFT of an array of random numbers. Only the half of
+        the FFT given by a real FFT is stored, i.e. the last dimension of A is
+        ny // 2 + 1, and the zero frequency component is at the start of the
+        array.
+
     Args:
         nx, ny (int): Fractal surface size in cells
         nthreads (int): Number of threads to use
         b (int): Constant related to fractal dimension
         weighting (memoryview): Access to weighting vector
         v1 (memoryview): Access to positional vector at centre of array, scaled by weighting
-        A (memoryview): Access to array containing random numbers (to be convolved with fractal function)
-        fractalsurface (memoryview): Access to array containing fractal surface data
+        A (memoryview): Access to array containing the real FFT of random numbers (to be convolved with fractal function)
     """
 
     cdef Py_ssize_t i, j
-    cdef float v2x, v2y, rr
+    cdef float rr, rrneg, fractal
+    cdef np.float64_t[::1] x = distances(nx, weighting[0], v1[0], False)
+    cdef np.float64_t[::1] xneg = distances(nx, weighting[0], v1[0], True)
+    cdef np.float64_t[::1] y = distances(ny, weighting[1], v1[1], False)
+    cdef np.float64_t[::1] yneg = distances(ny, weighting[1], v1[1], True)
 
     for i in prange(nx, nogil=True, schedule='static', num_threads=nthreads):
-        for j in range(ny):
-                # Positional vector for current position
-                v2x = weighting[0] * i
-                v2y = weighting[1] * j
+        for j in range(A.shape[1]):
+            # Calulate norm of v2 - v1
+            rr = sqrt(x[i] + y[j])
 
-                # Calulate norm of v2 - v1
-                rr = ((v2x - v1[0])**2 + (v2y - v1[1])**2)**(1/2)
+            # Catch potential divide by zero
+            if rr == 0:
+                rr = 0.9
 
-                # Catch potential divide by zero
-                if rr == 0:
-                    rr = 0.9
+            fractal = 1 / (rr**b)
+
+            # The real part of the inverse FFT of the filtered array is
+            # required, so the fractal function is averaged with its value
+            # at the negative frequency (they differ if a dimension is odd)
+            if xneg[i] != x[i] or yneg[j] != y[j]:
+                rrneg = sqrt(xneg[i] + yneg[j])
+                if rrneg == 0:
+                    rrneg = 0.9
+                fractal = (fractal + 1 / (rrneg**b)) / 2
 
-                fractalsurface[i, j] = A[i, j] * 1 / (rr**b)
+            A[i, j] = A[i, j] * fractal
 
 
-cpdef void generate_fractal3D(int nx, int ny, int nz, int nthreads, int b, np.float64_t[:] weighting, np.float64_t[:] v1, np.complex128_t[:, :, ::1] A, complextype_t[:, :, ::1] fractalvolume):
-    """This function generates a fractal volume for a 3D array.
+cpdef void generate_fractal3D(int nx, int ny, int nz, int nthreads, int b, np.float64_t[:] weighting, np.float64_t[:] v1, complextype_t[:, :, ::1] A):
+    """This function generates a fractal volume for a 3D array by filtering,
+        in place, the FFT of an array of random numbers. Only the half of
+        the FFT given by a real FFT is stored, i.e. the last dimension of A is
+        nz // 2 + 1, and the zero frequency component is at the start of the
+        array.
 
     Args:
         nx, ny, nz (int): Fractal volume size in cells
@@ -64,26 +83,72 @@ cpdef void generate_fractal3D(int nx, int ny, int nz, int nthreads, int b, np.fl
         b (int): Constant related to fractal dimension
         weighting (memoryview): Access to weighting vector
         v1 (memoryview): Access to positional vector at centre of array, scaled by weighting
-        A (memoryview): Access to array containing random numbers (to be convolved with fractal function)
-        fractalvolume (memoryview): Access to array containing fractal volume data
+        A (memoryview): Access to array containing the real FFT of random numbers (to be convolved with fractal function)
     """
 
     cdef Py_ssize_t i, j, k
-    cdef float v2x, v2y, v2z, rr
+    cdef float rr, rrneg, fractal
+    cdef np.float64_t[::1] x = distances(nx, weighting[0], v1[0], False)
+    cdef np.float64_t[::1] xneg = distances(nx, weighting[0], v1[0], True)
+    cdef np.float64_t[::1] y = distances(ny, weighting[1], v1[1], False)
+    cdef np.float64_t[::1] yneg = distances(ny, weighting[1], v1[1], True)
+    cdef np.float64_t[::1] z = distances(nz, weighting[2], v1[2], False)
+    cdef np.float64_t[::1] zneg = distances(nz, weighting[2], v1[2], True)
 
     for i in prange(nx, nogil=True, schedule='static', num_threads=nthreads):
         for j in range(ny):
-            for k in range(nz):
-                # Positional vector for current position
-                v2x = weighting[0] * i
-                v2y = weighting[1] * j
-                v2z = weighting[2] * k
-
+            for k in range(A.shape[2]):
                 # Calulate norm of v2 - v1
-                rr = ((v2x - v1[0])**2 + (v2y - v1[1])**2 + (v2z - v1[2])**2)**(1/2)
+                rr = sqrt(x[i] + y[j] + z[k])
 
                 # Catch potential divide by zero
                 if rr == 0:
                     rr = 0.9
 
-                fractalvolume[i, j, k] = A[i, j, k] * 1 / (rr**b)
+                fractal = 1 / (rr**b)
+
+                # The real part of the inverse FFT of the filtered array is
+                # required, so the fractal function is averaged with its value
+                # at the negative frequency (they differ if a dimension is odd)
+                if xneg[i] != x[i] or yneg[j] != y[j] or zneg[k] != z[k]:
+                    rrneg = sqrt(xneg[i] + yneg[j] + zneg[k])
+                    if rrneg == 0:
+                        rrneg = 0.9
+                    fractal = (fractal + 1 / (rrneg**b)) / 2
+
+                A[i, j, k] = A[i, j, k] * fractal
+
+
+cdef np.ndarray distances(int n, double weighting, double v1, bint negative):
+    """This function calculates the squared distances, in one dimension, of
+        the positions in a fractal array to the centre of the array. The
+        positions are those of the FFT frequencies of the array, or of the
+        negative frequencies, when the zero frequency component is shifted to
+        the centre of the array.
+
+    Args:
+        n (int): Size of the array in the dimension
+        weighting (double): Weighting in the dimension
+        v1 (double): Position of the centre of the array in the dimension, scaled by weighting
+        negative (bint): Whether to use the positions of the negative frequencies
+
+    Returns:
+        d (array): Squared distances
+    """
+
+    cdef Py_ssize_t i, shifted
+    cdef float v2
+    cdef np.ndarray[np.float64_t, ndim=1] d = np.empty(n, dtype=np.float64)
+
+    for i in range(n):
+        # Position of the frequency with the zero frequency component at the centre of the array
+        if negative:
+            shifted = ((n - i) % n + n // 2) % n
+        else:
+            shifted = (i + n // 2) % n
+
+        # Positional vector for current position
+        v2 = weighting * shifted
+        d[i] = (v2 - v1)**2
+
+    return d
@@ -0,0 +1,224 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+from cython.parallel import prange
+from libc.math cimport ceil
+from libc.math cimport rint
+
+from gprMax.constants cimport floattype_t
+
+# The functions in this module operate on views of the mask of a fractal
+# volume with the direction normal to the surface as the first dimension,
+# i.e. positions in the mask are (n, a, b) where n is the normal direction and
+# a, b are the directions in the plane of the surface. All positions are cell
+# coordinates in the domain, apart from those in the mask which are relative
+# to the start (nvolume, avolume, bvolume) of the fractal volume.
+
+
+cpdef void apply_rough_surface(
+                    int ns,
+                    int nf,
+                    int as_,
+                    int af,
+                    int bs,
+                    int bf,
+                    int nvolume,
+                    int avolume,
+                    int bvolume,
+                    bint plus,
+                    int filldepth,
+                    floattype_t[:, ::1] fractalsurface,
+                    np.int8_t[:, :, :] mask,
+                    int nthreads
+            ):
+    """This function applies a rough surface, and any surface water, to the
+        mask of a fractal volume.
+
+    Args:
+        ns, nf (int): Range of the rough surface in the normal direction
+        as_, af, bs, bf (int): Extent of the rough surface in the plane of the surface
+        nvolume, avolume, bvolume (int): Start of the fractal volume
+        plus (bint): Whether the surface is in the positive normal direction
+        filldepth (int): Depth of surface water (zero for no water)
+        fractalsurface (memoryview): Access to array containing fractal surface data
+        mask (memoryview): Access to view of mask of fractal volume
+        nthreads (int): Number of threads to use
+    """
+
+    cdef Py_ssize_t n, a, b
+
+    for a in prange(as_, af, nogil=True, schedule='static', num_threads=nthreads):
+        for n in range(ns, nf):
+            for b in range(bs, bf):
+                if plus:
+                    if n < fractalsurface[a - as_, b - bs]:
+                        mask[n - nvolume, a - avolume, b - bvolume] = 1
+                    elif filldepth > 0 and n < filldepth:
+                        mask[n - nvolume, a - avolume, b - bvolume] = 2
+                    else:
+                        mask[n - nvolume, a - avolume, b - bvolume] = 0
+                else:
+                    if n > fractalsurface[a - as_, b - bs]:
+                        mask[n - nvolume, a - avolume, b - bvolume] = 1
+                    elif filldepth > 0 and n > filldepth:
+                        mask[n - nvolume, a - avolume, b - bvolume] = 2
+                    else:
+                        mask[n - nvolume, a - avolume, b - bvolume] = 0
+
+
+cpdef void build_grass_blades(
+                    int nf,
+                    int as_,
+                    int af,
+                    int bs,
+                    int bf,
+                    int nvolume,
+                    int avolume,
+                    int bvolume,
+                    floattype_t[:, ::1] fractalsurface,
+                    floattype_t[:, ::1] geometryparams,
+                    np.int8_t[:, :, :] mask
+            ):
+    """This function builds the blades of grass on a surface in the mask of a
+        fractal volume. Blades can bend into the positions of other blades, so
+        they are built one after another.
+
+    Args:
+        nf (int): Maximum height of grass blades in the normal direction
+        as_, af, bs, bf (int): Extent of the grass surface in the plane of the surface
+        nvolume, avolume, bvolume (int): Start of the fractal volume
+        fractalsurface (memoryview): Access to array containing heights of grass blades
+        geometryparams (memoryview): Access to array containing geometry parameters of grass blades
+        mask (memoryview): Access to view of mask of fractal volume
+    """
+
+    cdef Py_ssize_t n, a, b
+    cdef int blade, height, aa, bb
+    cdef floattype_t scaling1, scaling2
+
+    blade = 0
+    with nogil:
+        for a in range(as_, af):
+            for b in range(bs, bf):
+                if fractalsurface[a - as_, b - bs] > 0:
+                    height = 0
+                    for n in range(nvolume, nf):
+                        if n < fractalsurface[a - as_, b - bs] and mask[n - nvolume, a - avolume, b - bvolume] != 1:
+                            # Coordinates of the blade at the height (in the working precision, as
+                            # Grass.calculate_blade_geometry), added to the existing location
+                            scaling1 = <floattype_t>height / geometryparams[blade, 0]
+                            scaling2 = <floattype_t>height / geometryparams[blade, 1]
+                            aa = a - avolume + round_half_down(geometryparams[blade, 2] * scaling1 * scaling1)
+                            bb = b - bvolume + round_half_down(geometryparams[blade, 3] * scaling2 * scaling2)
+                            # If these coordinates are outwith fractal volume stop building the blade, otherwise set the mask for grass
+                            if aa < 0 or aa >= mask.shape[1] or bb < 0 or bb >= mask.shape[2]:
+                                break
+                            else:
+                                mask[n - nvolume, aa, bb] = 3
+                                height = height + 1
+                    blade = blade + 1
+
+
+cpdef void build_grass_roots(
+                    int nf,
+                    int noriginal,
+                    int as_,
+                    int af,
+                    int bs,
+                    int bf,
+                    int nvolume,
+                    int avolume,
+                    int bvolume,
+                    floattype_t[:, ::1] fractalsurface,
+                    floattype_t[:, ::1] geometryparams,
+                    object R1,
+                    object R2,
+                    np.int8_t[:, :, :] mask
+            ):
+    """This function builds the roots of grass on a surface in the mask of a
+        fractal volume. Roots are built one after another, drawing random
+        numbers for their geometry in the same order as the roots are built.
+
+    Args:
+        nf (int): End of the fractal volume in the normal direction
+        noriginal (int): End of the original fractal volume (before any rough surfaces or grass were added) in the normal direction
+        as_, af, bs, bf (int): Extent of the grass surface in the plane of the surface
+        nvolume, avolume, bvolume (int): Start of the fractal volume
+        fractalsurface (memoryview): Access to array containing heights of grass blades
+        geometryparams (memoryview): Access to array containing geometry parameters of grass roots
+        R1, R2 (object): Random number generators for the geometry of grass roots in the plane of the surface
+        mask (memoryview): Access to view of mask of fractal volume
+    """
+
+    cdef Py_ssize_t n, a, b
+    cdef int root, aa, bb
+    cdef int nrandom = 1024
+    cdef Py_ssize_t r1, r2
+    cdef double[::1] random1 = R1.random_sample(nrandom)
+    cdef double[::1] random2 = R2.random_sample(nrandom)
+
+    r1 = 0
+    r2 = 0
+    root = 0
+    for a in range(as_, af):
+        for b in range(bs, bf):
+            if fractalsurface[a - as_, b - bs] > 0:
+                n = nf - 1
+                while n > nvolume:
+                    if n > noriginal - (fractalsurface[a - as_, b - bs] - noriginal) and mask[n - nvolume, a - avolume, b - bvolume] == 1:
+                        # Random numbers are drawn in blocks, which gives the same sequence as drawing them one at a time
+                        if r1 == nrandom:
+                            random1 = R1.random_sample(nrandom)
+                            r1 = 0
+                        if r2 == nrandom:
+                            random2 = R2.random_sample(nrandom)
+                            r2 = 0
+                        # Location of the root is accumulated in the working precision (as Grass.calculate_root_geometry)
+                        geometryparams[root, 4] += <floattype_t>(-1 + 2 * random1[r1])
+                        geometryparams[root, 5] += <floattype_t>(-1 + 2 * random2[r2])
+                        r1 += 1
+                        r2 += 1
+                        # Coordinates of the root at the depth, added to the existing location
+                        aa = a - avolume + <int>rint(geometryparams[root, 4])
+                        bb = b - bvolume + <int>rint(geometryparams[root, 5])
+                        # If these coordinates are outwith the fractal volume stop building the root, otherwise set the mask for grass
+                        if aa < 0 or aa >= mask.shape[1] or bb < 0 or bb >= mask.shape[2]:
+                            break
+                        else:
+                            mask[n - nvolume, aa, bb] = 3
+                    n -= 1
+                root += 1
+
+
+cdef int round_half_down(double value) noexcept nogil:
+    """This function rounds to the nearest integer, with half values rounded
+        towards zero (as gprMax.utilities.round_value).
+
+    Args:
+        value (double): Number to round
+
+    Returns:
+        (int): Rounded value
+    """
+
+    if value >= 0:
+        return <int>ceil(value - 0.5)
+    else:
+        return -<int>ceil(-value - 0.5)
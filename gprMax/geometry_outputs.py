@@ -229,7 +229,7 @@ class GeometryView(object):
                                      G.dx,
                                      G.dy,
                                      G.dz,
-                                     G.ID,
+                                     G.volume_ID(),
                                      points,
                                      x_lines,
                                      x_materials,
@@ -347,14 +347,15 @@ class GeometryObjects(object):
         fdata.attrs['dx, dy, dz'] = (G.dx, G.dy, G.dz)
 
         # Get minimum and maximum integers of materials in geometry objects volume
-        minmat = np.amin(G.ID[:, self.xs:self.xf + 1, self.ys:self.yf + 1, self.zs:self.zf + 1])
-        maxmat = np.amax(G.ID[:, self.xs:self.xf + 1, self.ys:self.yf + 1, self.zs:self.zf + 1])
+        ID = G.volume_ID()[:, self.xs:self.xf + 1, self.ys:self.yf + 1, self.zs:self.zf + 1]
+        minmat = np.amin(ID)
+        maxmat = np.amax(ID)
         fdata['/data'] = G.solid[self.xs:self.xf + 1, self.ys:self.yf + 1, self.zs:self.zf + 1].astype('int16') - minmat
         pbar.update(self.solidsize)
         fdata['/rigidE'] = G.rigidE[:, self.xs:self.xf + 1, self.ys:self.yf + 1, self.zs:self.zf + 1]
         fdata['/rigidH'] = G.rigidH[:, self.xs:self.xf + 1, self.ys:self.yf + 1, self.zs:self.zf + 1]
         pbar.update(self.rigidsize)
-        fdata['/ID'] = G.ID[:, self.xs:self.xf + 1, self.ys:self.yf + 1, self.zs:self.zf + 1] - minmat
+        fdata['/ID'] = ID.astype(np.uint32) - minmat
         pbar.update(self.IDsize)
 
         # Write materials list to a text file
@@ -19,6 +19,7 @@
 cimport numpy as np
 
 from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
 
 
 cpdef void define_fine_geometry(
@@ -34,7 +35,7 @@ cpdef void define_fine_geometry(
                     float dx,
                     float dy,
                     float dz,
-                    np.uint32_t[:, :, :, :] ID,
+                    idtype_t[:, :, :, :] ID,
                     floattype_t[:, :] points,
                     np.uint32_t[:, :] x_lines,
                     np.uint32_t[:] x_materials,
@@ -92,7 +93,7 @@ cpdef void define_normal_geometry(
                     int dx,
                     int dy,
                     int dz,
-                    np.uint32_t[:, :, :] solid,
+                    idtype_t[:, :, :] solid,
                     np.int8_t[:, :, :] srcs_pml,
                     np.int8_t[:, :, :] rxs,
                     np.uint32_t[:] solid_geometry,
@@ -18,6 +18,12 @@
 
 import numpy as np
 cimport numpy as np
+from cython.parallel import parallel
+from cython.parallel import prange
+from libc.math cimport acos
+from libc.math cimport sin
+from libc.math cimport sqrt
+from libc.math cimport M_PI
 
 from gprMax.utilities import round_value
 from gprMax.yee_cell_setget_rigid_ext cimport set_rigid_Ex
@@ -39,7 +45,7 @@ cpdef bint are_clockwise(
                     float v1y,
                     float v2x,
                     float v2y
-            ):
+            ) noexcept nogil:
     """Find if vector 2 is clockwise relative to vector 1.
 
     Args:
@@ -56,7 +62,7 @@ cpdef bint is_within_radius(
                     float vx,
                     float vy,
                     float radius
-            ):
+            ) noexcept nogil:
     """Check if the point is within a given radius of the centre of the circle.
 
     Args:
@@ -97,12 +103,42 @@ cpdef bint is_inside_sector(
         (boolean)
     """
 
-    cdef float sectorstart1, sectorstart2, sectorend1, sectorend2, relpoint1, relpoint2
+    cdef float sectorstart1, sectorstart2, sectorend1, sectorend2
 
     sectorstart1 = radius * np.cos(sectorstartangle)
     sectorstart2 = radius * np.sin(sectorstartangle)
     sectorend1 = radius * np.cos(sectorstartangle + sectorangle)
     sectorend2 = radius * np.sin(sectorstartangle + sectorangle)
+
+    return is_inside_sector_arms(px, py, ctrx, ctry, sectorstart1, sectorstart2, sectorend1, sectorend2, radius)
+
+
+cdef bint is_inside_sector_arms(
+                    float px,
+                    float py,
+                    float ctrx,
+                    float ctry,
+                    float sectorstart1,
+                    float sectorstart2,
+                    float sectorend1,
+                    float sectorend2,
+                    float radius
+            ) noexcept nogil:
+    """Check if a point is inside a circular sector (see is_inside_sector) given the ends of the start and end "arms" of the sector.
+
+    Args:
+        px, py (float): Coordinates of point.
+        ctrx, ctry (float): Coordinates of centre of circle.
+        sectorstart1, sectorstart2 (float): Coordinates (relative to the centre of the circle) of the end of the start arm of the sector.
+        sectorend1, sectorend2 (float): Coordinates (relative to the centre of the circle) of the end of the end arm of the sector.
+        radius (float): Radius.
+
+    Returns:
+        (boolean)
+    """
+
+    cdef float relpoint1, relpoint2
+
     relpoint1 = px - ctrx
     relpoint2 = py - ctry
 
@@ -172,7 +208,7 @@ cpdef void build_edge_x(
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
                     np.uint32_t[:, :, :, ::1] ID
-            ):
+            ) noexcept nogil:
     """Set x-orientated edges in the rigid and ID arrays for a Yee voxel.
 
     Args:
@@ -193,7 +229,7 @@ cpdef void build_edge_y(
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
                     np.uint32_t[:, :, :, ::1] ID
-            ):
+            ) noexcept nogil:
     """Set y-orientated edges in the rigid and ID arrays for a Yee voxel.
 
     Args:
@@ -214,7 +250,7 @@ cpdef void build_edge_z(
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
                     np.uint32_t[:, :, :, ::1] ID
-            ):
+            ) noexcept nogil:
     """Set z-orientated edges in the rigid and ID arrays for a Yee voxel.
 
     Args:
@@ -236,7 +272,7 @@ cpdef void build_face_yz(
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
                     np.uint32_t[:, :, :, ::1] ID
-            ):
+            ) noexcept nogil:
     """Set the edges of the yz-plane face of a Yell cell in the rigid and ID arrays.
 
     Args:
@@ -264,7 +300,7 @@ cpdef void build_face_xz(
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
                     np.uint32_t[:, :, :, ::1] ID
-            ):
+            ) noexcept nogil:
     """Set the edges of the xz-plane face of a Yell cell in the rigid and ID arrays.
 
     Args:
@@ -292,7 +328,7 @@ cpdef void build_face_xy(
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
                     np.uint32_t[:, :, :, ::1] ID
-            ):
+            ) noexcept nogil:
     """Set the edges of the xy-plane face of a Yell cell in the rigid and ID arrays.
 
     Args:
@@ -311,6 +347,90 @@ cpdef void build_face_xy(
     ID[1, i + 1, j, k] = numIDy
 
 
+
+
+cpdef void build_edge(
+                    int xs,
+                    int xf,
+                    int ys,
+                    int yf,
+                    int zs,
+                    int zf,
+                    int numID,
+                    np.int8_t[:, :, :, ::1] rigidE,
+                    np.int8_t[:, :, :, ::1] rigidH,
+                    np.uint32_t[:, :, :, ::1] ID
+            ):
+    """Builds #edge commands which sets values in the rigid and ID arrays.
+
+    Args:
+        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire edge.
+        numID (int): Numeric ID of material.
+        rigidE, rigidH, ID (memoryviews): Access to rigid and ID arrays.
+    """
+
+    cdef Py_ssize_t i, j, k
+
+    # x-orientated edge
+    if xs != xf:
+        for i in range(xs, xf):
+            build_edge_x(i, ys, zs, numID, rigidE, rigidH, ID)
+
+    # y-orientated edge
+    elif ys != yf:
+        for j in range(ys, yf):
+            build_edge_y(xs, j, zs, numID, rigidE, rigidH, ID)
+
+    # z-orientated edge
+    elif zs != zf:
+        for k in range(zs, zf):
+            build_edge_z(xs, ys, k, numID, rigidE, rigidH, ID)
+
+
+cpdef void build_plate(
+                    int xs,
+                    int xf,
+                    int ys,
+                    int yf,
+                    int zs,
+                    int zf,
+                    int numID1,
+                    int numID2,
+                    np.int8_t[:, :, :, ::1] rigidE,
+                    np.int8_t[:, :, :, ::1] rigidH,
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
+            ):
+    """Builds #plate commands which sets values in the rigid and ID arrays.
+
+    Args:
+        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire plate.
+        numID1, numID2 (int): Numeric ID of materials for the edges in the first and second directions in the plane of the plate.
+        rigidE, rigidH, ID (memoryviews): Access to rigid and ID arrays.
+        nthreads (int): Number of threads to use
+    """
+
+    cdef Py_ssize_t i, j, k
+
+    # yz-plane plate
+    if xs == xf:
+        for j in prange(ys, yf, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(zs, zf):
+                build_face_yz(xs, j, k, numID1, numID2, rigidE, rigidH, ID)
+
+    # xz-plane plate
+    elif ys == yf:
+        for i in prange(xs, xf, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(zs, zf):
+                build_face_xz(i, ys, k, numID1, numID2, rigidE, rigidH, ID)
+
+    # xy-plane plate
+    elif zs == zf:
+        for i in prange(xs, xf, nogil=True, schedule='static', num_threads=nthreads):
+            for j in range(ys, yf):
+                build_face_xy(i, j, zs, numID1, numID2, rigidE, rigidH, ID)
+
+
 cpdef void build_voxel(
                     int i,
                     int j,
@@ -324,7 +444,7 @@ cpdef void build_voxel(
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
                     np.uint32_t[:, :, :, ::1] ID
-            ):
+            ) noexcept nogil:
     """Set values in the solid, rigid and ID arrays for a Yee voxel.
 
     Args:
@@ -334,6 +454,33 @@ cpdef void build_voxel(
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
+    build_voxel_plane(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+    build_voxel_next_plane(i, j, k, numIDy, numIDz, averaging, ID)
+
+
+cdef void build_voxel_plane(
+                    int i,
+                    int j,
+                    int k,
+                    int numID,
+                    int numIDx,
+                    int numIDy,
+                    int numIDz,
+                    bint averaging,
+                    np.uint32_t[:, :, ::1] solid,
+                    np.int8_t[:, :, :, ::1] rigidE,
+                    np.int8_t[:, :, :, ::1] rigidH,
+                    np.uint32_t[:, :, :, ::1] ID
+            ) noexcept nogil:
+    """Set values in the solid, rigid and ID arrays for a Yee voxel that are in the x plane of the voxel.
+
+    Args:
+        i, j, k (int): Cell coordinates of voxel.
+        numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
+        averaging (bint): Whether material property averaging will occur for the object.
+        solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+    """
+
     if averaging:
         solid[i, j, k] = numID
         unset_rigid_E(i, j, k, rigidE)
@@ -350,13 +497,9 @@ cpdef void build_voxel(
         ID[0, i, j, k + 1] = numIDx
 
         ID[1, i, j, k] = numIDy
-        ID[1, i + 1, j, k + 1] = numIDy
-        ID[1, i + 1, j, k] = numIDy
         ID[1, i, j, k + 1] = numIDy
 
         ID[2, i, j, k] = numIDz
-        ID[2, i + 1, j + 1, k] = numIDz
-        ID[2, i + 1, j, k] = numIDz
         ID[2, i, j + 1, k] = numIDz
 
         ID[3, i, j, k] = numIDx
@@ -365,14 +508,42 @@ cpdef void build_voxel(
         ID[3, i, j, k + 1] = numIDx
 
         ID[4, i, j, k] = numIDy
-        ID[4, i + 1, j, k + 1] = numIDy
-        ID[4, i + 1, j, k] = numIDy
         ID[4, i, j, k + 1] = numIDy
 
         ID[5, i, j, k] = numIDz
+        ID[5, i, j + 1, k] = numIDz
+
+
+cdef void build_voxel_next_plane(
+                    int i,
+                    int j,
+                    int k,
+                    int numIDy,
+                    int numIDz,
+                    bint averaging,
+                    np.uint32_t[:, :, :, ::1] ID
+            ) noexcept nogil:
+    """Set values in the ID array for a Yee voxel that are in the next x plane, i.e. shared with the voxel at i + 1.
+
+    Args:
+        i, j, k (int): Cell coordinates of voxel.
+        numIDy, numIDz (int): Numeric ID of material.
+        averaging (bint): Whether material property averaging will occur for the object.
+        ID (memoryview): Access to ID array.
+    """
+
+    if not averaging:
+        ID[1, i + 1, j, k + 1] = numIDy
+        ID[1, i + 1, j, k] = numIDy
+
+        ID[2, i + 1, j + 1, k] = numIDz
+        ID[2, i + 1, j, k] = numIDz
+
+        ID[4, i + 1, j, k + 1] = numIDy
+        ID[4, i + 1, j, k] = numIDy
+
         ID[5, i + 1, j + 1, k] = numIDz
         ID[5, i + 1, j, k] = numIDz
-        ID[5, i, j + 1, k] = numIDz
 
 
 cpdef void build_triangle(
@@ -398,7 +569,8 @@ cpdef void build_triangle(
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
-                    np.uint32_t[:, :, :, ::1] ID
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
             ):
     """
     Builds #triangle and #triangular_prism commands which sets values in the
@@ -413,14 +585,17 @@ cpdef void build_triangle(
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
     """
 
     cdef Py_ssize_t i, j, k
-    cdef int i1, i2, j1, j2, sign, level, thicknesscells
+    cdef int i1, i2, j1, j2, sign, level, thicknesscells, axis
     cdef float area, s, t
+    cdef double ir, jr
 
     # Calculate a bounding box for the triangle
     if normal == 'x':
+        axis = 0
         area = 0.5 * (-z2 * y3 + z1 * (-y2 + y3) + y1 * (z2 - z3) + y2 * z3)
         i1 = round_value(np.amin([y1, y2, y3]) / dy) - 1
         i2 = round_value(np.amax([y1, y2, y3]) / dy) + 1
@@ -429,6 +604,7 @@ cpdef void build_triangle(
         level = round_value(x1 / dx)
         thicknesscells = round_value(thickness / dx)
     elif normal == 'y':
+        axis = 1
         area = 0.5 * (-z2 * x3 + z1 * (-x2 + x3) + x1 * (z2 - z3) + x2 * z3)
         i1 = round_value(np.amin([x1, x2, x3]) / dx) - 1
         i2 = round_value(np.amax([x1, x2, x3]) / dx) + 1
@@ -437,6 +613,7 @@ cpdef void build_triangle(
         level = round_value(y1 /dy)
         thicknesscells = round_value(thickness / dy)
     elif normal == 'z':
+        axis = 2
         area = 0.5 * (-y2 * x3 + y1 * (-x2 + x3) + x1 * (y2 - y3) + x2 * y3)
         i1 = round_value(np.amin([x1, x2, x3]) / dx) - 1
         i2 = round_value(np.amax([x1, x2, x3]) / dx) + 1
@@ -447,42 +624,42 @@ cpdef void build_triangle(
 
     sign = np.sign(area)
 
-    for i in range(i1, i2):
+    for i in prange(i1, i2, nogil=True, schedule='static', num_threads=nthreads):
         for j in range(j1, j2):
 
             # Calculate the areas of the 3 triangles defined by the 3 vertices of the main triangle and the point under test
-            if normal == 'x':
+            if axis == 0:
                 ir = (i + 0.5) * dy
                 jr = (j + 0.5) * dz
-                s = sign * (z1 * y3 - y1 * z3 + (z3 - z1) * ir + (y1 - y3) * jr);
-                t = sign * (y1 * z2 - z1 * y2 + (z1 - z2) * ir + (y2 - y1) * jr);
-            elif normal == 'y':
+                s = sign * (z1 * y3 - y1 * z3 + (z3 - z1) * ir + (y1 - y3) * jr)
+                t = sign * (y1 * z2 - z1 * y2 + (z1 - z2) * ir + (y2 - y1) * jr)
+            elif axis == 1:
                 ir = (i + 0.5) * dx
                 jr = (j + 0.5) * dz
-                s = sign * (z1 * x3 - x1 * z3 + (z3 - z1) * ir + (x1 - x3) * jr);
-                t = sign * (x1 * z2 - z1 * x2 + (z1 - z2) * ir + (x2 - x1) * jr);
-            elif normal == 'z':
+                s = sign * (z1 * x3 - x1 * z3 + (z3 - z1) * ir + (x1 - x3) * jr)
+                t = sign * (x1 * z2 - z1 * x2 + (z1 - z2) * ir + (x2 - x1) * jr)
+            elif axis == 2:
                 ir = (i + 0.5) * dx
                 jr = (j + 0.5) * dy
-                s = sign * (y1 * x3 - x1 * y3 + (y3 - y1) * ir + (x1 - x3) * jr);
-                t = sign * (x1 * y2 - y1 * x2 + (y1 - y2) * ir + (x2 - x1) * jr);
+                s = sign * (y1 * x3 - x1 * y3 + (y3 - y1) * ir + (x1 - x3) * jr)
+                t = sign * (x1 * y2 - y1 * x2 + (y1 - y2) * ir + (x2 - x1) * jr)
 
             # If these conditions are true then point is inside triangle
             if s > 0 and t > 0 and (s + t) < 2 * area * sign:
                 if thicknesscells == 0:
-                    if normal == 'x':
+                    if axis == 0:
                         build_face_yz(level, i, j, numIDy, numIDz, rigidE, rigidH, ID)
-                    elif normal == 'y':
+                    elif axis == 1:
                         build_face_xz(i, level, j, numIDx, numIDz, rigidE, rigidH, ID)
-                    elif normal == 'z':
+                    elif axis == 2:
                         build_face_xy(i, j, level, numIDx, numIDy, rigidE, rigidH, ID)
                 else:
                     for k in range(level, level + thicknesscells):
-                        if normal == 'x':
+                        if axis == 0:
                             build_voxel(k, i, j, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
-                        elif normal == 'y':
+                        elif axis == 1:
                             build_voxel(i, k, j, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
-                        elif normal == 'z':
+                        elif axis == 2:
                             build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
 
@@ -506,7 +683,8 @@ cpdef void build_cylindrical_sector(
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
-                    np.uint32_t[:, :, :, ::1] ID
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
             ):
     """
     Builds #cylindrical_sector commands which sets values in the solid, rigid
@@ -528,10 +706,18 @@ cpdef void build_cylindrical_sector(
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
     """
 
     cdef Py_ssize_t x, y, z
     cdef int x1, x2, y1, y2, z1, z2, thicknesscells
+    cdef float sectorstart1, sectorstart2, sectorend1, sectorend2
+
+    # Ends of the start and end arms of the sector (relative to the centre of the circle)
+    sectorstart1 = radius * np.cos(sectorstartangle)
+    sectorstart2 = radius * np.sin(sectorstartangle)
+    sectorend1 = radius * np.cos(sectorstartangle + sectorangle)
+    sectorend2 = radius * np.sin(sectorstartangle + sectorangle)
 
     if normal == 'x':
         # Angles are defined from zero degrees on the positive y-axis going towards positive z-axis
@@ -551,9 +737,9 @@ cpdef void build_cylindrical_sector(
         if z2 > solid.shape[2]:
             z2 = solid.shape[2]
 
-        for y in range(y1, y2):
+        for y in prange(y1, y2, nogil=True, schedule='static', num_threads=nthreads):
             for z in range(z1, z2):
-                if is_inside_sector(y * dy + 0.5 * dy, z * dz + 0.5 * dz, ctr1, ctr2, sectorstartangle, sectorangle, radius):
+                if is_inside_sector_arms(y * dy + 0.5 * dy, z * dz + 0.5 * dz, ctr1, ctr2, sectorstart1, sectorstart2, sectorend1, sectorend2, radius):
                     if thicknesscells == 0:
                         build_face_yz(level, y, z, numIDy, numIDz, rigidE, rigidH, ID)
                     else:
@@ -578,9 +764,9 @@ cpdef void build_cylindrical_sector(
         if z2 > solid.shape[2]:
             z2 = solid.shape[2]
 
-        for x in range(x1, x2):
+        for x in prange(x1, x2, nogil=True, schedule='static', num_threads=nthreads):
             for z in range(z1, z2):
-                if is_inside_sector(x * dx + 0.5 * dx, z * dz + 0.5 * dz, ctr1, ctr2, sectorstartangle, sectorangle, radius):
+                if is_inside_sector_arms(x * dx + 0.5 * dx, z * dz + 0.5 * dz, ctr1, ctr2, sectorstart1, sectorstart2, sectorend1, sectorend2, radius):
                     if thicknesscells == 0:
                         build_face_xz(x, level, z, numIDx, numIDz, rigidE, rigidH, ID)
                     else:
@@ -605,9 +791,9 @@ cpdef void build_cylindrical_sector(
         if y2 > solid.shape[1]:
             y2 = solid.shape[1]
 
-        for x in range(x1, x2):
+        for x in prange(x1, x2, nogil=True, schedule='static', num_threads=nthreads):
             for y in range(y1, y2):
-                if is_inside_sector(x * dx + 0.5 * dx, y * dy + 0.5 * dy, ctr1, ctr2, sectorstartangle, sectorangle, radius):
+                if is_inside_sector_arms(x * dx + 0.5 * dx, y * dy + 0.5 * dy, ctr1, ctr2, sectorstart1, sectorstart2, sectorend1, sectorend2, radius):
                     if thicknesscells == 0:
                         build_face_xy(x, y, level, numIDx, numIDy, rigidE, rigidH, ID)
                     else:
@@ -630,7 +816,8 @@ cpdef void build_box(
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
-                    np.uint32_t[:, :, :, ::1] ID
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
             ):
     """Builds #box commands which sets values in the solid, rigid and ID arrays.
 
@@ -639,54 +826,77 @@ cpdef void build_box(
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
     """
 
-    cdef Py_ssize_t i, j, k
+    build_boxes(np.array([[xs, xf, ys, yf, zs, zf]], dtype=np.int32), np.array([[numID, numIDx, numIDy, numIDz, averaging]], dtype=np.int32), solid, rigidE, rigidH, ID, nthreads)
 
-    if averaging:
-        for i in range(xs, xf):
-            for j in range(ys, yf):
-                for k in range(zs, zf):
-                    solid[i, j, k] = numID
-                    unset_rigid_E(i, j, k, rigidE)
-                    unset_rigid_H(i, j, k, rigidH)
-    else:
-        for i in range(xs, xf):
-            for j in range(ys, yf):
-                for k in range(zs, zf):
-                    solid[i, j, k] = numID
-                    set_rigid_E(i, j, k, rigidE)
-                    set_rigid_H(i, j, k, rigidH)
-
-        for i in range(xs, xf):
-            for j in range(ys, yf + 1):
-                for k in range(zs, zf + 1):
-                    ID[0, i, j, k] = numIDx
-
-        for i in range(xs, xf + 1):
-            for j in range(ys, yf):
-                for k in range(zs, zf + 1):
-                    ID[1, i, j, k] = numIDy
 
-        for i in range(xs, xf + 1):
-            for j in range(ys, yf + 1):
-                for k in range(zs, zf):
-                    ID[2, i, j, k] = numIDz
-
-        for i in range(xs, xf + 1):
-            for j in range(ys, yf):
-                for k in range(zs, zf):
-                    ID[3, i, j, k] = numIDx
+cpdef void build_boxes(
+                    int[:, ::1] boxes,
+                    int[:, ::1] materials,
+                    np.uint32_t[:, :, ::1] solid,
+                    np.int8_t[:, :, :, ::1] rigidE,
+                    np.int8_t[:, :, :, ::1] rigidH,
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
+            ):
+    """Builds a batch of #box commands which sets values in the solid, rigid and ID arrays.
+        The boxes are built in order, i.e. where boxes overlap the last box is built.
 
-        for i in range(xs, xf):
-            for j in range(ys, yf + 1):
-                for k in range(zs, zf):
-                    ID[4, i, j, k] = numIDy
+    Args:
+        boxes (memoryview): Access to array of cell coordinates (xs, xf, ys, yf, zs, zf) of entire boxes.
+        materials (memoryview): Access to array of numeric IDs of materials (numID, numIDx, numIDy, numIDz) and averaging of boxes.
+        solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
+    """
 
-        for i in range(xs, xf):
-            for j in range(ys, yf):
-                for k in range(zs, zf + 1):
-                    ID[5, i, j, k] = numIDz
+    cdef Py_ssize_t n, i, j, k
+    cdef int xs, xf, ys, yf, zs, zf, numID, numIDx, numIDy, numIDz
+    cdef bint averaging
+
+    # Threads share the cells of each box in turn
+    with nogil, parallel(num_threads=nthreads):
+        for n in range(boxes.shape[0]):
+            xs = boxes[n, 0]
+            xf = boxes[n, 1]
+            ys = boxes[n, 2]
+            yf = boxes[n, 3]
+            zs = boxes[n, 4]
+            zf = boxes[n, 5]
+            numID = materials[n, 0]
+            numIDx = materials[n, 1]
+            numIDy = materials[n, 2]
+            numIDz = materials[n, 3]
+            averaging = materials[n, 4]
+
+            if averaging:
+                for i in prange(xs, xf, schedule='static'):
+                    for j in range(ys, yf):
+                        for k in range(zs, zf):
+                            solid[i, j, k] = numID
+                            unset_rigid_E(i, j, k, rigidE)
+                            unset_rigid_H(i, j, k, rigidH)
+            else:
+                for i in prange(xs, xf + 1, schedule='static'):
+                    for j in range(ys, yf + 1):
+                        for k in range(zs, zf + 1):
+                            if i < xf and j < yf and k < zf:
+                                solid[i, j, k] = numID
+                                set_rigid_E(i, j, k, rigidE)
+                                set_rigid_H(i, j, k, rigidH)
+                            if i < xf:
+                                ID[0, i, j, k] = numIDx
+                            if j < yf:
+                                ID[1, i, j, k] = numIDy
+                            if k < zf:
+                                ID[2, i, j, k] = numIDz
+                            if j < yf and k < zf:
+                                ID[3, i, j, k] = numIDx
+                            if i < xf and k < zf:
+                                ID[4, i, j, k] = numIDy
+                            if i < xf and j < yf:
+                                ID[5, i, j, k] = numIDz
 
 
 cpdef void build_cylinder(
@@ -708,7 +918,8 @@ cpdef void build_cylinder(
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
-                    np.uint32_t[:, :, :, ::1] ID
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
             ):
     """Builds #cylinder commands which sets values in the solid, rigid and ID arrays for a Yee voxel.
 
@@ -719,155 +930,247 @@ cpdef void build_cylinder(
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
     """
 
-    cdef Py_ssize_t i, j, k
-    cdef int xs, xf, ys, yf, zs, zf, xc, yc, zc
-    cdef float f1f2mag, f2f1mag, f1ptmag, f2ptmag, dot1, dot2, factor1, factor2, theta1, theta2, distance1, distance2
-    cdef bint build, x_align, y_align, z_align
-    cdef np.ndarray f1f2, f2f1, f1pt, f2pt
-
-    # Check if cylinder is aligned with an axis
-    x_align = y_align = z_align = 0
-    # x-aligned
-    if round_value(y1 / dy) == round_value(y2 / dy) and round_value(z1 / dz) == round_value(z2 / dz):
-        x_align = 1
-
-    # y-aligned
-    elif round_value(x1 / dx) == round_value(x2 / dx) and round_value(z1 / dz) == round_value(z2 / dz):
-        y_align = 1
-
-    # z-aligned
-    elif round_value(x1 / dx) == round_value(x2 / dx) and round_value(y1 / dy) == round_value(y2 / dy):
-        z_align = 1
-
-    # Calculate a bounding box for the cylinder
-    if x1 < x2:
-        if x_align:
-            xs = round_value(x1 / dx)
-            xf = round_value(x2 / dx)
-        else:
-            xs = round_value((x1 - r) / dx) - 1
-            xf = round_value((x2 + r) / dx) + 1
-    else:
-        if x_align:
-            xs = round_value(x2 / dx)
-            xf = round_value(x1 / dx)
-        else:
-            xs = round_value((x2 - r) / dx) - 1
-            xf = round_value((x1 + r) / dx) + 1
-    if y1 < y2:
-        if y_align:
-            ys = round_value(y1 / dy)
-            yf = round_value(y2 / dy)
-        else:
-            ys = round_value((y1 - r) / dy) - 1
-            yf = round_value((y2 + r) / dy) + 1
-    else:
-        if y_align:
-            ys = round_value(y2 / dy)
-            yf = round_value(y1 / dy)
+    build_cylinders(np.array([[x1, y1, z1, x2, y2, z2, r]], dtype=np.float32), dx, dy, dz, np.array([[numID, numIDx, numIDy, numIDz, averaging]], dtype=np.int32), solid, rigidE, rigidH, ID, nthreads)
+
+
+cpdef void build_cylinders(
+                    float[:, ::1] cylinders,
+                    float dx,
+                    float dy,
+                    float dz,
+                    int[:, ::1] materials,
+                    np.uint32_t[:, :, ::1] solid,
+                    np.int8_t[:, :, :, ::1] rigidE,
+                    np.int8_t[:, :, :, ::1] rigidH,
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
+            ):
+    """Builds a batch of #cylinder commands which sets values in the solid, rigid and ID arrays for a Yee voxel.
+        The cylinders are built in order, i.e. where cylinders overlap the last cylinder is built.
+
+    Args:
+        cylinders (memoryview): Access to array of coordinates of the centres of cylinder faces (x1, y1, z1, x2, y2, z2) and radii of cylinders.
+        dx, dy, dz (float): Spatial discretisation.
+        materials (memoryview): Access to array of numeric IDs of materials (numID, numIDx, numIDy, numIDz) and averaging of cylinders.
+        solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
+    """
+
+    cdef Py_ssize_t n, i, j, k
+    cdef int xs, xf, ys, yf, zs, zf, align, numID, numIDx, numIDy, numIDz
+    cdef float x1, y1, z1, x2, y2, z2, r, f1f2mag, f2f1mag
+    cdef bint averaging, build
+    cdef int[:, ::1] bounds = np.zeros((cylinders.shape[0], 7), dtype=np.int32)
+    cdef float[:, ::1] magnitudes = np.zeros((cylinders.shape[0], 2), dtype=np.float32)
+    cdef np.ndarray f1f2, f2f1
+
+    for n in range(cylinders.shape[0]):
+        x1 = cylinders[n, 0]
+        y1 = cylinders[n, 1]
+        z1 = cylinders[n, 2]
+        x2 = cylinders[n, 3]
+        y2 = cylinders[n, 4]
+        z2 = cylinders[n, 5]
+        r = cylinders[n, 6]
+
+        # Check if cylinder is aligned with an axis
+        align = 0
+        # x-aligned
+        if round_value(y1 / dy) == round_value(y2 / dy) and round_value(z1 / dz) == round_value(z2 / dz):
+            align = 1
+
+        # y-aligned
+        elif round_value(x1 / dx) == round_value(x2 / dx) and round_value(z1 / dz) == round_value(z2 / dz):
+            align = 2
+
+        # z-aligned
+        elif round_value(x1 / dx) == round_value(x2 / dx) and round_value(y1 / dy) == round_value(y2 / dy):
+            align = 3
+
+        # Calculate a bounding box for the cylinder
+        if x1 < x2:
+            if align == 1:
+                xs = round_value(x1 / dx)
+                xf = round_value(x2 / dx)
+            else:
+                xs = round_value((x1 - r) / dx) - 1
+                xf = round_value((x2 + r) / dx) + 1
         else:
-            ys = round_value((y2 - r) / dy) - 1
-            yf = round_value((y1 + r) / dy) + 1
-    if z1 < z2:
-        if z_align:
-            zs = round_value(z1 / dz)
-            zf = round_value(z2 / dz)
+            if align == 1:
+                xs = round_value(x2 / dx)
+                xf = round_value(x1 / dx)
+            else:
+                xs = round_value((x2 - r) / dx) - 1
+                xf = round_value((x1 + r) / dx) + 1
+        if y1 < y2:
+            if align == 2:
+                ys = round_value(y1 / dy)
+                yf = round_value(y2 / dy)
+            else:
+                ys = round_value((y1 - r) / dy) - 1
+                yf = round_value((y2 + r) / dy) + 1
         else:
-            zs = round_value((z1 - r) / dz) - 1
-            zf = round_value((z2 + r) / dz) + 1
-    else:
-        if z_align:
-            zs = round_value(z2 / dz)
-            zf = round_value(z1 / dz)
+            if align == 2:
+                ys = round_value(y2 / dy)
+                yf = round_value(y1 / dy)
+            else:
+                ys = round_value((y2 - r) / dy) - 1
+                yf = round_value((y1 + r) / dy) + 1
+        if z1 < z2:
+            if align == 3:
+                zs = round_value(z1 / dz)
+                zf = round_value(z2 / dz)
+            else:
+                zs = round_value((z1 - r) / dz) - 1
+                zf = round_value((z2 + r) / dz) + 1
         else:
-            zs = round_value((z2 - r) / dz) - 1
-            zf = round_value((z1 + r) / dz) + 1
-
-    # Set bounds to domain if they outside
-    if xs < 0:
-        xs = 0
-    if xf > solid.shape[0]:
-        xf = solid.shape[0]
-    if ys < 0:
-        ys = 0
-    if yf > solid.shape[1]:
-        yf = solid.shape[1]
-    if zs < 0:
-        zs = 0
-    if zf > solid.shape[2]:
-        zf = solid.shape[2]
+            if align == 3:
+                zs = round_value(z2 / dz)
+                zf = round_value(z1 / dz)
+            else:
+                zs = round_value((z2 - r) / dz) - 1
+                zf = round_value((z1 + r) / dz) + 1
 
-    # x-aligned cylinder
-    if x_align:
-        for j in range(ys, yf):
-            for k in range(zs, zf):
-                if np.sqrt((j * dy + 0.5 * dy - y1)**2 + (k * dz + 0.5 * dz - z1)**2) <= r:
-                    for i in range(xs, xf):
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
-    # y-aligned cylinder
-    elif y_align:
-        for i in range(xs, xf):
-            for k in range(zs, zf):
-                if np.sqrt((i * dx + 0.5 * dx - x1)**2 + (k * dz + 0.5 * dz - z1)**2) <= r:
-                    for j in range(ys, yf):
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
-    # z-aligned cylinder
-    elif z_align:
-        for i in range(xs, xf):
-            for j in range(ys, yf):
-                if np.sqrt((i * dx + 0.5 * dx - x1)**2 + (j * dy + 0.5 * dy - y1)**2) <= r:
+        # Set bounds to domain if they outside
+        if xs < 0:
+            xs = 0
+        if xf > solid.shape[0]:
+            xf = solid.shape[0]
+        if ys < 0:
+            ys = 0
+        if yf > solid.shape[1]:
+            yf = solid.shape[1]
+        if zs < 0:
+            zs = 0
+        if zf > solid.shape[2]:
+            zf = solid.shape[2]
+
+        bounds[n, 0] = xs
+        bounds[n, 1] = xf
+        bounds[n, 2] = ys
+        bounds[n, 3] = yf
+        bounds[n, 4] = zs
+        bounds[n, 5] = zf
+        bounds[n, 6] = align
+
+        # Magnitudes of vectors between centres of cylinder faces
+        if align == 0:
+            f1f2 = np.array([x2 - x1, y2 - y1, z2 - z1], dtype=np.float32)
+            f2f1 = np.array([x1 - x2, y1 - y2, z1 - z2], dtype=np.float32)
+            magnitudes[n, 0] = np.sqrt((f1f2*f1f2).sum(axis=0))
+            magnitudes[n, 1] = np.sqrt((f2f1*f2f1).sum(axis=0))
+
+    # Threads share the cells of each cylinder in turn
+    with nogil, parallel(num_threads=nthreads):
+        for n in range(cylinders.shape[0]):
+            x1 = cylinders[n, 0]
+            y1 = cylinders[n, 1]
+            z1 = cylinders[n, 2]
+            x2 = cylinders[n, 3]
+            y2 = cylinders[n, 4]
+            z2 = cylinders[n, 5]
+            r = cylinders[n, 6]
+            align = bounds[n, 6]
+            f1f2mag = magnitudes[n, 0]
+            f2f1mag = magnitudes[n, 1]
+            numID = materials[n, 0]
+            numIDx = materials[n, 1]
+            numIDy = materials[n, 2]
+            numIDz = materials[n, 3]
+            averaging = materials[n, 4]
+
+            xs = bounds[n, 0]
+            xf = bounds[n, 1]
+            ys = bounds[n, 2]
+            yf = bounds[n, 3]
+            zs = bounds[n, 4]
+            zf = bounds[n, 5]
+
+            for i in prange(xs, xf, schedule='static'):
+                for j in range(ys, yf):
                     for k in range(zs, zf):
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        # x-aligned cylinder
+                        if align == 1:
+                            build = sqrt((j * dy + 0.5 * dy - y1)**2 + (k * dz + 0.5 * dz - z1)**2) <= r
+                        # y-aligned cylinder
+                        elif align == 2:
+                            build = sqrt((i * dx + 0.5 * dx - x1)**2 + (k * dz + 0.5 * dz - z1)**2) <= r
+                        # z-aligned cylinder
+                        elif align == 3:
+                            build = sqrt((i * dx + 0.5 * dx - x1)**2 + (j * dy + 0.5 * dy - y1)**2) <= r
+                        # Not aligned with any axis
+                        else:
+                            build = is_inside_cylinder(i * dx + 0.5 * dx, j * dy + 0.5 * dy, k * dz + 0.5 * dz, x1, y1, z1, x2, y2, z2, r, f1f2mag, f2f1mag)
+
+                        if build:
+                            build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
-    # Not aligned with any axis
-    else:
-        # Vectors between centres of cylinder faces
-        f1f2 = np.array([x2 - x1, y2 - y1, z2 - z1], dtype=np.float32)
-        f2f1 = np.array([x1 - x2, y1 - y2, z1 - z2], dtype=np.float32)
 
-        # Magnitudes
-        f1f2mag = np.sqrt((f1f2*f1f2).sum(axis=0))
-        f2f1mag = np.sqrt((f2f1*f2f1).sum(axis=0))
+cdef bint is_inside_cylinder(
+                    double px,
+                    double py,
+                    double pz,
+                    float x1,
+                    float y1,
+                    float z1,
+                    float x2,
+                    float y2,
+                    float z2,
+                    float r,
+                    float f1f2mag,
+                    float f2f1mag
+            ) noexcept nogil:
+    """Check if a point is inside a cylinder that is not aligned with an axis.
 
-        for i in range(xs, xf):
-            for j in range(ys, yf):
-                for k in range(zs, zf):
-                    # Build flag - default false, set to True if point is in cylinder
-                    build = 0
-                    # Vector from centre of first cylinder face to test point
-                    f1pt = np.array([i * dx + 0.5 * dx - x1, j * dy + 0.5 * dy - y1, k * dz + 0.5 * dz - z1], dtype=np.float32)
-                    # Vector from centre of second cylinder face to test point
-                    f2pt = np.array([i * dx + 0.5 * dx - x2, j * dy + 0.5 * dy - y2, k * dz + 0.5 * dz - z2], dtype=np.float32)
-                    # Magnitudes
-                    f1ptmag = np.sqrt((f1pt*f1pt).sum(axis=0))
-                    f2ptmag = np.sqrt((f2pt*f2pt).sum(axis=0))
-                    # Dot products
-                    dot1 = np.dot(f1f2, f1pt)
-                    dot2 = np.dot(f2f1, f2pt)
-
-                    if f1ptmag == 0 or f2ptmag == 0:
-                        build = 1
-                    else:
-                        factor1 = dot1 / (f1f2mag * f1ptmag)
-                        factor2 = dot2 / (f2f1mag * f2ptmag)
-                        # Catch cases where either factor1 or factor2 are 1
-                        try:
-                            theta1 = np.arccos(factor1)
-                        except FloatingPointError:
-                            theta1 = 0
-                        try:
-                            theta2 = np.arccos(factor2)
-                        except FloatingPointError:
-                            theta2 = 0
-                        distance1 = f1ptmag * np.sin(theta1)
-                        distance2 = f2ptmag * np.sin(theta2)
-                        if (distance1 <= r or distance2 <= r) and theta1 <= np.pi/2 and theta2 <= np.pi/2:
-                            build = 1
-
-                    if build:
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+    Args:
+        px, py, pz (double): Coordinates of point.
+        x1, y1, z1, x2, y2, z2 (float): Coordinates of the centres of cylinder faces.
+        r (float): Radius of the cylinder.
+        f1f2mag, f2f1mag (float): Magnitudes of the vectors between the centres of cylinder faces.
+
+    Returns:
+        (boolean)
+    """
+
+    cdef float f1ptx, f1pty, f1ptz, f2ptx, f2pty, f2ptz, f1ptmag, f2ptmag, dot1, dot2, factor1, factor2, theta1, theta2, distance1, distance2
+
+    # Vector from centre of first cylinder face to test point
+    f1ptx = <float>(px - x1)
+    f1pty = <float>(py - y1)
+    f1ptz = <float>(pz - z1)
+    # Vector from centre of second cylinder face to test point
+    f2ptx = <float>(px - x2)
+    f2pty = <float>(py - y2)
+    f2ptz = <float>(pz - z2)
+    # Magnitudes
+    f1ptmag = sqrt(f1ptx * f1ptx + f1pty * f1pty + f1ptz * f1ptz)
+    f2ptmag = sqrt(f2ptx * f2ptx + f2pty * f2pty + f2ptz * f2ptz)
+
+    if f1ptmag == 0 or f2ptmag == 0:
+        return True
+
+    # Dot products
+    dot1 = (x2 - x1) * f1ptx + (y2 - y1) * f1pty + (z2 - z1) * f1ptz
+    dot2 = (x1 - x2) * f2ptx + (y1 - y2) * f2pty + (z1 - z2) * f2ptz
+
+    factor1 = dot1 / (f1f2mag * f1ptmag)
+    factor2 = dot2 / (f2f1mag * f2ptmag)
+    # Catch cases where either factor1 or factor2 are (just) greater than 1
+    if factor1 < 1:
+        theta1 = acos(factor1)
+    else:
+        theta1 = 0
+    if factor2 < 1:
+        theta2 = acos(factor2)
+    else:
+        theta2 = 0
+    distance1 = f1ptmag * sin(theta1)
+    distance2 = f2ptmag * sin(theta2)
+
+    return (distance1 <= r or distance2 <= r) and theta1 <= M_PI / 2 and theta2 <= M_PI / 2
 
 
 cpdef void build_sphere(
@@ -886,7 +1189,8 @@ cpdef void build_sphere(
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
-                    np.uint32_t[:, :, :, ::1] ID
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
             ):
     """Builds #sphere commands which sets values in the solid, rigid and ID arrays for a Yee voxel.
 
@@ -897,38 +1201,103 @@ cpdef void build_sphere(
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
     """
 
-    cdef Py_ssize_t i, j, k
-    cdef int xs, xf, ys, yf, zs, zf
+    build_spheres(np.array([[xc, yc, zc]], dtype=np.int32), np.array([r], dtype=np.float32), dx, dy, dz, np.array([[numID, numIDx, numIDy, numIDz, averaging]], dtype=np.int32), solid, rigidE, rigidH, ID, nthreads)
 
-    # Calculate a bounding box for sphere
-    xs = round_value(((xc * dx) - r) / dx) - 1
-    xf = round_value(((xc * dx) + r) / dx) + 1
-    ys = round_value(((yc * dy) - r) / dy) - 1
-    yf = round_value(((yc * dy) + r) / dy) + 1
-    zs = round_value(((zc * dz) - r) / dz) - 1
-    zf = round_value(((zc * dz) + r) / dz) + 1
 
-    # Set bounds to domain if they outside
-    if xs < 0:
-        xs = 0
-    if xf > solid.shape[0]:
-        xf = solid.shape[0]
-    if ys < 0:
-        ys = 0
-    if yf > solid.shape[1]:
-        yf = solid.shape[1]
-    if zs < 0:
-        zs = 0
-    if zf > solid.shape[2]:
-        zf = solid.shape[2]
+cpdef void build_spheres(
+                    int[:, ::1] centres,
+                    float[::1] radii,
+                    float dx,
+                    float dy,
+                    float dz,
+                    int[:, ::1] materials,
+                    np.uint32_t[:, :, ::1] solid,
+                    np.int8_t[:, :, :, ::1] rigidE,
+                    np.int8_t[:, :, :, ::1] rigidH,
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
+            ):
+    """Builds a batch of #sphere commands which sets values in the solid, rigid and ID arrays for a Yee voxel.
+        The spheres are built in order, i.e. where spheres overlap the last sphere is built.
 
-    for i in range(xs, xf):
-        for j in range(ys, yf):
-            for k in range(zs, zf):
-                if np.sqrt((i + 0.5 - xc)**2 * dx**2 + (j + 0.5 - yc)**2 * dy**2 + (k + 0.5 - zc)**2 * dz**2) <= r:
-                    build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+    Args:
+        centres (memoryview): Access to array of cell coordinates of the centres of spheres.
+        radii (memoryview): Access to array of radii of spheres.
+        dx, dy, dz (float): Spatial discretisation.
+        materials (memoryview): Access to array of numeric IDs of materials (numID, numIDx, numIDy, numIDz) and averaging of spheres.
+        solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
+    """
+
+    cdef Py_ssize_t n, i, j, k
+    cdef int xc, yc, zc, xs, xf, ys, yf, zs, zf, numID, numIDx, numIDy, numIDz
+    cdef float r
+    cdef bint averaging
+    cdef int[:, ::1] bounds = np.zeros((centres.shape[0], 6), dtype=np.int32)
+
+    for n in range(centres.shape[0]):
+        xc = centres[n, 0]
+        yc = centres[n, 1]
+        zc = centres[n, 2]
+        r = radii[n]
+
+        # Calculate a bounding box for sphere
+        xs = round_value(((xc * dx) - r) / dx) - 1
+        xf = round_value(((xc * dx) + r) / dx) + 1
+        ys = round_value(((yc * dy) - r) / dy) - 1
+        yf = round_value(((yc * dy) + r) / dy) + 1
+        zs = round_value(((zc * dz) - r) / dz) - 1
+        zf = round_value(((zc * dz) + r) / dz) + 1
+
+        # Set bounds to domain if they outside
+        if xs < 0:
+            xs = 0
+        if xf > solid.shape[0]:
+            xf = solid.shape[0]
+        if ys < 0:
+            ys = 0
+        if yf > solid.shape[1]:
+            yf = solid.shape[1]
+        if zs < 0:
+            zs = 0
+        if zf > solid.shape[2]:
+            zf = solid.shape[2]
+
+        bounds[n, 0] = xs
+        bounds[n, 1] = xf
+        bounds[n, 2] = ys
+        bounds[n, 3] = yf
+        bounds[n, 4] = zs
+        bounds[n, 5] = zf
+
+    # Threads share the cells of each sphere in turn
+    with nogil, parallel(num_threads=nthreads):
+        for n in range(centres.shape[0]):
+            xc = centres[n, 0]
+            yc = centres[n, 1]
+            zc = centres[n, 2]
+            r = radii[n]
+            numID = materials[n, 0]
+            numIDx = materials[n, 1]
+            numIDy = materials[n, 2]
+            numIDz = materials[n, 3]
+            averaging = materials[n, 4]
+
+            xs = bounds[n, 0]
+            xf = bounds[n, 1]
+            ys = bounds[n, 2]
+            yf = bounds[n, 3]
+            zs = bounds[n, 4]
+            zf = bounds[n, 5]
+
+            for i in prange(xs, xf, schedule='static'):
+                for j in range(ys, yf):
+                    for k in range(zs, zf):
+                        if sqrt((i + 0.5 - xc)**2 * dx**2 + (j + 0.5 - yc)**2 * dy**2 + (k + 0.5 - zc)**2 * dz**2) <= r:
+                            build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
 
 cpdef void build_voxels_from_array(
@@ -941,7 +1310,8 @@ cpdef void build_voxels_from_array(
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
-                    np.uint32_t[:, :, :, ::1] ID
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
             ):
     """Builds Yee voxels by reading integers from an array.
 
@@ -951,6 +1321,7 @@ cpdef void build_voxels_from_array(
         averaging (bint): Whether material property averaging will occur for the object.
         data (memoryview): Access to array containing numeric IDs of voxels to create.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
     """
 
     cdef Py_ssize_t i, j, k
@@ -978,13 +1349,24 @@ cpdef void build_voxels_from_array(
     else:
         zf = zs + data.shape[2]
 
-    for i in range(xs, xf):
-        for j in range(ys, yf):
-            for k in range(zs, zf):
-                numID = data[i - xs, j - ys, k - zs]
-                if numID >= 0:
-                    numID += numexistmaterials
-                    build_voxel(i, j, k, numID, numID, numID, numID, averaging, solid, rigidE, rigidH, ID)
+    # Each thread sets the x planes of the arrays it is given, from the voxels
+    # before the plane and then the voxels in the plane, i.e. in the same
+    # order as if the voxels were built one after another
+    for i in prange(xs, xf + 1, nogil=True, schedule='static', num_threads=nthreads):
+        if i > xs:
+            for j in range(ys, yf):
+                for k in range(zs, zf):
+                    numID = data[i - 1 - xs, j - ys, k - zs]
+                    if numID >= 0:
+                        numID = numID + numexistmaterials
+                        build_voxel_next_plane(i - 1, j, k, numID, numID, averaging, ID)
+        if i < xf:
+            for j in range(ys, yf):
+                for k in range(zs, zf):
+                    numID = data[i - xs, j - ys, k - zs]
+                    if numID >= 0:
+                        numID = numID + numexistmaterials
+                        build_voxel_plane(i, j, k, numID, numID, numID, numID, averaging, solid, rigidE, rigidH, ID)
 
 
 cpdef void build_voxels_from_array_mask(
@@ -999,7 +1381,8 @@ cpdef void build_voxels_from_array_mask(
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
-                    np.uint32_t[:, :, :, ::1] ID
+                    np.uint32_t[:, :, :, ::1] ID,
+                    int nthreads
             ):
     """Builds Yee voxels by reading integers from an array.
 
@@ -1010,25 +1393,57 @@ cpdef void build_voxels_from_array_mask(
         data (memoryview): Access to array containing numeric IDs of voxels to create.
         mask (memoryview): Access to array containing a mask of voxels to create.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+        nthreads (int): Number of threads to use
     """
 
     cdef Py_ssize_t i, j, k
-    cdef int xf, yf, zf, numID, numIDx, numIDy, numIDz
+    cdef int xf, yf, zf, numID
 
     # Set upper bounds
     xf = xs + data.shape[0]
     yf = ys + data.shape[1]
     zf = zs + data.shape[2]
 
-    for i in range(xs, xf):
-        for j in range(ys, yf):
-            for k in range(zs, zf):
-                if mask[i - xs, j - ys, k - zs] == 1:
-                    numID = numIDx = numIDy = numIDz = data[i - xs, j - ys, k - zs]
-                    build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
-                elif mask[i - xs, j - ys, k - zs] == 2:
-                    numID = numIDx = numIDy = numIDz = waternumID
-                    build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
-                elif mask[i - xs, j - ys, k - zs] == 3:
-                    numID = numIDx = numIDy = numIDz = grassnumID
-                    build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+    # Each thread sets the x planes of the arrays it is given, from the voxels
+    # before the plane and then the voxels in the plane, i.e. in the same
+    # order as if the voxels were built one after another
+    for i in prange(xs, xf + 1, nogil=True, schedule='static', num_threads=nthreads):
+        if i > xs:
+            for j in range(ys, yf):
+                for k in range(zs, zf):
+                    numID = mask_numID(mask[i - 1 - xs, j - ys, k - zs], data[i - 1 - xs, j - ys, k - zs], waternumID, grassnumID)
+                    if numID >= 0:
+                        build_voxel_next_plane(i - 1, j, k, numID, numID, averaging, ID)
+        if i < xf:
+            for j in range(ys, yf):
+                for k in range(zs, zf):
+                    numID = mask_numID(mask[i - xs, j - ys, k - zs], data[i - xs, j - ys, k - zs], waternumID, grassnumID)
+                    if numID >= 0:
+                        build_voxel_plane(i, j, k, numID, numID, numID, numID, averaging, solid, rigidE, rigidH, ID)
+
+
+cdef int mask_numID(
+                    np.int8_t mask,
+                    np.int16_t data,
+                    int waternumID,
+                    int grassnumID
+            ) noexcept nogil:
+    """Numeric ID of the material of a voxel from a mask of voxels to create.
+
+    Args:
+        mask (int): Value of mask - 1 for the numeric ID from data, 2 for water, 3 for grass, otherwise no voxel.
+        data (int): Numeric ID of voxel.
+        waternumID, grassnumID (int): Numeric ID of water and grass materials.
+
+    Returns:
+        numID (int): Numeric ID of material, or -1 if no voxel is created.
+    """
+
+    if mask == 1:
+        return data
+    elif mask == 2:
+        return waternumID
+    elif mask == 3:
+        return grassnumID
+    else:
+        return -1
@@ -58,11 +58,20 @@ def main():
     parser.add_argument('-restart', type=int, help='model number to restart from, e.g. when creating B-scan')
     parser.add_argument('-mpi', type=int, help='number of MPI tasks, i.e. master + workers')
     parser.add_argument('-mpialt', action='store_true', default=False, help='flag to switch on MPI task farm')
+    parser.add_argument('-mpidomain', action='store_true', default=False, help='flag to decompose each model into subdomains (in the x direction) solved by the MPI tasks, e.g. mpiexec -n 4 python -m gprMax model.in -mpidomain')
     parser.add_argument('--mpi-worker', action='store_true', default=False, help=argparse.SUPPRESS)
     parser.add_argument('-gpu', type=int, action='append', nargs='?', const=True, help='flag to use Nvidia GPU (option to give device ID)')
+    parser.add_argument('-checkpoint', type=float, help='interval (in minutes) between checkpoints of the state of the solver, which are written to a file so that a model can be resumed (CPU solver)')
+    parser.add_argument('-resume', action='store_true', default=False, help='flag to resume models from their checkpoint files (if they exist)')
+    parser.add_argument('-batch', type=int, help='number of models (traces of a B-scan with a fixed geometry, requires --geometry-fixed) to solve together in a single sweep of the grid, with outputs written to a file of merged traces (CPU solver)')
     parser.add_argument('-benchmark', action='store_true', default=False, help='flag to switch on benchmarking mode')
     parser.add_argument('--geometry-only', action='store_true', default=False, help='flag to only build model and produce geometry file(s)')
     parser.add_argument('--geometry-fixed', action='store_true', default=False, help='flag to not reprocess model geometry, e.g. for B-scans where the geometry is fixed')
+    parser.add_argument('--build-cache', help='path to a directory to cache built models in, so models that have been built before are not built again')
+    parser.add_argument('--fractal-cache', help='path to a directory to cache fractal surfaces and volumes (with a seed) in, so they are not generated again')
+    parser.add_argument('--fused-updates', action='store_true', default=False, help='flag to use fused, cache-blocked electric and magnetic field updates (CPU solver, 3D models)')
+    parser.add_argument('--fused-tile-size', type=int, nargs=2, metavar=('TILEX', 'TILEY'), help='size (in cells, x and y) of the tiles of the grid for fused field updates (default 8 8)')
+    parser.add_argument('--brick-updates', action='store_true', default=False, help='flag to use field updates over bricks of cells, with scalar update coefficients in bricks of a single material (CPU solver, 3D models)')
     parser.add_argument('--write-processed', action='store_true', default=False, help='flag to write an input file after any Python code and include commands in the original input file have been processed')
     parser.add_argument('--opt-taguchi', action='store_true', default=False, help='flag to optimise parameters using the Taguchi optimisation method')
     args = parser.parse_args()
@@ -77,11 +86,20 @@ def api(
     restart=None,
     mpi=False,
     mpialt=False,
+    mpidomain=False,
     mpicomm=None,
     gpu=None,
+    checkpoint=None,
+    resume=False,
+    batch=None,
     benchmark=False,
     geometry_only=False,
     geometry_fixed=False,
+    build_cache=None,
+    fractal_cache=None,
+    fused_updates=False,
+    fused_tile_size=None,
+    brick_updates=False,
     write_processed=False,
     opt_taguchi=False
 ):
@@ -101,11 +119,20 @@ def api(
     args.restart = restart
     args.mpi = mpi
     args.mpialt = mpialt
+    args.mpidomain = mpidomain
     args.mpicomm = mpicomm
     args.gpu = gpu
+    args.checkpoint = checkpoint
+    args.resume = resume
+    args.batch = batch
     args.benchmark = benchmark
     args.geometry_only = geometry_only
     args.geometry_fixed = geometry_fixed
+    args.build_cache = build_cache
+    args.fractal_cache = fractal_cache
+    args.fused_updates = fused_updates
+    args.fused_tile_size = fused_tile_size
+    args.brick_updates = brick_updates
     args.write_processed = write_processed
     args.opt_taguchi = opt_taguchi
 
@@ -162,11 +189,22 @@ def run_main(args):
         # Create a separate namespace that users can access in any Python code blocks in the input file
         usernamespace = {'c': c, 'e0': e0, 'm0': m0, 'z0': z0, 'number_model_runs': args.n, 'inputfile': os.path.abspath(inputfile.name)}
 
+        # Batch mode - models with the same geometry solved together on CPU
+        if args.batch and (args.benchmark or args.opt_taguchi or args.mpi or args.mpialt or args.mpidomain or args.task or args.gpu is not None or args.checkpoint or args.resume):
+            raise GeneralError('Batch mode can only be used with the CPU solver, and cannot be combined with benchmarking, Taguchi optimisation, MPI, job array, or checkpoint modes.')
+        # The input file is only processed once for each batch of models
+        if args.batch and not args.geometry_fixed:
+            raise GeneralError('Batch mode requires the geometry to be fixed (--geometry-fixed), i.e. only the positions of simple sources and receivers, moved using #src_steps and #rx_steps, change between models.')
+
+        # Tiles of the grid for fused field updates
+        if getattr(args, 'fused_tile_size', None) and (len(args.fused_tile_size) != 2 or min(args.fused_tile_size) < 1):
+            raise GeneralError('The size of the tiles for fused field updates must be two integers (x and y) of at least one cell.')
+
         #######################################
         # Process for benchmarking simulation #
         #######################################
         if args.benchmark:
-            if args.mpi or args.opt_taguchi or args.task or args.n > 1:
+            if args.mpi or args.mpidomain or args.opt_taguchi or args.task or args.n > 1:
                 raise GeneralError('Benchmarking mode cannot be combined with MPI, job array, or Taguchi optimisation modes, or multiple model runs.')
             run_benchmark_sim(args, inputfile, usernamespace)
 
@@ -196,6 +234,14 @@ def run_main(args):
             elif args.mpialt:
                 run_mpi_alt_sim(args, inputfile, usernamespace)
 
+            # MPI domain decomposition - each model split between MPI tasks with each subdomain parallelised with OpenMP (CPU)
+            elif args.mpidomain:
+                if args.gpu is not None:
+                    raise GeneralError('MPI domain decomposition can only be used with the CPU solver')
+                if args.geometry_fixed:
+                    raise GeneralError('MPI domain decomposition cannot be combined with fixed geometry mode')
+                run_mpi_domain_sim(args, inputfile, usernamespace)
+
             # Standard behaviour - models run serially with each model parallelised with OpenMP (CPU) or CUDA (GPU)
             else:
                 if args.task and args.restart:
@@ -231,7 +277,7 @@ def run_std_sim(args, inputfile, usernamespace, optparams=None):
     numbermodelruns = args.n
 
     tsimstart = perf_counter()
-    for currentmodelrun in range(modelstart, modelend):
+    for currentmodelrun in range(modelstart, modelend, args.batch or 1):
         # If Taguchi optimistaion, add specific value for each parameter to
         # optimise for each experiment to user accessible namespace
         if optparams:
@@ -589,3 +635,38 @@ def run_mpi_alt_sim(args, inputfile, usernamespace, optparams=None):
                 break
 
         comm.send(None, dest=0, tag=tags.EXIT.value)
+
+
+def run_mpi_domain_sim(args, inputfile, usernamespace):
+    """
+    Run MPI domain decomposed simulation - models are run one after another,
+    each model is split into subdomains (in the x direction) that are solved
+    by the MPI tasks, and each subdomain is parallelised using OpenMP (CPU).
+    Only the root task prints information and writes files.
+
+    Args:
+        args (dict): Namespace with command line arguments
+        inputfile (object): File object for the input file.
+        usernamespace (dict): Namespace that can be accessed by user in any
+                Python code blocks in input file.
+    """
+
+    from mpi4py import MPI
+
+    # Get MPI communicator object either through argument or just get comm_world
+    if getattr(args, 'mpicomm', None) is None:
+        args.mpicomm = MPI.COMM_WORLD
+    rank = args.mpicomm.Get_rank()
+    hostname = MPI.Get_processor_name()
+
+    print('MPI domain decomposition (rank {}) on {} using {} tasks\n'.format(rank, hostname, args.mpicomm.Get_size()))
+
+    stdout = sys.stdout
+    if rank != 0:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        run_std_sim(args, inputfile, usernamespace)
+    finally:
+        if rank != 0:
+            sys.stdout.close()
+            sys.stdout = stdout
@@ -94,6 +94,16 @@ class FDTDGrid(Grid):
         # CPU - OpenMP threads
         self.nthreads = 0
 
+        # CPU - fused (cache-blocked) electric and magnetic field updates,
+        # and size of tiles (in x and y) the grid is split into for them
+        self.fusedupdates = False
+        self.fusedtilesize = (8, 8)
+
+        # CPU - field updates over bricks of cells (3D models), with scalar
+        # update coefficients in bricks of a single material, and size of bricks
+        self.brickupdates = False
+        self.bricksize = (16, 16, 16)
+
         # GPU
         # Threads per block
         self.tpb = (256, 1, 1)
@@ -132,6 +142,8 @@ class FDTDGrid(Grid):
         self.mixingmodels = []
         self.averagevolumeobjects = True
         self.fractalvolumes = []
+        # Directory to cache fractal surfaces and volumes (with a seed) in
+        self.fractalcache = None
         self.geometryviews = []
         self.geometryobjectswrite = []
         self.waveforms = []
@@ -143,6 +155,9 @@ class FDTDGrid(Grid):
         self.srcsteps = [0, 0, 0]
         self.rxsteps = [0, 0, 0]
         self.snapshots = []
+        self.snapshotseries = []
+        self.dfts = []
+        self.ntffboxes = []
 
     def initialise_geometry_arrays(self):
         """
@@ -158,27 +173,136 @@ class FDTDGrid(Grid):
         self.ID = np.ones((6, self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.uint32)
         self.IDlookup = {'Ex': 0, 'Ey': 1, 'Ez': 2, 'Hx': 3, 'Hy': 4, 'Hz': 5}
 
+    def compact_geometry_arrays(self):
+        """
+        Convert the solid and ID arrays to the smallest unsigned integer type
+            that can hold the numeric IDs of all materials, i.e. uint8 for
+            up to 256 materials, and uint16 for up to 65536 materials.
+        """
+        dtype = np.min_scalar_type(len(self.materials) - 1)
+        if dtype.itemsize < self.ID.dtype.itemsize:
+            self.solid = self.solid.astype(dtype)
+            self.ID = self.ID.astype(dtype)
+
+    def field_array_shape(self):
+        """
+        Shape of the arrays for the electric and magnetic field components.
+            2D models are a single cell slice of a 3D grid, and the field
+            components are only updated in the plane at the start of the
+            slice, so on CPU only that plane is stored.
+
+        Returns:
+            shape (tuple): Shape of the field arrays.
+        """
+        shape = [self.nx + 1, self.ny + 1, self.nz + 1]
+        if '2D' in self.mode and self.gpu is None:
+            shape['xyz'.index(self.mode[-1])] = 1
+
+        return tuple(shape)
+
+    def zero_field_components(self):
+        """
+        Field components that are always zero, i.e. those that are not
+            updated in 2D models on CPU (the electric field components in the
+            plane, and the magnetic field component normal to it).
+
+        Returns:
+            (tuple): Names of the field components.
+        """
+        if '2D' in self.mode and self.gpu is None:
+            return {'2D TMx': ('Ey', 'Ez', 'Hx'), '2D TMy': ('Ex', 'Ez', 'Hy'), '2D TMz': ('Ex', 'Ey', 'Hz')}[self.mode]
+
+        return ()
+
+    def field_component_updated(self, component, i, j, k):
+        """
+        Check if a field component at a position is updated, i.e. it is in
+            the field arrays (in the plane that is solved in 2D models) and
+            is not always zero.
+
+        Args:
+            component (str): Name of the field component, e.g. Ex.
+            i, j, k (int): Cell coordinates.
+
+        Returns:
+            (bool): True if the field component is updated.
+        """
+        shape = self.field_array_shape()
+
+        return component not in self.zero_field_components() and i < shape[0] and j < shape[1] and k < shape[2]
+
+    def reduce_geometry_arrays(self):
+        """
+        Keep only the plane of the ID array that is solved in 2D models on
+            CPU (see field_array_shape), once the model has been built.
+        """
+        shape = self.field_array_shape()
+        if self.ID.shape[1:] != shape:
+            self.ID = np.ascontiguousarray(self.ID[:, 0:shape[0], 0:shape[1], 0:shape[2]])
+
+    def volume_ID(self):
+        """
+        ID array for the whole volume of the grid, e.g. for geometry outputs.
+            Only the plane that is solved is stored in 2D models on CPU, so
+            it is repeated in the invariant direction.
+
+        Returns:
+            ID (array): ID array.
+        """
+        shape = (6, self.nx + 1, self.ny + 1, self.nz + 1)
+        if self.ID.shape == shape:
+            return self.ID
+
+        return np.ascontiguousarray(np.broadcast_to(self.ID, shape))
+
     def initialise_field_arrays(self):
-        """Initialise arrays for the electric and magnetic field components."""
-        self.Ex = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Ey = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Ez = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hx = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hy = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hz = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
+        """
+        Initialise arrays for the electric and magnetic field components.
+            Field components that are always zero (see zero_field_components)
+            share a single array.
+        """
+        shape = self.field_array_shape()
+        zeros = np.zeros(shape, dtype=floattype) if self.zero_field_components() else None
+        for component in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+            setattr(self, component, zeros if component in self.zero_field_components() else np.zeros(shape, dtype=floattype))
 
     def initialise_std_update_coeff_arrays(self):
         """Initialise arrays for storing update coefficients."""
         self.updatecoeffsE = np.zeros((len(self.materials), 5), dtype=floattype)
         self.updatecoeffsH = np.zeros((len(self.materials), 5), dtype=floattype)
 
+    def find_dispersive_cells(self):
+        """
+        Find the electric field components (that are updated) in dispersive
+            materials, stored as indices into the flattened field arrays for
+            each of the Ex, Ey and Ez components.
+        """
+        dispersive = np.zeros(len(self.materials), dtype=bool)
+        for material in self.materials:
+            dispersive[material.numID] = material.poles > 0
+
+        # Extents of the electric field components that are updated
+        extents = (np.s_[0:self.nx, 1:self.ny, 1:self.nz], np.s_[1:self.nx, 0:self.ny, 1:self.nz], np.s_[1:self.nx, 1:self.ny, 0:self.nz])
+
+        self.dispersivecells = []
+        for component, extent in enumerate(extents):
+            cells = np.zeros(self.field_array_shape(), dtype=bool)
+            cells[extent] = dispersive[self.ID[component][extent]]
+            self.dispersivecells.append(np.flatnonzero(cells).astype(np.int64))
+
     def initialise_dispersive_arrays(self):
         """Initialise arrays for storing coefficients when there are dispersive materials present."""
-        self.Tx = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.Ty = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.Tz = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
         self.updatecoeffsdispersive = np.zeros((len(self.materials), 3 * Material.maxpoles), dtype=complextype)
 
+    def initialise_dispersive_temporary_arrays(self):
+        """
+        Initialise arrays for storing temporary values (for each pole) of the
+            electric field components in dispersive materials, packed in the
+            order of the dispersive cells.
+        """
+        self.Tx, self.Ty, self.Tz = (np.zeros((cells.size, Material.maxpoles), dtype=complextype) for cells in self.dispersivecells)
+        self.phix, self.phiy, self.phiz = (np.zeros(cells.size, dtype=floattype) for cells in self.dispersivecells)
+
     def gpu_set_blocks_per_grid(self):
         """Set the blocks per grid size used for updating the electric and magnetic field arrays on a GPU."""
         self.bpg = (int(np.ceil(((self.nx + 1) * (self.ny + 1) * (self.nz + 1)) / self.tpb[0])), 1, 1)
@@ -201,9 +325,10 @@ class FDTDGrid(Grid):
 
         import pycuda.gpuarray as gpuarray
 
-        self.Tx_gpu = gpuarray.to_gpu(self.Tx)
-        self.Ty_gpu = gpuarray.to_gpu(self.Ty)
-        self.Tz_gpu = gpuarray.to_gpu(self.Tz)
+        # GPU kernels store temporary values for every cell of the grid
+        self.Tx_gpu = gpuarray.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
+        self.Ty_gpu = gpuarray.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
+        self.Tz_gpu = gpuarray.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
         self.updatecoeffsdispersive_gpu = gpuarray.to_gpu(self.updatecoeffsdispersive)
 
 
@@ -246,9 +371,7 @@ def dispersion_analysis(G):
                     if iterations > G.iterations:
                         iterations = G.iterations
 
-                waveformvalues = np.zeros(G.iterations)
-                for iteration in range(G.iterations):
-                    waveformvalues[iteration] = waveform.calculate_value(iteration * G.dt, G.dt)
+                waveformvalues = waveform.calculate_value(np.arange(G.iterations) * G.dt, G.dt)
 
                 # Ensure source waveform is not being overly truncated before attempting any FFT
                 if np.abs(waveformvalues[-1]) < np.abs(np.amax(waveformvalues)) / 100:
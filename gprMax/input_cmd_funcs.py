@@ -270,6 +270,44 @@ def snapshot(xs, ys, zs, xf, yf, zf, dx, dy, dz, time, filename):
     return s, f, d
 
 
+def snapshot_series(xs, ys, zs, xf, yf, zf, dx, dy, dz, interval, start, stop, filename, compression=None, precision=None):
+    """Prints the gprMax #snapshot_series command.
+
+    Args:
+        xs, ys, zs, xf, yf, zf (float): Start and finish coordinates.
+        dx, dy, dz (float): Spatial discretisation of snapshots.
+        interval, start, stop (float): Times in seconds (float) or numbers
+                    of iterations (integer) which denote the interval between
+                    snapshots, and the points in time at which the first and
+                    last snapshots will be taken.
+        filename (str): Filename where snapshots will be stored.
+        compression (str): Lossless compression of snapshots (none, gzip or lzf).
+        precision (str): Precision of stored values (full or half).
+
+    Returns:
+        s, f, d (tuple): 3 namedtuple Coordinate for the start,
+                finish coordinates and spatial discretisation
+    """
+
+    s = Coordinate(xs, ys, zs)
+    f = Coordinate(xf, yf, zf)
+    d = Coordinate(dx, dy, dz)
+
+    times = []
+    for time in (interval, start, stop):
+        if '.' in str(time) or 'e' in str(time):
+            times.append('{:g}'.format(float(time)))
+        else:
+            times.append('{:d}'.format(int(time)))
+
+    if precision is not None and compression is None:
+        compression = 'none'
+
+    command('snapshot_series', s, f, d, *times, filename, compression, precision)
+
+    return s, f, d
+
+
 def edge(xs, ys, zs, xf, yf, zf, material, rotate90origin=()):
     """Prints the gprMax #edge command.
 
@@ -30,17 +30,13 @@ from gprMax.exceptions import CmdInputError
 from gprMax.fractals import FractalSurface
 from gprMax.fractals import FractalVolume
 from gprMax.fractals import Grass
-from gprMax.geometry_primitives_ext import build_edge_x
-from gprMax.geometry_primitives_ext import build_edge_y
-from gprMax.geometry_primitives_ext import build_edge_z
-from gprMax.geometry_primitives_ext import build_face_yz
-from gprMax.geometry_primitives_ext import build_face_xz
-from gprMax.geometry_primitives_ext import build_face_xy
+from gprMax.geometry_primitives_ext import build_edge
+from gprMax.geometry_primitives_ext import build_plate
 from gprMax.geometry_primitives_ext import build_triangle
-from gprMax.geometry_primitives_ext import build_box
-from gprMax.geometry_primitives_ext import build_cylinder
+from gprMax.geometry_primitives_ext import build_boxes
+from gprMax.geometry_primitives_ext import build_cylinders
 from gprMax.geometry_primitives_ext import build_cylindrical_sector
-from gprMax.geometry_primitives_ext import build_sphere
+from gprMax.geometry_primitives_ext import build_spheres
 from gprMax.geometry_primitives_ext import build_voxels_from_array
 from gprMax.geometry_primitives_ext import build_voxels_from_array_mask
 from gprMax.materials import Material
@@ -65,9 +61,18 @@ def process_geometrycmds(geometry, G):
     else:
         tqdmdisable = G.tqdmdisable
 
+    # Consecutive #box, #cylinder or #sphere commands are built together
+    batchcmd = None
+    batch = []
+
     for object in tqdm(geometry, desc='Processing geometry related cmds', unit='cmds', ncols=get_terminal_width() - 1, file=sys.stdout, disable=tqdmdisable):
         tmp = object.split()
 
+        if tmp[0] != batchcmd and batch:
+            build_primitives(batchcmd, batch, G)
+            batch = []
+        batchcmd = tmp[0]
+
         if tmp[0] == '#geometry_objects_read:':
             if len(tmp) != 6:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires exactly five parameters')
@@ -135,7 +140,7 @@ def process_geometrycmds(geometry, G):
                     tqdm.write('Geometry objects from file {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, xs * G.dx, ys * G.dy, zs * G.dz, matfile))
             except KeyError:
                 averaging = False
-                build_voxels_from_array(xs, ys, zs, numexistmaterials, averaging, data, G.solid, G.rigidE, G.rigidH, G.ID)
+                build_voxels_from_array(xs, ys, zs, numexistmaterials, averaging, data, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
                 if G.messages:
                     tqdm.write('Geometry objects from file (voxels only) {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, xs * G.dx, ys * G.dy, zs * G.dz, matfile))
 
@@ -175,25 +180,18 @@ def process_geometrycmds(geometry, G):
             if xs != xf:
                 if ys != yf or zs != zf:
                     raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the edge is not specified correctly')
-                else:
-                    for i in range(xs, xf):
-                        build_edge_x(i, ys, zs, material.numID, G.rigidE, G.rigidH, G.ID)
 
             # y-orientated wire
             elif ys != yf:
                 if xs != xf or zs != zf:
                     raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the edge is not specified correctly')
-                else:
-                    for j in range(ys, yf):
-                        build_edge_y(xs, j, zs, material.numID, G.rigidE, G.rigidH, G.ID)
 
             # z-orientated wire
             elif zs != zf:
                 if xs != xf or ys != yf:
                     raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the edge is not specified correctly')
-                else:
-                    for k in range(zs, zf):
-                        build_edge_z(xs, ys, k, material.numID, G.rigidE, G.rigidH, G.ID)
+
+            build_edge(xs, xf, ys, yf, zs, zf, material.numID, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
                 tqdm.write('Edge from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, tmp[7]))
@@ -269,9 +267,7 @@ def process_geometrycmds(geometry, G):
                     numIDy = materials[0].numID
                     numIDz = materials[1].numID
 
-                for j in range(ys, yf):
-                    for k in range(zs, zf):
-                        build_face_yz(xs, j, k, numIDy, numIDz, G.rigidE, G.rigidH, G.ID)
+                build_plate(xs, xf, ys, yf, zs, zf, numIDy, numIDz, G.rigidE, G.rigidH, G.ID, G.nthreads)
 
             # xz-plane plate
             elif ys == yf:
@@ -284,9 +280,7 @@ def process_geometrycmds(geometry, G):
                     numIDx = materials[0].numID
                     numIDz = materials[1].numID
 
-                for i in range(xs, xf):
-                    for k in range(zs, zf):
-                        build_face_xz(i, ys, k, numIDx, numIDz, G.rigidE, G.rigidH, G.ID)
+                build_plate(xs, xf, ys, yf, zs, zf, numIDx, numIDz, G.rigidE, G.rigidH, G.ID, G.nthreads)
 
             # xy-plane plate
             elif zs == zf:
@@ -299,9 +293,7 @@ def process_geometrycmds(geometry, G):
                     numIDx = materials[0].numID
                     numIDy = materials[1].numID
 
-                for i in range(xs, xf):
-                    for j in range(ys, yf):
-                        build_face_xy(i, j, zs, numIDx, numIDy, G.rigidE, G.rigidH, G.ID)
+                build_plate(xs, xf, ys, yf, zs, zf, numIDx, numIDy, G.rigidE, G.rigidH, G.ID, G.nthreads)
 
             if G.messages:
                 tqdm.write('Plate from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, ', '.join(materialsrequested)))
@@ -414,7 +406,7 @@ def process_geometrycmds(geometry, G):
                     numIDy = materials[1].numID
                     numIDz = materials[2].numID
 
-            build_triangle(x1, y1, z1, x2, y2, z2, x3, y3, z3, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            build_triangle(x1, y1, z1, x2, y2, z2, x3, y3, z3, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
 
             if G.messages:
                 if thickness > 0:
@@ -509,7 +501,7 @@ def process_geometrycmds(geometry, G):
                     # Append the new material object to the materials list
                     G.materials.append(m)
 
-            build_box(xs, xf, ys, yf, zs, zf, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            batch.append(((xs, xf, ys, yf, zs, zf), (numID, numIDx, numIDy, numIDz, averaging)))
 
             if G.messages:
                 if averaging:
@@ -590,7 +582,7 @@ def process_geometrycmds(geometry, G):
                     # Append the new material object to the materials list
                     G.materials.append(m)
 
-            build_cylinder(x1, y1, z1, x2, y2, z2, r, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            batch.append(((x1, y1, z1, x2, y2, z2, r), (numID, numIDx, numIDy, numIDz, averaging)))
 
             if G.messages:
                 if averaging:
@@ -711,7 +703,7 @@ def process_geometrycmds(geometry, G):
                 ctr2 = round_value(ctr2 / G.dy) * G.dy
                 level = round_value(extent1 / G.dz)
 
-            build_cylindrical_sector(ctr1, ctr2, level, sectorstartangle, sectorangle, r, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            build_cylindrical_sector(ctr1, ctr2, level, sectorstartangle, sectorangle, r, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
 
             if G.messages:
                 if thickness > 0:
@@ -790,7 +782,7 @@ def process_geometrycmds(geometry, G):
                     # Append the new material object to the materials list
                     G.materials.append(m)
 
-            build_sphere(xc, yc, zc, r, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            batch.append(((xc, yc, zc), r, (numID, numIDx, numIDy, numIDz, averaging)))
 
             if G.messages:
                 if averaging:
@@ -1225,13 +1217,12 @@ def process_geometrycmds(geometry, G):
                         surface.fractalrange = fractalrange
 
                         # Set the fractal surface using the pre-calculated spatial distribution and a random height
-                        surface.fractalsurface = np.zeros((surface.fractalsurface.shape[0], surface.fractalsurface.shape[1]))
+                        surface.fractalsurface = np.zeros((surface.fractalsurface.shape[0], surface.fractalsurface.shape[1]), dtype=floattype)
                         for i in range(len(bladesindex[0])):
-                                surface.fractalsurface[bladesindex[0][i], bladesindex[1][i]] = R.randint(surface.fractalrange[0], surface.fractalrange[1], size=1)
+                                surface.fractalsurface[bladesindex[0][i], bladesindex[1][i]] = R.randint(surface.fractalrange[0], surface.fractalrange[1], size=1)[0]
 
                         # Create grass geometry parameters
-                        g = Grass(numblades)
-                        g.seed = surface.seed
+                        g = Grass(numblades, surface.seed)
                         surface.grass.append(g)
 
                         # Check to see if grass has been already defined as a material
@@ -1304,212 +1295,15 @@ def process_geometrycmds(geometry, G):
 
                 volume.generate_volume_mask()
 
-                # Apply any rough surfaces and add any surface water to the 3D mask array
-                for surface in volume.fractalsurfaces:
-                    if surface.surfaceID == 'xminus':
-                        for i in range(surface.fractalrange[0], surface.fractalrange[1]):
-                            for j in range(surface.ys, surface.yf):
-                                for k in range(surface.zs, surface.zf):
-                                    if i > surface.fractalsurface[j - surface.ys, k - surface.zs]:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 1
-                                    elif surface.filldepth > 0 and i > surface.filldepth:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 2
-                                    else:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 0
-
-                    elif surface.surfaceID == 'xplus':
-                        if not surface.ID:
-                            for i in range(surface.fractalrange[0], surface.fractalrange[1]):
-                                for j in range(surface.ys, surface.yf):
-                                    for k in range(surface.zs, surface.zf):
-                                        if i < surface.fractalsurface[j - surface.ys, k - surface.zs]:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 1
-                                        elif surface.filldepth > 0 and i < surface.filldepth:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 2
-                                        else:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 0
-                        elif surface.ID == 'grass':
-                            g = surface.grass[0]
-                            # Build the blades of the grass
-                            blade = 0
-                            for j in range(surface.ys, surface.yf):
-                                for k in range(surface.zs, surface.zf):
-                                    if surface.fractalsurface[j - surface.ys, k - surface.zs] > 0:
-                                        height = 0
-                                        for i in range(volume.xs, surface.fractalrange[1]):
-                                            if i < surface.fractalsurface[j - surface.ys, k - surface.zs] and volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] != 1:
-                                                y, z = g.calculate_blade_geometry(blade, height)
-                                                # Add y, z coordinates to existing location
-                                                yy = int(j - volume.ys + y)
-                                                zz = int(k - volume.zs + z)
-                                                # If these coordinates are outwith fractal volume stop building the blade, otherwise set the mask for grass
-                                                if yy < 0 or yy >= volume.mask.shape[1] or zz < 0 or zz >= volume.mask.shape[2]:
-                                                    break
-                                                else:
-                                                    volume.mask[i - volume.xs, yy, zz] = 3
-                                                    height += 1
-                                        blade += 1
-
-                            # Build the roots of the grass
-                            root = 0
-                            for j in range(surface.ys, surface.yf):
-                                for k in range(surface.zs, surface.zf):
-                                    if surface.fractalsurface[j - surface.ys, k - surface.zs] > 0:
-                                        depth = 0
-                                        i = volume.xf - 1
-                                        while i > volume.xs:
-                                            if i > volume.originalxf - (surface.fractalsurface[j - surface.ys, k - surface.zs] - volume.originalxf) and volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] == 1:
-                                                y, z = g.calculate_root_geometry(root, depth)
-                                                # Add y, z coordinates to existing location
-                                                yy = int(j - volume.ys + y)
-                                                zz = int(k - volume.zs + z)
-                                                # If these coordinates are outwith the fractal volume stop building the root, otherwise set the mask for grass
-                                                if yy < 0 or yy >= volume.mask.shape[1] or zz < 0 or zz >= volume.mask.shape[2]:
-                                                    break
-                                                else:
-                                                    volume.mask[i - volume.xs, yy, zz] = 3
-                                                    depth += 1
-                                            i -= 1
-                                        root += 1
-
-                    elif surface.surfaceID == 'yminus':
-                        for i in range(surface.xs, surface.xf):
-                            for j in range(surface.fractalrange[0], surface.fractalrange[1]):
-                                for k in range(surface.zs, surface.zf):
-                                    if j > surface.fractalsurface[i - surface.xs, k - surface.zs]:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 1
-                                    elif surface.filldepth > 0 and j > surface.filldepth:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 2
-                                    else:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 0
-
-                    elif surface.surfaceID == 'yplus':
-                        if not surface.ID:
-                            for i in range(surface.xs, surface.xf):
-                                for j in range(surface.fractalrange[0], surface.fractalrange[1]):
-                                    for k in range(surface.zs, surface.zf):
-                                        if j < surface.fractalsurface[i - surface.xs, k - surface.zs]:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 1
-                                        elif surface.filldepth > 0 and j < surface.filldepth:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 2
-                                        else:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 0
-                        elif surface.ID == 'grass':
-                            g = surface.grass[0]
-                            # Build the blades of the grass
-                            blade = 0
-                            for i in range(surface.xs, surface.xf):
-                                for k in range(surface.zs, surface.zf):
-                                    if surface.fractalsurface[i - surface.xs, k - surface.zs] > 0:
-                                        height = 0
-                                        for j in range(volume.ys, surface.fractalrange[1]):
-                                            if j < surface.fractalsurface[i - surface.xs, k - surface.zs] and volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] != 1:
-                                                x, z = g.calculate_blade_geometry(blade, height)
-                                                # Add x, z coordinates to existing location
-                                                xx = int(i - volume.xs + x)
-                                                zz = int(k - volume.zs + z)
-                                                # If these coordinates are outwith fractal volume stop building the blade, otherwise set the mask for grass
-                                                if xx < 0 or xx >= volume.mask.shape[0] or zz < 0 or zz >= volume.mask.shape[2]:
-                                                    break
-                                                else:
-                                                    volume.mask[xx, j - volume.ys, zz] = 3
-                                                    height += 1
-                                        blade += 1
-
-                            # Build the roots of the grass
-                            root = 0
-                            for i in range(surface.xs, surface.xf):
-                                for k in range(surface.zs, surface.zf):
-                                    if surface.fractalsurface[i - surface.xs, k - surface.zs] > 0:
-                                        depth = 0
-                                        j = volume.yf - 1
-                                        while j > volume.ys:
-                                            if j > volume.originalyf - (surface.fractalsurface[i - surface.xs, k - surface.zs] - volume.originalyf) and volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] == 1:
-                                                x, z = g.calculate_root_geometry(root, depth)
-                                                # Add x, z coordinates to existing location
-                                                xx = int(i - volume.xs + x)
-                                                zz = int(k - volume.zs + z)
-                                                # If these coordinates are outwith the fractal volume stop building the root, otherwise set the mask for grass
-                                                if xx < 0 or xx >= volume.mask.shape[0] or zz < 0 or zz >= volume.mask.shape[2]:
-                                                    break
-                                                else:
-                                                    volume.mask[xx, j - volume.ys, zz] = 3
-                                                    depth += 1
-                                            j -= 1
-                                        root += 1
-
-                    elif surface.surfaceID == 'zminus':
-                        for i in range(surface.xs, surface.xf):
-                            for j in range(surface.ys, surface.yf):
-                                for k in range(surface.fractalrange[0], surface.fractalrange[1]):
-                                    if k > surface.fractalsurface[i - surface.xs, j - surface.ys]:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 1
-                                    elif surface.filldepth > 0 and k > surface.filldepth:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 2
-                                    else:
-                                        volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 0
-
-                    elif surface.surfaceID == 'zplus':
-                        if not surface.ID:
-                            for i in range(surface.xs, surface.xf):
-                                for j in range(surface.ys, surface.yf):
-                                    for k in range(surface.fractalrange[0], surface.fractalrange[1]):
-                                        if k < surface.fractalsurface[i - surface.xs, j - surface.ys]:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 1
-                                        elif surface.filldepth > 0 and k < surface.filldepth:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 2
-                                        else:
-                                            volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] = 0
-                        elif surface.ID == 'grass':
-                            g = surface.grass[0]
-                            # Build the blades of the grass
-                            blade = 0
-                            for i in range(surface.xs, surface.xf):
-                                for j in range(surface.ys, surface.yf):
-                                    if surface.fractalsurface[i - surface.xs, j - surface.ys] > 0:
-                                        height = 0
-                                        for k in range(volume.zs, surface.fractalrange[1]):
-                                            if k < surface.fractalsurface[i - surface.xs, j - surface.ys] and volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] != 1:
-                                                x, y = g.calculate_blade_geometry(blade, height)
-                                                # Add x, y coordinates to existing location
-                                                xx = int(i - volume.xs + x)
-                                                yy = int(j - volume.ys + y)
-                                                # If these coordinates are outwith the fractal volume stop building the blade, otherwise set the mask for grass
-                                                if xx < 0 or xx >= volume.mask.shape[0] or yy < 0 or yy >= volume.mask.shape[1]:
-                                                    break
-                                                else:
-                                                    volume.mask[xx, yy, k - volume.zs] = 3
-                                                    height += 1
-                                        blade += 1
-
-                            # Build the roots of the grass
-                            root = 0
-                            for i in range(surface.xs, surface.xf):
-                                for j in range(surface.ys, surface.yf):
-                                    if surface.fractalsurface[i - surface.xs, j - surface.ys] > 0:
-                                        depth = 0
-                                        k = volume.zf - 1
-                                        while k > volume.zs:
-                                            if k > volume.originalzf - (surface.fractalsurface[i - surface.xs, j - surface.ys] - volume.originalzf) and volume.mask[i - volume.xs, j - volume.ys, k - volume.zs] == 1:
-                                                x, y = g.calculate_root_geometry(root, depth)
-                                                # Add x, y coordinates to existing location
-                                                xx = int(i - volume.xs + x)
-                                                yy = int(j - volume.ys + y)
-                                                # If these coordinates are outwith the fractal volume stop building the root, otherwise set the mask for grass
-                                                if xx < 0 or xx >= volume.mask.shape[0] or yy < 0 or yy >= volume.mask.shape[1]:
-                                                    break
-                                                else:
-                                                    volume.mask[xx, yy, k - volume.zs] = 3
-                                                    depth += 1
-                                            k -= 1
-                                        root += 1
+                # Apply any rough surfaces, surface water and grass/roots to the 3D mask array
+                volume.apply_fractal_surfaces(G)
 
                 # Build voxels from any true values of the 3D mask array
                 waternumID = next((x.numID for x in G.materials if x.ID == 'water'), 0)
                 grassnumID = next((x.numID for x in G.materials if x.ID == 'grass'), 0)
                 data = volume.fractalvolume.astype('int16', order='C')
                 mask = volume.mask.copy(order='C')
-                build_voxels_from_array_mask(volume.xs, volume.ys, volume.zs, waternumID, grassnumID, volume.averaging, mask, data, G.solid, G.rigidE, G.rigidH, G.ID)
+                build_voxels_from_array_mask(volume.xs, volume.ys, volume.zs, waternumID, grassnumID, volume.averaging, mask, data, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
 
             else:
                 if volume.nbins == 1:
@@ -1519,4 +1313,36 @@ def process_geometrycmds(geometry, G):
                     volume.fractalvolume += mixingmodel.startmaterialnum
 
                 data = volume.fractalvolume.astype('int16', order='C')
-                build_voxels_from_array(volume.xs, volume.ys, volume.zs, 0, volume.averaging, data, G.solid, G.rigidE, G.rigidH, G.ID)
+                build_voxels_from_array(volume.xs, volume.ys, volume.zs, 0, volume.averaging, data, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
+
+    if batch:
+        build_primitives(batchcmd, batch, G)
+
+
+def build_primitives(cmd, batch, G):
+    """
+    This function builds a batch of consecutive #box, #cylinder or #sphere
+    commands, i.e. sets the solid, rigid and ID arrays, in the order the
+    commands were given.
+
+    Args:
+        cmd (str): Name of the commands in the batch.
+        batch (list): Parameters of the commands, i.e. coordinates, and numeric IDs of materials and averaging.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    if cmd == '#box:':
+        boxes = np.array([box for box, materials in batch], dtype=np.int32)
+        materials = np.array([materials for box, materials in batch], dtype=np.int32)
+        build_boxes(boxes, materials, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
+
+    elif cmd == '#cylinder:':
+        cylinders = np.array([cylinder for cylinder, materials in batch], dtype=np.float32)
+        materials = np.array([materials for cylinder, materials in batch], dtype=np.int32)
+        build_cylinders(cylinders, G.dx, G.dy, G.dz, materials, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
+
+    elif cmd == '#sphere:':
+        centres = np.array([centre for centre, r, materials in batch], dtype=np.int32)
+        radii = np.array([r for centre, r, materials in batch], dtype=np.float32)
+        materials = np.array([materials for centre, r, materials in batch], dtype=np.int32)
+        build_spheres(centres, radii, G.dx, G.dy, G.dz, materials, G.solid, G.rigidE, G.rigidH, G.ID, G.nthreads)
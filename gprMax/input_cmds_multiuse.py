@@ -20,20 +20,21 @@ from colorama import init
 from colorama import Fore
 from colorama import Style
 init()
-import numpy as np
 from tqdm import tqdm
 
 from gprMax.constants import z0
-from gprMax.constants import floattype
+from gprMax.dft_outputs import DFTOutput
 from gprMax.exceptions import CmdInputError
 from gprMax.geometry_outputs import GeometryView
 from gprMax.geometry_outputs import GeometryObjects
 from gprMax.materials import Material
 from gprMax.materials import PeplinskiSoil
+from gprMax.ntff import NTFFBox
 from gprMax.pml import CFSParameter
 from gprMax.pml import CFS
 from gprMax.receivers import Rx
 from gprMax.snapshots import Snapshot
+from gprMax.snapshots import SnapshotSeries
 from gprMax.sources import VoltageSource
 from gprMax.sources import HertzianDipole
 from gprMax.sources import MagneticDipole
@@ -405,12 +406,13 @@ def process_multicmds(multicmds, G):
             r.xcoordorigin = xcoord
             r.ycoordorigin = ycoord
             r.zcoordorigin = zcoord
+            r.sampling = range(G.iterations)
 
             # If no ID or outputs are specified, use default
             if len(tmp) == 3:
                 r.ID = r.__class__.__name__ + '(' + str(r.xcoord) + ',' + str(r.ycoord) + ',' + str(r.zcoord) + ')'
                 for key in Rx.defaultoutputs:
-                    r.outputs[key] = np.zeros(G.iterations, dtype=floattype)
+                    r.outputs[key] = None
             else:
                 r.ID = tmp[3]
                 # Get allowable outputs
@@ -421,7 +423,7 @@ def process_multicmds(multicmds, G):
                 # Check and add field output names
                 for field in tmp[4::]:
                     if field in allowableoutputs:
-                        r.outputs[field] = np.zeros(G.iterations, dtype=floattype)
+                        r.outputs[field] = None
                     else:
                         raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' contains an output type that is not allowable. Allowable outputs in current context are {}'.format(allowableoutputs))
 
@@ -435,8 +437,8 @@ def process_multicmds(multicmds, G):
     if multicmds[cmdname] is not None:
         for cmdinstance in multicmds[cmdname]:
             tmp = cmdinstance.split()
-            if len(tmp) != 9:
-                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires exactly nine parameters')
+            if len(tmp) != 9 and len(tmp) != 12:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires exactly nine or twelve parameters')
 
             xs = G.calculate_coord('x', tmp[0])
             ys = G.calculate_coord('y', tmp[1])
@@ -475,8 +477,35 @@ def process_multicmds(multicmds, G):
                 else:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than the spatial discretisation')
 
+            # Sampling interval and time gate - if numbers of iterations given,
+            # otherwise real floating point values (times)
+            sampling = range(G.iterations)
+            if len(tmp) == 12:
+                interval, start, stop = tmp[9:12]
+                try:
+                    interval = int(interval)
+                except ValueError:
+                    interval = round_value(float(interval) / G.dt)
+                try:
+                    start = int(start)
+                except ValueError:
+                    start = round_value(float(start) / G.dt)
+                try:
+                    stop = int(stop)
+                except ValueError:
+                    stop = round_value(float(stop) / G.dt)
+                if interval < 1:
+                    raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the sampling interval should not be less than the time step')
+                if start < 0 or start >= G.iterations:
+                    raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the start of the time gate should be within the time window')
+                if stop < start:
+                    raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the start of the time gate should be before the end of the time gate')
+                sampling = range(start, min(stop + 1, G.iterations), interval)
+
             if G.messages:
                 print('Receiver array {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with steps {:g}m, {:g}m, {:g}m'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, dx * G.dx, dy * G.dy, dz * G.dz))
+                if len(tmp) == 12:
+                    print('  Output components sampled every {:g} secs from {:g} secs to {:g} secs'.format(sampling.step * G.dt, sampling[0] * G.dt, sampling[-1] * G.dt))
 
             for x in range(xs, xf + 1, dx):
                 for y in range(ys, yf + 1, dy):
@@ -488,9 +517,10 @@ def process_multicmds(multicmds, G):
                         r.xcoordorigin = x
                         r.ycoordorigin = y
                         r.zcoordorigin = z
+                        r.sampling = sampling
                         r.ID = r.__class__.__name__ + '(' + str(x) + ',' + str(y) + ',' + str(z) + ')'
                         for key in Rx.defaultoutputs:
-                            r.outputs[key] = np.zeros(G.iterations, dtype=floattype)
+                            r.outputs[key] = None
                         if G.messages:
                             print('  Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(r.xcoord * G.dx, r.ycoord * G.dy, r.zcoord * G.dz, ', '.join(r.outputs)))
                         G.rxs.append(r)
@@ -549,6 +579,192 @@ def process_multicmds(multicmds, G):
 
             G.snapshots.append(s)
 
+    # Series of snapshots
+    cmdname = '#snapshot_series'
+    if multicmds[cmdname] is not None:
+        for cmdinstance in multicmds[cmdname]:
+            tmp = cmdinstance.split()
+            if len(tmp) < 13 or len(tmp) > 15:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires between thirteen and fifteen parameters')
+
+            if G.gpu is not None:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' The #snapshot_series command cannot currently be used with GPU solving.')
+
+            xs = G.calculate_coord('x', tmp[0])
+            ys = G.calculate_coord('y', tmp[1])
+            zs = G.calculate_coord('z', tmp[2])
+
+            xf = G.calculate_coord('x', tmp[3])
+            yf = G.calculate_coord('y', tmp[4])
+            zf = G.calculate_coord('z', tmp[5])
+
+            dx = G.calculate_coord('x', tmp[6])
+            dy = G.calculate_coord('y', tmp[7])
+            dz = G.calculate_coord('z', tmp[8])
+
+            # Interval, and start and stop times - if numbers of iterations
+            # given, otherwise real floating point values (times)
+            try:
+                interval = int(tmp[9])
+            except ValueError:
+                interval = round_value(float(tmp[9]) / G.dt)
+            times = []
+            for time in tmp[10:12]:
+                try:
+                    time = int(time)
+                except ValueError:
+                    time = float(time)
+                    if time > 0:
+                        time = round_value((time / G.dt)) + 1
+                    else:
+                        raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' time values must be greater than zero')
+                times.append(time)
+            start, stop = times
+
+            compression = tmp[13].lower() if len(tmp) > 13 else 'none'
+            precision = tmp[14].lower() if len(tmp) > 14 else 'full'
+
+            check_coordinates(xs, ys, zs, name='lower')
+            check_coordinates(xf, yf, zf, name='upper')
+
+            if xs >= xf or ys >= yf or zs >= zf:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
+            if dx < 0 or dy < 0 or dz < 0:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than zero')
+            if dx < 1 or dy < 1 or dz < 1:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than the spatial discretisation')
+            if interval < 1:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the interval should not be less than the time step')
+            if start <= 0 or start > G.iterations:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' start time value is not valid')
+            if stop < start:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the start time should be before the stop time')
+            if compression not in SnapshotSeries.compressions:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' must have one of the following compression types {}'.format(','.join(SnapshotSeries.compressions)))
+            if precision not in ['full', 'half']:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' precision must be full or half')
+
+            s = SnapshotSeries(xs, ys, zs, xf, yf, zf, dx, dy, dz, range(start, min(stop, G.iterations) + 1, interval), tmp[12], compression, precision == 'half')
+
+            if G.messages:
+                print('Snapshot series from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, discretisation {:g}m, {:g}m, {:g}m, every {:g} secs from {:g} secs to {:g} secs with filename {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, dx * G.dx, dy * G.dy, dz * G.dz, interval * G.dt, s.times[0] * G.dt, s.times[-1] * G.dt, s.basefilename))
+
+            G.snapshotseries.append(s)
+
+    # Running discrete Fourier transforms of field components
+    cmdname = '#dft'
+    if multicmds[cmdname] is not None:
+        for cmdinstance in multicmds[cmdname]:
+            tmp = cmdinstance.split()
+            if len(tmp) < 11:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires at least eleven parameters')
+
+            if G.gpu is not None:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' The #dft command cannot currently be used with GPU solving.')
+
+            xs = G.calculate_coord('x', tmp[0])
+            ys = G.calculate_coord('y', tmp[1])
+            zs = G.calculate_coord('z', tmp[2])
+
+            xf = G.calculate_coord('x', tmp[3])
+            yf = G.calculate_coord('y', tmp[4])
+            zf = G.calculate_coord('z', tmp[5])
+
+            dx = G.calculate_coord('x', tmp[6])
+            dy = G.calculate_coord('y', tmp[7])
+            dz = G.calculate_coord('z', tmp[8])
+
+            check_coordinates(xs, ys, zs, name='lower')
+            check_coordinates(xf, yf, zf, name='upper')
+
+            if xs > xf or ys > yf or zs > zf:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
+            if dx < 0 or dy < 0 or dz < 0:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than zero')
+            if dx < 1:
+                if dx == 0:
+                    dx = 1
+                else:
+                    raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than the spatial discretisation')
+            if dy < 1:
+                if dy == 0:
+                    dy = 1
+                else:
+                    raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than the spatial discretisation')
+            if dz < 1:
+                if dz == 0:
+                    dz = 1
+                else:
+                    raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than the spatial discretisation')
+            if any(x.ID == tmp[9] for x in G.dfts):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' with ID {} already exists'.format(tmp[9]))
+
+            frequencies = [float(frequency) for frequency in tmp[10:]]
+            if any(frequency < 0 or frequency > 1 / (2 * G.dt) for frequency in frequencies):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' frequencies should be between zero and the Nyquist frequency of the time step ({:g} Hz)'.format(1 / (2 * G.dt)))
+
+            d = DFTOutput(xs, ys, zs, xf, yf, zf, dx, dy, dz, frequencies, tmp[9])
+            nx, ny, nz = d.shape()
+
+            if G.messages:
+                print('DFT output {} from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, with steps {:g}m, {:g}m, {:g}m, at {} point(s) and frequencies {} Hz created.'.format(d.ID, xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, dx * G.dx, dy * G.dy, dz * G.dz, nx * ny * nz, ', '.join('{:g}'.format(frequency) for frequency in frequencies)))
+
+            G.dfts.append(d)
+
+    # Near-to-far-field transformations
+    cmdname = '#ntff_box'
+    if multicmds[cmdname] is not None:
+        for cmdinstance in multicmds[cmdname]:
+            tmp = cmdinstance.split()
+            if len(tmp) < 14:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires at least fourteen parameters')
+
+            if G.gpu is not None:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' The #ntff_box command cannot currently be used with GPU solving.')
+
+            xs = G.calculate_coord('x', tmp[0])
+            ys = G.calculate_coord('y', tmp[1])
+            zs = G.calculate_coord('z', tmp[2])
+
+            xf = G.calculate_coord('x', tmp[3])
+            yf = G.calculate_coord('y', tmp[4])
+            zf = G.calculate_coord('z', tmp[5])
+
+            check_coordinates(xs, ys, zs, name='lower')
+            check_coordinates(xf, yf, zf, name='upper')
+
+            if xs >= xf or ys >= yf or zs >= zf:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
+            if xs < 1 or ys < 1 or zs < 1 or xf > G.nx - 1 or yf > G.ny - 1 or zf > G.nz - 1:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the box should be at least one cell inside the model domain')
+            if xs < G.pmlthickness['x0'] or xf > G.nx - G.pmlthickness['xmax'] or ys < G.pmlthickness['y0'] or yf > G.ny - G.pmlthickness['ymax'] or zs < G.pmlthickness['z0'] or zf > G.nz - G.pmlthickness['zmax']:
+                print(Fore.RED + "WARNING: '" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the box should not normally be positioned within the PML.' + Style.RESET_ALL)
+            if any(x.ID == tmp[6] for x in G.ntffboxes):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' with ID {} already exists'.format(tmp[6]))
+
+            theta = tuple(float(x) for x in tmp[7:10])
+            phi = tuple(float(x) for x in tmp[10:13])
+            if theta[0] < 0 or theta[1] > 180 or theta[1] < theta[0] or phi[1] < phi[0]:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' theta should be from zero to 180 degrees, and the start angles should be before the stop angles')
+            if theta[2] < 0 or phi[2] < 0:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the angle steps should not be less than zero')
+
+            frequencies = [float(frequency) for frequency in tmp[13:]]
+            if any(frequency <= 0 or frequency > 1 / (2 * G.dt) for frequency in frequencies):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' frequencies should be greater than zero and not greater than the Nyquist frequency of the time step ({:g} Hz)'.format(1 / (2 * G.dt)))
+
+            n = NTFFBox(xs, ys, zs, xf, yf, zf, theta, phi, frequencies, tmp[6])
+
+            # DFTs of the faces of the box are found with the other DFT outputs
+            for d in n.face_dfts():
+                n.dftindices.append(len(G.dfts))
+                G.dfts.append(d)
+
+            if G.messages:
+                print('Near-to-far-field transformation {} on box from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, at {} theta and {} phi angle(s), and frequencies {} Hz created.'.format(n.ID, xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, len(n.theta), len(n.phi), ', '.join('{:g}'.format(frequency) for frequency in frequencies)))
+
+            G.ntffboxes.append(n)
+
     # Materials
     cmdname = '#material'
     if multicmds[cmdname] is not None:
@@ -27,23 +27,36 @@ from colorama import init
 from colorama import Fore
 from colorama import Style
 init()
+import h5py
 import numpy as np
 from terminaltables import AsciiTable
 from tqdm import tqdm
 
+from gprMax.batch import initialise_batch_field_arrays
+from gprMax.batch import Shot
+from gprMax.build_cache import BuildCache
+from gprMax.checkpoint import Checkpoint
 from gprMax.constants import floattype, cudafloattype, cudacomplextype
+from gprMax.domain_decomposition import SubDomain
 from gprMax.exceptions import GeneralError
 
 from gprMax.fields_outputs import store_outputs
 from gprMax.fields_outputs import kernel_template_store_outputs
 from gprMax.fields_outputs import write_hdf5_outputfile
+from gprMax.fields_outputs import write_hdf5_merged_outputfile
 
 from gprMax.fields_updates_ext import update_electric
 from gprMax.fields_updates_ext import update_magnetic
-from gprMax.fields_updates_ext import update_electric_dispersive_multipole_A
-from gprMax.fields_updates_ext import update_electric_dispersive_multipole_B
-from gprMax.fields_updates_ext import update_electric_dispersive_1pole_A
-from gprMax.fields_updates_ext import update_electric_dispersive_1pole_B
+from gprMax.fields_updates_ext import update_electric_dispersive_A
+from gprMax.fields_updates_ext import update_electric_dispersive_phi
+from gprMax.fields_updates_ext import update_electric_dispersive_B
+from gprMax.fields_updates_ext import update_fields_fused
+from gprMax.fields_updates_ext import update_electric_outside_box
+from gprMax.fields_updates_ext import update_electric_cells
+from gprMax.fields_updates_ext import update_electric_bricks
+from gprMax.fields_updates_ext import update_magnetic_bricks
+from gprMax.fields_updates_ext import update_electric_batch
+from gprMax.fields_updates_ext import update_magnetic_batch
 from gprMax.fields_updates_gpu import kernels_template_fields
 
 from gprMax.grid import FDTDGrid
@@ -57,11 +70,21 @@ from gprMax.input_cmds_singleuse import process_singlecmds
 from gprMax.materials import Material, process_materials
 from gprMax.pml import PML
 from gprMax.pml import build_pmls
+from gprMax.pml_updates_ext import update_pml_electric
+from gprMax.pml_updates_ext import update_pml_magnetic
 from gprMax.pml_updates_gpu import kernels_template_pml
+from gprMax.receivers import initialise_rx_stores
+from gprMax.receivers import rx_outputs_size
+from gprMax.receivers import RxStore
 from gprMax.receivers import gpu_initialise_rx_arrays
 from gprMax.receivers import gpu_get_rx_array
+from gprMax.sources import initialise_src_arrays
 from gprMax.sources import gpu_initialise_src_arrays
+from gprMax.source_updates_ext import update_hertzian_dipole
+from gprMax.source_updates_ext import update_magnetic_dipole
+from gprMax.source_updates_ext import update_voltage_source
 from gprMax.source_updates_gpu import kernels_template_sources
+from gprMax.utilities import BackgroundWriter
 from gprMax.utilities import get_host_info
 from gprMax.utilities import get_terminal_width
 from gprMax.utilities import human_size
@@ -97,6 +120,9 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
     # Used for naming geometry and output files
     appendmodelnumber = '' if numbermodelruns == 1 and not args.task and not args.restart else str(currentmodelrun)
 
+    # Each model decomposed into subdomains solved by MPI tasks
+    mpidomain = getattr(args, 'mpidomain', False)
+
     # Normal model reading/building process; bypassed if geometry information to be reused
     if 'G' not in globals():
 
@@ -110,6 +136,17 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         if args.gpu:
             G.gpu = args.gpu
 
+        # Fused (cache-blocked) field updates on CPU
+        G.fusedupdates = args.fused_updates
+        if getattr(args, 'fused_tile_size', None):
+            G.fusedtilesize = tuple(args.fused_tile_size)
+
+        # Field updates over bricks of cells on CPU
+        G.brickupdates = args.brick_updates
+
+        # Directory to cache fractal surfaces and volumes in
+        G.fractalcache = getattr(args, 'fractal_cache', None)
+
         G.inputfilename = os.path.split(inputfile.name)[1]
         G.inputdirectory = os.path.dirname(os.path.abspath(inputfile.name))
         inputfilestr = '\n--- Model {}/{}, input file: {}'.format(currentmodelrun, modelend, inputfile.name)
@@ -136,6 +173,10 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         # Check validity of command names and that essential commands are present
         singlecmds, multicmds, geometry = check_cmd_names(processedlines)
 
+        # Maximum number of dispersive poles is found from the materials of
+        # this model, not those of any model processed before it
+        Material.maxpoles = 0
+
         # Create built-in materials
         m = Material(0, 'pec')
         m.se = float('inf')
@@ -153,67 +194,94 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         print()
         process_multicmds(multicmds, G)
 
-        # Initialise an array for volumetric material IDs (solid), boolean
-        # arrays for specifying materials not to be averaged (rigid),
-        # an array for cell edge IDs (ID)
-        G.initialise_geometry_arrays()
-
-        # Initialise arrays for the field components
-        G.initialise_field_arrays()
-
-        # Process geometry commands in the order they were given
-        process_geometrycmds(geometry, G)
+        # Geometry arrays, materials and PMLs of a model that has been built
+        # before can be loaded from the build cache
+        buildcache = None
+        if getattr(args, 'build_cache', None):
+            buildcache = BuildCache(args.build_cache, processedlines, G)
+            if not buildcache.cacheable:
+                print(Fore.RED + 'WARNING: Build cache not used as the model contains fractal geometry without a seed.\n' + Style.RESET_ALL)
 
-        # Build the PMLs and calculate initial coefficients
-        print()
-        if all(value == 0 for value in G.pmlthickness.values()):
+        if buildcache and buildcache.load(G):
             if G.messages:
-                print('PML boundaries: switched off')
-            pass  # If all the PMLs are switched off don't need to build anything
+                print('Geometry, materials and PMLs loaded from build cache: {}'.format(buildcache.path))
+
         else:
-            if G.messages:
-                if all(value == G.pmlthickness['x0'] for value in G.pmlthickness.values()):
-                    pmlinfo = str(G.pmlthickness['x0']) + ' cells'
-                else:
-                    pmlinfo = ''
-                    for key, value in G.pmlthickness.items():
-                        pmlinfo += '{}: {} cells, '.format(key, value)
-                    pmlinfo = pmlinfo[:-2]
-                print('PML boundaries: {}'.format(pmlinfo))
-            pbar = tqdm(total=sum(1 for value in G.pmlthickness.values() if value > 0), desc='Building PML boundaries', ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable)
-            build_pmls(G, pbar)
+            # Initialise an array for volumetric material IDs (solid), boolean
+            # arrays for specifying materials not to be averaged (rigid),
+            # an array for cell edge IDs (ID)
+            G.initialise_geometry_arrays()
+
+            # Process geometry commands in the order they were given
+            process_geometrycmds(geometry, G)
+
+            # Build the PMLs and calculate initial coefficients
+            print()
+            if all(value == 0 for value in G.pmlthickness.values()):
+                if G.messages:
+                    print('PML boundaries: switched off')
+                pass  # If all the PMLs are switched off don't need to build anything
+            else:
+                if G.messages:
+                    if all(value == G.pmlthickness['x0'] for value in G.pmlthickness.values()):
+                        pmlinfo = str(G.pmlthickness['x0']) + ' cells'
+                    else:
+                        pmlinfo = ''
+                        for key, value in G.pmlthickness.items():
+                            pmlinfo += '{}: {} cells, '.format(key, value)
+                        pmlinfo = pmlinfo[:-2]
+                    print('PML boundaries: {}'.format(pmlinfo))
+                pbar = tqdm(total=sum(1 for value in G.pmlthickness.values() if value > 0), desc='Building PML boundaries', ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable)
+                build_pmls(G, pbar)
+                pbar.close()
+
+            # Build the model, i.e. set the material properties (ID) for every edge
+            # of every Yee cell
+            print()
+            pbar = tqdm(total=2, desc='Building main grid', ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable)
+            build_electric_components(G.solid, G.rigidE, G.ID, G)
+            pbar.update()
+            build_magnetic_components(G.solid, G.rigidH, G.ID, G)
+            pbar.update()
             pbar.close()
 
-        # Build the model, i.e. set the material properties (ID) for every edge
-        # of every Yee cell
-        print()
-        pbar = tqdm(total=2, desc='Building main grid', ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable)
-        build_electric_components(G.solid, G.rigidE, G.ID, G)
-        pbar.update()
-        build_magnetic_components(G.solid, G.rigidH, G.ID, G)
-        pbar.update()
-        pbar.close()
-
-        # Add PEC boundaries to invariant direction in 2D modes
-        # N.B. 2D modes are a single cell slice of 3D grid
-        if '2D TMx' in G.mode:
-            # Ey & Ez components
-            G.ID[1,0,:,:] = 0
-            G.ID[1,1,:,:] = 0
-            G.ID[2,0,:,:] = 0
-            G.ID[2,1,:,:] = 0
-        elif '2D TMy' in G.mode:
-            # Ex & Ez components
-            G.ID[0,:,0,:] = 0
-            G.ID[0,:,1,:] = 0
-            G.ID[2,:,0,:] = 0
-            G.ID[2,:,1,:] = 0
-        elif '2D TMz' in G.mode:
-            # Ex & Ey components
-            G.ID[0,:,:,0] = 0
-            G.ID[0,:,:,1] = 0
-            G.ID[1,:,:,0] = 0
-            G.ID[1,:,:,1] = 0
+            # Add PEC boundaries to invariant direction in 2D modes
+            # N.B. 2D modes are a single cell slice of 3D grid
+            if '2D TMx' in G.mode:
+                # Ey & Ez components
+                G.ID[1,0,:,:] = 0
+                G.ID[1,1,:,:] = 0
+                G.ID[2,0,:,:] = 0
+                G.ID[2,1,:,:] = 0
+            elif '2D TMy' in G.mode:
+                # Ex & Ez components
+                G.ID[0,:,0,:] = 0
+                G.ID[0,:,1,:] = 0
+                G.ID[2,:,0,:] = 0
+                G.ID[2,:,1,:] = 0
+            elif '2D TMz' in G.mode:
+                # Ex & Ey components
+                G.ID[0,:,:,0] = 0
+                G.ID[0,:,:,1] = 0
+                G.ID[1,:,:,0] = 0
+                G.ID[1,:,:,1] = 0
+
+            # Save the built model to the build cache
+            if buildcache and buildcache.cacheable:
+                buildcache.save(G)
+                if G.messages:
+                    print('\nGeometry, materials and PMLs saved to build cache: {}'.format(buildcache.path))
+
+        # Only the plane of the ID array that is solved is kept in 2D models
+        G.reduce_geometry_arrays()
+
+        # Initialise arrays for the field components, and for the fields in
+        # the PMLs (for the subdomain of each task once the grid has been
+        # split if it is decomposed between MPI tasks)
+        if not mpidomain:
+            G.initialise_field_arrays()
+            for pml in G.pmls:
+                pml.initialise_field_arrays()
 
         # Process any voltage sources (that have resistance) to create a new
         # material at the source location
@@ -226,20 +294,27 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         # Initialise arrays of update coefficients and temporary values if
         # there are any dispersive materials
         if Material.maxpoles != 0:
-            # Update estimated memory (RAM) usage
-            memestimate = memory_usage(G)
-            # Check if model can be built and/or run on host
-            if memestimate > G.hostinfo['ram']:
-                raise GeneralError('Estimated memory (RAM) required ~{} exceeds {} detected!\n'.format(human_size(memestimate), human_size(G.hostinfo['ram'], a_kilobyte_is_1024_bytes=True)))
-
-            # Check if model can be run on specified GPU if required
-            if G.gpu is not None:
-                if memestimate > G.gpu.totalmem:
-                    raise GeneralError('Estimated memory (RAM) required ~{} exceeds {} detected on specified {} - {} GPU!\n'.format(human_size(memestimate), human_size(G.gpu.totalmem, a_kilobyte_is_1024_bytes=True), G.gpu.deviceID, G.gpu.name))
-            if G.messages:
-                print('Estimated memory (RAM) required: ~{}'.format(human_size(memestimate)))
+            # Temporary values are only stored for electric field components in dispersive materials
+            if not mpidomain:
+                G.find_dispersive_cells()
+
+                # Update estimated memory (RAM) usage (for the subdomain of
+                # each task once the grid has been split if it is decomposed)
+                memestimate = memory_usage(G)
+                # Check if model can be built and/or run on host
+                if memestimate > G.hostinfo['ram']:
+                    raise GeneralError('Estimated memory (RAM) required ~{} exceeds {} detected!\n'.format(human_size(memestimate), human_size(G.hostinfo['ram'], a_kilobyte_is_1024_bytes=True)))
+
+                # Check if model can be run on specified GPU if required
+                if G.gpu is not None:
+                    if memestimate > G.gpu.totalmem:
+                        raise GeneralError('Estimated memory (RAM) required ~{} exceeds {} detected on specified {} - {} GPU!\n'.format(human_size(memestimate), human_size(G.gpu.totalmem, a_kilobyte_is_1024_bytes=True), G.gpu.deviceID, G.gpu.name))
+                if G.messages:
+                    print('Estimated memory (RAM) required: ~{}'.format(human_size(memestimate)))
 
             G.initialise_dispersive_arrays()
+            if not mpidomain:
+                G.initialise_dispersive_temporary_arrays()
 
         # Process complete list of materials - calculate update coefficients,
         # store in arrays, and build text list of materials/properties
@@ -251,6 +326,14 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             materialstable.justify_columns[0] = 'right'
             print(materialstable.table)
 
+        # Store solid and ID arrays using the smallest integer type for the
+        # number of materials (GPU kernels require 32-bit integers)
+        if G.gpu is None:
+            memestimate = memory_usage(G)
+            G.compact_geometry_arrays()
+            if G.messages and memory_usage(G) < memestimate:
+                print('\nSolid and ID arrays stored as {}, estimated memory (RAM) required reduced to: ~{}'.format(G.ID.dtype.name, human_size(memory_usage(G))))
+
         # Check to see if numerical dispersion might be a problem
         results = dispersion_analysis(G)
         if results['error']:
@@ -274,6 +357,10 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         for pml in G.pmls:
             pml.initialise_field_arrays()
 
+        # Clear arrays for temporary values in dispersive materials
+        if Material.maxpoles != 0:
+            G.initialise_dispersive_temporary_arrays()
+
     # Adjust position of simple sources and receivers if required
     if G.srcsteps[0] != 0 or G.srcsteps[1] != 0 or G.srcsteps[2] != 0:
         for source in itertools.chain(G.hertziandipoles, G.magneticdipoles):
@@ -292,17 +379,33 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             receiver.ycoord = receiver.ycoordorigin + (currentmodelrun - 1) * G.rxsteps[1]
             receiver.zcoord = receiver.zcoordorigin + (currentmodelrun - 1) * G.rxsteps[2]
 
+    # Field components of 2D models are only stored for the plane at the start
+    # of the invariant direction (on CPU), and those that are not updated are
+    # always zero, so sources outside the plane or that excite a component
+    # that is always zero have no effect, and receivers outside the plane
+    # record zeros
+    if G.zero_field_components():
+        sources = [(source, 'E' + source.polarisation) for source in itertools.chain(G.hertziandipoles, G.voltagesources, G.transmissionlines)]
+        sources += [(source, 'H' + source.polarisation) for source in G.magneticdipoles]
+        if not all(G.field_component_updated(component, source.xcoord, source.ycoord, source.zcoord) for source, component in sources):
+            print(Fore.RED + '\nWARNING: Source(s) outside the plane that is solved in {} mode, i.e. not at the start of the domain in the {} direction, or that excite a field component that is not updated (magnetic dipoles), have no effect.'.format(G.mode, G.mode[-1]) + Style.RESET_ALL)
+        shape = G.field_array_shape()
+        if any(rx.xcoord >= shape[0] or rx.ycoord >= shape[1] or rx.zcoord >= shape[2] for rx in G.rxs):
+            print(Fore.RED + '\nWARNING: Receiver(s) outside the plane that is solved in {} mode, i.e. not at the start of the domain in the {} direction, record zeros.'.format(G.mode, G.mode[-1]) + Style.RESET_ALL)
+
+    rootwriter = not mpidomain or args.mpicomm.Get_rank() == 0
+
     # Write files for any geometry views and geometry object outputs
     if not (G.geometryviews or G.geometryobjectswrite) and args.geometry_only:
         print(Fore.RED + '\nWARNING: No geometry views or geometry objects to output found.' + Style.RESET_ALL)
-    if G.geometryviews:
+    if G.geometryviews and rootwriter:
         print()
         for i, geometryview in enumerate(G.geometryviews):
             geometryview.set_filename(appendmodelnumber, G)
             pbar = tqdm(total=geometryview.datawritesize, unit='byte', unit_scale=True, desc='Writing geometry view file {}/{}, {}'.format(i + 1, len(G.geometryviews), os.path.split(geometryview.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable)
             geometryview.write_vtk(G, pbar)
             pbar.close()
-    if G.geometryobjectswrite:
+    if G.geometryobjectswrite and rootwriter:
         for i, geometryobject in enumerate(G.geometryobjectswrite):
             pbar = tqdm(total=geometryobject.datawritesize, unit='byte', unit_scale=True, desc='Writing geometry object file {}/{}, {}'.format(i + 1, len(G.geometryobjectswrite), os.path.split(geometryobject.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable)
             geometryobject.write_hdf5(G, pbar)
@@ -314,37 +417,149 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
 
     # Run simulation
     else:
-        # Prepare any snapshot files
-        for snapshot in G.snapshots:
-            snapshot.prepare_vtk_imagedata(appendmodelnumber, G)
-
         # Output filename
         inputfileparts = os.path.splitext(os.path.join(G.inputdirectory, G.inputfilename))
         outputfile = inputfileparts[0] + appendmodelnumber + '.out'
-        print('\nOutput file: {}\n'.format(outputfile))
 
-        # Main FDTD solving functions for either CPU or GPU
-        if G.gpu is None:
-            tsolve = solve_cpu(currentmodelrun, modelend, G)
-        else:
-            tsolve = solve_gpu(currentmodelrun, modelend, G)
+        # Batch of models, i.e. traces of a B-scan, solved in a single sweep
+        # of the grid; outputs are written to a file of merged traces
+        shots = []
+        if getattr(args, 'batch', None):
+            batchmodels = range(currentmodelrun, min(currentmodelrun + args.batch, modelend + 1))
+            batchfields = initialise_batch_field_arrays(len(batchmodels), G)
+            batchgrid = (G.hertziandipoles, G.magneticdipoles, G.voltagesources, G.transmissionlines, G.rxs, G.snapshots, G.snapshotseries, G.dfts, G.ntffboxes)
+            shots = [Shot(model, index, batchfields, G) for index, model in enumerate(batchmodels)]
+            outputfile = inputfileparts[0] + '_merged.out'
+            if G.messages:
+                print('\nBatch of models {}-{} solved together'.format(batchmodels[0], batchmodels[-1]))
+
+        # Checkpoints of the state of the solver, and iteration to resume from
+        checkpoint = None
+        iterationstart = 0
+        if getattr(args, 'checkpoint', None) or getattr(args, 'resume', False):
+            if G.gpu is not None:
+                print(Fore.RED + '\nWARNING: Checkpoints can only be used with the CPU solver.' + Style.RESET_ALL)
+            else:
+                checkpointfile = inputfileparts[0] + appendmodelnumber + ('_checkpoint' + str(args.mpicomm.Get_rank()) if mpidomain else '_checkpoint') + '.h5'
+                checkpoint = Checkpoint(checkpointfile, args.checkpoint * 60 if args.checkpoint else None)
+                if args.resume:
+                    iterations = checkpoint.iterations(G)
+                    # All subdomains must resume from the same iteration
+                    if mpidomain:
+                        iterations = set.intersection(*[set(taskiterations) for taskiterations in args.mpicomm.allgather(iterations)])
+                    if iterations:
+                        iterationstart = max(iterations)
+                        print('\nResuming model from checkpoint at iteration {} of {}'.format(iterationstart, G.iterations))
+
+        # Prepare any snapshot files (not those already written before the checkpoint)
+        if shots:
+            for shot in shots:
+                for snapshot in shot.snapshots:
+                    snapshot.prepare_vtk_imagedata(str(shot.currentmodelrun), G)
+                for series in shot.snapshotseries:
+                    series.prepare_hdf5(str(shot.currentmodelrun), G)
+        elif rootwriter:
+            for snapshot in G.snapshots:
+                if snapshot.time > iterationstart:
+                    snapshot.prepare_vtk_imagedata(appendmodelnumber, G)
+            for series in G.snapshotseries:
+                series.prepare_hdf5(appendmodelnumber, G, iterationstart)
+
+        print('\nOutput file: {}\n'.format(outputfile))
 
-        # Write an output file in HDF5 format
-        write_hdf5_outputfile(outputfile, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+        # Snapshots and output file are written in a separate thread
+        writer = BackgroundWriter()
+
+        # Split the grid between MPI tasks
+        subdomain = None
+        if mpidomain:
+            if '3D' not in G.mode:
+                raise GeneralError('MPI domain decomposition can only be used with 3D models')
+            if G.fusedupdates:
+                print(Fore.RED + 'WARNING: Fused field updates cannot be used with MPI domain decomposition. Standard field updates will be used.\n' + Style.RESET_ALL)
+                G.fusedupdates = False
+            subdomain = SubDomain(args.mpicomm, G)
+            subdomain.decompose(G)
+            memestimate = memory_usage(G)
+            if memestimate > G.hostinfo['ram']:
+                raise GeneralError('Estimated memory (RAM) required by each MPI task ~{} exceeds {} detected!\n'.format(human_size(memestimate), human_size(G.hostinfo['ram'], a_kilobyte_is_1024_bytes=True)))
+            if G.messages:
+                print('MPI domain decomposition: {} subdomains in the x direction, estimated memory (RAM) required by each task: ~{}\n'.format(subdomain.ntasks, human_size(memestimate)))
+
+        # Output components of receivers that are too large to hold in memory
+        # are written to a file while solving, and copied to the output file
+        # once the model has completed (except when they are gathered from
+        # the subdomains of the grid)
+        rxfile = None
+        rxstores = []
+        if not shots and G.gpu is None:
+            if not subdomain and rx_outputs_size(G) > RxStore.spillsize:
+                rxfilename = inputfileparts[0] + appendmodelnumber + '_rxs.h5'
+                if iterationstart and not os.path.isfile(rxfilename):
+                    raise GeneralError('Receiver output file {} is required to resume the model from the checkpoint'.format(rxfilename))
+                rxfile = h5py.File(rxfilename, 'a' if iterationstart else 'w')
+                if G.messages:
+                    print('Output components of receivers stored in file while solving: {}\n'.format(rxfilename))
+            rxstores = initialise_rx_stores(G, rxfile)
+
+        completed = False
+        try:
+            # Main FDTD solving functions for either CPU or GPU
+            if shots:
+                tsolve = solve_cpu_batch(currentmodelrun, modelend, G, writer, shots, batchfields)
+            elif G.gpu is None:
+                tsolve = solve_cpu(currentmodelrun, modelend, G, writer, rxstores, subdomain, checkpoint, iterationstart)
+            else:
+                tsolve = solve_gpu(currentmodelrun, modelend, G)
+
+            # Gather outputs from the subdomains
+            if subdomain:
+                subdomain.gather_outputs(G)
+
+            # Write an output file in HDF5 format
+            if shots:
+                for shot in shots:
+                    writer.put(write_hdf5_merged_outputfile, outputfile, shot.currentmodelrun - (modelend - numbermodelruns + 1), numbermodelruns, shot.rxs, shot.transmissionlines, shot.dfts, shot.ntffboxes, G)
+            elif rootwriter:
+                writer.put(write_hdf5_outputfile, outputfile, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G, rxstores if rxfile else ())
+            writer.close()
+            completed = True
+
+        finally:
+            # Receiver output file is no longer required once the output file
+            # has been written, or if the model cannot be resumed from a checkpoint
+            if rxfile:
+                rxfile.close()
+                if completed or not (checkpoint and os.path.isfile(checkpoint.filename)):
+                    os.remove(rxfilename)
+
+        # Files of snapshot series are complete once all snapshots have been written
+        for snapshotseries in [shot.snapshotseries for shot in shots] or [G.snapshotseries]:
+            for series in snapshotseries:
+                series.close()
+
+        # Restore the sources and receivers of the grid after a batch of models
+        if shots:
+            G.hertziandipoles, G.magneticdipoles, G.voltagesources, G.transmissionlines, G.rxs, G.snapshots, G.snapshotseries, G.dfts, G.ntffboxes = batchgrid
+
+        # Checkpoint is no longer required once the model has completed
+        if checkpoint and os.path.isfile(checkpoint.filename):
+            os.remove(checkpoint.filename)
 
         if G.messages:
             print('Memory (RAM) used: ~{}'.format(human_size(p.memory_info().rss)))
             print('Solving time [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=tsolve)))
 
     # If geometry information to be reused between model runs then FDTDGrid
-    # class instance must be global so that it persists
-    if not args.geometry_fixed:
+    # class instance must be global so that it persists (until the last model,
+    # or batch of models, so it is not reused by another series of models)
+    if not args.geometry_fixed or currentmodelrun + (getattr(args, 'batch', None) or 1) > modelend:
         del G
 
     return tsolve
 
 
-def solve_cpu(currentmodelrun, modelend, G):
+def solve_cpu(currentmodelrun, modelend, G, writer, rxstores, subdomain=None, checkpoint=None, iterationstart=0):
     """
     Solving using FDTD method on CPU. Parallelised using Cython (OpenMP) for
     electric and magnetic field updates, and PML updates.
@@ -353,69 +568,362 @@ def solve_cpu(currentmodelrun, modelend, G):
         currentmodelrun (int): Current model run number.
         modelend (int): Number of last model to run.
         G (class): Grid class instance - holds essential parameters describing the model.
+        writer (class): BackgroundWriter class instance used to write snapshots.
+        rxstores (list): RxStore class instances to store output components for receivers.
+        subdomain (class): SubDomain class instance if the grid is decomposed
+                between MPI tasks, otherwise None.
+        checkpoint (class): Checkpoint class instance if checkpoints of the
+                state of the solver are used, otherwise None.
+        iterationstart (int): Iteration to resume from (from the checkpoint).
 
     Returns:
         tsolve (float): Time taken to execute solving
     """
 
+    # Fused field updates are only available for 3D models
+    if G.fusedupdates:
+        if '3D' not in G.mode:
+            print(Fore.RED + 'WARNING: Fused field updates can only be used with 3D models. Standard field updates will be used.\n' + Style.RESET_ALL)
+            G.fusedupdates = False
+        else:
+            fusedbox, fusedcells = fused_update_region(G)
+            fusedcellsidx = tuple(fusedcells.T)
+            if fusedbox[0] >= fusedbox[1] or fusedbox[2] >= fusedbox[3] or fusedbox[4] >= fusedbox[5]:
+                G.fusedupdates = False
+
+    # Field updates over bricks of cells are only available for 3D models;
+    # bricks of a single material are updated with scalar update coefficients
+    brickupdates = G.brickupdates and not G.fusedupdates and '3D' in G.mode
+    if brickupdates:
+        bricksE, bricksH = homogeneous_bricks(G)
+        if G.messages:
+            homogeneous = sum(np.prod(bricks[bricks[:, 6] >= 0, 1:6:2] - bricks[bricks[:, 6] >= 0, 0:6:2], axis=1).sum() for bricks in (bricksE, bricksH))
+            total = sum(np.prod(bricks[:, 1:6:2] - bricks[:, 0:6:2], axis=1).sum() for bricks in (bricksE, bricksH))
+            print('Field updates in bricks of {} x {} x {} cells: {:.1f}% of cells in bricks of a single material\n'.format(*G.bricksize, 100 * homogeneous / total))
+
+    # ID array for the cell edges of the field arrays
+    ID = G.ID
+
+    # Sources - pack coordinates, other source information and waveform values into arrays
+    hertzianarrays = initialise_src_arrays(G.hertziandipoles, G)
+    magneticarrays = initialise_src_arrays(G.magneticdipoles, G)
+    voltagearrays = initialise_src_arrays(G.voltagesources, G)
+
+    # Running discrete Fourier transforms
+    for dft in G.dfts:
+        dft.initialise_arrays()
+
+    # Restore the state of the solver from a checkpoint
+    if iterationstart:
+        checkpoint.read(iterationstart, rxstores, G)
+
     tsolvestart = perf_counter()
 
-    for iteration in tqdm(range(G.iterations), desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable):
+    for iteration in tqdm(range(iterationstart, G.iterations), initial=iterationstart, total=G.iterations, desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable):
+        # Write a checkpoint of the state of the solver (at the same iteration in all subdomains)
+        if checkpoint and checkpoint.interval:
+            due = checkpoint.due()
+            if subdomain:
+                due = subdomain.comm.bcast(due, root=0)
+            if due:
+                # Snapshots taken before the checkpoint are not taken again
+                # when the model is resumed, so they must be in their files
+                writer.flush()
+                checkpoint.write(iteration, rxstores, G)
+
         # Store field component values for every receiver and transmission line
-        store_outputs(iteration, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+        store_outputs(iteration, rxstores, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
 
-        # Write any snapshots to file
-        for i, snap in enumerate(G.snapshots):
+        # Copy fields for any snapshots and write them to file in the background
+        for snap in G.snapshots:
             if snap.time == iteration + 1:
-                snapiters = 36 * (((snap.xf - snap.xs) / snap.dx) * ((snap.yf - snap.ys) / snap.dy) * ((snap.zf - snap.zs) / snap.dz))
-                pbar = tqdm(total=snapiters, leave=False, unit='byte', unit_scale=True, desc='  Writing snapshot file {} of {}, {}'.format(i + 1, len(G.snapshots), os.path.split(snap.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable)
-                snap.write_vtk_imagedata(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G, pbar)
-                pbar.close()
+                if subdomain:
+                    fields, origin = subdomain.gather_snapshot_fields(snap, G)
+                    if fields is None:
+                        continue
+                else:
+                    fields, origin = snap.stage_fields(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                writer.put(snap.write_vtk_imagedata, *(fields + (G, None, origin)))
+        for series in G.snapshotseries:
+            if iteration + 1 in series.times:
+                if subdomain:
+                    fields, origin = subdomain.gather_snapshot_fields(series, G)
+                    if fields is None:
+                        continue
+                else:
+                    fields, origin = series.stage_fields(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                writer.put(series.write_hdf5, series.times.index(iteration + 1), *(fields + (G, None, origin)))
+
+        # If there are any dispersive materials do 1st part of dispersive update
+        # (it is split into two parts as it requires present and updated electric
+        # field values). The contribution of the poles is added once the electric
+        # field components have been updated.
+        if Material.maxpoles != 0:
+            update_electric_dispersive_A(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, ID, *G.dispersivecells, G.Tx, G.Ty, G.Tz, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)
 
         # Update magnetic field components
-        update_magnetic(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        if G.fusedupdates:
+            # Electric field components inside the fused box are updated in
+            # the same sweep, but those next to magnetic dipoles and
+            # transmission lines must be recalculated once the sources have
+            # been applied
+            if fusedcells.size:
+                fusedsaved = (G.Ex[fusedcellsidx], G.Ey[fusedcellsidx], G.Ez[fusedcellsidx])
+            update_fields_fused(G.nx, G.ny, G.nz, G.nthreads, G.fusedtilesize[0], G.fusedtilesize[1], fusedbox[0], fusedbox[1], fusedbox[2], fusedbox[3], fusedbox[4], fusedbox[5], G.updatecoeffsE, G.updatecoeffsH, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        elif brickupdates:
+            update_magnetic_bricks(G.nthreads, bricksH.shape[0], bricksH, G.updatecoeffsH, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        else:
+            update_magnetic(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
 
         # Update magnetic field components with the PML correction
-        for pml in G.pmls:
-            pml.update_magnetic(G)
+        update_pml_magnetic(G.nthreads, G.pmls, G.updatecoeffsH, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+        # Exchange halos of magnetic field components between subdomains
+        if subdomain:
+            subdomain.exchange_magnetic(G)
 
         # Update magnetic field components from sources
-        for source in G.transmissionlines + G.magneticdipoles:
-            source.update_magnetic(iteration, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+        for source in G.transmissionlines:
+            source.update_magnetic(iteration, G.updatecoeffsH, ID, G.Hx, G.Hy, G.Hz, G)
+        if G.magneticdipoles:
+            update_magnetic_dipole(len(G.magneticdipoles), iteration, G.dx, G.dy, G.dz, *magneticarrays, G.updatecoeffsH, ID, G.Hx, G.Hy, G.Hz)
 
         # Update electric field components
-        # All materials are non-dispersive so do standard update
-        if Material.maxpoles == 0:
-            update_electric(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
-        # If there are any dispersive materials do 1st part of dispersive update
-        # (it is split into two parts as it requires present and updated electric field values).
-        elif Material.maxpoles == 1:
-            update_electric_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
-        elif Material.maxpoles > 1:
-            update_electric_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        # Fused update - remaining electric field components outside the fused box
+        if G.fusedupdates:
+            if fusedcells.size:
+                G.Ex[fusedcellsidx], G.Ey[fusedcellsidx], G.Ez[fusedcellsidx] = fusedsaved
+                update_electric_cells(fusedcells.shape[0], fusedcells, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            update_electric_outside_box(G.nx, G.ny, G.nz, G.nthreads, fusedbox[0], fusedbox[1], fusedbox[2], fusedbox[3], fusedbox[4], fusedbox[5], G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        # Standard update (over bricks of cells)
+        elif brickupdates:
+            update_electric_bricks(G.nx, G.ny, G.nz, G.nthreads, bricksE.shape[0], bricksE, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        else:
+            update_electric(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+        # Update electric field components in dispersive materials with the contribution of the poles
+        if Material.maxpoles != 0:
+            update_electric_dispersive_phi(G.nthreads, G.updatecoeffsE, ID, *G.dispersivecells, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)
 
         # Update electric field components with the PML correction
-        for pml in G.pmls:
-            pml.update_electric(G)
+        update_pml_electric(G.nthreads, G.pmls, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
 
         # Update electric field components from sources (update any Hertzian dipole sources last)
-        for source in G.voltagesources + G.transmissionlines + G.hertziandipoles:
-            source.update_electric(iteration, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+        if G.voltagesources:
+            update_voltage_source(len(G.voltagesources), iteration, G.dx, G.dy, G.dz, *voltagearrays, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez)
+        for source in G.transmissionlines:
+            source.update_electric(iteration, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G)
+        if G.hertziandipoles:
+            update_hertzian_dipole(len(G.hertziandipoles), iteration, G.dx, G.dy, G.dz, *hertzianarrays, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez)
 
         # If there are any dispersive materials do 2nd part of dispersive update
         # (it is split into two parts as it requires present and updated electric
         # field values). Therefore it can only be completely updated after the
         # electric field has been updated by the PML and source updates.
-        if Material.maxpoles == 1:
-            update_electric_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
-        elif Material.maxpoles > 1:
-            update_electric_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
+        if Material.maxpoles != 0:
+            update_electric_dispersive_B(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, ID, *G.dispersivecells, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
+
+        # Exchange halos of electric field components between subdomains
+        if subdomain:
+            subdomain.exchange_electric(G)
 
     tsolve = perf_counter() - tsolvestart
 
     return tsolve
 
 
+def solve_cpu_batch(currentmodelrun, modelend, G, writer, shots, fields):
+    """
+    Solving a batch of models with the same geometry (e.g. traces of a B-scan)
+    using FDTD method on CPU. The electric and magnetic field updates of 3D
+    models are carried out for all models in a single sweep of the grid; PML,
+    source and dispersive material updates are carried out for each model.
+
+    Args:
+        currentmodelrun (int): First model number of the batch.
+        modelend (int): Number of last model to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+        writer (class): BackgroundWriter class instance used to write snapshots.
+        shots (list): Shot class instances of the models in the batch.
+        fields (tuple): Arrays for the field components of the batch.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
+
+    nbatch = len(shots)
+    Ex, Ey, Ez, Hx, Hy, Hz = fields
+    batchupdates = '3D' in G.mode
+
+    # ID array for the cell edges of the field arrays
+    ID = G.ID
+
+    # Receivers and sources - stores of output components, and arrays of
+    # coordinates, other source information and waveform values for each model
+    rxstores = []
+    srcarrays = []
+    for shot in shots:
+        shot.select(G)
+        rxstores.append(initialise_rx_stores(G))
+        for dft in G.dfts:
+            dft.initialise_arrays()
+        srcarrays.append(tuple(initialise_src_arrays(sources, G) for sources in (G.hertziandipoles, G.magneticdipoles, G.voltagesources)))
+
+    tsolvestart = perf_counter()
+
+    for iteration in tqdm(range(G.iterations), desc='Running simulation, models ' + str(currentmodelrun) + '-' + str(shots[-1].currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=G.tqdmdisable):
+        for shot, shotrxstores in zip(shots, rxstores):
+            shot.select(G)
+
+            # Store field component values for every receiver and transmission line
+            store_outputs(iteration, shotrxstores, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+
+            # Copy fields for any snapshots and write them to file in the background
+            for snap in G.snapshots:
+                if snap.time == iteration + 1:
+                    snapfields, origin = snap.stage_fields(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                    writer.put(snap.write_vtk_imagedata, *(snapfields + (G, None, origin)))
+            for series in G.snapshotseries:
+                if iteration + 1 in series.times:
+                    snapfields, origin = series.stage_fields(G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                    writer.put(series.write_hdf5, series.times.index(iteration + 1), *(snapfields + (G, None, origin)))
+
+            # If there are any dispersive materials do 1st part of dispersive update
+            if Material.maxpoles != 0:
+                update_electric_dispersive_A(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, ID, *G.dispersivecells, G.Tx, G.Ty, G.Tz, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)
+
+        # Update magnetic field components of all models
+        if batchupdates:
+            update_magnetic_batch(nbatch, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+        for shot, (hertzianarrays, magneticarrays, voltagearrays) in zip(shots, srcarrays):
+            shot.select(G)
+            if not batchupdates:
+                update_magnetic(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+            # Update magnetic field components with the PML correction
+            update_pml_magnetic(G.nthreads, G.pmls, G.updatecoeffsH, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+            # Update magnetic field components from sources
+            for source in G.transmissionlines:
+                source.update_magnetic(iteration, G.updatecoeffsH, ID, G.Hx, G.Hy, G.Hz, G)
+            if G.magneticdipoles:
+                update_magnetic_dipole(len(G.magneticdipoles), iteration, G.dx, G.dy, G.dz, *magneticarrays, G.updatecoeffsH, ID, G.Hx, G.Hy, G.Hz)
+
+        # Update electric field components of all models
+        if batchupdates:
+            update_electric_batch(nbatch, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+        for shot, (hertzianarrays, magneticarrays, voltagearrays) in zip(shots, srcarrays):
+            shot.select(G)
+            if not batchupdates:
+                update_electric(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+            # Update electric field components in dispersive materials with the contribution of the poles
+            if Material.maxpoles != 0:
+                update_electric_dispersive_phi(G.nthreads, G.updatecoeffsE, ID, *G.dispersivecells, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)
+
+            # Update electric field components with the PML correction
+            update_pml_electric(G.nthreads, G.pmls, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+            # Update electric field components from sources (update any Hertzian dipole sources last)
+            if G.voltagesources:
+                update_voltage_source(len(G.voltagesources), iteration, G.dx, G.dy, G.dz, *voltagearrays, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez)
+            for source in G.transmissionlines:
+                source.update_electric(iteration, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez, G)
+            if G.hertziandipoles:
+                update_hertzian_dipole(len(G.hertziandipoles), iteration, G.dx, G.dy, G.dz, *hertzianarrays, G.updatecoeffsE, ID, G.Ex, G.Ey, G.Ez)
+
+            # If there are any dispersive materials do 2nd part of dispersive update
+            if Material.maxpoles != 0:
+                update_electric_dispersive_B(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, ID, *G.dispersivecells, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
+
+    tsolve = perf_counter() - tsolvestart
+
+    return tsolve
+
+
+def fused_update_region(G):
+    """
+    Box in which electric field components can be updated in the same sweep
+        as the magnetic field components, i.e. away from the PMLs whose
+        magnetic field correction must be applied first. Also finds the cells
+        inside the box whose electric field components depend on magnetic field
+        components at magnetic dipoles and transmission lines, i.e. sources
+        that are updated with the magnetic field components.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        box (tuple): Extent of box (xs, xf, ys, yf, zs, zf) in cells.
+        cells (int): numpy array of cell coordinates to be recalculated.
+    """
+
+    # Number of cells between a PML and the box
+    margin = 2
+
+    box = []
+    for direction, n in zip(['x', 'y', 'z'], [G.nx, G.ny, G.nz]):
+        start = G.pmlthickness[direction + '0'] + margin if G.pmlthickness[direction + '0'] > 0 else 1
+        finish = n - G.pmlthickness[direction + 'max'] - margin if G.pmlthickness[direction + 'max'] > 0 else n
+        box += [start, finish]
+
+    cells = set()
+    for source in G.magneticdipoles + G.transmissionlines:
+        for i, j, k in itertools.product(range(source.xcoord - 1, source.xcoord + 2), range(source.ycoord - 1, source.ycoord + 2), range(source.zcoord - 1, source.zcoord + 2)):
+            if box[0] <= i < box[1] and box[2] <= j < box[3] and box[4] <= k < box[5]:
+                cells.add((i, j, k))
+    cells = np.array(sorted(cells), dtype=np.int32).reshape(-1, 3)
+
+    return tuple(box), cells
+
+
+def homogeneous_bricks(G):
+    """
+    Splits the cells in which the electric and magnetic field components are
+        updated (3D) into bricks, and finds the bricks in which every electric
+        or every magnetic field component is of a single material, i.e. those
+        that can be updated with scalar update coefficients.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        bricksE, bricksH (int): numpy arrays of bricks (xs, xf, ys, yf, zs, zf, material) for the electric and magnetic field updates. The material is -1 if the brick is not homogeneous.
+    """
+
+    # Materials of the electric field components in cells i, j, k from 1 to
+    # n - 1, and of the magnetic field components Hx[i + 1, j, k],
+    # Hy[i, j + 1, k], Hz[i, j, k + 1] in cells i, j, k from 0 to n - 1
+    regions = [((1, 1, 1), [G.ID[n, 1:G.nx, 1:G.ny, 1:G.nz] for n in range(3)]),
+               ((0, 0, 0), [G.ID[3, 1:G.nx + 1, 0:G.ny, 0:G.nz], G.ID[4, 0:G.nx, 1:G.ny + 1, 0:G.nz], G.ID[5, 0:G.nx, 0:G.ny, 1:G.nz + 1]])]
+
+    allbricks = []
+    for origin, components in regions:
+        # Smallest and largest material ID in each brick
+        lo = np.minimum(np.minimum(components[0], components[1]), components[2])
+        hi = np.maximum(np.maximum(components[0], components[1]), components[2])
+        edges = []
+        for axis, (start, n, size) in enumerate(zip(origin, lo.shape, G.bricksize)):
+            starts = np.arange(0, n, size)
+            lo = np.minimum.reduceat(lo, starts, axis=axis)
+            hi = np.maximum.reduceat(hi, starts, axis=axis)
+            edges.append((starts + start, np.minimum(starts + size, n) + start))
+
+        bricks = np.zeros(lo.shape + (7,), dtype=np.int32)
+        for axis, (starts, finishes) in enumerate(edges):
+            shape = [1, 1, 1]
+            shape[axis] = -1
+            bricks[..., 2 * axis] = starts.reshape(shape)
+            bricks[..., 2 * axis + 1] = finishes.reshape(shape)
+        bricks[..., 6] = lo
+        bricks[..., 6][lo != hi] = -1
+        allbricks.append(bricks.reshape(-1, 7))
+
+    return allbricks[0], allbricks[1]
+
+
 def solve_gpu(currentmodelrun, modelend, G):
     """Solving using FDTD method on GPU. Implemented using Nvidia CUDA.
 
@@ -438,7 +946,7 @@ def solve_gpu(currentmodelrun, modelend, G):
 
     # Electric and magnetic field updates - prepare kernels, and get kernel functions
     if Material.maxpoles > 0:
-        kernels_fields = SourceModule(kernels_template_fields.substitute(REAL=cudafloattype, COMPLEX=cudacomplextype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_MATDISPCOEFFS=G.updatecoeffsdispersive.shape[1], NX_FIELDS=G.Ex.shape[0], NY_FIELDS=G.Ex.shape[1], NZ_FIELDS=G.Ex.shape[2], NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3], NX_T=G.Tx.shape[1], NY_T=G.Tx.shape[2], NZ_T=G.Tx.shape[3]))
+        kernels_fields = SourceModule(kernels_template_fields.substitute(REAL=cudafloattype, COMPLEX=cudacomplextype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_MATDISPCOEFFS=G.updatecoeffsdispersive.shape[1], NX_FIELDS=G.Ex.shape[0], NY_FIELDS=G.Ex.shape[1], NZ_FIELDS=G.Ex.shape[2], NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3], NX_T=G.Ex.shape[0], NY_T=G.Ex.shape[1], NZ_T=G.Ex.shape[2]))
     else:   # Set to one any substitutions for dispersive materials
         kernels_fields = SourceModule(kernels_template_fields.substitute(REAL=cudafloattype, COMPLEX=cudacomplextype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_MATDISPCOEFFS=1, NX_FIELDS=G.Ex.shape[0], NY_FIELDS=G.Ex.shape[1], NZ_FIELDS=G.Ex.shape[2], NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3], NX_T=1, NY_T=1, NZ_T=1))
     update_e_gpu = kernels_fields.get_function("update_e")
@@ -0,0 +1,205 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from gprMax.constants import c
+from gprMax.constants import complextype
+from gprMax.constants import floattype
+from gprMax.constants import z0
+from gprMax.dft_outputs import DFTOutput
+from gprMax.utilities import round_value
+
+
+class NTFFBox(object):
+    """
+    Near-to-far-field transformation on the closed surface of a box, i.e. a
+        Huygens surface, in free space. Running DFTs of the field components
+        on the faces of the box are accumulated while the model is solved
+        (see DFTOutput). The equivalent surface currents given by the
+        tangential field components are then integrated to find the far-field
+        patterns at a set of angles.
+
+    Far-field electric field components are given multiplied by the distance
+        r from the centre of the box, and without the phase term exp(-j k r),
+        i.e. the transformation is in the frequency domain with the same time
+        convention as DFTOutput.
+    """
+
+    # Faces of the box - normal direction (x, y or z) and side (-1 for the
+    # face at the start of the box, 1 for the face at the end)
+    faces = [(0, -1), (0, 1), (1, -1), (1, 1), (2, -1), (2, 1)]
+
+    # Number of directions to calculate the far-field patterns for at once
+    ndirections = 4096
+
+    def __init__(self, xs=None, ys=None, zs=None, xf=None, yf=None, zf=None, theta=None, phi=None, frequencies=None, ID=None):
+        """
+        Args:
+            xs, xf, ys, yf, zs, zf (int): Cell coordinates of the box.
+            theta, phi (tuple): Start, stop and step of the angles (degrees)
+                    of the far-field patterns, i.e. the angle from the z axis,
+                    and the angle in the x-y plane from the x axis.
+            frequencies (list): Frequencies (Hz) of the far-field patterns.
+            ID (str): Name of the near-to-far-field transformation.
+        """
+
+        self.start = (xs, ys, zs)
+        self.finish = (xf, yf, zf)
+        self.theta = self.angles(*theta)
+        self.phi = self.angles(*phi)
+        self.frequencies = np.array(frequencies, dtype=np.float64)
+        self.ID = ID
+
+        # Indices (in the DFT outputs of the grid) of the DFTs of the faces
+        self.dftindices = []
+
+    @staticmethod
+    def angles(start, stop, step):
+        """Angles from start to stop (inclusive) at a step.
+
+        Args:
+            start, stop, step (float): Start, stop and step of the angles; a
+                    step of zero gives only the start angle.
+
+        Returns:
+            (array): Angles.
+        """
+
+        n = round_value((stop - start) / step) + 1 if step > 0 else 1
+
+        return start + step * np.arange(n)
+
+    def face_dfts(self):
+        """DFT outputs of the faces of the box. Each covers the plane of the
+            face and the plane before it, so that all tangential field
+            components can be found at the centres of the cells of the face.
+
+        Returns:
+            dfts (list): DFTOutput class instances, in the order of NTFFBox.faces.
+        """
+
+        dfts = []
+        for axis, side in NTFFBox.faces:
+            start = list(self.start)
+            finish = list(self.finish)
+            plane = self.start[axis] if side < 0 else self.finish[axis]
+            start[axis] = plane - 1
+            finish[axis] = plane
+            dfts.append(DFTOutput(*start, *finish, 1, 1, 1, self.frequencies, self.ID + '_face' + str(len(dfts) + 1), output=False))
+
+        return dfts
+
+    def farfields(self, dfts, G):
+        """Far-field patterns from the DFTs of the faces of the box.
+
+        Args:
+            dfts (list): DFTOutput class instances of the grid.
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            Etheta, Ephi (array): Far-field electric field components (multiplied by r) for each frequency, theta and phi.
+            power (array): Power radiated through the box for each frequency.
+        """
+
+        spacing = np.array([G.dx, G.dy, G.dz])
+        origin = (np.array(self.start) + np.array(self.finish)) / 2 * spacing
+        wavenumbers = 2 * np.pi * self.frequencies / c
+
+        # Unit vectors of directions
+        theta, phi = np.meshgrid(np.radians(self.theta), np.radians(self.phi), indexing='ij')
+        theta = theta.ravel()
+        phi = phi.ravel()
+        directions = np.array([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)])
+
+        # Radiation vectors of the equivalent electric (N) and magnetic (L) surface currents
+        N = np.zeros((len(self.frequencies), 3, len(theta)), dtype=np.complex128)
+        L = np.zeros((len(self.frequencies), 3, len(theta)), dtype=np.complex128)
+        power = np.zeros(len(self.frequencies))
+
+        # Normal direction (a) and tangential directions (b, t) of each face
+        for (a, side), index in zip(NTFFBox.faces, self.dftindices):
+            # Tangential directions
+            b = (a + 1) % 3
+            t = (a + 2) % 3
+
+            # DFTs (components, frequencies, and points in the normal and
+            # tangential directions); components are found at the centres of
+            # the cells of the face from the values on the Yee cell edges
+            dft = np.transpose(dfts[index].dft, (0, 4, 1 + a, 1 + b, 1 + t))
+            Eb = (dft[b, :, 1, :-1, :-1] + dft[b, :, 1, :-1, 1:]) / 2
+            Ec = (dft[t, :, 1, :-1, :-1] + dft[t, :, 1, 1:, :-1]) / 2
+            Hb = (dft[3 + b, :, 0, :-1, :-1] + dft[3 + b, :, 1, :-1, :-1] + dft[3 + b, :, 0, 1:, :-1] + dft[3 + b, :, 1, 1:, :-1]) / 4
+            Hc = (dft[3 + t, :, 0, :-1, :-1] + dft[3 + t, :, 1, :-1, :-1] + dft[3 + t, :, 0, :-1, 1:] + dft[3 + t, :, 1, :-1, 1:]) / 4
+            area = spacing[b] * spacing[t]
+
+            # Equivalent surface currents, J = n x H and M = -n x E
+            J = {b: -side * Hc, t: side * Hb}
+            M = {b: side * Ec, t: -side * Eb}
+
+            # Power through the face (Poynting vector)
+            power += side * area * np.real(Eb * np.conj(Hc) - Ec * np.conj(Hb)).sum(axis=(1, 2)) / 2
+
+            # Positions of the centres of the cells of the face relative to the origin
+            ra = (self.start[a] if side < 0 else self.finish[a]) * spacing[a] - origin[a]
+            rb = (self.start[b] + 0.5 + np.arange(Eb.shape[1])) * spacing[b] - origin[b]
+            rt = (self.start[t] + 0.5 + np.arange(Eb.shape[2])) * spacing[t] - origin[t]
+
+            for f, k in enumerate(wavenumbers):
+                for d in range(0, len(theta), NTFFBox.ndirections):
+                    directionsd = directions[:, d:d + NTFFBox.ndirections]
+                    phasea = area * np.exp(1j * k * ra * directionsd[a])
+                    phaseb = np.exp(1j * k * np.outer(directionsd[b], rb))
+                    phaset = np.exp(1j * k * np.outer(directionsd[t], rt))
+                    for component in (b, t):
+                        N[f, component, d:d + NTFFBox.ndirections] += phasea * np.einsum('ij,di,dj->d', J[component][f], phaseb, phaset, optimize=True)
+                        L[f, component, d:d + NTFFBox.ndirections] += phasea * np.einsum('ij,di,dj->d', M[component][f], phaseb, phaset, optimize=True)
+
+        # Spherical components of the radiation vectors, and far-field electric field components
+        Ntheta = N[:, 0] * np.cos(theta) * np.cos(phi) + N[:, 1] * np.cos(theta) * np.sin(phi) - N[:, 2] * np.sin(theta)
+        Nphi = -N[:, 0] * np.sin(phi) + N[:, 1] * np.cos(phi)
+        Ltheta = L[:, 0] * np.cos(theta) * np.cos(phi) + L[:, 1] * np.cos(theta) * np.sin(phi) - L[:, 2] * np.sin(theta)
+        Lphi = -L[:, 0] * np.sin(phi) + L[:, 1] * np.cos(phi)
+        Etheta = -1j * wavenumbers[:, np.newaxis] / (4 * np.pi) * (Lphi + z0 * Ntheta)
+        Ephi = 1j * wavenumbers[:, np.newaxis] / (4 * np.pi) * (Ltheta - z0 * Nphi)
+
+        shape = (len(self.frequencies), len(self.theta), len(self.phi))
+
+        return Etheta.reshape(shape), Ephi.reshape(shape), power
+
+    def outputs(self, dfts, G):
+        """Far-field patterns, and directivity, from the DFTs of the faces of the box.
+
+        Args:
+            dfts (list): DFTOutput class instances of the grid.
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            (dict): Arrays (frequencies, theta, and phi) keyed by name, and
+                    array of power radiated through the box for each frequency.
+        """
+
+        Etheta, Ephi, power = self.farfields(dfts, G)
+
+        # Directivity, i.e. radiation intensity relative to that of an
+        # isotropic source radiating the same power
+        intensity = (np.abs(Etheta)**2 + np.abs(Ephi)**2) / (2 * z0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            directivity = 4 * np.pi * intensity / power[:, np.newaxis, np.newaxis]
+
+        return {'Etheta': Etheta.astype(complextype), 'Ephi': Ephi.astype(complextype), 'Directivity': directivity.astype(floattype)}, power
@@ -16,8 +16,6 @@
 # You should have received a copy of the GNU General Public License
 # along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
 
-from importlib import import_module
-
 import numpy as np
 from tqdm import tqdm
 
@@ -186,7 +184,8 @@ class PML(object):
         if not self.CFS:
             self.CFS = [CFS()]
 
-        self.initialise_field_arrays()
+        # Arrays to store fields in the PML are initialised once the model
+        # has been built (see initialise_field_arrays)
 
     def initialise_field_arrays(self):
         """Initialise arrays to store fields in PML."""
@@ -246,26 +245,6 @@ class PML(object):
             self.HRE[x, :] = ((2 * e0 * Hkappa) - G.dt * (Halpha * Hkappa + Hsigma)) / tmp
             self.HRF[x, :] = (2 * Hsigma * G.dt) / (Hkappa * tmp)
 
-    def update_electric(self, G):
-        """This functions updates electric field components with the PML correction.
-
-        Args:
-            G (class): Grid class instance - holds essential parameters describing the model.
-        """
-
-        func = getattr(import_module('gprMax.pml_updates_ext'), 'update_pml_' + str(len(self.CFS)) + 'order_electric_' + self.direction)
-        func(self.xs, self.xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.EPhi1, self.EPhi2, self.ERA, self.ERB, self.ERE, self.ERF, self.d)
-
-    def update_magnetic(self, G):
-        """This functions updates magnetic field components with the PML correction.
-
-        Args:
-            G (class): Grid class instance - holds essential parameters describing the model.
-        """
-
-        func = getattr(import_module('gprMax.pml_updates_ext'), 'update_pml_' + str(len(self.CFS)) + 'order_magnetic_' + self.direction)
-        func(self.xs, self.xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.HPhi1, self.HPhi2, self.HRA, self.HRB, self.HRE, self.HRF, self.d)
-
     def gpu_set_blocks_per_grid(self, G):
         """Set the blocks per grid size used for updating the PML field arrays on a GPU.
 
@@ -335,55 +314,43 @@ def build_pmls(G, pbar):
         pbar (class): Progress bar class instance.
     """
 
+    # Relative permittivities and permeabilities of materials indexed by numeric ID
+    numIDs = np.array([material.numID for material in G.materials])
+    ers = np.zeros(numIDs.max() + 1)
+    mrs = np.zeros(numIDs.max() + 1)
+    ers[numIDs] = [material.er for material in G.materials]
+    mrs[numIDs] = [material.mr for material in G.materials]
+
     for key, value in G.pmlthickness.items():
         if value > 0:
-            sumer = 0  # Sum of relative permittivities in PML slab
-            summr = 0  # Sum of relative permeabilities in PML slab
-
             if key[0] == 'x':
                 if key == 'x0':
                     pml = PML(G, ID=key, direction='xminus', xf=value, yf=G.ny, zf=G.nz)
                 elif key == 'xmax':
                     pml = PML(G, ID=key, direction='xplus', xs=G.nx - value, xf=G.nx, yf=G.ny, zf=G.nz)
-                G.pmls.append(pml)
-                for j in range(G.ny):
-                    for k in range(G.nz):
-                        numID = G.solid[pml.xs, j, k]
-                        material = next(x for x in G.materials if x.numID == numID)
-                        sumer += material.er
-                        summr += material.mr
-                averageer = sumer / (G.ny * G.nz)
-                averagemr = summr / (G.ny * G.nz)
+                face = G.solid[pml.xs, 0:G.ny, 0:G.nz]
 
             elif key[0] == 'y':
                 if key == 'y0':
                     pml = PML(G, ID=key, direction='yminus', yf=value, xf=G.nx, zf=G.nz)
                 elif key == 'ymax':
                     pml = PML(G, ID=key, direction='yplus', ys=G.ny - value, xf=G.nx, yf=G.ny, zf=G.nz)
-                G.pmls.append(pml)
-                for i in range(G.nx):
-                    for k in range(G.nz):
-                        numID = G.solid[i, pml.ys, k]
-                        material = next(x for x in G.materials if x.numID == numID)
-                        sumer += material.er
-                        summr += material.mr
-                averageer = sumer / (G.nx * G.nz)
-                averagemr = summr / (G.nx * G.nz)
+                face = G.solid[0:G.nx, pml.ys, 0:G.nz]
 
             elif key[0] == 'z':
                 if key == 'z0':
                     pml = PML(G, ID=key, direction='zminus', zf=value, xf=G.nx, yf=G.ny)
                 elif key == 'zmax':
                     pml = PML(G, ID=key, direction='zplus', zs=G.nz - value, xf=G.nx, yf=G.ny, zf=G.nz)
-                G.pmls.append(pml)
-                for i in range(G.nx):
-                    for j in range(G.ny):
-                        numID = G.solid[i, j, pml.zs]
-                        material = next(x for x in G.materials if x.numID == numID)
-                        sumer += material.er
-                        summr += material.mr
-                averageer = sumer / (G.nx * G.ny)
-                averagemr = summr / (G.nx * G.ny)
+                face = G.solid[0:G.nx, 0:G.ny, pml.zs]
+
+            G.pmls.append(pml)
+
+            # Average relative permittivity and permeability of the materials
+            # on the inner face of the PML slab
+            counts = np.bincount(face.ravel(), minlength=len(ers))
+            averageer = np.dot(counts, ers) / face.size
+            averagemr = np.dot(counts, mrs) / face.size
 
             pml.calculate_update_coeffs(averageer, averagemr, G)
             pbar.update()
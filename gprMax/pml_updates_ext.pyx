@@ -18,1698 +18,378 @@
 
 import numpy as np
 cimport numpy as np
+from cython.parallel import parallel
 from cython.parallel import prange
-
-from gprMax.constants cimport floattype_t, complextype_t
-
-
-########################################################
-# Electric field PML updates - 1st order - xminus slab #
-########################################################
-cpdef void update_pml_1order_electric_xminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ey and Ez field components for the xminus slab.
-
-        Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEy, materialEz
-    cdef float dx, dHy, dHz, RA0, RB0, RE0, RF0
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        RA0 = (ERA[0, i] - 1)
-        RB0 = ERB[0, i]
-        RE0 = ERE[0, i]
-        RF0 = ERF[0, i]
-        ii = xf - i
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii - 1, jj, kk]) / dx
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] - updatecoeffsE[materialEy, 4] * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii - 1, jj, kk]) / dx
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] + updatecoeffsE[materialEz, 4] * (RA0 * dHy + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHy
-
-
-#######################################################
-# Electric field PML updates - 1st order - xplus slab #
-#######################################################
-cpdef void update_pml_1order_electric_xplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ey and Ez field components for the xplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEy, materialEz
-    cdef float dx, dHy, dHz, RA0, RB0, RE0, RF0
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        RA0 = (ERA[0, i] - 1)
-        RB0 = ERB[0, i]
-        RE0 = ERE[0, i]
-        RF0 = ERF[0, i]
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii - 1, jj, kk]) / dx
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] - updatecoeffsE[materialEy, 4] * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii - 1, jj, kk]) / dx
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] + updatecoeffsE[materialEz, 4] * (RA0 * dHy + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHy
-
-
-########################################################
-# Electric field PML updates - 1st order - yminus slab #
-########################################################
-cpdef void update_pml_1order_electric_yminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ez field components for the yminus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEz
-    cdef float dy, dHx, dHz, RA0, RB0, RE0, RF0
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = yf - j
-            RA0 = (ERA[0, j] - 1)
-            RB0 = ERB[0, j]
-            RE0 = ERE[0, j]
-            RF0 = ERF[0, j]
-            for k in range(0, nz):
-                kk = k + zs
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii, jj - 1, kk]) / dy
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] + updatecoeffsE[materialEx, 4] * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj - 1, kk]) / dy
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] - updatecoeffsE[materialEz, 4] * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-#######################################################
-# Electric field PML updates - 1st order - yplus slab #
-#######################################################
-cpdef void update_pml_1order_electric_yplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ez field components for the yplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEz
-    cdef float dy, dHx, dHz, RA0, RB0, RE0, RF0
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            RA0 = (ERA[0, j] - 1)
-            RB0 = ERB[0, j]
-            RE0 = ERE[0, j]
-            RF0 = ERF[0, j]
-            for k in range(0, nz):
-                kk = k + zs
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii, jj - 1, kk]) / dy
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] + updatecoeffsE[materialEx, 4] * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj - 1, kk]) / dy
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] - updatecoeffsE[materialEz, 4] * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-########################################################
-# Electric field PML updates - 1st order - zminus slab #
-########################################################
-cpdef void update_pml_1order_electric_zminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ey field components for the zminus slab.
-
-        Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-        """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEy
-    cdef float dz, dHx, dHy, RA0, RB0, RE0, RF0
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = zf - k
-                RA0 = (ERA[0, k] - 1)
-                RB0 = ERB[0, k]
-                RE0 = ERE[0, k]
-                RF0 = ERF[0, k]
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii, jj, kk - 1]) / dz
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] - updatecoeffsE[materialEx, 4] * (RA0 * dHy + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHy
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj, kk - 1]) / dz
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] + updatecoeffsE[materialEy, 4] * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-#######################################################
-# Electric field PML updates - 1st order - zplus slab #
-#######################################################
-cpdef void update_pml_1order_electric_zplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ey field components for the zplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEy
-    cdef float dz, dHx, dHy, RA0, RB0, RE0, RF0
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                RA0 = (ERA[0, k] - 1)
-                RB0 = ERB[0, k]
-                RE0 = ERE[0, k]
-                RF0 = ERF[0, k]
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii, jj, kk - 1]) / dz
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] - updatecoeffsE[materialEx, 4] * (RA0 * dHy + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHy
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj, kk - 1]) / dz
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] + updatecoeffsE[materialEy, 4] * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-########################################################
-# Magnetic field PML updates - 1st order - xminus slab #
-########################################################
-cpdef void update_pml_1order_magnetic_xminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hy and Hz field components for the xminus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, ERE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHy, materialHz
-    cdef float dx, dEy, dEz, RA0, RB0, RE0, RF0
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = xf - (i + 1)
-        RA0 = (HRA[0, i] - 1)
-        RB0 = HRB[0, i]
-        RE0 = HRE[0, i]
-        RF0 = HRF[0, i]
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEz = (Ez[ii + 1, jj, kk] - Ez[ii, jj, kk]) / dx
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] + updatecoeffsH[materialHy, 4] * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEy = (Ey[ii + 1, jj, kk] - Ey[ii, jj, kk]) / dx
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] - updatecoeffsH[materialHz, 4] * (RA0 * dEy + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEy
-
-
-#######################################################
-# Magnetic field PML updates - 1st order - xplus slab #
-#######################################################
-cpdef void update_pml_1order_magnetic_xplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hy and Hz field components for the xplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHy, materialHz
-    cdef float dx, dEy, dEz, RA0, RB0, RE0, RF0
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        RA0 = (HRA[0, i] - 1)
-        RB0 = HRB[0, i]
-        RE0 = HRE[0, i]
-        RF0 = HRF[0, i]
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEz = (Ez[ii + 1, jj, kk] - Ez[ii, jj, kk]) / dx
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] + updatecoeffsH[materialHy, 4] * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEy = (Ey[ii + 1, jj, kk] - Ey[ii, jj, kk]) / dx
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] - updatecoeffsH[materialHz, 4] * (RA0 * dEy + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEy
-
-
-########################################################
-# Magnetic field PML updates - 1st order - yminus slab #
-########################################################
-cpdef void update_pml_1order_magnetic_yminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hx and Hz field components for the yminus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHz
-    cdef float dy, dEx, dEz, RA0, RB0, RE0, RF0
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = yf - (j + 1)
-            RA0 = (HRA[0, j] - 1)
-            RB0 = HRB[0, j]
-            RE0 = HRE[0, j]
-            RF0 = HRF[0, j]
-            for k in range(0, nz):
-                kk = k + zs
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEz = (Ez[ii, jj + 1, kk] - Ez[ii, jj, kk]) / dy
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] - updatecoeffsH[materialHx, 4] * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEx = (Ex[ii, jj + 1, kk] - Ex[ii, jj, kk]) / dy
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] + updatecoeffsH[materialHz, 4] * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
-
-
-#######################################################
-# Magnetic field PML updates - 1st order - yplus slab #
-#######################################################
-cpdef void update_pml_1order_magnetic_yplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hx and Hz field components for the yplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHz
-    cdef float dy, dEx, dEz, RA0, RB0, RE0, RF0
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            RA0 = (HRA[0, j] - 1)
-            RB0 = HRB[0, j]
-            RE0 = HRE[0, j]
-            RF0 = HRF[0, j]
-            for k in range(0, nz):
-                kk = k + zs
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEz = (Ez[ii, jj + 1, kk] - Ez[ii, jj, kk]) / dy
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] - updatecoeffsH[materialHx, 4] * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEx = (Ex[ii, jj + 1, kk] - Ex[ii, jj, kk]) / dy
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] + updatecoeffsH[materialHz, 4] * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
-
-
-########################################################
-# Magnetic field PML updates - 1st order - zminus slab #
-########################################################
-cpdef void update_pml_1order_magnetic_zminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hx and Hy field components for the zminus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHy
-    cdef float dz, dEx, dEy, RA0, RB0, RE0, RF0
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = zf - (k + 1)
-                RA0 = (HRA[0, k] - 1)
-                RB0 = HRB[0, k]
-                RE0 = HRE[0, k]
-                RF0 = HRF[0, k]
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEy = (Ey[ii, jj, kk + 1] - Ey[ii, jj, kk]) / dz
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] + updatecoeffsH[materialHx, 4] * (RA0 * dEy + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEy
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEx = (Ex[ii, jj, kk + 1] - Ex[ii, jj, kk]) / dz
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] - updatecoeffsH[materialHy, 4] * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
-
-
-#######################################################
-# Magnetic field PML updates - 1st order - zplus slab #
-#######################################################
-cpdef void update_pml_1order_magnetic_zplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hx and Hy field components for the zplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHy
-    cdef float dz, dEx, dEy, RA0, RB0, RE0, RF0
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                RA0 = (HRA[0, k] - 1)
-                RB0 = HRB[0, k]
-                RE0 = HRE[0, k]
-                RF0 = HRF[0, k]
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEy = (Ey[ii, jj, kk + 1] - Ey[ii, jj, kk]) / dz
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] + updatecoeffsH[materialHx, 4] * (RA0 * dEy + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEy
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEx = (Ex[ii, jj, kk + 1] - Ex[ii, jj, kk]) / dz
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] - updatecoeffsH[materialHy, 4] * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
-
-
-########################################################
-# Electric field PML updates - 2nd order - xminus slab #
-########################################################
-cpdef void update_pml_2order_electric_xminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ey and Ez field components for the xminus slab.
-
-        Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEy, materialEz
-    cdef float dx, dHy, dHz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        RA0 = ERA[0, i]
-        RB0 = ERB[0, i]
-        RE0 = ERE[0, i]
-        RF0 = ERF[0, i]
-        RA1 = ERA[1, i]
-        RB1 = ERB[1, i]
-        RE1 = ERE[1, i]
-        RF1 = ERF[1, i]
-        RA01 = ERA[0, i] * ERA[1, i] - 1
-        ii = xf - i
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii - 1, jj, kk]) / dx
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] - updatecoeffsE[materialEy, 4] * (RA01 * dHz + RA1 * RB0 * EPhi1[0, i, j, k] + RB1 * EPhi1[1, i, j, k])
-                EPhi1[1, i, j, k] = RE1 * EPhi1[1, i, j, k] - RF1 * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii - 1, jj, kk]) / dx
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] + updatecoeffsE[materialEz, 4] * (RA01 * dHy + RA1 * RB0 * EPhi2[0, i, j, k] + RB1 * EPhi2[1, i, j, k])
-                EPhi2[1, i, j, k] = RE1 * EPhi2[1, i, j, k] - RF1 * (RA0 * dHy + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHy
-
-
-#######################################################
-# Electric field PML updates - 2nd order - xplus slab #
-#######################################################
-cpdef void update_pml_2order_electric_xplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ey and Ez field components for the xplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEy, materialEz
-    cdef float dx, dHy, dHz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        RA0 = ERA[0, i]
-        RB0 = ERB[0, i]
-        RE0 = ERE[0, i]
-        RF0 = ERF[0, i]
-        RA1 = ERA[1, i]
-        RB1 = ERB[1, i]
-        RE1 = ERE[1, i]
-        RF1 = ERF[1, i]
-        RA01 = ERA[0, i] * ERA[1, i] - 1
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii - 1, jj, kk]) / dx
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] - updatecoeffsE[materialEy, 4] * (RA01 * dHz + RA1 * RB0 * EPhi1[0, i, j, k] + RB1 * EPhi1[1, i, j, k])
-                EPhi1[1, i, j, k] = RE1 * EPhi1[1, i, j, k] - RF1 * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii - 1, jj, kk]) / dx
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] + updatecoeffsE[materialEz, 4] * (RA01 * dHy + RA1 * RB0 * EPhi2[0, i, j, k] + RB1 * EPhi2[1, i, j, k])
-                EPhi2[1, i, j, k] = RE1 * EPhi2[1, i, j, k] - RF1 * (RA0 * dHy + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHy
-
-
-########################################################
-# Electric field PML updates - 2nd order - yminus slab #
-########################################################
-cpdef void update_pml_2order_electric_yminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ez field components for the yminus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEz
-    cdef float dy, dHx, dHz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = yf - j
-            RA0 = ERA[0, j]
-            RB0 = ERB[0, j]
-            RE0 = ERE[0, j]
-            RF0 = ERF[0, j]
-            RA1 = ERA[1, j]
-            RB1 = ERB[1, j]
-            RE1 = ERE[1, j]
-            RF1 = ERF[1, j]
-            RA01 = ERA[0, j] * ERA[1, j] - 1
-            for k in range(0, nz):
-                kk = k + zs
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii, jj - 1, kk]) / dy
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] + updatecoeffsE[materialEx, 4] * (RA01 * dHz + RA1 * RB0 * EPhi1[0, i, j, k] + RB1 * EPhi1[1, i, j, k])
-                EPhi1[1, i, j, k] = RE1 * EPhi1[1, i, j, k] - RF1 * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj - 1, kk]) / dy
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] - updatecoeffsE[materialEz, 4] * (RA01 * dHx + RA1 * RB0 * EPhi2[0, i, j, k] + RB1 * EPhi2[1, i, j, k])
-                EPhi2[1, i, j, k] = RE1 * EPhi2[1, i, j, k] - RF1 * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-#######################################################
-# Electric field PML updates - 2nd order - yplus slab #
-#######################################################
-cpdef void update_pml_2order_electric_yplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ez field components for the yplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEz
-    cdef float dy, dHx, dHz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            RA0 = ERA[0, j]
-            RB0 = ERB[0, j]
-            RE0 = ERE[0, j]
-            RF0 = ERF[0, j]
-            RA1 = ERA[1, j]
-            RB1 = ERB[1, j]
-            RE1 = ERE[1, j]
-            RF1 = ERF[1, j]
-            RA01 = ERA[0, j] * ERA[1, j] - 1
-            for k in range(0, nz):
-                kk = k + zs
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHz = (Hz[ii, jj, kk] - Hz[ii, jj - 1, kk]) / dy
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] + updatecoeffsE[materialEx, 4] * (RA01 * dHz + RA1 * RB0 * EPhi1[0, i, j, k] + RB1 * EPhi1[1, i, j, k])
-                EPhi1[1, i, j, k] = RE1 * EPhi1[1, i, j, k] - RF1 * (RA0 * dHz + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHz
-                # Ez
-                materialEz = ID[2, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj - 1, kk]) / dy
-                Ez[ii, jj, kk] = Ez[ii, jj, kk] - updatecoeffsE[materialEz, 4] * (RA01 * dHx + RA1 * RB0 * EPhi2[0, i, j, k] + RB1 * EPhi2[1, i, j, k])
-                EPhi2[1, i, j, k] = RE1 * EPhi2[1, i, j, k] - RF1 * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-########################################################
-# Electric field PML updates - 2nd order - zminus slab #
-########################################################
-cpdef void update_pml_2order_electric_zminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
+from libc.stdlib cimport free
+from libc.stdlib cimport malloc
+
+from gprMax.constants cimport floattype_t, complextype_t, idtype_t
+
+
+# Description of a PML slab - its extent, coefficients and field arrays - for the updates
+cdef struct pmlslab_t:
+    # Number of cells in the slab, i.e. extents of the loops over the slab
+    int nx, ny, nz
+    # Index in the field arrays of the first cell of the loops, and direction
+    # (+1 or -1) in which the index changes with the loop index
+    int xs, ys, zs, xd, yd, zd
+    # Direction (0, 1, 2 for x, y, z) and order of the PML
+    int axis, order
+    # Spatial discretisation in the direction of the PML
+    float d
+    # Size of the PML coefficient arrays (i.e. PML thickness)
+    int thickness
+    floattype_t* RA
+    floattype_t* RB
+    floattype_t* RE
+    floattype_t* RF
+    # Offsets (into flattened field arrays) of the field values differenced
+    Py_ssize_t lo, hi
+    # Two field components updated (only the first in 2D models), with the
+    # field components they are updated from, component in ID array, sign of
+    # update, and PML field arrays
+    int ncomponents
+    floattype_t* F1
+    floattype_t* F2
+    floattype_t* D1
+    floattype_t* D2
+    int ID1, ID2, sign1, sign2
+    floattype_t* Phi1
+    floattype_t* Phi2
+    Py_ssize_t Phi1ny, Phi1nz, Phi1size, Phi2ny, Phi2nz, Phi2size
+
+
+###############################################################
+# Electric and magnetic field PML updates - all slabs at once #
+###############################################################
+cpdef void update_pml_electric(
                         int nthreads,
+                        list pmls,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ey field components for the zminus slab.
-
-        Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-        """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEy
-    cdef float dz, dHx, dHy, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = zf - k
-                RA0 = ERA[0, k]
-                RB0 = ERB[0, k]
-                RE0 = ERE[0, k]
-                RF0 = ERF[0, k]
-                RA1 = ERA[1, k]
-                RB1 = ERB[1, k]
-                RE1 = ERE[1, k]
-                RF1 = ERF[1, k]
-                RA01 = ERA[0, k] * ERA[1, k] - 1
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii, jj, kk - 1]) / dz
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] - updatecoeffsE[materialEx, 4] * (RA01 * dHy + RA1 * RB0 * EPhi1[0, i, j, k] + RB1 * EPhi1[1, i, j, k])
-                EPhi1[1, i, j, k] = RE1 * EPhi1[1, i, j, k] - RF1 * (RA0 * dHy + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHy
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj, kk - 1]) / dz
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] + updatecoeffsE[materialEy, 4] * (RA01 * dHx + RA1 * RB0 * EPhi2[0, i, j, k] + RB1 * EPhi2[1, i, j, k])
-                EPhi2[1, i, j, k] = RE1 * EPhi2[1, i, j, k] - RF1 * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-#######################################################
-# Electric field PML updates - 2nd order - zplus slab #
-#######################################################
-cpdef void update_pml_2order_electric_zplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] EPhi1,
-                        floattype_t[:, :, :, ::1] EPhi2,
-                        floattype_t[:, ::1] ERA,
-                        floattype_t[:, ::1] ERB,
-                        floattype_t[:, ::1] ERE,
-                        floattype_t[:, ::1] ERF,
-                        float d
-                ):
-    """This function updates the Ex and Ey field components for the zplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, ERA, ERB, ERE, ERF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialEx, materialEy
-    cdef float dz, dHx, dHy, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                RA0 = ERA[0, k]
-                RB0 = ERB[0, k]
-                RE0 = ERE[0, k]
-                RF0 = ERF[0, k]
-                RA1 = ERA[1, k]
-                RB1 = ERB[1, k]
-                RE1 = ERE[1, k]
-                RF1 = ERF[1, k]
-                RA01 = ERA[0, k] * ERA[1, k] - 1
-                # Ex
-                materialEx = ID[0, ii, jj, kk]
-                dHy = (Hy[ii, jj, kk] - Hy[ii, jj, kk - 1]) / dz
-                Ex[ii, jj, kk] = Ex[ii, jj, kk] - updatecoeffsE[materialEx, 4] * (RA01 * dHy + RA1 * RB0 * EPhi1[0, i, j, k] + RB1 * EPhi1[1, i, j, k])
-                EPhi1[1, i, j, k] = RE1 * EPhi1[1, i, j, k] - RF1 * (RA0 * dHy + RB0 * EPhi1[0, i, j, k])
-                EPhi1[0, i, j, k] = RE0 * EPhi1[0, i, j, k] - RF0 * dHy
-                # Ey
-                materialEy = ID[1, ii, jj, kk]
-                dHx = (Hx[ii, jj, kk] - Hx[ii, jj, kk - 1]) / dz
-                Ey[ii, jj, kk] = Ey[ii, jj, kk] + updatecoeffsE[materialEy, 4] * (RA01 * dHx + RA1 * RB0 * EPhi2[0, i, j, k] + RB1 * EPhi2[1, i, j, k])
-                EPhi2[1, i, j, k] = RE1 * EPhi2[1, i, j, k] - RF1 * (RA0 * dHx + RB0 * EPhi2[0, i, j, k])
-                EPhi2[0, i, j, k] = RE0 * EPhi2[0, i, j, k] - RF0 * dHx
-
-
-########################################################
-# Magnetic field PML updates - 2nd order - xminus slab #
-########################################################
-cpdef void update_pml_2order_magnetic_xminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
+                        floattype_t[:, :, ::1] Hz
                 ):
-    """This function updates the Hy and Hz field components for the xminus slab.
+    """This function updates electric field components with the PML correction for all PML slabs.
 
     Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
         nthreads (int): Number of threads to use
+        pmls (list): PML class instances
         updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, ERE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
     """
 
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHy, materialHz
-    cdef float dx, dEy, dEz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = xf - (i + 1)
-        RA0 = HRA[0, i]
-        RB0 = HRB[0, i]
-        RE0 = HRE[0, i]
-        RF0 = HRF[0, i]
-        RA1 = HRA[1, i]
-        RB1 = HRB[1, i]
-        RE1 = HRE[1, i]
-        RF1 = HRF[1, i]
-        RA01 = HRA[0, i] * HRA[1, i] - 1
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEz = (Ez[ii + 1, jj, kk] - Ez[ii, jj, kk]) / dx
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] + updatecoeffsH[materialHy, 4] * (RA01 * dEz + RA1 * RB0 * HPhi1[0, i, j, k] + RB1 * HPhi1[1, i, j, k])
-                HPhi1[1, i, j, k] = RE1 * HPhi1[1, i, j, k] - RF1 * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEy = (Ey[ii + 1, jj, kk] - Ey[ii, jj, kk]) / dx
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] - updatecoeffsH[materialHz, 4] * (RA01 * dEy + RA1 * RB0 * HPhi2[0, i, j, k] + RB1 * HPhi2[1, i, j, k])
-                HPhi2[1, i, j, k] = RE1 * HPhi2[1, i, j, k] - RF1 * (RA0 * dEy + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEy
+    update_pml(nthreads, pmls, False, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
 
 
-#######################################################
-# Magnetic field PML updates - 2nd order - xplus slab #
-#######################################################
-cpdef void update_pml_2order_magnetic_xplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
+cpdef void update_pml_magnetic(
                         int nthreads,
+                        list pmls,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
+                        floattype_t[:, :, ::1] Hz
                 ):
-    """This function updates the Hy and Hz field components for the xplus slab.
+    """This function updates magnetic field components with the PML correction for all PML slabs.
 
     Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
         nthreads (int): Number of threads to use
+        pmls (list): PML class instances
         updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
     """
 
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHy, materialHz
-    cdef float dx, dEy, dEz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dx = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
+    update_pml(nthreads, pmls, True, updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
 
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        RA0 = HRA[0, i]
-        RB0 = HRB[0, i]
-        RE0 = HRE[0, i]
-        RF0 = HRF[0, i]
-        RA1 = HRA[1, i]
-        RB1 = HRB[1, i]
-        RE1 = HRE[1, i]
-        RF1 = HRF[1, i]
-        RA01 = HRA[0, i] * HRA[1, i] - 1
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEz = (Ez[ii + 1, jj, kk] - Ez[ii, jj, kk]) / dx
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] + updatecoeffsH[materialHy, 4] * (RA01 * dEz + RA1 * RB0 * HPhi1[0, i, j, k] + RB1 * HPhi1[1, i, j, k])
-                HPhi1[1, i, j, k] = RE1 * HPhi1[1, i, j, k] - RF1 * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEy = (Ey[ii + 1, jj, kk] - Ey[ii, jj, kk]) / dx
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] - updatecoeffsH[materialHz, 4] * (RA01 * dEy + RA1 * RB0 * HPhi2[0, i, j, k] + RB1 * HPhi2[1, i, j, k])
-                HPhi2[1, i, j, k] = RE1 * HPhi2[1, i, j, k] - RF1 * (RA0 * dEy + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEy
 
-
-########################################################
-# Magnetic field PML updates - 2nd order - yminus slab #
-########################################################
-cpdef void update_pml_2order_magnetic_yminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
+cdef void update_pml(
                         int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        list pmls,
+                        bint magnetic,
+                        floattype_t[:, ::1] updatecoeffs,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
+                        floattype_t[:, :, ::1] Hz
                 ):
-    """This function updates the Hx and Hz field components for the yminus slab.
+    """This function updates electric or magnetic field components with the PML correction for all PML slabs
+        in a single parallel region. The cells of each slab are shared between the threads (over the two outer
+        loops, so a slab that is only a few cells thick still keeps every thread busy). Slabs overlap at
+        the edges and corners of the domain, so they are updated in turn.
 
     Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
         nthreads (int): Number of threads to use
+        pmls (list): PML class instances
+        magnetic (bool): Update magnetic (rather than electric) field components
         updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
     """
 
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHz
-    cdef float dy, dEx, dEz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = yf - (j + 1)
-            RA0 = HRA[0, j]
-            RB0 = HRB[0, j]
-            RE0 = HRE[0, j]
-            RF0 = HRF[0, j]
-            RA1 = HRA[1, j]
-            RB1 = HRB[1, j]
-            RE1 = HRE[1, j]
-            RF1 = HRF[1, j]
-            RA01 = HRA[0, j] * HRA[1, j] - 1
-            for k in range(0, nz):
-                kk = k + zs
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEz = (Ez[ii, jj + 1, kk] - Ez[ii, jj, kk]) / dy
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] - updatecoeffsH[materialHx, 4] * (RA01 * dEz + RA1 * RB0 * HPhi1[0, i, j, k] + RB1 * HPhi1[1, i, j, k])
-                HPhi1[1, i, j, k] = RE1 * HPhi1[1, i, j, k] - RF1 * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEx = (Ex[ii, jj + 1, kk] - Ex[ii, jj, kk]) / dy
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] + updatecoeffsH[materialHz, 4] * (RA01 * dEx + RA1 * RB0 * HPhi2[0, i, j, k] + RB1 * HPhi2[1, i, j, k])
-                HPhi2[1, i, j, k] = RE1 * HPhi2[1, i, j, k] - RF1 * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
-
-
-#######################################################
-# Magnetic field PML updates - 2nd order - yplus slab #
-#######################################################
-cpdef void update_pml_2order_magnetic_yplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+    cdef Py_ssize_t s, row
+    cdef int axis
+    cdef int nslabs = len(pmls)
+    cdef int plane = -1
+    cdef Py_ssize_t NY = Ex.shape[1]
+    cdef Py_ssize_t NZ = Ex.shape[2]
+    cdef Py_ssize_t IDstride = Ex.shape[0] * NY * NZ
+    cdef pmlslab_t* slabs
+
+    if nslabs == 0:
+        return
+
+    # Only a single plane of field components is stored in 2D models
+    for axis in range(3):
+        if Ex.shape[axis] == 1:
+            plane = axis
+
+    slabs = <pmlslab_t*> malloc(nslabs * sizeof(pmlslab_t))
+    try:
+        for s in range(nslabs):
+            describe_slab(&slabs[s], pmls[s], magnetic, plane, NY, NZ, Ex, Ey, Ez, Hx, Hy, Hz)
+
+        with nogil, parallel(num_threads=nthreads):
+            for s in range(nslabs):
+                for row in prange(slabs[s].nx * slabs[s].ny, schedule='static'):
+                    update_pml_row(&slabs[s], row, &updatecoeffs[0, 0], updatecoeffs.shape[1], &ID[0, 0, 0, 0], IDstride, NY, NZ)
+    finally:
+        free(slabs)
+
+
+cdef void describe_slab(
+                        pmlslab_t* slab,
+                        object pml,
+                        bint magnetic,
+                        int plane,
+                        Py_ssize_t NY,
+                        Py_ssize_t NZ,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
+                        floattype_t[:, :, ::1] Hz
                 ):
-    """This function updates the Hx and Hz field components for the yplus slab.
+    """This function describes a PML slab for the updates.
 
     Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
+        slab (pointer): Description of the slab to fill in
+        pml (class): PML class instance
+        magnetic (bool): Describe magnetic (rather than electric) field updates
+        plane (int): Invariant direction (0, 1, 2 for x, y, z) of a 2D model, or -1 for a 3D model
+        NY, NZ (int): Size of the field arrays in the y and z directions
+        E, H (memoryviews): Access to field component arrays
     """
 
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHz
-    cdef float dy, dEx, dEz, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dy = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            RA0 = HRA[0, j]
-            RB0 = HRB[0, j]
-            RE0 = HRE[0, j]
-            RF0 = HRF[0, j]
-            RA1 = HRA[1, j]
-            RB1 = HRB[1, j]
-            RE1 = HRE[1, j]
-            RF1 = HRF[1, j]
-            RA01 = HRA[0, j] * HRA[1, j] - 1
-            for k in range(0, nz):
-                kk = k + zs
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEz = (Ez[ii, jj + 1, kk] - Ez[ii, jj, kk]) / dy
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] - updatecoeffsH[materialHx, 4] * (RA01 * dEz + RA1 * RB0 * HPhi1[0, i, j, k] + RB1 * HPhi1[1, i, j, k])
-                HPhi1[1, i, j, k] = RE1 * HPhi1[1, i, j, k] - RF1 * (RA0 * dEz + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEz
-                # Hz
-                materialHz = ID[5, ii, jj, kk]
-                dEx = (Ex[ii, jj + 1, kk] - Ex[ii, jj, kk]) / dy
-                Hz[ii, jj, kk] = Hz[ii, jj, kk] + updatecoeffsH[materialHz, 4] * (RA01 * dEx + RA1 * RB0 * HPhi2[0, i, j, k] + RB1 * HPhi2[1, i, j, k])
-                HPhi2[1, i, j, k] = RE1 * HPhi2[1, i, j, k] - RF1 * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
-
-
-########################################################
-# Magnetic field PML updates - 2nd order - zminus slab #
-########################################################
-cpdef void update_pml_2order_magnetic_zminus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hx and Hy field components for the zminus slab.
+    cdef floattype_t[:, ::1] RA, RB, RE, RF
+    cdef floattype_t[:, :, :, ::1] Phi1, Phi2
+    cdef bint swap
+    cdef int axis = 'xyz'.index(pml.direction[0])
+    cdef bint minus = pml.direction[1:] == 'minus'
+    cdef Py_ssize_t stride = (NY * NZ, NZ, 1)[axis]
+
+    slab.nx = pml.xf - pml.xs
+    slab.ny = pml.yf - pml.ys
+    slab.nz = pml.zf - pml.zs
+    slab.axis = axis
+    slab.order = len(pml.CFS)
+    slab.d = pml.d
+    if slab.nx <= 0 or slab.ny <= 0 or slab.nz <= 0:
+        slab.nx = 0
+        return
+    if slab.order not in (1, 2):
+        raise ValueError('PML updates are only available for up to a 2nd order PML')
+
+    # Cells in a slab where absorption increases in the negative direction
+    # are looped over from the inside of the domain; magnetic field components
+    # are offset by half a cell
+    slab.xs, slab.ys, slab.zs = pml.xs, pml.ys, pml.zs
+    slab.xd = slab.yd = slab.zd = 1
+    if minus:
+        if axis == 0:
+            slab.xs, slab.xd = pml.xf - magnetic, -1
+        elif axis == 1:
+            slab.ys, slab.yd = pml.yf - magnetic, -1
+        else:
+            slab.zs, slab.zd = pml.zf - magnetic, -1
+
+    # Field components updated, and those they are updated from (electric
+    # field components from a backward difference of magnetic field
+    # components; magnetic from a forward difference of electric)
+    if not magnetic:
+        RA, RB, RE, RF = pml.ERA, pml.ERB, pml.ERE, pml.ERF
+        Phi1, Phi2 = pml.EPhi1, pml.EPhi2
+        slab.lo, slab.hi = -stride, 0
+        if axis == 0:
+            slab.F1, slab.D1, slab.ID1, slab.sign1 = &Ey[0, 0, 0], &Hz[0, 0, 0], 1, -1
+            slab.F2, slab.D2, slab.ID2, slab.sign2 = &Ez[0, 0, 0], &Hy[0, 0, 0], 2, 1
+        elif axis == 1:
+            slab.F1, slab.D1, slab.ID1, slab.sign1 = &Ex[0, 0, 0], &Hz[0, 0, 0], 0, 1
+            slab.F2, slab.D2, slab.ID2, slab.sign2 = &Ez[0, 0, 0], &Hx[0, 0, 0], 2, -1
+        else:
+            slab.F1, slab.D1, slab.ID1, slab.sign1 = &Ex[0, 0, 0], &Hy[0, 0, 0], 0, -1
+            slab.F2, slab.D2, slab.ID2, slab.sign2 = &Ey[0, 0, 0], &Hx[0, 0, 0], 1, 1
+    else:
+        RA, RB, RE, RF = pml.HRA, pml.HRB, pml.HRE, pml.HRF
+        Phi1, Phi2 = pml.HPhi1, pml.HPhi2
+        slab.lo, slab.hi = 0, stride
+        if axis == 0:
+            slab.F1, slab.D1, slab.ID1, slab.sign1 = &Hy[0, 0, 0], &Ez[0, 0, 0], 4, 1
+            slab.F2, slab.D2, slab.ID2, slab.sign2 = &Hz[0, 0, 0], &Ey[0, 0, 0], 5, -1
+        elif axis == 1:
+            slab.F1, slab.D1, slab.ID1, slab.sign1 = &Hx[0, 0, 0], &Ez[0, 0, 0], 3, -1
+            slab.F2, slab.D2, slab.ID2, slab.sign2 = &Hz[0, 0, 0], &Ex[0, 0, 0], 5, 1
+        else:
+            slab.F1, slab.D1, slab.ID1, slab.sign1 = &Hx[0, 0, 0], &Ey[0, 0, 0], 3, 1
+            slab.F2, slab.D2, slab.ID2, slab.sign2 = &Hy[0, 0, 0], &Ex[0, 0, 0], 4, -1
+
+    slab.thickness = RA.shape[1]
+    slab.RA, slab.RB, slab.RE, slab.RF = &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0]
+    slab.Phi1, slab.Phi2 = &Phi1[0, 0, 0, 0], &Phi2[0, 0, 0, 0]
+    slab.Phi1ny, slab.Phi1nz, slab.Phi1size = Phi1.shape[2], Phi1.shape[3], Phi1.shape[1] * Phi1.shape[2] * Phi1.shape[3]
+    slab.Phi2ny, slab.Phi2nz, slab.Phi2size = Phi2.shape[2], Phi2.shape[3], Phi2.shape[1] * Phi2.shape[2] * Phi2.shape[3]
+
+    # Only one of the field components is updated in 2D models, i.e. the
+    # electric field component normal to the plane, or the magnetic field
+    # component in the plane
+    slab.ncomponents = 2
+    if plane >= 0:
+        slab.ncomponents = 1
+        if magnetic:
+            swap = slab.ID1 - 3 == plane
+        else:
+            swap = slab.ID1 != plane
+        if swap:
+            slab.F1, slab.D1, slab.ID1, slab.sign1 = slab.F2, slab.D2, slab.ID2, slab.sign2
+            slab.Phi1, slab.Phi1ny, slab.Phi1nz, slab.Phi1size = slab.Phi2, slab.Phi2ny, slab.Phi2nz, slab.Phi2size
+
+
+cdef inline void update_pml_row(
+                        pmlslab_t* slab,
+                        Py_ssize_t row,
+                        floattype_t* updatecoeffs,
+                        Py_ssize_t ncoeffs,
+                        idtype_t* ID,
+                        Py_ssize_t IDstride,
+                        Py_ssize_t NY,
+                        Py_ssize_t NZ
+                ) noexcept nogil:
+    """This function updates the field components of a row (in the z direction) of cells of a PML slab.
 
     Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
+        slab (pointer): Description of the slab
+        row (int): Index of the row, i.e. i * ny + j
+        updatecoeffs, ID (pointers): Access to update coeffients and ID arrays
+        ncoeffs (int): Number of update coefficients for each material
+        IDstride (int): Number of cells in each component of the ID array
+        NY, NZ (int): Size of the field arrays in the y and z directions
     """
 
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHy
-    cdef float dz, dEx, dEy, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = zf - (k + 1)
-                RA0 = HRA[0, k]
-                RB0 = HRB[0, k]
-                RE0 = HRE[0, k]
-                RF0 = HRF[0, k]
-                RA1 = HRA[1, k]
-                RB1 = HRB[1, k]
-                RE1 = HRE[1, k]
-                RF1 = HRF[1, k]
-                RA01 = HRA[0, k] * HRA[1, k] - 1
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEy = (Ey[ii, jj, kk + 1] - Ey[ii, jj, kk]) / dz
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] + updatecoeffsH[materialHx, 4] * (RA01 * dEy + RA1 * RB0 * HPhi1[0, i, j, k] + RB1 * HPhi1[1, i, j, k])
-                HPhi1[1, i, j, k] = RE1 * HPhi1[1, i, j, k] - RF1 * (RA0 * dEy + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEy
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEx = (Ex[ii, jj, kk + 1] - Ex[ii, jj, kk]) / dz
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] - updatecoeffsH[materialHy, 4] * (RA01 * dEx + RA1 * RB0 * HPhi2[0, i, j, k] + RB1 * HPhi2[1, i, j, k])
-                HPhi2[1, i, j, k] = RE1 * HPhi2[1, i, j, k] - RF1 * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
-
-
-#######################################################
-# Magnetic field PML updates - 2nd order - zplus slab #
-#######################################################
-cpdef void update_pml_2order_magnetic_zplus(
-                        int xs,
-                        int xf,
-                        int ys,
-                        int yf,
-                        int zs,
-                        int zf,
-                        int nthreads,
-                        floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
-                        floattype_t[:, :, ::1] Ex,
-                        floattype_t[:, :, ::1] Ey,
-                        floattype_t[:, :, ::1] Ez,
-                        floattype_t[:, :, ::1] Hx,
-                        floattype_t[:, :, ::1] Hy,
-                        floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] HPhi1,
-                        floattype_t[:, :, :, ::1] HPhi2,
-                        floattype_t[:, ::1] HRA,
-                        floattype_t[:, ::1] HRB,
-                        floattype_t[:, ::1] HRE,
-                        floattype_t[:, ::1] HRF,
-                        float d
-                ):
-    """This function updates the Hx and Hy field components for the zplus slab.
-
-    Args:
-        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
-        nthreads (int): Number of threads to use
-        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
-        EPhi, HPhi, HRA, HRB, HRE, HRF (memoryviews): Access to PML coefficient arrays
-        d (float): Spatial discretisation, e.g. dx, dy or dz
-    """
-
-    cdef Py_ssize_t i, j, k, ii, jj, kk
-    cdef int nx, ny, nz, materialHx, materialHy
-    cdef float dz, dEx, dEy, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
-    dz = d
-    nx = xf - xs
-    ny = yf - ys
-    nz = zf - zs
-
-    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-        ii = i + xs
-        for j in range(0, ny):
-            jj = j + ys
-            for k in range(0, nz):
-                kk = k + zs
-                RA0 = HRA[0, k]
-                RB0 = HRB[0, k]
-                RE0 = HRE[0, k]
-                RF0 = HRF[0, k]
-                RA1 = HRA[1, k]
-                RB1 = HRB[1, k]
-                RE1 = HRE[1, k]
-                RF1 = HRF[1, k]
-                RA01 = HRA[0, k] * HRA[1, k] - 1
-                # Hx
-                materialHx = ID[3, ii, jj, kk]
-                dEy = (Ey[ii, jj, kk + 1] - Ey[ii, jj, kk]) / dz
-                Hx[ii, jj, kk] = Hx[ii, jj, kk] + updatecoeffsH[materialHx, 4] * (RA01 * dEy + RA1 * RB0 * HPhi1[0, i, j, k] + RB1 * HPhi1[1, i, j, k])
-                HPhi1[1, i, j, k] = RE1 * HPhi1[1, i, j, k] - RF1 * (RA0 * dEy + RB0 * HPhi1[0, i, j, k])
-                HPhi1[0, i, j, k] = RE0 * HPhi1[0, i, j, k] - RF0 * dEy
-                # Hy
-                materialHy = ID[4, ii, jj, kk]
-                dEx = (Ex[ii, jj, kk + 1] - Ex[ii, jj, kk]) / dz
-                Hy[ii, jj, kk] = Hy[ii, jj, kk] - updatecoeffsH[materialHy, 4] * (RA01 * dEx + RA1 * RB0 * HPhi2[0, i, j, k] + RB1 * HPhi2[1, i, j, k])
-                HPhi2[1, i, j, k] = RE1 * HPhi2[1, i, j, k] - RF1 * (RA0 * dEx + RB0 * HPhi2[0, i, j, k])
-                HPhi2[0, i, j, k] = RE0 * HPhi2[0, i, j, k] - RF0 * dEx
+    cdef Py_ssize_t i, j, k, l, cell, cell0, phi1, phi10, phi2, phi20
+    cdef float dD, RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01
+    cdef float d = slab.d
+    cdef int T = slab.thickness
+    cdef int zd = slab.zd
+    cdef int ncomponents = slab.ncomponents
+    cdef bint zaxis = slab.axis == 2
+    cdef floattype_t* RA = slab.RA
+    cdef floattype_t* RB = slab.RB
+    cdef floattype_t* RE = slab.RE
+    cdef floattype_t* RF = slab.RF
+    cdef floattype_t* F1 = slab.F1
+    cdef floattype_t* F2 = slab.F2
+    cdef floattype_t* D1 = slab.D1
+    cdef floattype_t* D2 = slab.D2
+    cdef floattype_t* Phi1 = slab.Phi1
+    cdef floattype_t* Phi2 = slab.Phi2
+    cdef Py_ssize_t Phi1size = slab.Phi1size
+    cdef Py_ssize_t Phi2size = slab.Phi2size
+    cdef Py_ssize_t lo = slab.lo
+    cdef Py_ssize_t hi = slab.hi
+    cdef idtype_t* ID1 = ID + slab.ID1 * IDstride
+    cdef idtype_t* ID2 = ID + slab.ID2 * IDstride
+    cdef floattype_t* coeffs = updatecoeffs + 4
+    cdef float sign1 = slab.sign1
+    cdef float sign2 = slab.sign2
+
+    i = row // slab.ny
+    j = row - i * slab.ny
+    l = i if slab.axis == 0 else j
+
+    # Indices of the first cell of the row in the field and PML field arrays
+    cell0 = ((slab.xs + slab.xd * i) * NY + slab.ys + slab.yd * j) * NZ + slab.zs
+    phi10 = (i * slab.Phi1ny + j) * slab.Phi1nz
+    phi20 = (i * slab.Phi2ny + j) * slab.Phi2nz
+
+    if slab.order == 1:
+        RA0 = RA[l] - 1
+        RB0 = RB[l]
+        RE0 = RE[l]
+        RF0 = RF[l]
+        for k in range(0, slab.nz):
+            # Coefficients for the distance into the slab
+            if zaxis:
+                RA0 = RA[k] - 1
+                RB0 = RB[k]
+                RE0 = RE[k]
+                RF0 = RF[k]
+            cell = cell0 + zd * k
+            phi1 = phi10 + k
+            phi2 = phi20 + k
+
+            # 1st field component
+            dD = (D1[cell + hi] - D1[cell + lo]) / d
+            F1[cell] = F1[cell] + sign1 * coeffs[ID1[cell] * ncoeffs] * (RA0 * dD + RB0 * Phi1[phi1])
+            Phi1[phi1] = RE0 * Phi1[phi1] - RF0 * dD
+
+            # 2nd field component
+            if ncomponents == 2:
+                dD = (D2[cell + hi] - D2[cell + lo]) / d
+                F2[cell] = F2[cell] + sign2 * coeffs[ID2[cell] * ncoeffs] * (RA0 * dD + RB0 * Phi2[phi2])
+                Phi2[phi2] = RE0 * Phi2[phi2] - RF0 * dD
+
+    else:
+        RA0 = RA[l]
+        RB0 = RB[l]
+        RE0 = RE[l]
+        RF0 = RF[l]
+        RA1 = RA[T + l]
+        RB1 = RB[T + l]
+        RE1 = RE[T + l]
+        RF1 = RF[T + l]
+        RA01 = RA[l] * RA[T + l] - 1
+        for k in range(0, slab.nz):
+            # Coefficients for the distance into the slab
+            if zaxis:
+                RA0 = RA[k]
+                RB0 = RB[k]
+                RE0 = RE[k]
+                RF0 = RF[k]
+                RA1 = RA[T + k]
+                RB1 = RB[T + k]
+                RE1 = RE[T + k]
+                RF1 = RF[T + k]
+                RA01 = RA[k] * RA[T + k] - 1
+            cell = cell0 + zd * k
+            phi1 = phi10 + k
+            phi2 = phi20 + k
+
+            # 1st field component
+            dD = (D1[cell + hi] - D1[cell + lo]) / d
+            F1[cell] = F1[cell] + sign1 * coeffs[ID1[cell] * ncoeffs] * (RA01 * dD + RA1 * RB0 * Phi1[phi1] + RB1 * Phi1[Phi1size + phi1])
+            Phi1[Phi1size + phi1] = RE1 * Phi1[Phi1size + phi1] - RF1 * (RA0 * dD + RB0 * Phi1[phi1])
+            Phi1[phi1] = RE0 * Phi1[phi1] - RF0 * dD
+
+            # 2nd field component
+            if ncomponents == 2:
+                dD = (D2[cell + hi] - D2[cell + lo]) / d
+                F2[cell] = F2[cell] + sign2 * coeffs[ID2[cell] * ncoeffs] * (RA01 * dD + RA1 * RB0 * Phi2[phi2] + RB1 * Phi2[Phi2size + phi2])
+                Phi2[Phi2size + phi2] = RE1 * Phi2[Phi2size + phi2] - RF1 * (RA0 * dD + RB0 * Phi2[phi2])
+                Phi2[phi2] = RE0 * Phi2[phi2] - RF0 * dD
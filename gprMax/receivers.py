@@ -18,9 +18,12 @@
 
 from collections import OrderedDict
 
+import h5py
 import numpy as np
 
 from gprMax.constants import floattype
+from gprMax.exceptions import GeneralError
+from gprMax.fields_outputs_ext import store_rx_outputs
 
 
 class Rx(object):
@@ -40,6 +43,187 @@ class Rx(object):
         self.xcoordorigin = None
         self.ycoordorigin = None
         self.zcoordorigin = None
+        # Iterations at which output components are stored, i.e. time gate and sampling interval
+        self.sampling = None
+
+
+class RxStore(object):
+    """
+    Output components of receivers with the same sampling, i.e. time gate
+        and sampling interval. Samples are stored in a buffer which, if a
+        HDF5 file is given, holds a fixed number of samples and is flushed to
+        a chunked dataset in the file as it fills, so the memory used does not
+        depend on the length of the time window. Otherwise the buffer holds
+        all the samples, and the output arrays of each receiver are views of
+        the buffer. Output components are only flushed to file if those of
+        all the receivers are too large to hold in memory; the output arrays
+        of the receivers are then not available, only the output file.
+    """
+
+    # Maximum size (bytes) of a buffer that is flushed to file, and of the
+    # blocks of receivers read back from file
+    buffersize = 64 * 1024**2
+
+    # Size (bytes) of the output components of all the receivers of a model
+    # above which they are flushed to file rather than held in memory
+    spillsize = 512 * 1024**2
+
+    def __init__(self, rxs, rxindices, sampling, f=None, name=None):
+        """
+        Args:
+            rxs (list): Receiver class instances.
+            rxindices (list): Indices of the receivers in the list of receivers of the model.
+            sampling (range): Iterations at which output components are stored.
+            f (object): HDF5 file to flush the buffer to, or None to hold all samples in memory.
+            name (str): Name of the dataset in the HDF5 file.
+        """
+
+        self.rxs = rxs
+        self.rxindices = rxindices
+        self.sampling = sampling
+        self.nsamples = len(sampling)
+
+        # Receiver coordinates
+        self.rxcoords = np.zeros((len(rxs), 3), dtype=np.int32)
+        for i, rx in enumerate(rxs):
+            self.rxcoords[i, 0] = rx.xcoord
+            self.rxcoords[i, 1] = rx.ycoord
+            self.rxcoords[i, 2] = rx.zcoord
+
+        # Output components requested by any receiver
+        self.components = [output for output in Rx.allowableoutputs if any(output in rx.outputs for rx in rxs)]
+        self.rxcomponents = np.array([Rx.allowableoutputs.index(output) for output in self.components], dtype=np.int32)
+
+        # Number of samples stored, and flushed to file
+        self.nstored = 0
+        self.nflushed = 0
+
+        self.dataset = None
+        if f is None:
+            nbuffer = self.nsamples
+        else:
+            # Dataset is chunked so that both a flushed buffer and a block of
+            # receivers (with all their samples) are made up of whole chunks
+            itemsize = np.dtype(floattype).itemsize
+            nbuffer = min(self.nsamples, max(1, RxStore.buffersize // (len(self.components) * len(rxs) * itemsize)))
+            nblock = min(len(rxs), max(1, RxStore.buffersize // (len(self.components) * self.nsamples * itemsize)))
+            shape = (len(self.components), self.nsamples, len(rxs))
+            if name in f:
+                self.dataset = f[name]
+                if self.dataset.shape != shape:
+                    raise GeneralError('Receiver output file {} is not of the same model as the input file'.format(f.filename))
+            else:
+                # Space for the dataset is allocated when it is created, so
+                # flushing buffers does not change the structure of the file
+                dcpl = h5py.h5p.create(h5py.h5p.DATASET_CREATE)
+                dcpl.set_alloc_time(h5py.h5d.ALLOC_TIME_EARLY)
+                self.dataset = f.create_dataset(name, shape, dtype=floattype, chunks=(len(self.components), nbuffer, nblock), dcpl=dcpl)
+
+        # Buffer to store output components - rows are output components; columns are samples; pages are receivers
+        self.buffer = np.zeros((len(self.components), nbuffer, len(rxs)), dtype=floattype)
+        for i, rx in enumerate(rxs):
+            for output in rx.outputs:
+                rx.outputs[output] = self.buffer[self.components.index(output), :, i] if f is None else None
+
+    def count(self, iteration):
+        """Number of samples before an iteration.
+
+        Args:
+            iteration (int): Iteration number.
+
+        Returns:
+            (int): Number of samples.
+        """
+
+        return len(range(self.sampling.start, min(iteration, self.sampling.stop), self.sampling.step))
+
+    def store(self, iteration, Ex, Ey, Ez, Hx, Hy, Hz, G):
+        """Store output components for the receivers if the iteration is sampled.
+
+        Args:
+            iteration (int): Current iteration number.
+            Ex, Ey, Ez, Hx, Hy, Hz (memory view): Current electric and magnetic field values.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        if iteration not in self.sampling:
+            return
+
+        sample = self.sampling.index(iteration)
+        column = sample % self.buffer.shape[1]
+        store_rx_outputs(column, len(self.rxs), len(self.components), G.dx, G.dy, G.dz, self.rxcoords, self.rxcomponents, self.buffer, Ex, Ey, Ez, Hx, Hy, Hz)
+        self.nstored = sample + 1
+
+        if self.dataset is not None and (column == self.buffer.shape[1] - 1 or self.nstored == self.nsamples):
+            self.flush()
+
+    def flush(self):
+        """Write samples stored in the buffer since it was last flushed to file."""
+
+        if self.nstored > self.nflushed:
+            column = self.nflushed % self.buffer.shape[1]
+            self.dataset[:, self.nflushed:self.nstored, :] = self.buffer[:, column:column + self.nstored - self.nflushed, :]
+            self.nflushed = self.nstored
+
+    def resume(self, iteration):
+        """Continue storing output components from an iteration, i.e. samples before it have been stored.
+
+        Args:
+            iteration (int): Iteration number.
+        """
+
+        self.nstored = self.count(iteration)
+        self.nflushed = self.nstored
+
+    def write_hdf5(self, f):
+        """Write output components of the receivers, read from file in blocks of receivers, to an output file.
+
+        Args:
+            f (object): HDF5 output file.
+        """
+
+        nblock = self.dataset.chunks[2]
+        for start in range(0, len(self.rxs), nblock):
+            block = self.dataset[:, :, start:start + nblock]
+            for i, rx in enumerate(self.rxs[start:start + nblock]):
+                for output in rx.outputs:
+                    f['/rxs/rx' + str(self.rxindices[start + i] + 1) + '/' + output] = block[self.components.index(output), :, i]
+
+
+def rx_outputs_size(G):
+    """Size of the output components of all receivers, i.e. the memory required to hold them.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        size (int): Size in bytes.
+    """
+
+    return sum(len(rx.outputs) * len(rx.sampling) for rx in G.rxs) * np.dtype(floattype).itemsize
+
+
+def initialise_rx_stores(G, f=None):
+    """Initialise stores of output components for groups of receivers with the same sampling.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        f (object): HDF5 file to flush buffers of output components to while
+                    solving, or None to hold all output components in memory.
+
+    Returns:
+        rxstores (list): RxStore class instances.
+    """
+
+    groups = OrderedDict()
+    for rxindex, rx in enumerate(G.rxs):
+        groups.setdefault(rx.sampling, []).append(rxindex)
+
+    rxstores = []
+    for n, (sampling, rxindices) in enumerate(groups.items()):
+        rxstores.append(RxStore([G.rxs[rxindex] for rxindex in rxindices], rxindices, sampling, f, 'rxs' + str(n)))
+
+    return rxstores
 
 
 def gpu_initialise_rx_arrays(G):
@@ -80,9 +264,9 @@ def gpu_get_rx_array(rxs_gpu, rxcoords_gpu, G):
     for rx in G.rxs:
         for rxgpu in range(len(G.rxs)):
             if rx.xcoord == rxcoords_gpu[rxgpu, 0] and rx.ycoord == rxcoords_gpu[rxgpu, 1] and rx.zcoord == rxcoords_gpu[rxgpu, 2]:
-                rx.outputs['Ex'] = rxs_gpu[0, :, rxgpu]
-                rx.outputs['Ey'] = rxs_gpu[1, :, rxgpu]
-                rx.outputs['Ez'] = rxs_gpu[2, :, rxgpu]
-                rx.outputs['Hx'] = rxs_gpu[3, :, rxgpu]
-                rx.outputs['Hy'] = rxs_gpu[4, :, rxgpu]
-                rx.outputs['Hz'] = rxs_gpu[5, :, rxgpu]
+                rx.outputs['Ex'] = rxs_gpu[0, rx.sampling, rxgpu]
+                rx.outputs['Ey'] = rxs_gpu[1, rx.sampling, rxgpu]
+                rx.outputs['Ez'] = rxs_gpu[2, rx.sampling, rxgpu]
+                rx.outputs['Hx'] = rxs_gpu[3, rx.sampling, rxgpu]
+                rx.outputs['Hy'] = rxs_gpu[4, rx.sampling, rxgpu]
+                rx.outputs['Hz'] = rxs_gpu[5, rx.sampling, rxgpu]
@@ -20,12 +20,12 @@ import os
 import sys
 from struct import pack
 
+import h5py
 import numpy as np
 
+from gprMax._version import __version__
 from gprMax.constants import floattype
-from gprMax.grid import Ix
-from gprMax.grid import Iy
-from gprMax.grid import Iz
+from gprMax.exceptions import GeneralError
 from gprMax.utilities import round_value
 
 
@@ -67,6 +67,25 @@ class Snapshot(object):
         self.time = time
         self.basefilename = filename
 
+    def snapshot_filename(self, appendmodelnumber, extension, G):
+        """Creates the directory for snapshots and constructs the filename
+            from the user-supplied name and model run number.
+
+        Args:
+            appendmodelnumber (str): Text to append to filename.
+            extension (str): File extension.
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            filename (str): Absolute path of the snapshot file.
+        """
+
+        snapshotdir = os.path.join(G.inputdirectory, os.path.splitext(G.inputfilename)[0] + '_snaps' + appendmodelnumber)
+        if not os.path.exists(snapshotdir):
+            os.mkdir(snapshotdir)
+
+        return os.path.abspath(os.path.join(snapshotdir, self.basefilename + extension))
+
     def prepare_vtk_imagedata(self, appendmodelnumber, G):
         """Prepares a VTK ImageData (.vti) file for a snapshot.
 
@@ -80,11 +99,7 @@ class Snapshot(object):
         self.vtk_ny = self.yf - self.ys
         self.vtk_nz = self.zf - self.zs
 
-        # Create directory and construct filename from user-supplied name and model run number
-        snapshotdir = os.path.join(G.inputdirectory, os.path.splitext(G.inputfilename)[0] + '_snaps' + appendmodelnumber)
-        if not os.path.exists(snapshotdir):
-            os.mkdir(snapshotdir)
-        self.filename = os.path.abspath(os.path.join(snapshotdir, self.basefilename + '.vti'))
+        self.filename = self.snapshot_filename(appendmodelnumber, '.vti', G)
 
         # Calculate number of cells according to requested sampling
         self.vtk_xscells = round_value(self.xs / self.dx)
@@ -108,48 +123,265 @@ class Snapshot(object):
         self.filehandle.write('</CellData>\n</Piece>\n</ImageData>\n<AppendedData encoding="raw">\n_'.encode('utf-8'))
         self.filehandle.close()
 
-    def write_vtk_imagedata(self, Ex, Ey, Ez, Hx, Hy, Hz, G, pbar):
+    def stage_fields(self, Ex, Ey, Ez, Hx, Hy, Hz):
+        """Copies the electric and magnetic field values required to write the
+            snapshot, so it can be written while the fields continue to be updated.
+
+        Args:
+            Ex, Ey, Ez, Hx, Hy, Hz (memory view): Electric and magnetic field values.
+
+        Returns:
+            fields (tuple): Copies of the electric and magnetic field values.
+            origin (tuple): Indices of the first cell of the copied fields.
+        """
+
+        origin = (max(self.xs - 1, 0), max(self.ys - 1, 0), max(self.zs - 1, 0))
+        slab = np.s_[origin[0]:self.xf + 1, origin[1]:self.yf + 1, origin[2]:self.zf + 1]
+        fields = tuple(np.array(field[slab]) for field in (Ex, Ey, Ez, Hx, Hy, Hz))
+
+        # Only a single plane of field components is stored in 2D models;
+        # those in the next plane are zero
+        shape = (self.xf + 1 - origin[0], self.yf + 1 - origin[1], self.zf + 1 - origin[2])
+        if fields[0].shape != shape:
+            padding = [(0, n - m) for n, m in zip(shape, fields[0].shape)]
+            fields = tuple(np.pad(field, padding, mode='constant') for field in fields)
+
+        return fields, origin
+
+    def write_vtk_imagedata(self, Ex, Ey, Ez, Hx, Hy, Hz, G, pbar=None, origin=(0, 0, 0)):
         """Writes electric and magnetic field values to VTK ImageData (.vti) file.
 
         Args:
             Ex, Ey, Ez, Hx, Hy, Hz (memory view): Electric and magnetic field values.
             G (class): Grid class instance - holds essential parameters describing the model.
             pbar (class): Progress bar class instance.
+            origin (tuple): Indices of the first cell of the field values, if
+                    they are a copy of part of the grid (see stage_fields).
         """
 
         self.filehandle = open(self.filename, 'ab')
 
         datasize = 3 * np.dtype(floattype).itemsize * (self.vtk_xfcells - self.vtk_xscells) * (self.vtk_yfcells - self.vtk_yscells) * (self.vtk_zfcells - self.vtk_zscells)
+
+        efield, hfield, current = self.cell_values(Ex, Ey, Ez, Hx, Hy, Hz, G, origin)
+        self.write_vtk_dataarray(efield, datasize, pbar)
+        self.write_vtk_dataarray(hfield, datasize, pbar)
+        self.write_vtk_dataarray(current, datasize, pbar)
+
+        self.filehandle.write('\n</AppendedData>\n</VTKFile>'.encode('utf-8'))
+        self.filehandle.close()
+
+    def cell_values(self, Ex, Ey, Ez, Hx, Hy, Hz, G, origin=(0, 0, 0)):
+        """Calculates the electric and magnetic field values and currents at
+            the sampled cells of the snapshot.
+
+        Args:
+            Ex, Ey, Ez, Hx, Hy, Hz (memory view): Electric and magnetic field values.
+            G (class): Grid class instance - holds essential parameters describing the model.
+            origin (tuple): Indices of the first cell of the field values, if
+                    they are a copy of part of the grid (see stage_fields).
+
+        Returns:
+            efield, hfield, current (tuple): numpy arrays of x, y and z
+                    components (indexed i, j, k) of the electric field,
+                    magnetic field and current.
+        """
+
+        # Indices of sampled cells
+        i = np.arange(self.xs, self.xf, self.dx)
+        j = np.arange(self.ys, self.yf, self.dy)
+        k = np.arange(self.zs, self.zf, self.dz)
+        ii, jj, kk = np.ix_(i - origin[0], j - origin[1], k - origin[2])
+
+        # The electric field component value at a point comes from average of the 4 electric field component values in that cell
+        efield = (Ex[ii, jj, kk] + Ex[ii, jj + 1, kk] + Ex[ii, jj, kk + 1] + Ex[ii, jj + 1, kk + 1]) / 4, \
+                 (Ey[ii, jj, kk] + Ey[ii + 1, jj, kk] + Ey[ii, jj, kk + 1] + Ey[ii + 1, jj, kk + 1]) / 4, \
+                 (Ez[ii, jj, kk] + Ez[ii + 1, jj, kk] + Ez[ii, jj + 1, kk] + Ez[ii + 1, jj + 1, kk]) / 4
+
+        # The magnetic field component value at a point comes from average
+        # of 2 magnetic field component values in that cell and the following cell
+        hfield = (Hx[ii, jj, kk] + Hx[ii + 1, jj, kk]) / 2, \
+                 (Hy[ii, jj, kk] + Hy[ii, jj + 1, kk]) / 2, \
+                 (Hz[ii, jj, kk] + Hz[ii, jj, kk + 1]) / 2
+
+        # Currents (zero on the lower faces of the grid) - differences of
+        # magnetic field values are scaled and summed in double precision,
+        # and only the result is cast to the precision of the snapshot
+        Ix = G.dy * (Hy[ii, jj, kk - 1] - Hy[ii, jj, kk]).astype(np.float64) + G.dz * (Hz[ii, jj, kk] - Hz[ii, jj - 1, kk]).astype(np.float64)
+        Ix[:, j == 0, :] = 0
+        Ix[:, :, k == 0] = 0
+        Iy = G.dx * (Hx[ii, jj, kk] - Hx[ii, jj, kk - 1]).astype(np.float64) + G.dz * (Hz[ii - 1, jj, kk] - Hz[ii, jj, kk]).astype(np.float64)
+        Iy[i == 0, :, :] = 0
+        Iy[:, :, k == 0] = 0
+        Iz = G.dx * (Hx[ii, jj - 1, kk] - Hx[ii, jj, kk]).astype(np.float64) + G.dy * (Hy[ii, jj, kk] - Hy[ii - 1, jj, kk]).astype(np.float64)
+        Iz[i == 0, :, :] = 0
+        Iz[:, j == 0, :] = 0
+
+        return efield, hfield, (Ix.astype(floattype), Iy.astype(floattype), Iz.astype(floattype))
+
+    def write_vtk_dataarray(self, components, datasize, pbar):
+        """Writes a DataArray (with 3 components) to the appended data section of a VTK ImageData (.vti) file.
+
+        Args:
+            components (tuple): numpy arrays of x, y and z components (indexed i, j, k).
+            datasize (int): Number of bytes of appended data.
+            pbar (class): Progress bar class instance.
+        """
+
+        # Interleave components for each cell, with x varying fastest and z slowest
+        data = np.empty(components[0].shape[::-1] + (3,), dtype=floattype)
+        for n, component in enumerate(components):
+            data[..., n] = component.T
+
         # Write number of bytes of appended data as UInt32
         self.filehandle.write(pack('I', datasize))
-        for k in range(self.zs, self.zf, self.dz):
-            for j in range(self.ys, self.yf, self.dy):
-                for i in range(self.xs, self.xf, self.dx):
-                    pbar.update(n=12)
-                    # The electric field component value at a point comes from average of the 4 electric field component values in that cell
-                    self.filehandle.write(pack(Snapshot.floatstring, (Ex[i, j, k] + Ex[i, j + 1, k] + Ex[i, j, k + 1] + Ex[i, j + 1, k + 1]) / 4))
-                    self.filehandle.write(pack(Snapshot.floatstring, (Ey[i, j, k] + Ey[i + 1, j, k] + Ey[i, j, k + 1] + Ey[i + 1, j, k + 1]) / 4))
-                    self.filehandle.write(pack(Snapshot.floatstring, (Ez[i, j, k] + Ez[i + 1, j, k] + Ez[i, j + 1, k] + Ez[i + 1, j + 1, k]) / 4))
+        self.filehandle.write(data.tobytes())
+        if pbar is not None:
+            pbar.update(n=12 * components[0].size)
 
-        self.filehandle.write(pack('I', datasize))
-        for k in range(self.zs, self.zf, self.dz):
-            for j in range(self.ys, self.yf, self.dy):
-                for i in range(self.xs, self.xf, self.dx):
-                    pbar.update(n=12)
-                    # The magnetic field component value at a point comes from average
-                    # of 2 magnetic field component values in that cell and the following cell
-                    self.filehandle.write(pack(Snapshot.floatstring, (Hx[i, j, k] + Hx[i + 1, j, k]) / 2))
-                    self.filehandle.write(pack(Snapshot.floatstring, (Hy[i, j, k] + Hy[i, j + 1, k]) / 2))
-                    self.filehandle.write(pack(Snapshot.floatstring, (Hz[i, j, k] + Hz[i, j, k + 1]) / 2))
 
-        self.filehandle.write(pack('I', datasize))
-        for k in range(self.zs, self.zf, self.dz):
-            for j in range(self.ys, self.yf, self.dy):
-                for i in range(self.xs, self.xf, self.dx):
-                    pbar.update(n=12)
-                    self.filehandle.write(pack(Snapshot.floatstring, Ix(i, j, k, Hx, Hy, Hz, G)))
-                    self.filehandle.write(pack(Snapshot.floatstring, Iy(i, j, k, Hx, Hy, Hz, G)))
-                    self.filehandle.write(pack(Snapshot.floatstring, Iz(i, j, k, Hx, Hy, Hz, G)))
+class SnapshotSeries(Snapshot):
+    """Series of snapshots of the electric and magnetic field values, taken at
+        an interval of iterations and stored as frames of a single HDF5 dataset.
+        An XDMF file is written alongside so that the series can be viewed.
+    """
 
-        self.filehandle.write('\n</AppendedData>\n</VTKFile>'.encode('utf-8'))
-        self.filehandle.close()
+    # Values stored for each sampled cell
+    components = ['Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz', 'Ix', 'Iy', 'Iz']
+
+    # Maximum size (bytes) of chunks of the dataset
+    chunksize = 4 * 1024**2
+
+    # Lossless compression filters available
+    compressions = ['none', 'gzip', 'lzf']
+
+    def __init__(self, xs=None, ys=None, zs=None, xf=None, yf=None, zf=None, dx=None, dy=None, dz=None, times=None, filename=None, compression='none', half=False):
+        """
+        Args:
+            xs, xf, ys, yf, zs, zf (float): Extent of the volume.
+            dx, dy, dz (float): Spatial discretisation.
+            times (range): Iteration numbers to take the snapshots on.
+            filename (str): Filename to save to.
+            compression (str): Lossless compression filter for the dataset.
+            half (bool): Store values as half precision (float16).
+        """
+
+        super().__init__(xs, ys, zs, xf, yf, zf, dx, dy, dz, None, filename)
+        self.times = times
+        self.compression = compression
+        self.half = half
+        self.file = None
+
+    def prepare_hdf5(self, appendmodelnumber, G, iterationstart=0):
+        """Prepares a HDF5 file, and an XDMF file to view it, for a series of snapshots.
+
+        Args:
+            appendmodelnumber (str): Text to append to filename.
+            G (class): Grid class instance - holds essential parameters describing the model.
+            iterationstart (int): Iteration the model is resumed from; the
+                    file is reopened to add the remaining snapshots.
+        """
+
+        self.filename = self.snapshot_filename(appendmodelnumber, '.h5', G)
+
+        # Frames are stored with x varying fastest (as in VTK files), with
+        # the values for each cell interleaved
+        nx = len(range(self.xs, self.xf, self.dx))
+        ny = len(range(self.ys, self.yf, self.dy))
+        nz = len(range(self.zs, self.zf, self.dz))
+        shape = (len(self.times), nz, ny, nx, len(SnapshotSeries.components))
+        dtype = np.float16 if self.half else floattype
+
+        if iterationstart and os.path.isfile(self.filename):
+            self.file = h5py.File(self.filename, 'a')
+            if self.file['fields'].shape != shape:
+                raise GeneralError('Snapshot file {} does not match the snapshots of the model'.format(self.filename))
+            return
+
+        self.file = h5py.File(self.filename, 'w')
+        self.file.attrs['gprMax'] = __version__
+        self.file.attrs['Title'] = G.title
+        self.file.attrs['dt'] = G.dt
+        self.file.attrs['dx_dy_dz'] = (self.dx * G.dx, self.dy * G.dy, self.dz * G.dz)
+        self.file.attrs['Origin'] = (self.xs * G.dx, self.ys * G.dy, self.zs * G.dz)
+        self.file.attrs['Components'] = SnapshotSeries.components
+        self.file['times'] = (np.array(self.times) - 1) * G.dt
+
+        # Chunks of a single frame, or of planes of cells of a frame if it is large
+        nplanes = max(1, min(nz, SnapshotSeries.chunksize // (ny * nx * shape[4] * np.dtype(dtype).itemsize)))
+        chunks = (1, nplanes, ny, nx, shape[4])
+        if self.compression == 'none':
+            self.file.create_dataset('fields', shape, dtype=dtype, chunks=chunks)
+        else:
+            self.file.create_dataset('fields', shape, dtype=dtype, chunks=chunks, compression=self.compression, shuffle=True)
+
+        self.write_xdmf(shape, G)
+
+    def write_xdmf(self, shape, G):
+        """Writes an XDMF (.xdmf) file that describes the snapshots in the HDF5
+            file as a temporal collection of grids, e.g. for viewing in Paraview.
+
+        Args:
+            shape (tuple): Shape of the dataset of snapshots.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        nframes, nz, ny, nx, ncomponents = shape
+        dimensions = '{} {} {} {} {}'.format(*shape)
+        # Half precision values are converted by HDF5 when they are read
+        precision = np.dtype(floattype).itemsize
+        datafile = os.path.basename(self.filename) + ':/fields'
+
+        with open(os.path.splitext(self.filename)[0] + '.xdmf', 'w') as f:
+            f.write('<?xml version="1.0" ?>\n')
+            f.write('<Xdmf Version="2.0">\n<Domain>\n')
+            f.write('<Grid Name="{}" GridType="Collection" CollectionType="Temporal">\n'.format(self.basefilename))
+            for frame, time in enumerate(self.times):
+                f.write('<Grid Name="{}" GridType="Uniform">\n'.format(frame))
+                f.write('<Time Value="{:g}" />\n'.format((time - 1) * G.dt))
+                f.write('<Topology TopologyType="3DCoRectMesh" Dimensions="{} {} {}" />\n'.format(nz + 1, ny + 1, nx + 1))
+                f.write('<Geometry GeometryType="ORIGIN_DXDYDZ">\n')
+                f.write('<DataItem Dimensions="3" NumberType="Float" Format="XML">{:g} {:g} {:g}</DataItem>\n'.format(self.zs * G.dz, self.ys * G.dy, self.xs * G.dx))
+                f.write('<DataItem Dimensions="3" NumberType="Float" Format="XML">{:g} {:g} {:g}</DataItem>\n'.format(self.dz * G.dz, self.dy * G.dy, self.dx * G.dx))
+                f.write('</Geometry>\n')
+                for start, name in enumerate(['E-field', 'H-field', 'Current']):
+                    f.write('<Attribute Name="{}" AttributeType="Vector" Center="Cell">\n'.format(name))
+                    f.write('<DataItem ItemType="HyperSlab" Dimensions="{} {} {} 3" Type="HyperSlab">\n'.format(nz, ny, nx))
+                    f.write('<DataItem Dimensions="3 5" Format="XML">{} 0 0 0 {} 1 1 1 1 1 1 {} {} {} 3</DataItem>\n'.format(frame, 3 * start, nz, ny, nx))
+                    f.write('<DataItem Dimensions="{}" NumberType="Float" Precision="{}" Format="HDF">{}</DataItem>\n'.format(dimensions, precision, datafile))
+                    f.write('</DataItem>\n</Attribute>\n')
+                f.write('</Grid>\n')
+            f.write('</Grid>\n</Domain>\n</Xdmf>\n')
+
+    def write_hdf5(self, frame, Ex, Ey, Ez, Hx, Hy, Hz, G, pbar=None, origin=(0, 0, 0)):
+        """Writes electric and magnetic field values to a frame of the HDF5 file.
+
+        Args:
+            frame (int): Index of the snapshot in the series.
+            Ex, Ey, Ez, Hx, Hy, Hz (memory view): Electric and magnetic field values.
+            G (class): Grid class instance - holds essential parameters describing the model.
+            pbar (class): Progress bar class instance.
+            origin (tuple): Indices of the first cell of the field values, if
+                    they are a copy of part of the grid (see stage_fields).
+        """
+
+        dataset = self.file['fields']
+        values = sum(self.cell_values(Ex, Ey, Ez, Hx, Hy, Hz, G, origin), ())
+
+        # Interleave values for each cell, with x varying fastest and z slowest
+        data = np.empty(dataset.shape[1:], dtype=dataset.dtype)
+        for n, value in enumerate(values):
+            data[..., n] = value.T
+
+        dataset[frame] = data
+        # Frames written so far are complete if the model is stopped
+        self.file.flush()
+        if pbar is not None:
+            pbar.update(n=data.nbytes)
+
+    def close(self):
+        """Closes the HDF5 file."""
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,241 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+
+from gprMax.constants cimport floattype_t, idtype_t
+
+
+cpdef void update_hertzian_dipole(
+                    int nsrc,
+                    int iteration,
+                    double dx,
+                    double dy,
+                    double dz,
+                    int[:, ::1] srcinfo1,
+                    double[::1] srcinfo2,
+                    floattype_t[:, ::1] srcwaves,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function updates electric field values for Hertzian dipole sources.
+
+    Args:
+        nsrc (int): Number of Hertzian dipoles
+        iteration (int): Current iteration number
+        dx, dy, dz (double): Spatial discretisation
+        srcinfo1 (memoryview): Access to array of source cell coordinates, polarisation, and first and last iterations the source is active
+        srcinfo2 (memoryview): Access to array of source lengths
+        srcwaves (memoryview): Access to array of source waveform values
+        updatecoeffs, ID, E (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t src, i, j, k
+    cdef int polarisation
+    cdef floattype_t invcellvolume = 1 / (dx * dy * dz)
+
+    for src in range(nsrc):
+        if iteration < srcinfo1[src, 4] or iteration > srcinfo1[src, 5]:
+            continue
+        i = srcinfo1[src, 0]
+        j = srcinfo1[src, 1]
+        k = srcinfo1[src, 2]
+        polarisation = srcinfo1[src, 3]
+
+        if polarisation == 0:
+            Ex[i, j, k] -= updatecoeffsE[ID[0, i, j, k], 4] * srcwaves[src, iteration] * <floattype_t>srcinfo2[src] * invcellvolume
+        elif polarisation == 1:
+            Ey[i, j, k] -= updatecoeffsE[ID[1, i, j, k], 4] * srcwaves[src, iteration] * <floattype_t>srcinfo2[src] * invcellvolume
+        elif polarisation == 2:
+            Ez[i, j, k] -= updatecoeffsE[ID[2, i, j, k], 4] * srcwaves[src, iteration] * <floattype_t>srcinfo2[src] * invcellvolume
+
+
+cpdef void update_magnetic_dipole(
+                    int nsrc,
+                    int iteration,
+                    double dx,
+                    double dy,
+                    double dz,
+                    int[:, ::1] srcinfo1,
+                    double[::1] srcinfo2,
+                    floattype_t[:, ::1] srcwaves,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates magnetic field values for magnetic dipole sources.
+
+    Args:
+        nsrc (int): Number of magnetic dipoles
+        iteration (int): Current iteration number
+        dx, dy, dz (double): Spatial discretisation
+        srcinfo1 (memoryview): Access to array of source cell coordinates, polarisation, and first and last iterations the source is active
+        srcinfo2 (memoryview): Access to array of other source information (not used)
+        srcwaves (memoryview): Access to array of source waveform values
+        updatecoeffs, ID, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t src, i, j, k
+    cdef int polarisation
+    cdef floattype_t invcellvolume = 1 / (dx * dy * dz)
+
+    for src in range(nsrc):
+        if iteration < srcinfo1[src, 4] or iteration > srcinfo1[src, 5]:
+            continue
+        i = srcinfo1[src, 0]
+        j = srcinfo1[src, 1]
+        k = srcinfo1[src, 2]
+        polarisation = srcinfo1[src, 3]
+
+        if polarisation == 0:
+            Hx[i, j, k] -= updatecoeffsH[ID[3, i, j, k], 4] * srcwaves[src, iteration] * invcellvolume
+        elif polarisation == 1:
+            Hy[i, j, k] -= updatecoeffsH[ID[4, i, j, k], 4] * srcwaves[src, iteration] * invcellvolume
+        elif polarisation == 2:
+            Hz[i, j, k] -= updatecoeffsH[ID[5, i, j, k], 4] * srcwaves[src, iteration] * invcellvolume
+
+
+cpdef void update_voltage_source(
+                    int nsrc,
+                    int iteration,
+                    double dx,
+                    double dy,
+                    double dz,
+                    int[:, ::1] srcinfo1,
+                    double[::1] srcinfo2,
+                    floattype_t[:, ::1] srcwaves,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function updates electric field values for voltage sources.
+
+    Args:
+        nsrc (int): Number of voltage sources
+        iteration (int): Current iteration number
+        dx, dy, dz (double): Spatial discretisation
+        srcinfo1 (memoryview): Access to array of source cell coordinates, polarisation, and first and last iterations the source is active
+        srcinfo2 (memoryview): Access to array of source resistances
+        srcwaves (memoryview): Access to array of source waveform values
+        updatecoeffs, ID, E (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t src, i, j, k
+    cdef int polarisation
+    cdef double resistance
+
+    for src in range(nsrc):
+        if iteration < srcinfo1[src, 4] or iteration > srcinfo1[src, 5]:
+            continue
+        i = srcinfo1[src, 0]
+        j = srcinfo1[src, 1]
+        k = srcinfo1[src, 2]
+        polarisation = srcinfo1[src, 3]
+        resistance = srcinfo2[src]
+
+        # Resistive voltage source, otherwise a hard source
+        if polarisation == 0:
+            if resistance != 0:
+                Ex[i, j, k] -= updatecoeffsE[ID[0, i, j, k], 4] * srcwaves[src, iteration] * <floattype_t>(1 / (resistance * dy * dz))
+            else:
+                Ex[i, j, k] = -srcwaves[src, iteration] / <floattype_t>dx
+        elif polarisation == 1:
+            if resistance != 0:
+                Ey[i, j, k] -= updatecoeffsE[ID[1, i, j, k], 4] * srcwaves[src, iteration] * <floattype_t>(1 / (resistance * dx * dz))
+            else:
+                Ey[i, j, k] = -srcwaves[src, iteration] / <floattype_t>dy
+        elif polarisation == 2:
+            if resistance != 0:
+                Ez[i, j, k] -= updatecoeffsE[ID[2, i, j, k], 4] * srcwaves[src, iteration] * <floattype_t>(1 / (resistance * dx * dy))
+            else:
+                Ez[i, j, k] = -srcwaves[src, iteration] / <floattype_t>dz
+
+
+cpdef tuple calculate_transmission_line_incident(
+                    int iterations,
+                    int nl,
+                    int srcpos,
+                    int antpos,
+                    double coeffV,
+                    double coeffI,
+                    double coeffsrc,
+                    double coeffabc,
+                    floattype_t[::1] waveformvaluesJ,
+                    floattype_t[::1] waveformvaluesM,
+                    floattype_t[::1] voltage,
+                    floattype_t[::1] current,
+                    floattype_t[::1] Vinc,
+                    floattype_t[::1] Iinc
+            ):
+    """This function calculates the incident voltage and current at the
+        antenna position of a long transmission line not connected to the
+        main grid. Only the cells of the line that the wave from the source
+        can have reached, and that can still affect the antenna position
+        before the last iteration, are updated.
+
+    Args:
+        iterations (int): Number of iterations
+        nl (int): Number of cells in the transmission line
+        srcpos, antpos (int): Cell positions of the source and antenna in the transmission line
+        coeffV, coeffI (double): Coefficients for the voltage and current updates along the line
+        coeffsrc (double): Coefficient for the source update of the voltage
+        coeffabc (double): Coefficient for the ABC at the end of the line
+        waveformvaluesJ, waveformvaluesM (memoryviews): Access to arrays of source waveform values
+        voltage, current (memoryviews): Access to arrays of voltage and current values along the line
+        Vinc, Iinc (memoryviews): Access to arrays to store incident voltage and current
+
+    Returns:
+        abcv0, abcv1 (float): Coefficients for the ABC after the last iteration
+    """
+
+    cdef Py_ssize_t iteration, i, last
+    cdef floattype_t abcv0 = 0
+    cdef floattype_t abcv1 = 0
+
+    for iteration in range(iterations):
+        Iinc[iteration] = current[antpos]
+        Vinc[iteration] = voltage[antpos]
+
+        # Last cell of the line that is updated - the wave travels at most
+        # one cell per iteration (a margin of two cells is used)
+        last = min(nl - 1, srcpos + iteration + 2, antpos + iterations - iteration + 2)
+
+        # Update current values along the line, and one cell before the source
+        for i in range(last):
+            current[i] -= coeffI * (voltage[i + 1] - voltage[i])
+        current[srcpos - 1] += coeffI * waveformvaluesM[iteration]
+
+        # Update voltage values along the line, and at the source
+        for i in range(1, last + 1):
+            voltage[i] -= coeffV * (current[i] - current[i - 1])
+        voltage[srcpos] += coeffsrc * waveformvaluesJ[iteration]
+
+        # Update ABC at the end of the line
+        voltage[0] = coeffabc * (voltage[1] - abcv0) + abcv1
+        abcv0 = voltage[0]
+        abcv1 = voltage[1]
+
+    return abcv0, abcv1
@@ -17,6 +17,7 @@
 # along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
 
 from copy import deepcopy
+import hashlib
 
 import numpy as np
 
@@ -25,6 +26,7 @@ from gprMax.constants import floattype
 from gprMax.grid import Ix
 from gprMax.grid import Iy
 from gprMax.grid import Iz
+from gprMax.source_updates_ext import calculate_transmission_line_incident
 from gprMax.utilities import round_value
 
 
@@ -51,21 +53,11 @@ class Source(object):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        # Waveform values for electric sources - calculated half a timestep later
-        self.waveformvaluesJ = np.zeros((G.iterations), dtype=floattype)
-
-        # Waveform values for magnetic sources
-        self.waveformvaluesM = np.zeros((G.iterations), dtype=floattype)
-
         waveform = next(x for x in G.waveforms if x.ID == self.waveformID)
 
-        for iteration in range(G.iterations):
-            time = G.dt * iteration
-            if time >= self.start and time <= self.stop:
-                # Set the time of the waveform evaluation to account for any delay in the start
-                time -= self.start
-                self.waveformvaluesJ[iteration] = waveform.calculate_value(time + 0.5 * G.dt, G.dt)
-                self.waveformvaluesM[iteration] = waveform.calculate_value(time, G.dt)
+        # Waveform values for electric sources (calculated half a timestep
+        # later) and magnetic sources, shared with other sources using the waveform
+        self.waveformvaluesJ, self.waveformvaluesM = waveform.calculate_source_values(G.dt, G.iterations, self.start, self.stop)
 
 
 class VoltageSource(Source):
@@ -122,7 +114,9 @@ class VoltageSource(Source):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        if self.resistance != 0:
+        # No material is needed for a voltage source that has no effect, i.e.
+        # outside the plane that is solved in a 2D model
+        if self.resistance != 0 and G.field_component_updated('E' + self.polarisation, self.xcoord, self.ycoord, self.zcoord):
             i = self.xcoord
             j = self.ycoord
             k = self.zcoord
@@ -215,23 +209,23 @@ class MagneticDipole(Source):
                 Hz[i, j, k] -= updatecoeffsH[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesM[iteration] * (1 / (G.dx * G.dy * G.dz))
 
 
-def gpu_initialise_src_arrays(sources, G):
-    """Initialise arrays on GPU for source coordinates/polarisation, other source information, and source waveform values.
+def initialise_src_arrays(sources, G):
+    """Initialise arrays for source coordinates/polarisation, other source information, and source waveform values.
 
     Args:
         sources (list): List of sources of one class, e.g. HertzianDipoles.
         G (class): Grid class instance - holds essential parameters describing the model.
 
     Returns:
-        srcinfo1_gpu (int): numpy array of source cell coordinates and polarisation information.
-        srcinfo2_gpu (float): numpy array of other source information, e.g. length, resistance etc...
-        srcwaves_gpu (float): numpy array of source waveform values.
+        srcinfo1 (int): numpy array of source cell coordinates, polarisation, and first and last iterations the source is active.
+        srcinfo2 (float): numpy array of other source information, e.g. length, resistance etc...
+        srcwaves (float): numpy array of source waveform values.
     """
 
-    import pycuda.gpuarray as gpuarray
+    times = np.arange(G.iterations) * G.dt
 
-    srcinfo1 = np.zeros((len(sources), 4), dtype=np.int32)
-    srcinfo2 = np.zeros((len(sources)), dtype=floattype)
+    srcinfo1 = np.zeros((len(sources), 6), dtype=np.int32)
+    srcinfo2 = np.zeros((len(sources)), dtype=np.float64)
     srcwaves = np.zeros((len(sources), G.iterations), dtype=floattype)
     for i, src in enumerate(sources):
         srcinfo1[i, 0] = src.xcoord
@@ -245,6 +239,15 @@ def gpu_initialise_src_arrays(sources, G):
         elif src.polarisation == 'z':
             srcinfo1[i, 3] = 2
 
+        # Iterations the source is active (none if it is never active, or if
+        # it has no effect, i.e. it is outside the plane that is solved in a
+        # 2D model or excites a field component that is not updated)
+        active = np.flatnonzero((times >= src.start) & (times <= src.stop))
+        component = ('H' if src.__class__.__name__ == 'MagneticDipole' else 'E') + src.polarisation
+        if '2D' in G.mode and not G.field_component_updated(component, src.xcoord, src.ycoord, src.zcoord):
+            active = active[:0]
+        srcinfo1[i, 4:6] = (active[0], active[-1]) if active.size else (0, -1)
+
         if src.__class__.__name__ == 'HertzianDipole':
             srcinfo2[i] = src.dl
             srcwaves[i, :] = src.waveformvaluesJ
@@ -254,8 +257,28 @@ def gpu_initialise_src_arrays(sources, G):
         elif src.__class__.__name__ == 'MagneticDipole':
             srcwaves[i, :] = src.waveformvaluesM
 
-    srcinfo1_gpu = gpuarray.to_gpu(srcinfo1)
-    srcinfo2_gpu = gpuarray.to_gpu(srcinfo2)
+    return srcinfo1, srcinfo2, srcwaves
+
+
+def gpu_initialise_src_arrays(sources, G):
+    """Initialise arrays on GPU for source coordinates/polarisation, other source information, and source waveform values.
+
+    Args:
+        sources (list): List of sources of one class, e.g. HertzianDipoles.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        srcinfo1_gpu (int): numpy array of source cell coordinates and polarisation information.
+        srcinfo2_gpu (float): numpy array of other source information, e.g. length, resistance etc...
+        srcwaves_gpu (float): numpy array of source waveform values.
+    """
+
+    import pycuda.gpuarray as gpuarray
+
+    srcinfo1, srcinfo2, srcwaves = initialise_src_arrays(sources, G)
+
+    srcinfo1_gpu = gpuarray.to_gpu(np.ascontiguousarray(srcinfo1[:, 0:4]))
+    srcinfo2_gpu = gpuarray.to_gpu(srcinfo2.astype(floattype))
     srcwaves_gpu = gpuarray.to_gpu(srcwaves)
 
     return srcinfo1_gpu, srcinfo2_gpu, srcwaves_gpu
@@ -267,6 +290,10 @@ class TransmissionLine(Source):
     line which is attached virtually to a grid cell.
     """
 
+    # Incident voltages and currents (and states of the transmission line)
+    # calculated for transmission lines in any model
+    incidentcache = {}
+
     def __init__(self, G):
         """
         Args:
@@ -284,16 +311,16 @@ class TransmissionLine(Source):
         # used it results in instabilities for certain impedances)
         self.dl = np.sqrt(3) * c * G.dt
 
-        # Number of cells in the transmission line (initially a long line to
-        # calculate incident voltage and current); consider putting ABCs/PML at end
-        self.nl = round_value(0.667 * G.iterations)
-
         # Cell position of the one-way injector excitation in the transmission line
         self.srcpos = 5
 
         # Cell position of where line connects to antenna/main grid
         self.antpos = 10
 
+        # Number of cells in the transmission line (initially a long line to
+        # calculate incident voltage and current); consider putting ABCs/PML at end
+        self.nl = max(round_value(0.667 * G.iterations), self.antpos + 1)
+
         self.voltage = np.zeros(self.nl, dtype=floattype)
         self.current = np.zeros(self.nl, dtype=floattype)
         self.Vinc = np.zeros(G.iterations, dtype=floattype)
@@ -306,15 +333,33 @@ class TransmissionLine(Source):
         Calculates the incident voltage and current with a long length
         transmission line not connected to the main grid from: http://dx.doi.org/10.1002/mop.10415
 
+        The incident voltage and current, and the state of the transmission
+        line afterwards, are cached for transmission lines with the same
+        resistance and waveform values, e.g. in every model of a B-scan.
+
         Args:
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        for iteration in range(G.iterations):
-            self.Iinc[iteration] = self.current[self.antpos]
-            self.Vinc[iteration] = self.voltage[self.antpos]
-            self.update_current(iteration, G)
-            self.update_voltage(iteration, G)
+        key = hashlib.sha256()
+        key.update('{} {} {} {} {} {}'.format(self.resistance, G.dt, G.iterations, self.nl, self.srcpos, self.antpos).encode('utf-8'))
+        key.update(self.waveformvaluesJ.tobytes())
+        key.update(self.waveformvaluesM.tobytes())
+        key = key.digest()
+
+        if key not in TransmissionLine.incidentcache:
+            self.abcv0, self.abcv1 = calculate_transmission_line_incident(G.iterations, self.nl, self.srcpos, self.antpos,
+                                                                          self.resistance * (c * G.dt / self.dl), (1 / self.resistance) * (c * G.dt / self.dl),
+                                                                          c * G.dt / self.dl, (c * G.dt - self.dl) / (c * G.dt + self.dl),
+                                                                          self.waveformvaluesJ, self.waveformvaluesM, self.voltage, self.current, self.Vinc, self.Iinc)
+            TransmissionLine.incidentcache[key] = (self.Vinc.copy(), self.Iinc.copy(), self.voltage[0:self.antpos + 1].copy(), self.current[0:self.antpos + 1].copy(), self.abcv0, self.abcv1)
+
+        else:
+            Vinc, Iinc, voltage, current, self.abcv0, self.abcv1 = TransmissionLine.incidentcache[key]
+            self.Vinc[:] = Vinc
+            self.Iinc[:] = Iinc
+            self.voltage[0:self.antpos + 1] = voltage
+            self.current[0:self.antpos + 1] = current
 
         # Shorten number of cells in the transmission line before use with main grid
         self.nl = self.antpos + 1
@@ -381,6 +426,11 @@ class TransmissionLine(Source):
 
             self.update_voltage(iteration, G)
 
+            # A transmission line outside the plane that is solved in a 2D
+            # model is not connected to the grid
+            if not G.field_component_updated('E' + self.polarisation, i, j, k):
+                return
+
             if self.polarisation == 'x':
                 Ex[i, j, k] = - self.voltage[self.antpos] / G.dx
 
@@ -406,7 +456,12 @@ class TransmissionLine(Source):
             j = self.ycoord
             k = self.zcoord
 
-            if self.polarisation == 'x':
+            # A transmission line outside the plane that is solved in a 2D
+            # model is not connected to the grid, i.e. there is no current
+            if not G.field_component_updated('E' + self.polarisation, i, j, k):
+                self.current[self.antpos] = 0
+
+            elif self.polarisation == 'x':
                 self.current[self.antpos] = Ix(i, j, k, G.Hx, G.Hy, G.Hz, G)
 
             elif self.polarisation == 'y':
@@ -20,11 +20,13 @@ from contextlib import contextmanager
 import decimal as d
 import platform
 import psutil
+import queue
 import re
 import subprocess
 from shutil import get_terminal_size
 import sys
 import textwrap
+import threading
 
 from colorama import init
 from colorama import Fore
@@ -394,6 +396,73 @@ def detect_gpus():
     return gpus
 
 
+class BackgroundWriter(object):
+    """Writes files in a separate thread so that the main FDTD loop can
+        continue iterating while data is serialised to disk.
+    """
+
+    def __init__(self, nbuffers=2):
+        """
+        Args:
+            nbuffers (int): Number of staged writes that can be waiting at
+                    any one time (double-buffered by default). Staging blocks
+                    if the writer falls this far behind.
+        """
+
+        self.queue = queue.Queue(maxsize=nbuffers)
+        self.error = None
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        """Executes writes in the order they were staged until a stop signal (None) is received."""
+
+        while True:
+            task = self.queue.get()
+            if task is None:
+                self.queue.task_done()
+                break
+            # Keep emptying the queue after an error so staging never blocks
+            if self.error is None:
+                func, args = task
+                try:
+                    func(*args)
+                except Exception as e:
+                    self.error = e
+            self.queue.task_done()
+
+    def put(self, func, *args):
+        """Stages a write.
+
+        Args:
+            func (function): Function that writes the data.
+            args: Arguments to pass to the function. Any arrays must be copies
+                    that are not modified by the solver.
+        """
+
+        if self.error is not None:
+            raise self.error
+        self.queue.put((func, args))
+
+    def flush(self):
+        """Waits for all staged writes to finish, e.g. before a checkpoint is
+            written, and re-raises any error from the writer thread.
+        """
+
+        self.queue.join()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """Waits for all staged writes to finish, and re-raises any error from the writer thread."""
+
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
 def memory_usage(G):
     """Estimate the amount of memory (RAM) required to run a model.
 
@@ -406,10 +475,20 @@ def memory_usage(G):
 
     stdoverhead = 50e6
 
-    # 6 x field arrays + 6 x ID arrays
-    fieldarrays = (6 + 6) * (G.nx + 1) * (G.ny + 1) * (G.nz + 1) * np.dtype(floattype).itemsize
+    # 6 x field arrays (a single plane of cells in 2D models on CPU, where
+    # the field components that are always zero share one array)
+    fieldcells = int(np.prod(G.field_array_shape()))
+    zerocomponents = len(G.zero_field_components())
+    fieldarrays = (6 - zerocomponents + min(zerocomponents, 1)) * fieldcells * np.dtype(floattype).itemsize
+
+    # Solid and ID arrays are 32-bit integers until they are narrowed to
+    # the smallest type for the number of materials (after the model is built)
+    iditemsize = G.ID.dtype.itemsize if hasattr(G, 'ID') else np.dtype(np.uint32).itemsize
+
+    # 6 x ID arrays (only the plane that is solved is kept in 2D models on CPU)
+    idarrays = 6 * fieldcells * iditemsize
 
-    solidarray = G.nx * G.ny * G.nz * np.dtype(np.uint32).itemsize
+    solidarray = G.nx * G.ny * G.nz * iditemsize
 
     # 12 x rigidE array components + 6 x rigidH array components
     rigidarrays = (12 + 6) * G.nx * G.ny * G.nz * np.dtype(np.int8).itemsize
@@ -434,11 +513,22 @@ def memory_usage(G):
                 pmlarrays += ((G.nx + 1) * G.ny * v)
                 pmlarrays += (G.nx * (G.ny + 1) * v)
 
-    # Any dispersive material coefficients
+    # Any dispersive material coefficients - on the CPU temporary values (and
+    # the contribution of the poles) are only stored for electric field
+    # components in dispersive materials, once these have been found
     disparrays = 0
     if Material.maxpoles != 0:
-        disparrays = 3 * Material.maxpoles * (G.nx + 1) * (G.ny + 1) * (G.nz + 1) * np.dtype(complextype).itemsize
+        if G.gpu is None and hasattr(G, 'dispersivecells'):
+            ncells = sum(cells.size for cells in G.dispersivecells)
+            disparrays = ncells * (Material.maxpoles * np.dtype(complextype).itemsize + np.dtype(floattype).itemsize + np.dtype(np.int64).itemsize)
+        else:
+            disparrays = 3 * Material.maxpoles * (G.nx + 1) * (G.ny + 1) * (G.nz + 1) * np.dtype(complextype).itemsize
+
+    # Running discrete Fourier transforms (double precision complex numbers)
+    dftarrays = 0
+    for dft in G.dfts:
+        dftarrays += 6 * int(np.prod(dft.shape())) * len(dft.frequencies) * np.dtype(np.complex128).itemsize
 
-    memestimate = int(stdoverhead + fieldarrays + solidarray + rigidarrays + pmlarrays + disparrays)
+    memestimate = int(stdoverhead + fieldarrays + idarrays + solidarray + rigidarrays + pmlarrays + disparrays + dftarrays)
 
     return memestimate
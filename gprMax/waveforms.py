@@ -18,6 +18,7 @@
 
 import numpy as np
 
+from gprMax.constants import floattype
 from gprMax.utilities import round_value
 
 
@@ -44,6 +45,9 @@ class Waveform(object):
         self.zeta = 0
         self.delay = 0
 
+        # Waveform values calculated for sources
+        self.cache = {}
+
     def calculate_coefficients(self):
         """Calculates coefficients (used to calculate values) for specific waveforms."""
 
@@ -55,17 +59,18 @@ class Waveform(object):
             self.zeta = np.pi**2 * self.freq**2
 
     def calculate_value(self, time, dt):
-        """Calculates value of the waveform at a specific time.
+        """Calculates value(s) of the waveform at a specific time, or at an array of times.
 
         Args:
-            time (float): Absolute time.
+            time (float/array): Absolute time(s).
             dt (float): Absolute time discretisation.
 
         Returns:
-            ampvalue (float): Calculated value for waveform.
+            ampvalue (float/array): Calculated value(s) for waveform.
         """
 
         self.calculate_coefficients()
+        time = np.asarray(time, dtype=np.float64)
 
         # Waveforms
         if self.type == 'gaussian':
@@ -96,27 +101,52 @@ class Waveform(object):
             ampvalue = - (2 * self.zeta * (2 * self.zeta * delay**2 - 1) * np.exp(-self.zeta * delay**2)) * normalise
 
         elif self.type == 'sine':
-            ampvalue = np.sin(2 * np.pi * self.freq * time)
-            if time * self.freq > 1:
-                ampvalue = 0
+            ampvalue = np.where(time * self.freq > 1, 0, np.sin(2 * np.pi * self.freq * time))
 
         elif self.type == 'contsine':
             rampamp = 0.25
-            ramp = rampamp * time * self.freq
-            if ramp > 1:
-                ramp = 1
+            ramp = np.minimum(rampamp * time * self.freq, 1)
             ampvalue = ramp * np.sin(2 * np.pi * self.freq * time)
 
         elif self.type == 'impulse':
             # time < dt condition required to do impulsive magnetic dipole
-            if time == 0 or time < dt:
-                ampvalue = 1
-            elif time >= dt:
-                ampvalue = 0
+            ampvalue = np.where((time == 0) | (time < dt), 1, 0)
 
         elif self.type == 'user':
-            ampvalue = self.userfunc(time)
+            ampvalue = np.asarray(self.userfunc(time), dtype=np.float64)
+
+        ampvalue = ampvalue * self.amp
+
+        return ampvalue if ampvalue.ndim else ampvalue[()]
+
+    def calculate_source_values(self, dt, iterations, start, stop):
+        """
+        Calculates values of the waveform for a source for the duration of
+            the simulation. Values are cached, so sources using the waveform
+            with the same timing share the same arrays.
+
+        Args:
+            dt (float): Absolute time discretisation.
+            iterations (int): Number of iterations.
+            start, stop (float): Times the source starts and stops.
+
+        Returns:
+            valuesJ (float): numpy array of waveform values for electric sources - calculated half a timestep later.
+            valuesM (float): numpy array of waveform values for magnetic sources.
+        """
+
+        key = (self.type, self.amp, self.freq, self.userfunc, dt, iterations, start, stop)
+        if key not in self.cache:
+            valuesJ = np.zeros((iterations), dtype=floattype)
+            valuesM = np.zeros((iterations), dtype=floattype)
+
+            # Set the time of the waveform evaluation to account for any delay in the start
+            time = np.arange(iterations) * dt
+            active = (time >= start) & (time <= stop)
+            time = time[active] - start
+            valuesJ[active] = self.calculate_value(time + 0.5 * dt, dt)
+            valuesM[active] = self.calculate_value(time, dt)
 
-        ampvalue *= self.amp
+            self.cache[key] = (valuesJ, valuesM)
 
-        return ampvalue
+        return self.cache[key]
@@ -18,6 +18,7 @@
 
 import numpy as np
 cimport numpy as np
+from cython.parallel import prange
 
 from gprMax.materials import Material
 from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Ex
@@ -27,88 +28,127 @@ from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Hx
 from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Hy
 from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Hz
 
+# Value that marks field components in the ID array that require averaging
+cdef np.uint32_t AVERAGE = 4294967295
 
-cpdef void create_electric_average(int i, int j, int k, int numID1, int numID2, int numID3, int numID4, int componentID, G):
-    """This function creates a new material by averaging the dielectric properties of the surrounding cells.
+# Offsets of the cells surrounding each field component
+electricoffsets = [('Ex', ((0, 0, 0), (0, -1, 0), (0, -1, -1), (0, 0, -1))),
+                   ('Ey', ((0, 0, 0), (-1, 0, 0), (-1, 0, -1), (0, 0, -1))),
+                   ('Ez', ((0, 0, 0), (-1, 0, 0), (-1, -1, 0), (0, -1, 0)))]
+magneticoffsets = [('Hx', ((0, 0, 0), (-1, 0, 0))),
+                   ('Hy', ((0, 0, 0), (0, -1, 0))),
+                   ('Hz', ((0, 0, 0), (0, 0, -1)))]
+
+
+def find_averaged_material(materials, G):
+    """This function finds an existing material for a combination of surrounding materials. A material matches if
+        the names of the surrounding materials occur as many times in its ID as they do in the ID of an averaged
+        material for the combination.
 
     Args:
-        i, j, k (int): Cell coordinates.
-        numID1, numID2, numID3, numID4 (int): Numeric IDs for materials in surrounding cells.
-        componentID (int): Numeric ID for electric field component.
+        materials (list): Materials in the surrounding cells.
         G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        numID (int): Numeric ID of the first matching material, or None if there is no match.
     """
 
-    # Make an ID composed of the names of the four materials that will be averaged
-    requiredID = G.materials[numID1].ID + '+' + G.materials[numID2].ID + '+' + G.materials[numID3].ID + '+' + G.materials[numID4].ID
+    requiredID = '+'.join(material.ID for material in materials)
+    names = [material.ID for material in materials]
+    for x in G.materials:
+        if all(x.ID.count(name) == requiredID.count(name) for name in names):
+            return x.numID
+
+    return None
 
-    # Check if this material already exists
-    tmp = requiredID.split('+')
-    material = [x for x in G.materials if
-             x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-             x.ID.count(tmp[1]) == requiredID.count(tmp[1]) and
-             x.ID.count(tmp[2]) == requiredID.count(tmp[2]) and
-             x.ID.count(tmp[3]) == requiredID.count(tmp[3])]
 
-    if material:
-        G.ID[componentID, i, j, k] = material[0].numID
+def create_averaged_materials(numIDs, G):
+    """This function creates new materials by averaging the properties of the surrounding cells. Each unique
+        combination of surrounding materials, regardless of the order of the cells, is looked up once among the
+        existing materials, in the order the combinations first occur, and a new material is created if there is
+        no match.
+
+    Args:
+        numIDs (array): Numeric IDs for materials in surrounding cells, one row per field component.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        newIDs (array): Numeric IDs for the averaged materials, one per field component.
+    """
+
+    # Combinations of materials are identified by their sorted numeric IDs,
+    # packed into a single integer if possible
+    keys = np.sort(numIDs, axis=1).astype(np.int64)
+    nmaterials = len(G.materials)
+    if nmaterials**keys.shape[1] < 2**63:
+        packed = np.zeros(len(keys), dtype=np.int64)
+        for n in range(keys.shape[1]):
+            packed = packed * nmaterials + keys[:, n]
+        _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
     else:
-        # Create new material
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+
+    newIDs = np.zeros(len(first), dtype=np.uint32)
+    for n in np.argsort(first):
+        materials = [G.materials[numID] for numID in numIDs[first[n]]]
+
+        # Check if this material already exists
+        numID = find_averaged_material(materials, G)
+        if numID is not None:
+            newIDs[n] = numID
+            continue
+
+        # Create new material with an ID composed of the names of the materials that are averaged
         newNumID = len(G.materials)
-        m = Material(newNumID, requiredID)
+        m = Material(newNumID, '+'.join(material.ID for material in materials))
         m.type = 'dielectric-smoothed'
         # Create averaged constituents for material
-        m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er, G.materials[numID3].er, G.materials[numID4].er), axis=0)
-        m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se, G.materials[numID3].se, G.materials[numID4].se), axis=0)
-        m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr, G.materials[numID3].mr, G.materials[numID4].mr), axis=0)
-        m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm, G.materials[numID3].sm, G.materials[numID4].sm), axis=0)
+        m.er = np.mean([material.er for material in materials], axis=0)
+        m.se = np.mean([material.se for material in materials], axis=0)
+        m.mr = np.mean([material.mr for material in materials], axis=0)
+        m.sm = np.mean([material.sm for material in materials], axis=0)
 
         # Append the new material object to the materials list
         G.materials.append(m)
 
-        G.ID[componentID, i, j, k] = newNumID
+        newIDs[n] = newNumID
 
+    return newIDs[inverse.reshape(-1)]
 
-cpdef void create_magnetic_average(int i, int j, int k, int numID1, int numID2, int componentID, G):
-    """This function creates a new material by averaging the dielectric properties of the surrounding cells.
+
+def average_components(components, solid, ID, G):
+    """This function sets the numeric IDs of field components that have been marked as requiring averaging.
 
     Args:
-        i, j, k (int): Cell coordinates.
-        numID1, numID2 (int): Numeric IDs for materials in surrounding cells.
-        componentID (int): Numeric ID for electric field component.
+        components (list): Names of field components and offsets of their surrounding cells.
+        solid, ID (arrays): Solid and ID arrays
         G (class): Grid class instance - holds essential parameters describing the model.
     """
 
-    # Make an ID composed of the names of the two materials that will be averaged
-    requiredID = G.materials[numID1].ID + '+' + G.materials[numID2].ID
+    # Field components that require averaging and materials in their surrounding cells
+    cells = []
+    numIDs = []
+    for component, offsets in components:
+        componentID = G.IDlookup[component]
+        i, j, k = np.nonzero(ID[componentID] == AVERAGE)
+        cells.append((componentID, i, j, k))
+        numIDs.append(np.stack([solid[i + di, j + dj, k + dk] for di, dj, dk in offsets], axis=1))
+    numIDs = np.concatenate(numIDs)
 
-    # Check if this material already exists
-    tmp = requiredID.split('+')
-    material = [x for x in G.materials if
-                (x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                 x.ID.count(tmp[1]) == requiredID.count(tmp[1])) or
-                (x.ID.count(tmp[0]) % 2 == 0 and x.ID.count(tmp[1]) % 2 == 0)]
+    if len(numIDs) == 0:
+        return
 
-    if material:
-        G.ID[componentID, i, j, k] = material[0].numID
-    else:
-        # Create new material
-        newNumID = len(G.materials)
-        m = Material(newNumID, requiredID)
-        m.type = 'dielectric-smoothed'
-        # Create averaged constituents for material
-        m.er = np.mean((G.materials[numID1].er, G.materials[numID2].er), axis=0)
-        m.se = np.mean((G.materials[numID1].se, G.materials[numID2].se), axis=0)
-        m.mr = np.mean((G.materials[numID1].mr, G.materials[numID2].mr), axis=0)
-        m.sm = np.mean((G.materials[numID1].sm, G.materials[numID2].sm), axis=0)
-
-        # Append the new material object to the materials list
-        G.materials.append(m)
-
-        G.ID[componentID, i, j, k] = newNumID
+    newIDs = create_averaged_materials(numIDs, G)
+    start = 0
+    for componentID, i, j, k in cells:
+        ID[componentID, i, j, k] = newIDs[start:start + len(i)]
+        start += len(i)
 
 
 cpdef void build_electric_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:, :, :, ::1] rigidE, np.uint32_t[:, :, :, ::1] ID, G):
-    """This function builds the electric field components in the ID array.
+    """This function builds the electric field components in the ID array. Components with the same material in all
+        surrounding cells are set in parallel, and components that require averaging are marked and then set once all
+        the averaged materials have been created.
 
     Args:
         solid, rigid, ID (memoryviews): Access to solid, rigid and ID arrays
@@ -116,18 +156,21 @@ cpdef void build_electric_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:,
     """
 
     cdef Py_ssize_t i, j, k
-    cdef int numID1, numID2, numID3, numID4, componentID
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef int componentID
+    cdef np.uint32_t numID1, numID2, numID3, numID4
 
     # Ex component
     componentID = G.IDlookup['Ex']
-    for i in range(0, G.nx):
-        for j in range(1, G.ny):
-            for k in range(1, G.nz):
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(1, nz):
 
                 # If rigid is True do not average
-                if get_rigid_Ex(i, j, k, rigidE):
-                    pass
-                else:
+                if not get_rigid_Ex(i, j, k, rigidE):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i, j - 1, k]
                     numID3 = solid[i, j - 1, k - 1]
@@ -137,19 +180,16 @@ cpdef void build_electric_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:,
                     if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
                         ID[componentID, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        create_electric_average(i, j, k, numID1, numID2, numID3, numID4, componentID, G)
+                        ID[componentID, i, j, k] = AVERAGE
 
     # Ey component
     componentID = G.IDlookup['Ey']
-    for i in range(1, G.nx):
-        for j in range(0, G.ny):
-            for k in range(1, G.nz):
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(1, nz):
 
                 # If rigid is True do not average
-                if get_rigid_Ey(i, j, k, rigidE):
-                    pass
-                else:
+                if not get_rigid_Ey(i, j, k, rigidE):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i - 1, j, k]
                     numID3 = solid[i - 1, j, k - 1]
@@ -159,19 +199,16 @@ cpdef void build_electric_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:,
                     if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
                         ID[componentID, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        create_electric_average(i, j, k, numID1, numID2, numID3, numID4, componentID, G)
+                        ID[componentID, i, j, k] = AVERAGE
 
     # Ez component
     componentID = G.IDlookup['Ez']
-    for i in range(1, G.nx):
-        for j in range(1, G.ny):
-            for k in range(0, G.nz):
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(0, nz):
 
                 # If rigid is True do not average
-                if get_rigid_Ez(i, j, k, rigidE):
-                    pass
-                else:
+                if not get_rigid_Ez(i, j, k, rigidE):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i - 1, j, k]
                     numID3 = solid[i - 1, j - 1, k]
@@ -181,12 +218,16 @@ cpdef void build_electric_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:,
                     if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
                         ID[componentID, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        create_electric_average(i, j, k, numID1, numID2, numID3, numID4, componentID, G)
+                        ID[componentID, i, j, k] = AVERAGE
+
+    # Averaging is required
+    average_components(electricoffsets, np.asarray(solid), np.asarray(ID), G)
 
 
 cpdef void build_magnetic_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:, :, :, ::1] rigidH, np.uint32_t[:, :, :, ::1] ID, G):
-    """This function builds the magnetic field components in the ID array.
+    """This function builds the magnetic field components in the ID array. Components with the same material in both
+        surrounding cells are set in parallel, and components that require averaging are marked and then set once all
+        the averaged materials have been created.
 
     Args:
         solid, rigid, ID (memoryviews): Access to solid, rigid and ID arrays
@@ -194,18 +235,21 @@ cpdef void build_magnetic_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:,
     """
 
     cdef Py_ssize_t i, j, k
-    cdef int numID1, numID2, componentID
+    cdef int nx = G.nx
+    cdef int ny = G.ny
+    cdef int nz = G.nz
+    cdef int nthreads = G.nthreads
+    cdef int componentID
+    cdef np.uint32_t numID1, numID2
 
     # Hx component
     componentID = G.IDlookup['Hx']
-    for i in range(1, G.nx):
-        for j in range(0, G.ny):
-            for k in range(0, G.nz):
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(0, nz):
 
                 # If rigid is True do not average
-                if get_rigid_Hx(i, j, k, rigidH):
-                    pass
-                else:
+                if not get_rigid_Hx(i, j, k, rigidH):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i - 1, j, k]
 
@@ -213,45 +257,41 @@ cpdef void build_magnetic_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:,
                     if numID1 == numID2:
                         ID[componentID, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        create_magnetic_average(i, j, k, numID1, numID2, componentID, G)
+                        ID[componentID, i, j, k] = AVERAGE
 
     # Hy component
     componentID = G.IDlookup['Hy']
-    for i in range(0, G.nx):
-        for j in range(1, G.ny):
-            for k in range(0, G.nz):
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(0, nz):
 
                 # If rigid is True do not average
-                if get_rigid_Hy(i, j, k, rigidH):
-                    pass
-                else:
+                if not get_rigid_Hy(i, j, k, rigidH):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i, j - 1, k]
 
                     # If all values are the same no need to average
                     if numID1 == numID2:
-                        ID[4, i, j, k] = numID1
+                        ID[componentID, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        create_magnetic_average(i, j, k, numID1, numID2, componentID, G)
+                        ID[componentID, i, j, k] = AVERAGE
 
     # Hz component
     componentID = G.IDlookup['Hz']
-    for i in range(0, G.nx):
-        for j in range(0, G.ny):
-            for k in range(1, G.nz):
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(1, nz):
 
                 # If rigid is True do not average
-                if get_rigid_Hz(i, j, k, rigidH):
-                    pass
-                else:
+                if not get_rigid_Hz(i, j, k, rigidH):
                     numID1 = solid[i, j, k]
                     numID2 = solid[i, j, k - 1]
 
                     # If all values are the same no need to average
                     if numID1 == numID2:
-                        ID[5, i, j, k] = numID1
+                        ID[componentID, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        create_magnetic_average(i, j, k, numID1, numID2, componentID, G)
+                        ID[componentID, i, j, k] = AVERAGE
+
+    # Averaging is required
+    average_components(magneticoffsets, np.asarray(solid), np.asarray(ID), G)
@@ -105,6 +105,7 @@ if 'cleanall' in sys.argv:
 # Windows
 if sys.platform == 'win32':
     compile_args = ['/O2', '/openmp', '/w']  # No static linking as no static version of OpenMP library.
+    nocontract_args = []  # Floating point contractions are off by default
     linker_args = []
     extra_objects = []
 # Mac OS X - needs gcc (usually via HomeBrew) because the default compiler LLVM (clang) does not support OpenMP
@@ -118,14 +119,20 @@ elif sys.platform == 'darwin':
     else:
         raise('Cannot find gcc 4.x, 5.x, 6.x, 7.x, or 8.x in /usr/local/bin. gprMax requires gcc to be installed - easily done through the Homebrew package manager (http://brew.sh). Note: gcc with OpenMP support, i.e. --without-multilib, must be installed')
     compile_args = ['-O3', '-w', '-fopenmp', '-march=native']  # Sometimes worth testing with '-fstrict-aliasing', '-fno-common'
+    nocontract_args = ['-ffp-contract=off']
     linker_args = ['-fopenmp', '-Wl,-rpath,' + rpath]
     extra_objects = []
 # Linux
 elif sys.platform == 'linux':
     compile_args = ['-O3', '-w', '-fopenmp', '-march=native']
+    nocontract_args = ['-ffp-contract=off']
     linker_args = ['-fopenmp']
     extra_objects = []
 
+# Extensions compiled without floating point contractions, i.e. fused
+# multiply-add instructions, so results are the same as the Python code
+nocontractfiles = [os.path.join(packagename, 'source_updates_ext.pyx')]
+
 # Build a list of all the extensions
 extensions = []
 for file in cythonfiles:
@@ -138,7 +145,7 @@ for file in cythonfiles:
                           [tmp[0] + fileext],
                           language='c',
                           include_dirs=[np.get_include()],
-                          extra_compile_args=compile_args,
+                          extra_compile_args=compile_args + nocontract_args if file in nocontractfiles else compile_args,
                           extra_link_args=linker_args,
                           extra_objects=extra_objects)
     extensions.append(extension)
@@ -0,0 +1,85 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import inspect
+import os
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+
+from gprMax._version import __version__
+from gprMax.constants import c
+from gprMax.constants import e0
+from gprMax.constants import m0
+from gprMax.constants import z0
+from gprMax.gprMax import api
+from gprMax.model_build_run import run_model
+from gprMax.utilities import get_host_info
+from gprMax.utilities import human_size
+from gprMax.utilities import open_path_file
+
+
+"""Compares the solving times of a model with the standard field updates and with fused field updates over tiles of different sizes. Results are printed and saved to a NumPy archive."""
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Compares the solving times of a model with the standard field updates and with fused field updates over tiles of different sizes. Results are printed and saved to a NumPy archive.', usage='cd gprMax; python -m tests.benchmarking.bench_fused_updates inputfile')
+parser.add_argument('inputfile', help='name of model input file including path')
+parser.add_argument('--tile-sizes', type=int, nargs='+', default=[4, 4, 8, 8, 16, 8, 16, 16, 32, 16, 32, 32], help='sizes (in cells, x and y) of tiles to benchmark, given as pairs of values')
+parser.add_argument('--repeats', type=int, default=3, help='number of times to solve the model with each type of field update (the fastest time is used)')
+args = parser.parse_args()
+
+if len(args.tile_sizes) % 2:
+    parser.error('tile sizes must be given as pairs of values')
+tilesizes = [tuple(args.tile_sizes[n:n + 2]) for n in range(0, len(args.tile_sizes), 2)]
+
+# Get machine/CPU/OS details
+hostinfo = get_host_info()
+hyperthreading = ', {} cores with Hyper-Threading'.format(hostinfo['logicalcores']) if hostinfo['hyperthreading'] else ''
+machineIDlong = '{}; {} x {} ({} cores{}); {} RAM; {}'.format(hostinfo['machineID'], hostinfo['sockets'], hostinfo['cpuID'], hostinfo['physicalcores'], hyperthreading, human_size(hostinfo['ram'], a_kilobyte_is_1024_bytes=True), hostinfo['osversion'])
+
+# Arguments for models as given by the API, with its defaults
+modelargs = SimpleNamespace(**{name: parameter.default for name, parameter in inspect.signature(api).parameters.items()})
+modelargs.inputfile = args.inputfile
+
+# Standard field updates, and fused field updates with each tile size
+updates = [None] + tilesizes
+times = np.zeros((len(updates), args.repeats))
+with open_path_file(args.inputfile) as inputfile:
+    usernamespace = {'c': c, 'e0': e0, 'm0': m0, 'z0': z0, 'number_model_runs': 1, 'inputfile': os.path.abspath(inputfile.name)}
+    for n, tilesize in enumerate(updates):
+        modelargs.fused_updates = tilesize is not None
+        modelargs.fused_tile_size = tilesize
+        for repeat in range(args.repeats):
+            times[n, repeat] = run_model(modelargs, 1, 1, 1, inputfile, usernamespace)
+
+# Get model size (in cells) and number of iterations
+with h5py.File(os.path.splitext(args.inputfile)[0] + '.out', 'r') as f:
+    iterations = f.attrs['Iterations']
+    numcells = f.attrs['nx, ny, nz']
+
+print('\nHost: {}'.format(machineIDlong))
+print('Model: {} ({} x {} x {} cells, {} iterations, {} threads)'.format(args.inputfile, numcells[0], numcells[1], numcells[2], iterations, os.environ.get('OMP_NUM_THREADS', hostinfo['physicalcores'])))
+besttimes = times.min(axis=1)
+for tilesize, besttime in zip(updates, besttimes):
+    name = 'standard updates' if tilesize is None else 'fused updates, {} x {} tiles'.format(*tilesize)
+    print('{:<30} {:>8.2f} s  (speed-up {:.2f})'.format(name, besttime, besttimes[0] / besttime))
+
+# Save tile sizes and benchmarking times to NumPy archive
+np.savez(os.path.splitext(args.inputfile)[0] + '_fused', machineID=machineIDlong, tilesizes=np.array(tilesizes), times=times, iterations=iterations, numcells=numcells, version=__version__)
@@ -0,0 +1,160 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from gprMax.constants import complextype
+from gprMax.constants import floattype
+from gprMax.fields_updates_ext import update_electric
+from gprMax.fields_updates_ext import update_electric_dispersive_A
+from gprMax.fields_updates_ext import update_electric_dispersive_B
+from gprMax.fields_updates_ext import update_electric_dispersive_phi
+from gprMax.grid import FDTDGrid
+from gprMax.materials import Material
+
+"""Compare the electric field components and temporary values of dispersive
+    materials updated with the temporary values stored only for cells in
+    dispersive materials, against those updated with the temporary values
+    stored for every cell of the grid, as by the original multipole kernels.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_dispersive_updates
+"""
+
+# Extents of the electric field components that are updated
+extents = (np.s_[0:-1, 1:-1, 1:-1], np.s_[1:-1, 0:-1, 1:-1], np.s_[1:-1, 1:-1, 0:-1])
+
+
+def create_grid(shape, maxpoles, seed):
+    """Create a grid with cells of random materials, some of them dispersive,
+        and random update coefficients and field values.
+
+    Args:
+        shape (tuple): Number of cells (x, y, z) of the grid.
+        maxpoles (int): Maximum number of poles of the dispersive materials.
+        seed (int): Seed for the materials, update coefficients and field values.
+
+    Returns:
+        G (class): Grid with materials, ID, update coefficient and field arrays.
+    """
+
+    rng = np.random.RandomState(seed)
+    G = FDTDGrid()
+    G.nx, G.ny, G.nz = shape
+    G.mode = '3D'
+    G.nthreads = 2
+    for numID in range(6):
+        m = Material(numID, 'material' + str(numID))
+        m.poles = rng.randint(1, maxpoles + 1) if numID >= 3 else 0
+        G.materials.append(m)
+    G.ID = rng.randint(0, len(G.materials), size=(6, G.nx + 1, G.ny + 1, G.nz + 1)).astype(np.uint32)
+
+    G.updatecoeffsE = rng.uniform(-1, 1, (len(G.materials), 5)).astype(floattype)
+    G.updatecoeffsdispersive = np.zeros((len(G.materials), 3 * maxpoles), dtype=complextype)
+    for m in G.materials:
+        coeffs = rng.uniform(-1, 1, (3 * m.poles, 2))
+        G.updatecoeffsdispersive[m.numID, 0:3 * m.poles] = coeffs[:, 0] + 1j * coeffs[:, 1]
+    for component in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+        setattr(G, component, rng.uniform(-1, 1, (G.nx + 1, G.ny + 1, G.nz + 1)).astype(floattype))
+
+    return G
+
+
+def update_electric_dispersive_dense(maxpoles, T, G):
+    """Update the electric field components and the temporary values of every
+        cell of the grid, as the original update_electric_dispersive_multipole_A
+        and update_electric_dispersive_multipole_B kernels did.
+
+    Args:
+        maxpoles (int): Maximum number of poles.
+        T (list): Arrays of temporary values (poles, x, y, z) of the Ex, Ey and Ez components.
+        G (class): Grid with materials, ID, update coefficient and field arrays.
+    """
+
+    nx, ny, nz = G.nx, G.ny, G.nz
+    E = (G.Ex, G.Ey, G.Ez)
+    # Update coefficients and differences of the magnetic field components in
+    # the updates of the Ex, Ey and Ez components
+    curls = ((2, G.Hz[0:nx, 1:ny, 1:nz] - G.Hz[0:nx, 0:ny - 1, 1:nz], 3, G.Hy[0:nx, 1:ny, 1:nz] - G.Hy[0:nx, 1:ny, 0:nz - 1]),
+             (3, G.Hx[1:nx, 0:ny, 1:nz] - G.Hx[1:nx, 0:ny, 0:nz - 1], 1, G.Hz[1:nx, 0:ny, 1:nz] - G.Hz[0:nx - 1, 0:ny, 1:nz]),
+             (1, G.Hy[1:nx, 1:ny, 0:nz] - G.Hy[0:nx - 1, 1:ny, 0:nz], 2, G.Hx[1:nx, 1:ny, 0:nz] - G.Hx[1:nx, 0:ny - 1, 0:nz]))
+
+    for component, extent in enumerate(extents):
+        material = G.ID[component][extent]
+        phi = np.zeros(material.shape, dtype=floattype)
+        for pole in range(maxpoles):
+            phi = phi + G.updatecoeffsdispersive[material, pole * 3].real * T[component][pole][extent].real
+            T[component][pole][extent] = G.updatecoeffsdispersive[material, 1 + pole * 3] * T[component][pole][extent] + G.updatecoeffsdispersive[material, 2 + pole * 3] * E[component][extent]
+        c1, curl1, c2, curl2 = curls[component]
+        E[component][extent] = G.updatecoeffsE[material, 0] * E[component][extent] + G.updatecoeffsE[material, c1] * curl1 - G.updatecoeffsE[material, c2] * curl2 - G.updatecoeffsE[material, 4] * phi
+
+    # Second part of the update, once the electric field components have been updated
+    for component, extent in enumerate(extents):
+        material = G.ID[component][extent]
+        for pole in range(maxpoles):
+            T[component][pole][extent] = T[component][pole][extent] - G.updatecoeffsdispersive[material, 2 + pole * 3] * E[component][extent]
+
+
+class TestDispersiveUpdates(unittest.TestCase):
+
+    def test_dispersive_cells(self):
+        for seed, maxpoles in enumerate((1, 3)):
+            G = create_grid((7, 6, 5), maxpoles, seed)
+            Gref = create_grid((7, 6, 5), maxpoles, seed)
+            G.find_dispersive_cells()
+            with mock.patch.object(Material, 'maxpoles', maxpoles):
+                G.initialise_dispersive_temporary_arrays()
+            Tref = [np.zeros((maxpoles, G.nx + 1, G.ny + 1, G.nz + 1), dtype=complextype) for n in range(3)]
+
+            # Only the cells in dispersive materials have temporary values
+            for component, cells in enumerate(G.dispersivecells):
+                dispersive = np.zeros(G.ID.shape[1:], dtype=bool)
+                dispersive[extents[component]] = G.ID[component][extents[component]] >= 3
+                np.testing.assert_array_equal(cells, np.flatnonzero(dispersive))
+
+            rng = np.random.RandomState(seed)
+            for iteration in range(4):
+                # Magnetic field components change between iterations
+                for component in ('Hx', 'Hy', 'Hz'):
+                    H = rng.uniform(-1, 1, getattr(G, component).shape).astype(floattype)
+                    setattr(G, component, H)
+                    setattr(Gref, component, H.copy())
+
+                update_electric_dispersive_A(G.nthreads, maxpoles, G.updatecoeffsdispersive, G.ID, *G.dispersivecells, G.Tx, G.Ty, G.Tz, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)
+                update_electric(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                update_electric_dispersive_phi(G.nthreads, G.updatecoeffsE, G.ID, *G.dispersivecells, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)
+                update_electric_dispersive_B(G.nthreads, maxpoles, G.updatecoeffsdispersive, G.ID, *G.dispersivecells, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
+                update_electric_dispersive_dense(maxpoles, Tref, Gref)
+
+                # Kernels may fuse multiplications and additions, so values
+                # are the same to within rounding
+                for component in ('Ex', 'Ey', 'Ez'):
+                    np.testing.assert_allclose(getattr(G, component), getattr(Gref, component), rtol=1e-5, atol=1e-6, err_msg=component)
+                for T, cells, Tdense in zip((G.Tx, G.Ty, G.Tz), G.dispersivecells, Tref):
+                    Tdense = Tdense.reshape(maxpoles, -1).copy()
+                    np.testing.assert_allclose(T, Tdense[:, cells].T, rtol=1e-5, atol=1e-6)
+                    # Temporary values of cells in non-dispersive materials stay zero
+                    Tdense[:, cells] = 0
+                    self.assertFalse(np.any(Tdense))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,325 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+import h5py
+import numpy as np
+from scipy import fftpack
+
+from gprMax.constants import complextype
+from gprMax.constants import floattype
+from gprMax.fractals import FractalSurface
+from gprMax.fractals import FractalVolume
+from gprMax.fractals import Grass
+from gprMax.fractals_mask_ext import build_grass_blades
+from gprMax.fractals_mask_ext import build_grass_roots
+from gprMax.gprMax import api
+
+"""Compare the grass built in the mask of a fractal volume by the compiled
+    functions with that built by the Grass class methods, for a surface in the
+    positive x direction of a fractal volume. Compare fractal surfaces and
+    volumes generated with real FFTs, and loaded from the fractal cache, with
+    those generated with complex FFTs of shifted arrays, as by the original
+    functions.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_fractals
+"""
+
+# Size of fractal volume (cells), end of original volume in the x direction,
+# and range of heights of blades of grass
+shape = (60, 40, 40)
+originalxf = 40
+fractalrange = (42, 60)
+numblades = 400
+
+# Model with a fractal box and seeded grass, whose geometry is written to file
+model_grass = """#title: Fractal box with grass
+#domain: 0.1 0.1 0.1
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 1e-9
+#material: 5 0.001 1 0 my_soil
+#fractal_box: 0 0 0 0.1 0.1 0.06 1.5 1 1 1 1 my_soil my_fractal_box 7
+#add_grass: 0 0 0.06 0.1 0.1 0.06 1.5 0.075 0.09 200 my_fractal_box 11
+#geometry_objects_write: 0 0 0 0.1 0.1 0.1 {}
+"""
+
+
+def grass_surface(seed):
+    """Heights of blades of grass on a surface, at random positions.
+
+    Args:
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        fractalsurface (array): Heights of blades of grass.
+    """
+
+    R = np.random.RandomState(seed)
+    fractalsurface = np.zeros(shape[1:], dtype=floattype)
+    positions = R.choice(shape[1] * shape[2], numblades, replace=False)
+    fractalsurface.ravel()[positions] = R.randint(fractalrange[0], fractalrange[1], size=numblades)
+
+    return fractalsurface
+
+
+def volume_mask():
+    """Mask of a fractal volume before any grass is added."""
+
+    mask = np.zeros(shape, dtype=np.int8)
+    mask[:originalxf, :, :] = 1
+
+    return mask
+
+
+def build_grass_reference(mask, fractalsurface, g):
+    """Build the blades and roots of grass in the mask with the Grass class
+        methods, i.e. one blade or root at a time in Python.
+
+    Args:
+        mask (array): Mask of fractal volume.
+        fractalsurface (array): Heights of blades of grass.
+        g (class): Grass class instance.
+    """
+
+    blade = 0
+    for j in range(shape[1]):
+        for k in range(shape[2]):
+            if fractalsurface[j, k] > 0:
+                height = 0
+                for i in range(0, fractalrange[1]):
+                    if i < fractalsurface[j, k] and mask[i, j, k] != 1:
+                        y, z = g.calculate_blade_geometry(blade, height)
+                        yy = int(j + y)
+                        zz = int(k + z)
+                        if yy < 0 or yy >= mask.shape[1] or zz < 0 or zz >= mask.shape[2]:
+                            break
+                        else:
+                            mask[i, yy, zz] = 3
+                            height += 1
+                blade += 1
+
+    root = 0
+    for j in range(shape[1]):
+        for k in range(shape[2]):
+            if fractalsurface[j, k] > 0:
+                depth = 0
+                i = shape[0] - 1
+                while i > 0:
+                    if i > originalxf - (fractalsurface[j, k] - originalxf) and mask[i, j, k] == 1:
+                        y, z = g.calculate_root_geometry(root, depth)
+                        yy = int(j + y)
+                        zz = int(k + z)
+                        if yy < 0 or yy >= mask.shape[1] or zz < 0 or zz >= mask.shape[2]:
+                            break
+                        else:
+                            mask[i, yy, zz] = 3
+                            depth += 1
+                    i -= 1
+                root += 1
+
+
+def build_grass(mask, fractalsurface, g):
+    """Build the blades and roots of grass in the mask with the compiled functions.
+
+    Args:
+        mask (array): Mask of fractal volume.
+        fractalsurface (array): Heights of blades of grass.
+        g (class): Grass class instance.
+    """
+
+    extent = (0, shape[1], 0, shape[2])
+    build_grass_blades(fractalrange[1], *extent, 0, 0, 0, fractalsurface, g.geometryparams, mask)
+    build_grass_roots(shape[0], originalxf, *extent, 0, 0, 0, fractalsurface, g.geometryparams, g.R5, g.R6, mask)
+
+
+def generate_fractal_original(shape, b, weighting, seed):
+    """Generate a fractal array with complex FFTs, with the zero frequency
+        component shifted to the centre of the array, as the original
+        generate_fractal_surface and generate_fractal_volume methods did.
+
+    Args:
+        shape (tuple): Size of the fractal array in cells.
+        b (int): Constant related to fractal dimension.
+        weighting (array): Weighting vector.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        (array): Fractal array.
+    """
+
+    # Positional vector at centre of array, scaled by weighting
+    v1 = weighting * np.array(shape) / 2
+
+    R = np.random.RandomState(seed)
+    A = R.randn(*shape)
+    A = fftpack.fftshift(fftpack.fftn(A))
+
+    # Norm of positional vectors of array, in single precision, minus v1
+    v2 = np.ix_(*[(weighting[n] * np.arange(shape[n])).astype(np.float32) for n in range(len(shape))])
+    rr = np.sqrt(sum((v2[n] - v1[n])**2 for n in range(len(shape)))).astype(np.float32)
+    rr[rr == 0] = 0.9
+    fractal = (A * 1 / (rr.astype(np.float64)**b)).astype(complextype)
+
+    return np.real(fftpack.ifftn(fftpack.ifftshift(fractal)))
+
+
+def create_fractal_volume(shape, dimension, seed, nbins):
+    """Create a fractal volume with a seed.
+
+    Args:
+        shape (tuple): Size of the fractal volume in cells.
+        dimension (float): Fractal dimension.
+        seed (int): Seed for the random number generator.
+        nbins (int): Number of bins.
+
+    Returns:
+        volume (class): FractalVolume class instance.
+    """
+
+    volume = FractalVolume(0, shape[0], 0, shape[1], 0, shape[2], dimension)
+    volume.seed = seed
+    volume.nbins = nbins
+    volume.weighting = np.array([1, 1.5, 0.75])
+
+    return volume
+
+
+def create_fractal_surface(shape, dimension, seed, fractalrange):
+    """Create a fractal surface in the x direction with a seed.
+
+    Args:
+        shape (tuple): Size of the fractal surface in cells.
+        dimension (float): Fractal dimension.
+        seed (int): Seed for the random number generator.
+        fractalrange (tuple): Range of values of the fractal surface.
+
+    Returns:
+        surface (class): FractalSurface class instance.
+    """
+
+    surface = FractalSurface(10, 10, 0, shape[0], 0, shape[1], dimension)
+    surface.seed = seed
+    surface.fractalrange = fractalrange
+    surface.weighting = np.array([1.5, 0.75])
+
+    return surface
+
+
+class TestGrass(unittest.TestCase):
+
+    def test_grass_seeded(self):
+        fractalsurface = grass_surface(5)
+        masks = []
+        for g in (Grass(numblades, 8), Grass(numblades, 8)):
+            mask = volume_mask()
+            build_grass(mask, fractalsurface, g)
+            masks.append(mask)
+        self.assertTrue(np.any(masks[0] == 3))
+        np.testing.assert_array_equal(masks[1], masks[0])
+
+    def test_grass_reference(self):
+        for seed in range(1, 5):
+            fractalsurface = grass_surface(seed)
+            mask = volume_mask()
+            g = Grass(numblades, seed)
+            build_grass(mask, fractalsurface, g)
+            maskref = volume_mask()
+            gref = Grass(numblades, seed)
+            build_grass_reference(maskref, fractalsurface, gref)
+            np.testing.assert_array_equal(mask, maskref, err_msg='seed {}'.format(seed))
+            # Positions of roots, which are accumulated in the working precision
+            np.testing.assert_array_equal(g.geometryparams, gref.geometryparams, err_msg='seed {}'.format(seed))
+
+    def test_grass_model_seeded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            solids = []
+            for run in range(2):
+                basename = os.path.join(directory, 'grass' + str(run))
+                with open(basename + '.in', 'w') as f:
+                    f.write(model_grass.format(basename))
+                api(basename + '.in', geometry_only=True)
+                with h5py.File(basename + '.h5', 'r') as f:
+                    solids.append(f['data'][()])
+        np.testing.assert_array_equal(solids[1], solids[0])
+
+
+class TestFractals(unittest.TestCase):
+
+    def test_fractal_volume(self):
+        G = SimpleNamespace(nthreads=2, fractalcache=None)
+        # Even and odd sizes
+        for shape, dimension, seed in (((16, 32, 16), 1.5, 3), ((21, 17, 15), 2.5, 4), ((16, 1, 13), 1.5, 5)):
+            volume = create_fractal_volume(shape, dimension, seed, 20)
+            volume.generate_fractal_volume(G)
+            fractalvolume = generate_fractal_original(shape, int(volume.b), volume.weighting, seed)
+            bins = np.linspace(np.amin(fractalvolume), np.amax(fractalvolume), volume.nbins)
+            for j in range(shape[1]):
+                for k in range(shape[2]):
+                    fractalvolume[:, j, k] = np.digitize(fractalvolume[:, j, k], bins, right=True)
+            np.testing.assert_array_equal(volume.fractalvolume, fractalvolume, err_msg=str(shape))
+
+    def test_fractal_surface(self):
+        G = SimpleNamespace(nthreads=2, fractalcache=None)
+        for shape, dimension, seed in (((30, 24), 1.5, 6), ((25, 19), 2.5, 7)):
+            surface = create_fractal_surface(shape, dimension, seed, (10, 20))
+            surface.generate_fractal_surface(G)
+            fractalsurface = generate_fractal_original(shape, int(surface.b), surface.weighting, seed)
+            fractalsurface = 10 + 10 * (fractalsurface - np.amin(fractalsurface)) / (np.amax(fractalsurface) - np.amin(fractalsurface))
+            # Surfaces are generated in single precision
+            np.testing.assert_allclose(surface.fractalsurface, fractalsurface, rtol=0, atol=1e-4, err_msg=str(shape))
+
+    def test_fractal_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            G = SimpleNamespace(nthreads=2, fractalcache=directory)
+            volume = create_fractal_volume((20, 18, 16), 1.5, 3, 10)
+            volume.generate_fractal_volume(G)
+            surface = create_fractal_surface((20, 18), 1.5, 3, (10, 20))
+            surface.generate_fractal_surface(G)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+            # The same volume and surface are loaded from the cache, and
+            # surfaces are scaled to their range after they are loaded
+            with mock.patch('gprMax.fractals.generate_fractal3D', side_effect=AssertionError), mock.patch('gprMax.fractals.generate_fractal2D', side_effect=AssertionError):
+                cachedvolume = create_fractal_volume((20, 18, 16), 1.5, 3, 10)
+                cachedvolume.generate_fractal_volume(G)
+                cachedsurface = create_fractal_surface((20, 18), 1.5, 3, (5, 20))
+                cachedsurface.generate_fractal_surface(G)
+            np.testing.assert_array_equal(cachedvolume.fractalvolume, volume.fractalvolume)
+            np.testing.assert_allclose(cachedsurface.fractalsurface, 5 + 1.5 * (surface.fractalsurface - 10), atol=1e-4)
+
+            # Volumes with other parameters, or without a seed, are generated
+            for parameters in ((3, 12), (4, 10)):
+                volumes = []
+                for G.fractalcache in (None, directory):
+                    volumes.append(create_fractal_volume((20, 18, 16), 1.5, *parameters))
+                    volumes[-1].generate_fractal_volume(G)
+                np.testing.assert_array_equal(volumes[1].fractalvolume, volumes[0].fractalvolume)
+            volume = create_fractal_volume((20, 18, 16), 1.5, None, 10)
+            volume.generate_fractal_volume(G)
+            self.assertEqual(len(os.listdir(directory)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
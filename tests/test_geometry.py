@@ -0,0 +1,392 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+import unittest
+
+import numpy as np
+
+from gprMax.geometry_primitives_ext import build_boxes
+from gprMax.geometry_primitives_ext import build_cylinders
+from gprMax.geometry_primitives_ext import build_spheres
+from gprMax.geometry_primitives_ext import build_voxel
+from gprMax.geometry_primitives_ext import build_voxels_from_array
+from gprMax.materials import Material
+from gprMax.utilities import round_value
+from gprMax.yee_cell_build_ext import build_electric_components
+from gprMax.yee_cell_build_ext import build_magnetic_components
+from gprMax.yee_cell_build_ext import electricoffsets
+from gprMax.yee_cell_build_ext import magneticoffsets
+
+"""Compare the geometry built by the parallel and batched functions with that
+    built one cell at a time, as by the original serial functions - for the
+    averaged materials of field components, and for boxes, cylinders, spheres
+    and arrays of voxels built with one and more threads.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_geometry
+"""
+
+# Materials (name, er, se, mr, sm) - the name of one material is part of
+# the name of another, as the names of materials are used to find those
+# that have been averaged
+materials = [('pec', 1, 0, 1, 0),
+             ('free_space', 1, 0, 1, 0),
+             ('sand', 3, 0.001, 1, 0),
+             ('wet_sand', 10, 0.01, 1, 0),
+             ('ferrite', 5, 0, 4, 0.01)]
+
+
+def create_grid(shape, seed):
+    """Create a grid with cells of random materials.
+
+    Args:
+        shape (tuple): Number of cells (x, y, z) of the grid.
+        seed (int): Seed for the materials of the cells.
+
+    Returns:
+        G (class): Grid with materials, solid, rigid and ID arrays.
+    """
+
+    G = SimpleNamespace(nx=shape[0], ny=shape[1], nz=shape[2], nthreads=2, materials=[])
+    for numID, (ID, er, se, mr, sm) in enumerate(materials):
+        m = Material(numID, ID)
+        m.er, m.se, m.mr, m.sm = er, se, mr, sm
+        G.materials.append(m)
+    G.solid = np.random.RandomState(seed).randint(1, len(materials), size=shape).astype(np.uint32)
+    G.rigidE = np.zeros((12,) + shape, dtype=np.int8)
+    G.rigidH = np.zeros((6,) + shape, dtype=np.int8)
+    G.ID = np.ones((6, G.nx + 1, G.ny + 1, G.nz + 1), dtype=np.uint32)
+    G.IDlookup = {'Ex': 0, 'Ey': 1, 'Ez': 2, 'Hx': 3, 'Hy': 4, 'Hz': 5}
+
+    return G
+
+
+def create_average_serial(i, j, k, numIDs, componentID, G):
+    """Set the numeric ID of a field component to an averaged material, found
+        or created as by the original create_electric_average and
+        create_magnetic_average functions - except that, as for electric field
+        components, a material is only found for a magnetic field component if
+        the names of both surrounding materials occur in its name as many times
+        as in the name of their averaged material.
+
+    Args:
+        i, j, k (int): Cell coordinates.
+        numIDs (list): Numeric IDs for materials in surrounding cells.
+        componentID (int): Numeric ID for field component.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    requiredID = '+'.join(G.materials[numID].ID for numID in numIDs)
+    tmp = requiredID.split('+')
+    material = [x for x in G.materials if all(x.ID.count(name) == requiredID.count(name) for name in tmp)]
+
+    if material:
+        G.ID[componentID, i, j, k] = material[0].numID
+    else:
+        m = Material(len(G.materials), requiredID)
+        m.type = 'dielectric-smoothed'
+        m.er = np.mean([G.materials[numID].er for numID in numIDs], axis=0)
+        m.se = np.mean([G.materials[numID].se for numID in numIDs], axis=0)
+        m.mr = np.mean([G.materials[numID].mr for numID in numIDs], axis=0)
+        m.sm = np.mean([G.materials[numID].sm for numID in numIDs], axis=0)
+        G.materials.append(m)
+        G.ID[componentID, i, j, k] = m.numID
+
+
+def build_components_serial(G):
+    """Build the electric and magnetic field components in the ID array one
+        cell at a time, as by the original functions (for grids without
+        rigid components).
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    for component, offsets in electricoffsets + magneticoffsets:
+        componentID = G.IDlookup[component]
+        # Cells with surrounding cells in the previous cell in a direction
+        # start from the second cell in that direction
+        start = [int(any(offset[n] for offset in offsets)) for n in range(3)]
+        for i in range(start[0], G.nx):
+            for j in range(start[1], G.ny):
+                for k in range(start[2], G.nz):
+                    numIDs = [G.solid[i + di, j + dj, k + dk] for di, dj, dk in offsets]
+                    if all(numID == numIDs[0] for numID in numIDs):
+                        G.ID[componentID, i, j, k] = numIDs[0]
+                    else:
+                        create_average_serial(i, j, k, numIDs, componentID, G)
+
+
+def build_boxes_serial(boxes, materials, G):
+    """Build boxes in order, as the original build_box function did for each
+        #box command.
+
+    Args:
+        boxes (array): Cell coordinates (xs, xf, ys, yf, zs, zf) of boxes.
+        materials (array): Numeric IDs of materials (numID, numIDx, numIDy, numIDz) and averaging of boxes.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    for (xs, xf, ys, yf, zs, zf), (numID, numIDx, numIDy, numIDz, averaging) in zip(boxes, materials):
+        G.solid[xs:xf, ys:yf, zs:zf] = numID
+        G.rigidE[:, xs:xf, ys:yf, zs:zf] = not averaging
+        G.rigidH[:, xs:xf, ys:yf, zs:zf] = not averaging
+        if not averaging:
+            G.ID[0, xs:xf, ys:yf + 1, zs:zf + 1] = numIDx
+            G.ID[1, xs:xf + 1, ys:yf, zs:zf + 1] = numIDy
+            G.ID[2, xs:xf + 1, ys:yf + 1, zs:zf] = numIDz
+            G.ID[3, xs:xf + 1, ys:yf, zs:zf] = numIDx
+            G.ID[4, xs:xf, ys:yf + 1, zs:zf] = numIDy
+            G.ID[5, xs:xf, ys:yf, zs:zf + 1] = numIDz
+
+
+def build_spheres_serial(centres, radii, dx, dy, dz, materials, G):
+    """Build spheres in order one voxel at a time, as the original
+        build_sphere function did for each #sphere command.
+
+    Args:
+        centres (array): Cell coordinates of the centres of spheres.
+        radii (array): Radii of spheres.
+        dx, dy, dz (float): Spatial discretisation.
+        materials (array): Numeric IDs of materials (numID, numIDx, numIDy, numIDz) and averaging of spheres.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    dx, dy, dz = (float(np.float32(d)) for d in (dx, dy, dz))
+    for (xc, yc, zc), r, (numID, numIDx, numIDy, numIDz, averaging) in zip(centres, radii, materials):
+        r = float(r)
+        xs = max(round_value(((xc * dx) - r) / dx) - 1, 0)
+        xf = min(round_value(((xc * dx) + r) / dx) + 1, G.nx)
+        ys = max(round_value(((yc * dy) - r) / dy) - 1, 0)
+        yf = min(round_value(((yc * dy) + r) / dy) + 1, G.ny)
+        zs = max(round_value(((zc * dz) - r) / dz) - 1, 0)
+        zf = min(round_value(((zc * dz) + r) / dz) + 1, G.nz)
+        for i in range(xs, xf):
+            for j in range(ys, yf):
+                for k in range(zs, zf):
+                    if np.sqrt((i + 0.5 - xc)**2 * dx**2 + (j + 0.5 - yc)**2 * dy**2 + (k + 0.5 - zc)**2 * dz**2) <= r:
+                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+
+
+def build_cylinders_serial(cylinders, dx, dy, dz, materials, G):
+    """Build cylinders in order one voxel at a time, as the original
+        build_cylinder function did for each #cylinder command.
+
+    Args:
+        cylinders (array): Coordinates of the centres of cylinder faces (x1, y1, z1, x2, y2, z2) and radii of cylinders.
+        dx, dy, dz (float): Spatial discretisation.
+        materials (array): Numeric IDs of materials (numID, numIDx, numIDy, numIDz) and averaging of cylinders.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    d = np.array([dx, dy, dz], dtype=np.float32)
+    for cylinder, (numID, numIDx, numIDy, numIDz, averaging) in zip(cylinders, materials):
+        f1, f2, r = cylinder[0:3], cylinder[3:6], cylinder[6]
+        # Axis the cylinder is aligned with, if any
+        centres = [(round_value(float(f1[n] / d[n])), round_value(float(f2[n] / d[n]))) for n in range(3)]
+        aligned = [all(centres[m][0] == centres[m][1] for m in range(3) if m != n) for n in range(3)]
+        align = aligned.index(True) if any(aligned) else None
+
+        # Bounding box of the cylinder
+        bounds = []
+        for n in range(3):
+            if align == n:
+                start, finish = sorted(centres[n])
+            else:
+                start = round_value(float((min(f1[n], f2[n]) - r) / d[n])) - 1
+                finish = round_value(float((max(f1[n], f2[n]) + r) / d[n])) + 1
+            bounds.append(range(max(start, 0), min(finish, G.solid.shape[n])))
+
+        f1f2 = f2 - f1
+        f2f1 = f1 - f2
+        f1f2mag = np.sqrt((f1f2 * f1f2).sum(axis=0))
+        f2f1mag = np.sqrt((f2f1 * f2f1).sum(axis=0))
+        for i in bounds[0]:
+            for j in bounds[1]:
+                for k in bounds[2]:
+                    # Centre of the cell
+                    pt = np.array([float(np.float32(c * d[n])) + 0.5 * float(d[n]) for n, c in enumerate((i, j, k))])
+                    if align is not None:
+                        build = np.sqrt(sum((pt[n] - float(f1[n]))**2 for n in range(3) if n != align)) <= r
+                    else:
+                        f1pt = (pt - f1).astype(np.float32)
+                        f2pt = (pt - f2).astype(np.float32)
+                        f1ptmag = np.sqrt((f1pt * f1pt).sum(axis=0))
+                        f2ptmag = np.sqrt((f2pt * f2pt).sum(axis=0))
+                        if f1ptmag == 0 or f2ptmag == 0:
+                            build = True
+                        else:
+                            factor1 = np.dot(f1f2, f1pt) / (f1f2mag * f1ptmag)
+                            factor2 = np.dot(f2f1, f2pt) / (f2f1mag * f2ptmag)
+                            theta1 = np.float32(np.arccos(min(factor1, 1)))
+                            theta2 = np.float32(np.arccos(min(factor2, 1)))
+                            distance1 = f1ptmag * np.float32(np.sin(theta1))
+                            distance2 = f2ptmag * np.float32(np.sin(theta2))
+                            build = (distance1 <= r or distance2 <= r) and theta1 <= np.pi / 2 and theta2 <= np.pi / 2
+                    if build:
+                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+
+
+def build_voxels_from_array_serial(xs, ys, zs, numexistmaterials, averaging, data, G):
+    """Build voxels from an array one voxel at a time, as the original
+        build_voxels_from_array function did.
+
+    Args:
+        xs, ys, zs (int): Cell coordinates of position of start of array in domain.
+        numexistmaterials (int): Number of existing materials in model prior to building voxels.
+        averaging (bool): Whether material property averaging will occur for the object.
+        data (array): Numeric IDs of voxels to create.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    # Arrays that start outside the domain are moved to its edge
+    xs, ys, zs = max(xs, 0), max(ys, 0), max(zs, 0)
+    for i in range(xs, min(xs + data.shape[0], G.nx)):
+        for j in range(ys, min(ys + data.shape[1], G.ny)):
+            for k in range(zs, min(zs + data.shape[2], G.nz)):
+                numID = data[i - xs, j - ys, k - zs]
+                if numID >= 0:
+                    numID += numexistmaterials
+                    build_voxel(i, j, k, numID, numID, numID, numID, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+
+
+def random_materials(rng, number):
+    """Choose random materials for primitives, with one material or with a
+        material for each direction, and averaging for some of those with one
+        material.
+
+    Args:
+        rng (class): NumPy RandomState instance.
+        number (int): Number of primitives.
+
+    Returns:
+        numIDs (array): Numeric IDs of materials (numID, numIDx, numIDy, numIDz) and averaging of primitives.
+    """
+
+    numIDs = rng.randint(0, len(materials), size=(number, 5)).astype(np.int32)
+    single = rng.rand(number) < 0.5
+    numIDs[single, 1:4] = numIDs[single, 0:1]
+    numIDs[:, 4] = single & (rng.rand(number) < 0.5)
+
+    return numIDs
+
+
+def material_properties(G):
+    """Properties of the materials of a grid, for comparison."""
+    return [(m.numID, m.ID, m.type, float(m.er), float(m.se), float(m.mr), float(m.sm)) for m in G.materials]
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_yee_cell_build(self):
+        for seed in range(3):
+            G = create_grid((9, 8, 7), seed)
+            build_electric_components(G.solid, G.rigidE, G.ID, G)
+            build_magnetic_components(G.solid, G.rigidH, G.ID, G)
+            Gref = create_grid((9, 8, 7), seed)
+            build_components_serial(Gref)
+            np.testing.assert_array_equal(G.ID, Gref.ID)
+            self.assertEqual(material_properties(G), material_properties(Gref))
+
+    def test_magnetic_averaging(self):
+        # Half space of ferrite in free space - the magnetic field components
+        # normal to the interface are in both materials
+        G = create_grid((6, 6, 6), 0)
+        G.solid[:] = 1
+        G.solid[3:, :, :] = 4
+        build_electric_components(G.solid, G.rigidE, G.ID, G)
+        build_magnetic_components(G.solid, G.rigidH, G.ID, G)
+        m = G.materials[G.ID[G.IDlookup['Hx'], 3, 2, 2]]
+        self.assertEqual(m.ID, 'ferrite+free_space')
+        self.assertEqual((m.er, m.se, m.mr, m.sm), (3, 0, 2.5, 0.005))
+        self.assertTrue(np.all(G.ID[G.IDlookup['Hx'], 3, :6, :6] == m.numID))
+        self.assertTrue(np.all(G.ID[G.IDlookup['Hy'], 3:6, 1:6, :6] == 4))
+
+    def assert_geometry_equal(self, G, Gref):
+        for array in ('solid', 'rigidE', 'rigidH', 'ID'):
+            np.testing.assert_array_equal(getattr(G, array), getattr(Gref, array), err_msg=array)
+
+    def test_boxes(self):
+        shape = (20, 17, 15)
+        rng = np.random.RandomState(0)
+        # Overlapping boxes, some at the edges of the domain
+        starts = rng.randint(0, 15, size=(12, 3))
+        finishes = np.minimum(starts + rng.randint(1, 9, size=(12, 3)), shape)
+        boxes = np.stack((starts, finishes), axis=2).reshape(12, 6).astype(np.int32)
+        materials = random_materials(rng, 12)
+        Gref = create_grid(shape, 0)
+        build_boxes_serial(boxes, materials, Gref)
+        for nthreads in (1, 4):
+            G = create_grid(shape, 0)
+            build_boxes(boxes, materials, G.solid, G.rigidE, G.rigidH, G.ID, nthreads)
+            self.assert_geometry_equal(G, Gref)
+
+    def test_spheres(self):
+        shape = (20, 17, 15)
+        dx, dy, dz = 0.002, 0.003, 0.0025
+        rng = np.random.RandomState(1)
+        centres = rng.randint(0, 17, size=(10, 3)).astype(np.int32)
+        radii = rng.uniform(0.002, 0.02, size=10).astype(np.float32)
+        materials = random_materials(rng, 10)
+        Gref = create_grid(shape, 0)
+        build_spheres_serial(centres, radii, dx, dy, dz, materials, Gref)
+        for nthreads in (1, 4):
+            G = create_grid(shape, 0)
+            build_spheres(centres, radii, dx, dy, dz, materials, G.solid, G.rigidE, G.rigidH, G.ID, nthreads)
+            self.assert_geometry_equal(G, Gref)
+
+    def test_cylinders(self):
+        shape = (20, 17, 15)
+        dx, dy, dz = 0.002, 0.003, 0.0025
+        rng = np.random.RandomState(2)
+        # Cylinders aligned with each axis and not aligned with any axis
+        cylinders = []
+        for n in range(12):
+            f1 = rng.uniform(0, 1, 3) * np.multiply(shape, (dx, dy, dz))
+            f2 = rng.uniform(0, 1, 3) * np.multiply(shape, (dx, dy, dz))
+            if n % 4 < 3:
+                align = n % 4
+                f2[np.arange(3) != align] = f1[np.arange(3) != align]
+            cylinders.append(np.concatenate((f1, f2, [rng.uniform(0.002, 0.012)])))
+        cylinders = np.array(cylinders, dtype=np.float32)
+        materials = random_materials(rng, 12)
+        Gref = create_grid(shape, 0)
+        build_cylinders_serial(cylinders, dx, dy, dz, materials, Gref)
+        for nthreads in (1, 4):
+            G = create_grid(shape, 0)
+            build_cylinders(cylinders, dx, dy, dz, materials, G.solid, G.rigidE, G.rigidH, G.ID, nthreads)
+            self.assert_geometry_equal(G, Gref)
+
+    def test_voxels_from_array(self):
+        shape = (20, 17, 15)
+        rng = np.random.RandomState(3)
+        # Arrays with voxels that are not built (negative IDs), partly outside the domain
+        for xs, ys, zs, averaging in ((2, 3, 1, False), (-2, 5, 4, True), (12, -1, 9, False)):
+            data = rng.randint(-1, 3, size=(11, 9, 8)).astype(np.int16)
+            Gref = create_grid(shape, 0)
+            build_voxels_from_array_serial(xs, ys, zs, 2, averaging, data, Gref)
+            for nthreads in (1, 4):
+                G = create_grid(shape, 0)
+                build_voxels_from_array(xs, ys, zs, 2, averaging, data, G.solid, G.rigidE, G.rigidH, G.ID, nthreads)
+                self.assert_geometry_equal(G, Gref)
+
+
+if __name__ == '__main__':
+    unittest.main()
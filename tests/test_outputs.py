@@ -0,0 +1,479 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from struct import pack
+import tempfile
+import time
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+import h5py
+import numpy as np
+
+from gprMax.constants import c
+from gprMax.gprMax import api
+from gprMax.constants import floattype
+from gprMax.constants import z0
+from gprMax.receivers import Rx
+from gprMax.receivers import RxStore
+from gprMax.snapshots import Snapshot
+from gprMax.utilities import BackgroundWriter
+from gprMax.waveforms import Waveform
+import gprMax.model_build_run
+from tests.test_solver_modes import interrupted
+from tests.test_solver_modes import Interrupt
+from tests.test_solver_modes import read_outputs
+from tests.test_solver_modes import run_model
+
+"""Compare the outputs of models against the field components stored at
+    every iteration by receivers, against individual snapshots, and against
+    analytical solutions.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_outputs
+"""
+
+# Small model with a dielectric box, a Hertzian dipole and a receiver array
+model_box = """#title: Hertzian dipole and dielectric box
+#domain: 0.08 0.08 0.08
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 2e-9
+#material: 6 0.01 1 0 half_space
+#box: 0.05 0 0 0.08 0.08 0.08 half_space
+#waveform: gaussiandot 1 1e9 my_pulse
+#hertzian_dipole: z 0.03 0.04 0.04 my_pulse
+"""
+
+# Receiver array sampled every 3 iterations from iteration 100 to 400, and
+# receivers at the same points sampled at every iteration
+model_rx_array = model_box + """#rx_array: 0.01 0.04 0.04 0.07 0.04 0.04 0.02 0 0 3 100 400
+#rx: 0.01 0.04 0.04
+#rx: 0.03 0.04 0.04
+#rx: 0.05 0.04 0.04
+#rx: 0.07 0.04 0.04
+"""
+
+# Receiver array with its sampling interval and time gate given in seconds
+model_rx_array_secs = model_box + """#rx_array: 0.01 0.04 0.04 0.07 0.04 0.04 0.02 0 0 1.2e-11 3.9e-10 1.55e-9
+"""
+
+# Series of snapshots, and individual snapshots at the same iterations - the
+# amplitude of the source is such that the field values can be stored as
+# half precision values
+model_snapshots = """#title: Hertzian dipole and dielectric box
+#domain: 0.08 0.08 0.08
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 2e-9
+#material: 6 0.01 1 0 half_space
+#box: 0.05 0 0 0.08 0.08 0.08 half_space
+#waveform: gaussiandot 1e-11 1e9 my_pulse
+#hertzian_dipole: z 0.03 0.04 0.04 my_pulse
+#snapshot_series: 0.01 0.01 0.01 0.07 0.07 0.07 0.004 0.004 0.004 100 100 300 series
+#snapshot_series: 0.01 0.01 0.01 0.07 0.07 0.07 0.004 0.004 0.004 100 100 300 series_half gzip half
+#snapshot: 0.01 0.01 0.01 0.07 0.07 0.07 0.004 0.004 0.004 100 snap1
+#snapshot: 0.01 0.01 0.01 0.07 0.07 0.07 0.004 0.004 0.004 200 snap2
+#snapshot: 0.01 0.01 0.01 0.07 0.07 0.07 0.004 0.004 0.004 300 snap3
+"""
+
+# DFTs at a line of points, and receivers at the same points
+model_dft = model_box + """#dft: 0.02 0.04 0.04 0.06 0.04 0.04 0.02 0 0 line 5e8 1e9 1.5e9
+#rx: 0.02 0.04 0.04
+#rx: 0.04 0.04 0.04
+#rx: 0.06 0.04 0.04
+"""
+
+# Far-field patterns of a Hertzian dipole in free space - the current has no
+# DC component, so no static field remains at the end of the time window
+model_ntff = """#title: Hertzian dipole in free space
+#domain: 0.3 0.3 0.3
+#dx_dy_dz: 0.005 0.005 0.005
+#time_window: 5e-9
+#waveform: gaussiandot 1 1e9 my_pulse
+#hertzian_dipole: z 0.15 0.15 0.15 my_pulse
+#ntff_box: 0.08 0.08 0.08 0.22 0.22 0.22 dipole 30 150 30 0 90 45 5e8 1e9
+"""
+
+
+def read_rxs(outputfile):
+    """Read the outputs of the receivers of an output file.
+
+    Args:
+        outputfile (str): Name of the output file, including path.
+
+    Returns:
+        rxs (dict): Sampling (start, stop, step) and dictionary of output
+                    arrays of receivers keyed by their position.
+    """
+
+    rxs = {}
+    with h5py.File(outputfile, 'r') as f:
+        for rx in f['rxs'].values():
+            rxs.setdefault(tuple(rx.attrs['Position']), []).append((tuple(rx.attrs['Sampling']), {output: rx[output][()] for output in rx}))
+
+    return rxs
+
+
+def read_vti(filename, shape):
+    """Read the field values and currents of a snapshot from a VTK ImageData (.vti) file.
+
+    Args:
+        filename (str): Name of the snapshot file, including path.
+        shape (tuple): Numbers of sampled cells (z, y, x) of the snapshot.
+
+    Returns:
+        (array): Values for each sampled cell, interleaved as in a frame of a series of snapshots.
+    """
+
+    with open(filename, 'rb') as f:
+        data = f.read()
+    offset = data.index(b'encoding="raw">\n_') + len(b'encoding="raw">\n_')
+    size = np.prod(shape) * 3 * np.dtype(floattype).itemsize
+    dataarrays = []
+    for n in range(3):
+        dataarrays.append(np.frombuffer(data, dtype=floattype, count=np.prod(shape) * 3, offset=offset + 4).reshape(shape + (3,)))
+        offset += 4 + size
+
+    return np.concatenate(dataarrays, axis=-1)
+
+
+def write_vti_baseline(snapshot, Ex, Ey, Ez, Hx, Hy, Hz, G):
+    """Write a snapshot to a VTK ImageData (.vti) file one cell at a time, as
+        the original snapshot writer did - the averages of field values are
+        calculated with the precision of the fields, and the currents in
+        double precision before they are packed into the file.
+
+    Args:
+        snapshot (class): Snapshot class instance, with the header of its file written.
+        Ex, Ey, Ez, Hx, Hy, Hz (array): Electric and magnetic field values.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    cells = [(i, j, k) for k in range(snapshot.zs, snapshot.zf, snapshot.dz)
+                       for j in range(snapshot.ys, snapshot.yf, snapshot.dy)
+                       for i in range(snapshot.xs, snapshot.xf, snapshot.dx)]
+    datasize = 3 * np.dtype(floattype).itemsize * len(cells)
+
+    with open(snapshot.filename, 'ab') as f:
+        f.write(pack('I', datasize))
+        for i, j, k in cells:
+            f.write(pack(Snapshot.floatstring, (Ex[i, j, k] + Ex[i, j + 1, k] + Ex[i, j, k + 1] + Ex[i, j + 1, k + 1]) / 4))
+            f.write(pack(Snapshot.floatstring, (Ey[i, j, k] + Ey[i + 1, j, k] + Ey[i, j, k + 1] + Ey[i + 1, j, k + 1]) / 4))
+            f.write(pack(Snapshot.floatstring, (Ez[i, j, k] + Ez[i + 1, j, k] + Ez[i, j + 1, k] + Ez[i + 1, j + 1, k]) / 4))
+        f.write(pack('I', datasize))
+        for i, j, k in cells:
+            f.write(pack(Snapshot.floatstring, (Hx[i, j, k] + Hx[i + 1, j, k]) / 2))
+            f.write(pack(Snapshot.floatstring, (Hy[i, j, k] + Hy[i, j + 1, k]) / 2))
+            f.write(pack(Snapshot.floatstring, (Hz[i, j, k] + Hz[i, j, k + 1]) / 2))
+        f.write(pack('I', datasize))
+        for i, j, k in cells:
+            Ix = 0 if j == 0 or k == 0 else G.dy * float(Hy[i, j, k - 1] - Hy[i, j, k]) + G.dz * float(Hz[i, j, k] - Hz[i, j - 1, k])
+            Iy = 0 if i == 0 or k == 0 else G.dx * float(Hx[i, j, k] - Hx[i, j, k - 1]) + G.dz * float(Hz[i - 1, j, k] - Hz[i, j, k])
+            Iz = 0 if i == 0 or j == 0 else G.dx * float(Hx[i, j - 1, k] - Hx[i, j, k]) + G.dy * float(Hy[i, j, k] - Hy[i - 1, j, k])
+            f.write(pack(Snapshot.floatstring, Ix))
+            f.write(pack(Snapshot.floatstring, Iy))
+            f.write(pack(Snapshot.floatstring, Iz))
+        f.write('\n</AppendedData>\n</VTKFile>'.encode('utf-8'))
+
+
+def store_outputs_serial(iteration, rxs, Ex, Ey, Ez, Hx, Hy, Hz, G):
+    """Store the output components of receivers one receiver and component at
+        a time, as the original store_outputs function did - the currents are
+        calculated in double precision before they are stored.
+
+    Args:
+        iteration (int): Current iteration number.
+        rxs (list): Tuples of coordinates and dictionary of output arrays of receivers.
+        Ex, Ey, Ez, Hx, Hy, Hz (array): Electric and magnetic field values.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    fields = {'Ex': Ex, 'Ey': Ey, 'Ez': Ez, 'Hx': Hx, 'Hy': Hy, 'Hz': Hz}
+    for (i, j, k), outputs in rxs:
+        for output in outputs:
+            if output == 'Ix':
+                value = 0 if j == 0 or k == 0 else G.dy * float(Hy[i, j, k - 1] - Hy[i, j, k]) + G.dz * float(Hz[i, j, k] - Hz[i, j - 1, k])
+            elif output == 'Iy':
+                value = 0 if i == 0 or k == 0 else G.dx * float(Hx[i, j, k] - Hx[i, j, k - 1]) + G.dz * float(Hz[i - 1, j, k] - Hz[i, j, k])
+            elif output == 'Iz':
+                value = 0 if i == 0 or j == 0 else G.dx * float(Hx[i, j - 1, k] - Hx[i, j, k]) + G.dy * float(Hy[i, j, k] - Hy[i - 1, j, k])
+            else:
+                value = fields[output][i, j, k]
+            outputs[output][iteration] = value
+
+
+class TestOutputs(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_rx_array_sampling(self):
+        test = run_model(model_rx_array, self.directory.name)
+        with h5py.File(test + '.out', 'r') as f:
+            iterations = f.attrs['Iterations']
+        rxs = read_rxs(test + '.out')
+        self.assertEqual(len(rxs), 4)
+        for position, outputs in rxs.items():
+            (sampling, rxoutputs), (samplingref, rxoutputsref) = sorted(outputs, key=lambda rx: rx[0][2], reverse=True)
+            self.assertEqual(sampling, (100, 401, 3))
+            self.assertEqual(samplingref, (0, iterations, 1))
+            self.assertEqual(sorted(rxoutputs), sorted(rxoutputsref))
+            for output in rxoutputsref:
+                self.assertEqual(len(rxoutputs[output]), len(range(100, 401, 3)))
+                np.testing.assert_array_equal(rxoutputs[output], rxoutputsref[output][100:401:3], err_msg=output)
+
+    def test_rx_array_sampling_secs(self):
+        test = run_model(model_rx_array_secs, self.directory.name)
+        with h5py.File(test + '.out', 'r') as f:
+            dt = f.attrs['dt']
+        rxs = read_rxs(test + '.out')
+        for outputs in rxs.values():
+            for sampling, rxoutputs in outputs:
+                self.assertEqual(sampling, (round(3.9e-10 / dt), round(1.55e-9 / dt) + 1, round(1.2e-11 / dt)))
+
+    def assert_outputs_equal(self, outputs, outputsref):
+        """Check the outputs of two models are the same."""
+        self.assertEqual(sorted(outputs), sorted(outputsref))
+        for name in outputsref:
+            np.testing.assert_array_equal(outputs[name], outputsref[name], err_msg=name)
+
+    def test_rx_outputs_in_memory(self):
+        # Output components of receivers are held in memory (not in a file)
+        # and are available from the receivers once the model has been solved
+        solved = []
+        solve_cpu = gprMax.model_build_run.solve_cpu
+
+        def record(currentmodelrun, modelend, G, *args):
+            tsolve = solve_cpu(currentmodelrun, modelend, G, *args)
+            solved.append((os.listdir(self.directory.name), [dict(rx.outputs) for rx in G.rxs]))
+            return tsolve
+
+        with mock.patch('gprMax.model_build_run.solve_cpu', record):
+            test = run_model(model_rx_array, self.directory.name)
+        (files, rxoutputs), = solved
+        self.assertNotIn('model_rxs.h5', files)
+        outputs = read_outputs(test + '.out')
+        for rxindex, rx in enumerate(rxoutputs):
+            for output, values in rx.items():
+                np.testing.assert_array_equal(values, outputs['rxs/rx' + str(rxindex + 1) + '/' + output])
+
+    def test_rx_array_chunks(self):
+        ref = run_model(model_rx_array, self.directory.name, 'ref')
+        # Output components stored in a file, in buffers and blocks of
+        # receivers of a few samples and receivers
+        with mock.patch.object(RxStore, 'spillsize', 0), mock.patch.object(RxStore, 'buffersize', 6 * 4 * 4 * 7):
+            test = run_model(model_rx_array, self.directory.name, 'test')
+        self.assertFalse(os.path.isfile(test + '_rxs.h5'))
+        self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+    def test_rx_array_chunks_interrupted(self):
+        ref = run_model(model_rx_array, self.directory.name, 'ref')
+        patchdue, patchinterrupt = interrupted(200, 300)
+        with mock.patch.object(RxStore, 'spillsize', 0):
+            # File of output components is removed if the model cannot be resumed
+            with patchinterrupt:
+                with self.assertRaises(Interrupt):
+                    run_model(model_rx_array, self.directory.name, 'test')
+            test = os.path.join(self.directory.name, 'test')
+            self.assertFalse(os.path.isfile(test + '_rxs.h5'))
+
+            # and is kept to resume the model from a checkpoint
+            with patchdue, patchinterrupt:
+                with self.assertRaises(Interrupt):
+                    api(test + '.in', checkpoint=1)
+            self.assertTrue(os.path.isfile(test + '_rxs.h5'))
+            api(test + '.in', checkpoint=1, resume=True)
+        self.assertFalse(os.path.isfile(test + '_rxs.h5'))
+        self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+    def test_rx_store_baseline(self):
+        G = SimpleNamespace(dx=0.002, dy=0.003, dz=0.001)
+        rng = np.random.RandomState(0)
+        iterations = 5
+
+        # Receivers at random points, including on the faces of the domain,
+        # with random output components
+        rxs = []
+        rxsref = []
+        for n in range(40):
+            rx = Rx()
+            rx.xcoord, rx.ycoord, rx.zcoord = rng.randint(0, 12, 3) * rng.randint(0, 2, 3)
+            for output in Rx.allowableoutputs:
+                if rng.randint(2):
+                    rx.outputs[output] = None
+            rxs.append(rx)
+            rxsref.append(((rx.xcoord, rx.ycoord, rx.zcoord), {output: np.zeros(iterations, dtype=floattype) for output in rx.outputs}))
+        rxstore = RxStore(rxs, list(range(len(rxs))), range(iterations))
+
+        for iteration in range(iterations):
+            fields = [(rng.standard_normal((13, 13, 13)) * 10.0**rng.randint(-3, 4, (13, 13, 13))).astype(floattype) for n in range(6)]
+            rxstore.store(iteration, *fields, G)
+            store_outputs_serial(iteration, rxsref, *fields, G)
+
+        for rx, (coords, outputsref) in zip(rxs, rxsref):
+            self.assertEqual(sorted(rx.outputs), sorted(outputsref))
+            for output in outputsref:
+                np.testing.assert_array_equal(rx.outputs[output], outputsref[output], err_msg=output)
+
+    def test_background_writer(self):
+        # Writes are done in the order they are staged, and an error from a
+        # write is raised in the main thread, after which writes are skipped
+        written = []
+
+        def write(n):
+            time.sleep(0.01)
+            if n == 3:
+                raise IOError('disk full')
+            written.append(n)
+
+        writer = BackgroundWriter()
+        for n in range(3):
+            writer.put(write, n)
+        writer.flush()
+        self.assertEqual(written, [0, 1, 2])
+        writer.put(write, 3)
+        writer.put(write, 4)
+        with self.assertRaises(IOError):
+            writer.close()
+        self.assertEqual(written, [0, 1, 2])
+
+    def test_snapshots_background_writer(self):
+        # Snapshots written in the main loop, and while the solver keeps
+        # iterating, with the writer slowed down so that it falls behind
+        def put_in_main_loop(self, func, *args):
+            func(*args)
+
+        with mock.patch.object(BackgroundWriter, 'put', put_in_main_loop):
+            ref = run_model(model_snapshots, self.directory.name, 'ref')
+
+        write_vtk_imagedata = Snapshot.write_vtk_imagedata
+
+        def write_slowly(self, *args, **kwargs):
+            time.sleep(0.2)
+            write_vtk_imagedata(self, *args, **kwargs)
+
+        with mock.patch.object(Snapshot, 'write_vtk_imagedata', write_slowly):
+            test = run_model(model_snapshots, self.directory.name, 'test')
+
+        for n in range(3):
+            with open(os.path.join(test + '_snaps', 'snap' + str(n + 1) + '.vti'), 'rb') as f:
+                data = f.read()
+            with open(os.path.join(ref + '_snaps', 'snap' + str(n + 1) + '.vti'), 'rb') as f:
+                dataref = f.read()
+            self.assertEqual(data, dataref)
+        for name in ('series.h5', 'series_half.h5'):
+            with h5py.File(os.path.join(test + '_snaps', name), 'r') as f, h5py.File(os.path.join(ref + '_snaps', name), 'r') as fref:
+                np.testing.assert_array_equal(f['fields'][()], fref['fields'][()])
+        self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+    def test_snapshot_series(self):
+        test = run_model(model_snapshots, self.directory.name)
+        snapshotdir = test + '_snaps'
+        with h5py.File(os.path.join(snapshotdir, 'series.h5'), 'r') as f:
+            fields = f['fields'][()]
+            times = f['times'][()]
+            dt = f.attrs['dt']
+        with h5py.File(os.path.join(snapshotdir, 'series_half.h5'), 'r') as f:
+            fieldshalf = f['fields'][()]
+        self.assertEqual(fields.shape, (3, 15, 15, 15, 9))
+        np.testing.assert_allclose(times, np.array([99, 199, 299]) * dt)
+        self.assertEqual(fieldshalf.dtype, np.float16)
+        for frame in range(3):
+            snapshot = read_vti(os.path.join(snapshotdir, 'snap' + str(frame + 1) + '.vti'), fields.shape[1:4])
+            self.assertTrue(np.any(snapshot != 0))
+            np.testing.assert_array_equal(fields[frame], snapshot)
+            np.testing.assert_array_equal(fieldshalf[frame], snapshot.astype(np.float16))
+
+    def test_snapshot_baseline(self):
+        G = SimpleNamespace(dx=0.002, dy=0.003, dz=0.001, inputdirectory=self.directory.name, inputfilename='model.in')
+        rng = np.random.RandomState(0)
+        fields = [(rng.standard_normal((12, 12, 12)) * 10.0**rng.randint(-3, 4, (12, 12, 12))).astype(floattype) for n in range(6)]
+        for extent in [(0, 0, 0, 10, 11, 9, 1, 1, 1), (1, 2, 3, 11, 11, 11, 2, 3, 1)]:
+            snapshot = Snapshot(*extent, time=1, filename='snap')
+            snapshot.prepare_vtk_imagedata('', G)
+            snapshot.write_vtk_imagedata(*fields, G)
+            with open(snapshot.filename, 'rb') as f:
+                data = f.read()
+            staged, origin = snapshot.stage_fields(*fields)
+            snapshot.prepare_vtk_imagedata('', G)
+            snapshot.write_vtk_imagedata(*staged, G, origin=origin)
+            with open(snapshot.filename, 'rb') as f:
+                datastaged = f.read()
+            snapshot.prepare_vtk_imagedata('', G)
+            write_vti_baseline(snapshot, *fields, G)
+            with open(snapshot.filename, 'rb') as f:
+                database = f.read()
+            self.assertEqual(data, database)
+            self.assertEqual(datastaged, database)
+
+    def test_dft(self):
+        test = run_model(model_dft, self.directory.name)
+        with h5py.File(test + '.out', 'r') as f:
+            dt = f.attrs['dt']
+            grp = f['dfts/dft1']
+            start, steps, frequencies = grp.attrs['Start'], grp.attrs['Steps'], grp.attrs['Frequencies']
+            dfts = {component: grp[component][()] for component in grp}
+        rxs = read_rxs(test + '.out')
+        self.assertEqual(dfts['Ex'].shape, (3, 3, 1, 1))
+        for i in range(3):
+            position = (start[0] + i * steps[0], start[1], start[2])
+            (sampling, rxoutputs), = next(outputs for rxposition, outputs in rxs.items() if np.allclose(rxposition, position))
+            for component, dft in dfts.items():
+                # Electric field components are at whole time steps, and
+                # magnetic field components half a time step earlier
+                times = np.arange(len(rxoutputs[component])) * dt
+                if component[0] == 'H':
+                    times -= 0.5 * dt
+                dftref = np.exp(-2j * np.pi * np.outer(frequencies, times)) @ rxoutputs[component].astype(np.float64)
+                np.testing.assert_allclose(dft[:, i, 0, 0], dftref, rtol=0, atol=1e-6 * np.abs(dftref).max(), err_msg=component)
+
+    def test_ntff_box(self):
+        test = run_model(model_ntff, self.directory.name)
+        with h5py.File(test + '.out', 'r') as f:
+            dt = f.attrs['dt']
+            iterations = f.attrs['Iterations']
+            grp = f['ntffs/ntff1']
+            frequencies, theta = grp.attrs['Frequencies'], np.radians(grp.attrs['Theta'])
+            Etheta, Ephi, directivity, power = (grp[name][()] for name in ('Etheta', 'Ephi', 'Directivity', 'Power'))
+        self.assertEqual(Etheta.shape, (2, 5, 3))
+
+        # Far-field electric field (multiplied by r) and power radiated of a
+        # short dipole with the DFT of the current of the Hertzian dipole
+        w = Waveform()
+        w.type = 'gaussiandot'
+        w.freq = 1e9
+        times = np.arange(iterations) * dt
+        current = np.abs(np.exp(-2j * np.pi * np.outer(frequencies, times)) @ w.calculate_value(times, dt))
+        wavenumbers = 2 * np.pi * frequencies / c
+        Ethetaref = z0 * wavenumbers * current * 0.005 / (4 * np.pi)
+        powerref = z0 * wavenumbers**2 * (current * 0.005)**2 / (12 * np.pi)
+
+        Ethetaref = np.broadcast_to(Ethetaref[:, np.newaxis, np.newaxis] * np.sin(theta)[np.newaxis, :, np.newaxis], Etheta.shape)
+        np.testing.assert_allclose(np.abs(Etheta), Ethetaref, rtol=1e-2)
+        np.testing.assert_array_less(np.abs(Ephi), 1e-4 * np.abs(Etheta).max())
+        np.testing.assert_allclose(power, powerref, rtol=1e-2)
+        np.testing.assert_allclose(directivity[:, 2, :], np.full((2, 3), 1.5), rtol=1e-2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+import copy
+from types import SimpleNamespace
+import unittest
+
+import numpy as np
+
+from gprMax.constants import floattype
+from gprMax.grid import FDTDGrid
+from gprMax.materials import Material
+from gprMax.pml import CFS
+from gprMax.pml import PML
+from gprMax.pml import build_pmls
+from gprMax.pml_updates_ext import update_pml_electric
+from gprMax.pml_updates_ext import update_pml_magnetic
+
+"""Compare the field components and PML arrays updated for all PML slabs at
+    once against those updated one slab at a time, as by the original
+    per-slab kernels, and the PML coefficients of slabs built from the
+    materials on their inner faces against those built by averaging the
+    materials one cell at a time, as by the original build_pmls function.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_pml_updates
+"""
+
+# Field components updated by the PML slabs of each direction (x, y, z) for
+# electric and magnetic field updates: the field component, the sign of its
+# correction, and the field component it is differenced from
+pmlcomponents = {('x', 'E'): (('Ey', -1, 'Hz'), ('Ez', 1, 'Hy')),
+                 ('y', 'E'): (('Ex', 1, 'Hz'), ('Ez', -1, 'Hx')),
+                 ('z', 'E'): (('Ex', -1, 'Hy'), ('Ey', 1, 'Hx')),
+                 ('x', 'H'): (('Hy', 1, 'Ez'), ('Hz', -1, 'Ey')),
+                 ('y', 'H'): (('Hx', -1, 'Ez'), ('Hz', 1, 'Ex')),
+                 ('z', 'H'): (('Hx', 1, 'Ey'), ('Hy', -1, 'Ex'))}
+
+
+def create_grid(shape, order, seed):
+    """Create a grid with PML slabs of different thicknesses on each side,
+        random ID, update coefficient and field values, and random PML
+        coefficients and field values.
+
+    Args:
+        shape (tuple): Number of cells (x, y, z) of the grid.
+        order (int): Order of the PML, i.e. number of CFS parameters.
+        seed (int): Seed for the random values.
+
+    Returns:
+        G (class): Grid with PML slabs, ID, update coefficient and field arrays.
+    """
+
+    rng = np.random.RandomState(seed)
+    G = FDTDGrid()
+    G.nx, G.ny, G.nz = shape
+    G.dx, G.dy, G.dz = 0.5, 0.75, 0.25
+    G.dt = 1e-12
+    G.nthreads = 2
+    G.pmlthickness = OrderedDict(zip(('x0', 'y0', 'z0', 'xmax', 'ymax', 'zmax'), (3, 2, 4, 3, 1, 2)))
+    G.cfs = [CFS() for n in range(order)]
+    G.materials = [Material(numID, ID) for numID, ID in enumerate(('pec', 'free_space', 'sand'))]
+    G.initialise_geometry_arrays()
+    build_pmls(G, SimpleNamespace(update=lambda: None))
+
+    for pml in G.pmls:
+        pml.initialise_field_arrays()
+        for name in ('ERA', 'ERB', 'ERE', 'HRA', 'HRB', 'HRE'):
+            setattr(pml, name, rng.uniform(0.5, 1, getattr(pml, name).shape).astype(floattype))
+        for name in ('ERF', 'HRF'):
+            setattr(pml, name, rng.uniform(0, 0.5, getattr(pml, name).shape).astype(floattype))
+        for name in ('EPhi1', 'EPhi2', 'HPhi1', 'HPhi2'):
+            setattr(pml, name, rng.uniform(-1, 1, getattr(pml, name).shape).astype(floattype))
+
+    G.ID = rng.randint(0, len(G.materials), size=(6, G.nx + 1, G.ny + 1, G.nz + 1)).astype(np.uint32)
+    G.updatecoeffsE = rng.uniform(-1, 1, (len(G.materials), 5)).astype(floattype)
+    G.updatecoeffsH = rng.uniform(-1, 1, (len(G.materials), 5)).astype(floattype)
+    for component in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+        setattr(G, component, rng.uniform(-1, 1, (G.nx + 1, G.ny + 1, G.nz + 1)).astype(floattype))
+
+    return G
+
+
+def update_pml_slab(pml, field, G):
+    """Update electric or magnetic field components with the PML correction of
+        a slab, as the original per-slab kernels did.
+
+    Args:
+        pml (class): PML class instance.
+        field (str): Field components to update, i.e. 'E' or 'H'.
+        G (class): Grid with ID, update coefficient and field arrays.
+    """
+
+    axis = 'xyz'.index(pml.direction[0])
+    start = (pml.xs, pml.ys, pml.zs)
+    finish = (pml.xf, pml.yf, pml.zf)
+    n = finish[axis] - start[axis]
+
+    # Cells of a slab where absorption increases in the negative direction are
+    # numbered from the inside of the domain; magnetic field components are
+    # offset by half a cell. Electric field components are updated from a
+    # backward difference, and magnetic from a forward difference.
+    indices = [np.arange(s, f) for s, f in zip(start, finish)]
+    if pml.direction[1:] == 'minus':
+        indices[axis] = finish[axis] - np.arange(n) - (field == 'H')
+    neighbours = list(indices)
+    neighbours[axis] = indices[axis] + (-1 if field == 'E' else 1)
+    cells = np.ix_(*indices)
+    neighbourcells = np.ix_(*neighbours)
+
+    # Profiles of the PML coefficients through the thickness of the slab
+    profile = [1, 1, 1]
+    profile[axis] = n
+    RA, RB, RE, RF = (getattr(pml, field + 'R' + c)[:, :n].reshape([len(pml.CFS)] + profile) for c in 'ABEF')
+    updatecoeffs = G.updatecoeffsE if field == 'E' else G.updatecoeffsH
+    d = floattype(pml.d)
+
+    for Phi, (component, sign, diffcomponent) in zip((getattr(pml, field + 'Phi1'), getattr(pml, field + 'Phi2')), pmlcomponents[(pml.direction[0], field)]):
+        F = getattr(G, component)
+        D = getattr(G, diffcomponent)
+        Phi = Phi[:, :pml.nx, :pml.ny, :pml.nz]
+        coeff = sign * updatecoeffs[G.ID[G.IDlookup[component]][cells], 4]
+        if field == 'E':
+            dD = (D[cells] - D[neighbourcells]) / d
+        else:
+            dD = (D[neighbourcells] - D[cells]) / d
+        if len(pml.CFS) == 1:
+            F[cells] = F[cells] + coeff * ((RA[0] - 1) * dD + RB[0] * Phi[0])
+        else:
+            F[cells] = F[cells] + coeff * ((RA[0] * RA[1] - 1) * dD + RA[1] * RB[0] * Phi[0] + RB[1] * Phi[1])
+            Phi[1] = RE[1] * Phi[1] - RF[1] * (RA[0] * dD + RB[0] * Phi[0])
+        Phi[0] = RE[0] * Phi[0] - RF[0] * dD
+
+
+def build_pmls_serial(G):
+    """Build PML slabs, averaging the relative permittivity and permeability
+        of the materials on the inner face of each slab one cell at a time,
+        as the original build_pmls function did.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    for key, value in G.pmlthickness.items():
+        if value > 0:
+            sumer = 0
+            summr = 0
+            if key[0] == 'x':
+                if key == 'x0':
+                    pml = PML(G, ID=key, direction='xminus', xf=value, yf=G.ny, zf=G.nz)
+                elif key == 'xmax':
+                    pml = PML(G, ID=key, direction='xplus', xs=G.nx - value, xf=G.nx, yf=G.ny, zf=G.nz)
+                G.pmls.append(pml)
+                for j in range(G.ny):
+                    for k in range(G.nz):
+                        numID = G.solid[pml.xs, j, k]
+                        material = next(x for x in G.materials if x.numID == numID)
+                        sumer += material.er
+                        summr += material.mr
+                averageer = sumer / (G.ny * G.nz)
+                averagemr = summr / (G.ny * G.nz)
+            elif key[0] == 'y':
+                if key == 'y0':
+                    pml = PML(G, ID=key, direction='yminus', yf=value, xf=G.nx, zf=G.nz)
+                elif key == 'ymax':
+                    pml = PML(G, ID=key, direction='yplus', ys=G.ny - value, xf=G.nx, yf=G.ny, zf=G.nz)
+                G.pmls.append(pml)
+                for i in range(G.nx):
+                    for k in range(G.nz):
+                        numID = G.solid[i, pml.ys, k]
+                        material = next(x for x in G.materials if x.numID == numID)
+                        sumer += material.er
+                        summr += material.mr
+                averageer = sumer / (G.nx * G.nz)
+                averagemr = summr / (G.nx * G.nz)
+            elif key[0] == 'z':
+                if key == 'z0':
+                    pml = PML(G, ID=key, direction='zminus', zf=value, xf=G.nx, yf=G.ny)
+                elif key == 'zmax':
+                    pml = PML(G, ID=key, direction='zplus', zs=G.nz - value, xf=G.nx, yf=G.ny, zf=G.nz)
+                G.pmls.append(pml)
+                for i in range(G.nx):
+                    for j in range(G.ny):
+                        numID = G.solid[i, j, pml.zs]
+                        material = next(x for x in G.materials if x.numID == numID)
+                        sumer += material.er
+                        summr += material.mr
+                averageer = sumer / (G.nx * G.ny)
+                averagemr = summr / (G.nx * G.ny)
+
+            pml.calculate_update_coeffs(averageer, averagemr, G)
+
+
+class TestPMLUpdates(unittest.TestCase):
+
+    def assert_close(self, values, valuesref, name):
+        """Check values are the same to within rounding of the largest value."""
+        np.testing.assert_allclose(values, valuesref, rtol=1e-5, atol=1e-5 * np.abs(valuesref).max(), err_msg=name)
+
+    def test_pml_slabs(self):
+        for order in (1, 2):
+            G = create_grid((14, 13, 12), order, order)
+            Gref = copy.deepcopy(G)
+            self.assertEqual([pml.direction for pml in G.pmls], ['xminus', 'yminus', 'zminus', 'xplus', 'yplus', 'zplus'])
+
+            for iteration in range(3):
+                update_pml_magnetic(G.nthreads, G.pmls, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                update_pml_electric(G.nthreads, G.pmls, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                for field in ('H', 'E'):
+                    for pml in Gref.pmls:
+                        update_pml_slab(pml, field, Gref)
+
+                # Kernels may fuse multiplications and additions, so values
+                # are the same to within rounding
+                for component in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+                    self.assert_close(getattr(G, component), getattr(Gref, component), component)
+                for pml, pmlref in zip(G.pmls, Gref.pmls):
+                    for name in ('EPhi1', 'EPhi2', 'HPhi1', 'HPhi2'):
+                        self.assert_close(getattr(pml, name), getattr(pmlref, name), pml.direction + ' ' + name)
+
+    def test_build_pmls(self):
+        # Materials with random properties (and numeric IDs not in the order
+        # of the materials) in cells of a random mix of materials
+        rng = np.random.RandomState(0)
+        Gs = []
+        for n in range(2):
+            G = FDTDGrid()
+            G.nx, G.ny, G.nz = 17, 14, 11
+            G.dx, G.dy, G.dz = 0.002, 0.003, 0.001
+            G.dt = 1e-12
+            G.pmlthickness = OrderedDict(zip(('x0', 'y0', 'z0', 'xmax', 'ymax', 'zmax'), (3, 2, 4, 3, 1, 2)))
+            Gs.append(G)
+        for numID in (0, 1, 4, 3, 2):
+            properties = rng.uniform(1, 20), rng.uniform(1, 5)
+            for G in Gs:
+                m = Material(numID, 'material' + str(numID))
+                m.er, m.mr = properties
+                G.materials.append(m)
+        solid = rng.randint(0, 5, size=(Gs[0].nx, Gs[0].ny, Gs[0].nz)).astype(np.uint8)
+        G, Gref = Gs
+        G.solid = solid
+        Gref.solid = solid.copy()
+
+        build_pmls(G, SimpleNamespace(update=lambda: None))
+        build_pmls_serial(Gref)
+        self.assertEqual([pml.ID for pml in G.pmls], [pml.ID for pml in Gref.pmls])
+        for pml, pmlref in zip(G.pmls, Gref.pmls):
+            self.assertEqual((pml.xs, pml.xf, pml.ys, pml.yf, pml.zs, pml.zf), (pmlref.xs, pmlref.xf, pmlref.ys, pmlref.yf, pmlref.zs, pmlref.zf))
+            self.assertAlmostEqual(pml.CFS[0].sigma.max, pmlref.CFS[0].sigma.max, delta=1e-12 * pmlref.CFS[0].sigma.max)
+            for name in ('ERA', 'ERB', 'ERE', 'ERF', 'HRA', 'HRB', 'HRE', 'HRF'):
+                np.testing.assert_array_equal(getattr(pml, name), getattr(pmlref, name), err_msg=pml.ID + ' ' + name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,416 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import h5py
+import numpy as np
+
+from gprMax.build_cache import BuildCache
+from gprMax.checkpoint import Checkpoint
+from gprMax.domain_decomposition import SubDomain
+from gprMax.exceptions import GeneralError
+from gprMax.gprMax import api
+from gprMax.grid import FDTDGrid
+import gprMax.model_build_run
+from gprMax.snapshots import SnapshotSeries
+
+"""Compare the outputs of models solved with the different modes of the CPU
+    solver against those of the standard solver.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_solver_modes
+"""
+
+# Small model with a transmission line, and a receiver
+model_tl = """#title: Transmission line in free space
+#domain: 0.08 0.08 0.08
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 2e-9
+#waveform: gaussian 1 1e9 my_pulse
+#transmission_line: z 0.04 0.04 0.04 50 my_pulse
+#rx: 0.05 0.04 0.04
+"""
+
+# Small model with a dielectric box, a Hertzian dipole and receivers
+model_box = """#title: Hertzian dipole and dielectric box
+#domain: 0.08 0.08 0.08
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 2e-9
+#material: 6 0.01 1 0 half_space
+#box: 0.05 0 0 0.08 0.08 0.08 half_space
+#waveform: gaussiandot 1 1e9 my_pulse
+#hertzian_dipole: z 0.03 0.04 0.04 my_pulse
+#rx: 0.02 0.04 0.04
+#rx: 0.06 0.05 0.04
+"""
+
+# Small model with a dispersive material, a transmission line and receivers
+model_dispersive = """#title: Transmission line and dispersive box
+#domain: 0.08 0.08 0.08
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 2e-9
+#material: 6 0.01 1 0 half_space
+#add_dispersion_debye: 1 3 1e-10 half_space
+#box: 0.05 0 0 0.08 0.08 0.08 half_space
+#waveform: gaussian 1 1e9 my_pulse
+#transmission_line: z 0.03 0.04 0.04 50 my_pulse
+#rx: 0.02 0.04 0.04
+#rx: 0.06 0.05 0.04
+"""
+
+# Model with objects whose materials are averaged, as well as a dispersive material
+model_geometry = model_dispersive + """#sphere: 0.03 0.02 0.06 0.008 pec
+#cylinder: 0.01 0.06 0.02 0.07 0.06 0.02 0.004 half_space
+"""
+
+# B-scan of a model with a dispersive material
+model_bscan = """#title: B-scan of dispersive box
+#domain: 0.08 0.08 0.08
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 2e-9
+#material: 6 0.01 1 0 half_space
+#add_dispersion_debye: 1 3 1e-10 half_space
+#box: 0.05 0 0 0.08 0.08 0.08 half_space
+#waveform: gaussiandot 1 1e9 my_pulse
+#hertzian_dipole: z 0.02 0.04 0.04 my_pulse
+#rx: 0.03 0.04 0.04
+#src_steps: 0.004 0 0
+#rx_steps: 0.004 0 0
+"""
+
+# Model with enough materials that the solid and ID arrays are stored as uint16
+model_materials = model_box + ''.join('#material: {} 0.001 1 0 material{}\n'.format(2 + n / 100, n) for n in range(300)) + """#box: 0.01 0.01 0.01 0.03 0.03 0.03 material299
+#sphere: 0.05 0.05 0.05 0.01 material150
+"""
+
+# Geometry views of the whole domain, per-cell and per-cell-edge
+geometry_views = """#geometry_view: 0 0 0 0.08 0.08 0.08 0.002 0.002 0.002 view_n n
+#geometry_view: 0 0 0 0.08 0.08 0.08 0.002 0.002 0.002 view_f f
+"""
+
+# 2D (TMz) model with a dielectric half space
+model_2d = """#title: Hertzian dipole and dielectric half space in 2D
+#domain: 0.1 0.1 0.002
+#dx_dy_dz: 0.002 0.002 0.002
+#time_window: 2e-9
+#material: 6 0.01 1 0 half_space
+#box: 0.05 0 0 0.1 0.1 0.002 half_space
+#waveform: gaussiandot 1 1e9 my_pulse
+#hertzian_dipole: z 0.03 0.05 0 my_pulse
+#rx: 0.06 0.05 0
+"""
+
+# Sources and a receiver outside the plane that is solved in the 2D model,
+# and a magnetic dipole that excites a field component that is not updated
+model_2d_offplane = model_2d + """#hertzian_dipole: z 0.04 0.05 0.002 my_pulse
+#magnetic_dipole: z 0.04 0.04 0 my_pulse
+#voltage_source: z 0.045 0.06 0.002 50 my_pulse
+#transmission_line: z 0.045 0.05 0.002 50 my_pulse
+#rx: 0.06 0.05 0.002
+"""
+
+
+class Interrupt(Exception):
+    """Interrupts a model, e.g. as a node failure."""
+
+
+def interrupted(iterationcheckpoint, iterationinterrupt):
+    """Patches for the solver to write a checkpoint at an iteration, and interrupt the model at a later iteration.
+
+    Args:
+        iterationcheckpoint (int): Iteration to write the checkpoint at.
+        iterationinterrupt (int): Iteration to interrupt the model at.
+
+    Returns:
+        (tuple): Patches of Checkpoint.due and gprMax.model_build_run.store_outputs.
+    """
+
+    iterations = iter(range(iterationcheckpoint + 1))
+    store_outputs = gprMax.model_build_run.store_outputs
+
+    def due(self):
+        return next(iterations, None) == iterationcheckpoint
+
+    def interrupt(iteration, *args):
+        if iteration == iterationinterrupt:
+            raise Interrupt
+        store_outputs(iteration, *args)
+
+    return mock.patch.object(Checkpoint, 'due', due), mock.patch('gprMax.model_build_run.store_outputs', interrupt)
+
+
+def run_model(model, directory, name='model', **kwargs):
+    """Write an input file and run it with the API.
+
+    Args:
+        model (str): Commands of the input file.
+        directory (str): Directory to write the input file in.
+        name (str): Name of the input file (without extension).
+        kwargs: Arguments of the API.
+
+    Returns:
+        (str): Name of the input file (without extension), including path.
+    """
+
+    basename = os.path.join(directory, name)
+    with open(basename + '.in', 'w') as f:
+        f.write(model)
+    api(basename + '.in', **kwargs)
+
+    return basename
+
+
+def read_outputs(outputfile):
+    """Read the datasets of the receivers and transmission lines of an output file.
+
+    Args:
+        outputfile (str): Name of the output file, including path.
+
+    Returns:
+        outputs (dict): Arrays keyed by their path in the output file.
+    """
+
+    outputs = {}
+    with h5py.File(outputfile, 'r') as f:
+        for group in ('rxs', 'tls'):
+            if group in f:
+                f[group].visititems(lambda name, obj: outputs.update({group + '/' + name: obj[()]}) if isinstance(obj, h5py.Dataset) else None)
+
+    return outputs
+
+
+class TestSolverModes(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_outputs_equal(self, outputs, outputsref):
+        """Check the outputs of two models are the same."""
+        self.assertEqual(sorted(outputs), sorted(outputsref))
+        for name in outputsref:
+            np.testing.assert_array_equal(outputs[name], outputsref[name], err_msg=name)
+
+    def test_fused_updates_transmission_line(self):
+        ref = run_model(model_tl, self.directory.name, 'ref')
+        test = run_model(model_tl, self.directory.name, 'test', fused_updates=True)
+        outputs = read_outputs(test + '.out')
+        self.assertTrue(np.any(outputs['tls/tl1/Itotal'] != 0))
+        self.assert_outputs_equal(outputs, read_outputs(ref + '.out'))
+
+    def test_fused_tile_size(self):
+        ref = run_model(model_box, self.directory.name, 'ref')
+        for tilesize in [(1, 1), (3, 5), (64, 64)]:
+            test = run_model(model_box, self.directory.name, 'test', fused_updates=True, fused_tile_size=tilesize)
+            self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+        with self.assertRaises(GeneralError):
+            run_model(model_box, self.directory.name, 'test', fused_updates=True, fused_tile_size=(0, 8))
+
+    def test_brick_updates(self):
+        for n, model in enumerate((model_box, model_tl, model_geometry)):
+            ref = run_model(model, self.directory.name, 'ref' + str(n))
+            test = run_model(model, self.directory.name, 'test' + str(n), brick_updates=True)
+            self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+    def test_checkpoint_resume(self):
+        ref = run_model(model_dispersive, self.directory.name, 'ref')
+        patchdue, patchinterrupt = interrupted(200, 300)
+        with patchdue, patchinterrupt:
+            with self.assertRaises(Interrupt):
+                run_model(model_dispersive, self.directory.name, 'test', checkpoint=1)
+        test = os.path.join(self.directory.name, 'test')
+        self.assertTrue(os.path.isfile(test + '_checkpoint.h5'))
+        api(test + '.in', checkpoint=1, resume=True)
+        self.assertFalse(os.path.isfile(test + '_checkpoint.h5'))
+        self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+    def test_checkpoint_resume_snapshots(self):
+        model = model_dispersive + '#snapshot_series: 0.01 0.01 0.01 0.07 0.07 0.07 0.004 0.004 0.004 50 50 500 series\n'
+        ref = run_model(model, self.directory.name, 'ref')
+
+        # Snapshots are written slowly, and those not written when the
+        # model is interrupted are lost, e.g. as in a node failure
+        interrupt = []
+        write_hdf5 = SnapshotSeries.write_hdf5
+
+        def write_slowly(self, *args, **kwargs):
+            time.sleep(0.2)
+            if not interrupt:
+                write_hdf5(self, *args, **kwargs)
+
+        patchdue, patchinterrupt = interrupted(200, 300)
+        store_outputs = patchinterrupt.new
+
+        def interrupt_writes(iteration, *args):
+            if iteration == 300:
+                interrupt.append(iteration)
+            store_outputs(iteration, *args)
+
+        with patchdue, mock.patch('gprMax.model_build_run.store_outputs', interrupt_writes), mock.patch.object(SnapshotSeries, 'write_hdf5', write_slowly):
+            with self.assertRaises(Interrupt):
+                run_model(model, self.directory.name, 'test', checkpoint=1)
+        test = os.path.join(self.directory.name, 'test')
+        api(test + '.in', checkpoint=1, resume=True)
+
+        with h5py.File(os.path.join(test + '_snaps', 'series.h5'), 'r') as f, h5py.File(os.path.join(ref + '_snaps', 'series.h5'), 'r') as fref:
+            np.testing.assert_array_equal(f['fields'][()], fref['fields'][()])
+
+    def test_build_cache(self):
+        # Grids of models after the build cache is checked, i.e. after they are loaded from it
+        grids = []
+        load = BuildCache.load
+
+        def record(self, G):
+            cached = load(self, G)
+            grids.append((cached, G))
+            return cached
+
+        cache = os.path.join(self.directory.name, 'cache')
+        with mock.patch.object(BuildCache, 'load', record):
+            ref = run_model(model_geometry, self.directory.name, 'ref', build_cache=cache)
+            test = run_model(model_geometry, self.directory.name, 'test', build_cache=cache)
+        self.assertEqual([cached for cached, G in grids], [False, True])
+
+        Gref, Gtest = (G for cached, G in grids)
+        for name in BuildCache.arrays:
+            np.testing.assert_array_equal(getattr(Gtest, name), getattr(Gref, name), err_msg=name)
+        materials = [[(m.numID, m.ID, m.type, m.averagable, m.er, m.se, m.mr, m.sm, m.poles, m.deltaer, m.tau, m.alpha) for m in G.materials] for G in (Gref, Gtest)]
+        self.assertEqual(materials[1], materials[0])
+        self.assertEqual(next(m for m in Gtest.materials if m.ID == 'half_space').deltaer, [3])
+        self.assertEqual([(pml.ID, pml.direction, pml.xs, pml.xf, pml.ys, pml.yf, pml.zs, pml.zf, pml.d, pml.thickness) for pml in Gtest.pmls],
+                         [(pml.ID, pml.direction, pml.xs, pml.xf, pml.ys, pml.yf, pml.zs, pml.zf, pml.d, pml.thickness) for pml in Gref.pmls])
+        for pml, pmlref in zip(Gtest.pmls, Gref.pmls):
+            for name in BuildCache.pmlarrays:
+                np.testing.assert_array_equal(getattr(pml, name), getattr(pmlref, name), err_msg=name)
+            self.assertEqual([[vars(getattr(cfs, parameter)) for parameter in ('alpha', 'kappa', 'sigma')] for cfs in pml.CFS],
+                             [[vars(getattr(cfs, parameter)) for parameter in ('alpha', 'kappa', 'sigma')] for cfs in pmlref.CFS])
+
+        # Only arrays and attributes are stored, i.e. no pickled objects
+        cached, = os.listdir(cache)
+        self.assertEqual(sorted(os.listdir(os.path.join(cache, cached))), sorted(['build.h5'] + [name + '.npy' for name in BuildCache.arrays]))
+        self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+    def test_batch(self):
+        ref = run_model(model_bscan, self.directory.name, 'ref', n=3)
+        test = run_model(model_bscan, self.directory.name, 'test', n=3, batch=2, geometry_fixed=True)
+        outputs = read_outputs(test + '_merged.out')
+        for trace in range(3):
+            outputsref = read_outputs(ref + str(trace + 1) + '.out')
+            self.assert_outputs_equal({name: output[:, trace] for name, output in outputs.items()}, outputsref)
+
+        # Input file is only processed once for each batch of models
+        with self.assertRaises(GeneralError):
+            run_model(model_bscan, self.directory.name, 'test', n=3, batch=2)
+
+    @unittest.skipIf(shutil.which('mpiexec') is None, 'requires mpiexec')
+    def test_mpi_domain_decomposition(self):
+        ref = run_model(model_box, self.directory.name, 'ref')
+        test = os.path.join(self.directory.name, 'test')
+        shutil.copyfile(ref + '.in', test + '.in')
+        subprocess.run(['mpiexec', '-n', '3', sys.executable, '-m', 'gprMax', test + '.in', '-mpidomain'], check=True)
+        self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+
+    @unittest.skipIf(importlib.util.find_spec('mpi4py') is None, 'requires mpi4py')
+    def test_mpi_domain_memory(self):
+        # Field, PML and dispersive material arrays of the grid when it is
+        # split between MPI tasks - they are only initialised for the subdomain
+        allocated = []
+        decompose = SubDomain.decompose
+
+        def record(self, G):
+            allocated.append((hasattr(G, 'Ex'), any(hasattr(pml, 'EPhi1') for pml in G.pmls), hasattr(G, 'Tx')))
+            decompose(self, G)
+
+        ref = run_model(model_dispersive, self.directory.name, 'ref')
+        with mock.patch.object(SubDomain, 'decompose', record):
+            test = run_model(model_dispersive, self.directory.name, 'test', mpidomain=True)
+        self.assertEqual(allocated, [(False, False, False)])
+        self.assert_outputs_equal(read_outputs(test + '.out'), read_outputs(ref + '.out'))
+
+    def test_compact_geometry_arrays(self):
+        # Solid and ID arrays stored as the narrowest type for the number of
+        # materials, and as uint32
+        iddtypes = []
+        solve_cpu = gprMax.model_build_run.solve_cpu
+
+        def record(currentmodelrun, modelend, G, *args):
+            iddtypes.append((G.solid.dtype, G.ID.dtype))
+            return solve_cpu(currentmodelrun, modelend, G, *args)
+
+        for model, dtype in ((model_geometry, np.uint8), (model_materials, np.uint16)):
+            iddtypes.clear()
+            ref = os.path.join(self.directory.name, dtype.__name__ + '_ref')
+            test = os.path.join(self.directory.name, dtype.__name__ + '_test')
+            os.makedirs(ref)
+            os.makedirs(test)
+            with mock.patch('gprMax.model_build_run.solve_cpu', record):
+                with mock.patch.object(FDTDGrid, 'compact_geometry_arrays', lambda self: None):
+                    run_model(model + geometry_views, ref)
+                run_model(model + geometry_views, test)
+            self.assertEqual(iddtypes, [(np.uint32, np.uint32), (dtype, dtype)])
+            self.assert_outputs_equal(read_outputs(os.path.join(test, 'model.out')), read_outputs(os.path.join(ref, 'model.out')))
+            for view in ('view_n.vti', 'view_f.vtp'):
+                with open(os.path.join(test, view), 'rb') as f, open(os.path.join(ref, view), 'rb') as fref:
+                    self.assertEqual(f.read(), fref.read(), msg=view)
+
+    def test_2d_plane(self):
+        # Grid of the model once it has been solved
+        grids = []
+        solve_cpu = gprMax.model_build_run.solve_cpu
+
+        def record(currentmodelrun, modelend, G, *args):
+            tsolve = solve_cpu(currentmodelrun, modelend, G, *args)
+            grids.append(G)
+            return tsolve
+
+        ref = run_model(model_2d, self.directory.name, 'ref')
+        with mock.patch('gprMax.model_build_run.solve_cpu', record):
+            test = run_model(model_2d_offplane, self.directory.name, 'test')
+        G, = grids
+
+        # Only the plane of the ID array that is solved is kept, and the field
+        # components that are always zero share one array, which stays zero
+        self.assertEqual(G.ID.shape, (6, G.nx + 1, G.ny + 1, 1))
+        self.assertTrue(G.Ex is G.Ey is G.Hz)
+        self.assertFalse(np.any(G.Ex))
+
+        # Sources outside the plane have no effect, and the receiver outside
+        # the plane records zeros
+        outputs = read_outputs(test + '.out')
+        outputsref = read_outputs(ref + '.out')
+        self.assert_outputs_equal({name: output for name, output in outputs.items() if name.startswith('rxs/rx1/')}, outputsref)
+        for name, output in outputs.items():
+            if name.startswith('rxs/rx2/'):
+                self.assertFalse(np.any(output), msg=name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from gprMax.constants import floattype
+from gprMax.sources import HertzianDipole
+from gprMax.sources import MagneticDipole
+from gprMax.sources import TransmissionLine
+from gprMax.sources import VoltageSource
+from gprMax.sources import initialise_src_arrays
+from gprMax.source_updates_ext import calculate_transmission_line_incident
+from gprMax.source_updates_ext import update_hertzian_dipole
+from gprMax.source_updates_ext import update_magnetic_dipole
+from gprMax.source_updates_ext import update_voltage_source
+
+"""Compare the compiled source updates with the source update methods of the
+    source classes, which must give exactly the same field values, and the
+    incident voltage and current of transmission lines with those calculated
+    by stepping the whole line, as by the original calculate_incident_V_I.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_source_updates
+"""
+
+
+class Grid(object):
+    """Parameters of a small grid used by the source updates."""
+
+    def __init__(self):
+        self.dx = 0.002
+        self.dy = 0.0025
+        self.dz = 0.003
+        self.dt = 4.1e-12
+        self.iterations = 50
+        self.nx = self.ny = self.nz = 6
+        self.mode = '3D'
+        self.IDlookup = {'Ex': 0, 'Ey': 1, 'Ez': 2, 'Hx': 3, 'Hy': 4, 'Hz': 5}
+
+
+def create_sources(sourcetype, G, R, **attributes):
+    """Sources with each polarisation, random positions and waveform values.
+
+    Args:
+        sourcetype (class): Class of the sources.
+        G (class): Grid class instance.
+        R (class): Random number generator.
+        attributes: Other attributes of the sources.
+
+    Returns:
+        sources (list): Source class instances.
+    """
+
+    sources = []
+    for polarisation in ('x', 'y', 'z', 'z'):
+        source = sourcetype()
+        source.polarisation = polarisation
+        source.xcoord, source.ycoord, source.zcoord = R.randint(0, G.nx, size=3)
+        source.start = 5 * G.dt
+        source.stop = 40 * G.dt
+        source.waveformvaluesJ = R.uniform(-1, 1, G.iterations).astype(floattype)
+        source.waveformvaluesM = R.uniform(-1, 1, G.iterations).astype(floattype)
+        for name, value in attributes.items():
+            setattr(source, name, value)
+        sources.append(source)
+
+    return sources
+
+
+def create_transmission_line(G, resistance, waveformvaluesJ, waveformvaluesM):
+    """Transmission line with given waveform values.
+
+    Args:
+        G (class): Grid class instance.
+        resistance (float): Resistance of the line.
+        waveformvaluesJ, waveformvaluesM (array): Waveform values for electric and magnetic updates.
+
+    Returns:
+        tl (class): TransmissionLine class instance.
+    """
+
+    tl = TransmissionLine(G)
+    tl.resistance = resistance
+    tl.waveformvaluesJ = waveformvaluesJ
+    tl.waveformvaluesM = waveformvaluesM
+
+    return tl
+
+
+class TestSourceUpdates(unittest.TestCase):
+
+    def setUp(self):
+        self.G = Grid()
+        self.R = np.random.RandomState(1)
+        shape = (self.G.nx + 1, self.G.ny + 1, self.G.nz + 1)
+        self.updatecoeffs = self.R.uniform(0, 1e3, (4, 5)).astype(floattype)
+        self.ID = self.R.randint(0, 4, (6,) + shape).astype(np.uint8)
+        self.fields = [self.R.uniform(-1, 1, shape).astype(floattype) for component in range(3)]
+
+    def compare(self, sources, kernel, method):
+        """Update copies of the field components with the compiled source
+            updates and the source update methods for all iterations, and check
+            they are the same."""
+        G = self.G
+        fields = [field.copy() for field in self.fields]
+        fieldsref = [field.copy() for field in self.fields]
+        srcarrays = initialise_src_arrays(sources, G)
+        for iteration in range(G.iterations):
+            kernel(len(sources), iteration, G.dx, G.dy, G.dz, *srcarrays, self.updatecoeffs, self.ID, *fields)
+            for source in sources:
+                getattr(source, method)(iteration, self.updatecoeffs, self.ID, *fieldsref, G)
+            for field, fieldref in zip(fields, fieldsref):
+                np.testing.assert_array_equal(field, fieldref, err_msg='iteration {}'.format(iteration))
+        self.assertTrue(any(np.any(field != original) for field, original in zip(fields, self.fields)))
+
+    def test_hertzian_dipole(self):
+        sources = create_sources(HertzianDipole, self.G, self.R, dl=0.0025)
+        self.compare(sources, update_hertzian_dipole, 'update_electric')
+
+    def test_magnetic_dipole(self):
+        sources = create_sources(MagneticDipole, self.G, self.R)
+        self.compare(sources, update_magnetic_dipole, 'update_magnetic')
+
+    def test_voltage_source(self):
+        sources = create_sources(VoltageSource, self.G, self.R, resistance=50)
+        self.compare(sources, update_voltage_source, 'update_electric')
+
+    def test_voltage_source_hard(self):
+        sources = create_sources(VoltageSource, self.G, self.R, resistance=0)
+        self.compare(sources, update_voltage_source, 'update_electric')
+
+    def test_transmission_line_incident(self):
+        # Time windows long enough for the wave to reach the end of the line,
+        # and so short that the line is only as long as the position of the antenna
+        G = self.G
+        for iterations, resistance in ((400, 50), (1200, 73), (8, 50)):
+            G.iterations = iterations
+            waveformvalues = [self.R.uniform(-1, 1, iterations).astype(floattype) for n in range(2)]
+            tl = create_transmission_line(G, resistance, *waveformvalues)
+            with mock.patch.dict(TransmissionLine.incidentcache, clear=True):
+                tl.calculate_incident_V_I(G)
+
+            tlref = create_transmission_line(G, resistance, *waveformvalues)
+            for iteration in range(G.iterations):
+                tlref.Iinc[iteration] = tlref.current[tlref.antpos]
+                tlref.Vinc[iteration] = tlref.voltage[tlref.antpos]
+                tlref.update_current(iteration, G)
+                tlref.update_voltage(iteration, G)
+            tlref.nl = tlref.antpos + 1
+
+            np.testing.assert_array_equal(tl.Vinc, tlref.Vinc)
+            np.testing.assert_array_equal(tl.Iinc, tlref.Iinc)
+            self.assertEqual(tl.nl, tlref.nl)
+            np.testing.assert_array_equal(tl.voltage[0:tl.nl], tlref.voltage[0:tlref.nl])
+            np.testing.assert_array_equal(tl.current[0:tl.nl], tlref.current[0:tlref.nl])
+            self.assertEqual((tl.abcv0, tl.abcv1), (tlref.abcv0, tlref.abcv1))
+
+    def test_transmission_line_incident_cache(self):
+        G = self.G
+        waveformvalues = [self.R.uniform(-1, 1, G.iterations).astype(floattype) for n in range(2)]
+        with mock.patch.dict(TransmissionLine.incidentcache, clear=True), mock.patch('gprMax.sources.calculate_transmission_line_incident', side_effect=calculate_transmission_line_incident) as kernel:
+            tl = create_transmission_line(G, 50, *waveformvalues)
+            tl.calculate_incident_V_I(G)
+
+            # Lines with the same resistance and waveform values, e.g. in
+            # every model of a B-scan, use the cached values
+            tlcached = create_transmission_line(G, 50, *waveformvalues)
+            tlcached.calculate_incident_V_I(G)
+            self.assertEqual(kernel.call_count, 1)
+            self.assertTrue(np.any(tl.Vinc))
+            np.testing.assert_array_equal(tlcached.Vinc, tl.Vinc)
+            np.testing.assert_array_equal(tlcached.Iinc, tl.Iinc)
+            np.testing.assert_array_equal(tlcached.voltage[0:tlcached.nl], tl.voltage[0:tl.nl])
+            np.testing.assert_array_equal(tlcached.current[0:tlcached.nl], tl.current[0:tl.nl])
+            self.assertEqual((tlcached.abcv0, tlcached.abcv1, tlcached.nl), (tl.abcv0, tl.abcv1, tl.nl))
+
+            # and those with a different resistance or waveform values do not
+            create_transmission_line(G, 73, *waveformvalues).calculate_incident_V_I(G)
+            create_transmission_line(G, 50, waveformvalues[0], 2 * waveformvalues[1]).calculate_incident_V_I(G)
+            self.assertEqual(kernel.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+# Copyright (C) 2015-2018: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+import unittest
+
+import numpy as np
+from scipy import interpolate
+
+from gprMax.constants import floattype
+from gprMax.sources import HertzianDipole
+from gprMax.waveforms import Waveform
+
+"""Compare the values of waveforms calculated for arrays of times, and for
+    the duration of a simulation for sources, against those calculated one
+    time at a time, as by the original calculate_value function.
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_waveforms
+"""
+
+
+def calculate_value_serial(w, time, dt):
+    """Calculate the value of a waveform at a specific time, as the original
+        calculate_value function did.
+
+    Args:
+        w (class): Waveform class instance.
+        time (float): Absolute time.
+        dt (float): Absolute time discretisation.
+
+    Returns:
+        ampvalue (float): Calculated value for waveform.
+    """
+
+    w.calculate_coefficients()
+
+    if w.type == 'gaussian':
+        delay = time - w.chi
+        ampvalue = np.exp(-w.zeta * delay**2)
+    elif w.type == 'gaussiandot' or w.type == 'gaussianprime':
+        delay = time - w.chi
+        ampvalue = -2 * w.zeta * delay * np.exp(-w.zeta * delay**2)
+    elif w.type == 'gaussiandotnorm':
+        delay = time - w.chi
+        normalise = np.sqrt(np.exp(1) / (2 * w.zeta))
+        ampvalue = -2 * w.zeta * delay * np.exp(-w.zeta * delay**2) * normalise
+    elif w.type == 'gaussiandotdot' or w.type == 'gaussiandoubleprime':
+        delay = time - w.chi
+        ampvalue = 2 * w.zeta * (2 * w.zeta * delay**2 - 1) * np.exp(-w.zeta * delay**2)
+    elif w.type == 'gaussiandotdotnorm':
+        delay = time - w.chi
+        normalise = 1 / (2 * w.zeta)
+        ampvalue = 2 * w.zeta * (2 * w.zeta * delay**2 - 1) * np.exp(-w.zeta * delay**2) * normalise
+    elif w.type == 'ricker':
+        delay = time - w.chi
+        normalise = 1 / (2 * w.zeta)
+        ampvalue = - (2 * w.zeta * (2 * w.zeta * delay**2 - 1) * np.exp(-w.zeta * delay**2)) * normalise
+    elif w.type == 'sine':
+        ampvalue = np.sin(2 * np.pi * w.freq * time)
+        if time * w.freq > 1:
+            ampvalue = 0
+    elif w.type == 'contsine':
+        rampamp = 0.25
+        ramp = rampamp * time * w.freq
+        if ramp > 1:
+            ramp = 1
+        ampvalue = ramp * np.sin(2 * np.pi * w.freq * time)
+    elif w.type == 'impulse':
+        if time == 0 or time < dt:
+            ampvalue = 1
+        elif time >= dt:
+            ampvalue = 0
+    elif w.type == 'user':
+        ampvalue = w.userfunc(time)
+
+    ampvalue *= w.amp
+
+    return ampvalue
+
+
+def calculate_source_values_serial(w, dt, iterations, start, stop):
+    """Calculate the values of a waveform for a source for the duration of a
+        simulation one iteration at a time, as the original
+        calculate_waveform_values function did.
+
+    Args:
+        w (class): Waveform class instance.
+        dt (float): Absolute time discretisation.
+        iterations (int): Number of iterations.
+        start, stop (float): Times the source starts and stops.
+
+    Returns:
+        valuesJ, valuesM (array): Waveform values for electric and magnetic sources.
+    """
+
+    valuesJ = np.zeros((iterations), dtype=floattype)
+    valuesM = np.zeros((iterations), dtype=floattype)
+    for iteration in range(iterations):
+        time = dt * iteration
+        if time >= start and time <= stop:
+            time -= start
+            valuesJ[iteration] = calculate_value_serial(w, time + 0.5 * dt, dt)
+            valuesM[iteration] = calculate_value_serial(w, time, dt)
+
+    return valuesJ, valuesM
+
+
+def create_waveforms():
+    """Create a waveform of each type, including user waveforms from a
+        function and from interpolated values, as from an excitation file.
+
+    Returns:
+        waveforms (list): Waveform class instances.
+    """
+
+    waveforms = []
+    for wavetype in Waveform.types:
+        w = Waveform()
+        w.ID = wavetype
+        w.type = wavetype
+        w.amp = 2.5
+        w.freq = 1.2e9
+        waveforms.append(w)
+
+    waveforms[-1].userfunc = lambda time: np.sin(2 * np.pi * 8e8 * time) * np.exp(-time / 1e-9)
+    w = Waveform()
+    w.ID = 'excitation_file'
+    w.type = 'user'
+    times = np.arange(0, 3e-9, 5e-11)
+    w.userfunc = interpolate.interp1d(times, np.cos(2 * np.pi * 1e9 * times), kind='linear', fill_value='extrapolate')
+    waveforms.append(w)
+
+    return waveforms
+
+
+class TestWaveforms(unittest.TestCase):
+
+    def test_calculate_value(self):
+        dt = 1.1e-11
+        times = np.concatenate(([0, 0.5 * dt, dt], np.arange(500) * dt + 0.5 * dt, np.arange(500) * dt))
+        for w in create_waveforms():
+            values = w.calculate_value(times, dt)
+            valuesref = np.array([calculate_value_serial(w, time, dt) for time in times], dtype=np.float64)
+            np.testing.assert_allclose(values, valuesref, rtol=1e-13, atol=1e-13 * np.abs(valuesref).max(), err_msg=w.ID)
+            # A single time gives a single value
+            self.assertEqual(np.ndim(w.calculate_value(times[5], dt)), 0)
+
+    def test_calculate_source_values(self):
+        dt = 1.1e-11
+        iterations = 500
+        for w in create_waveforms():
+            for start, stop in ((0, iterations * dt), (3e-10, 2e-9)):
+                valuesJ, valuesM = w.calculate_source_values(dt, iterations, start, stop)
+                valuesJref, valuesMref = calculate_source_values_serial(w, dt, iterations, start, stop)
+                np.testing.assert_array_equal(valuesJ, valuesJref, err_msg=w.ID)
+                np.testing.assert_array_equal(valuesM, valuesMref, err_msg=w.ID)
+
+    def test_shared_source_values(self):
+        G = SimpleNamespace(dt=1.1e-11, iterations=500, waveforms=create_waveforms())
+        sources = []
+        for start, stop in ((0, 1e-8), (0, 1e-8), (3e-10, 1e-8)):
+            source = HertzianDipole()
+            source.waveformID = 'ricker'
+            source.start, source.stop = start, stop
+            source.calculate_waveform_values(G)
+            sources.append(source)
+
+        # Sources with the same waveform and timing share the same values
+        self.assertIs(sources[0].waveformvaluesJ, sources[1].waveformvaluesJ)
+        self.assertIs(sources[0].waveformvaluesM, sources[1].waveformvaluesM)
+        self.assertIsNot(sources[0].waveformvaluesJ, sources[2].waveformvaluesJ)
+
+        # and values are calculated again if the waveform is changed
+        w = next(w for w in G.waveforms if w.ID == 'ricker')
+        w.freq = 6e8
+        sources[0].calculate_waveform_values(G)
+        self.assertIsNot(sources[0].waveformvaluesJ, sources[1].waveformvaluesJ)
+        np.testing.assert_array_equal(sources[0].waveformvaluesJ, calculate_source_values_serial(w, G.dt, G.iterations, 0, 1e-8)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -93,9 +93,11 @@ def merge_files(basefilename, removefiles=False):
             for rx in range(1, nrx + 1):
                 path = '/rxs/rx' + str(rx)
                 grp = fout.create_group(path)
+                if 'Sampling' in fin[path].attrs:
+                    grp.attrs['Sampling'] = fin[path].attrs['Sampling']
                 availableoutputs = list(fin[path].keys())
                 for output in availableoutputs:
-                    grp.create_dataset(output, (fout.attrs['Iterations'], modelruns), dtype=fin[path + '/' + output].dtype)
+                    grp.create_dataset(output, (fin[path + '/' + output].shape[0], modelruns), dtype=fin[path + '/' + output].dtype)
 
         # For all receivers
         for rx in range(1, nrx + 1):
@@ -64,6 +64,16 @@ def mpl_plot(filename, outputs=Rx.defaultoutputs, fft=False):
         path = '/rxs/rx' + str(rx) + '/'
         availableoutputs = list(f[path].keys())
 
+        # Time axis for receivers with output components stored at an
+        # interval and/or within a time gate
+        rxtime = time
+        rxdt = dt
+        if 'Sampling' in f[path].attrs:
+            start, stop, step = f[path].attrs['Sampling']
+            if (start, stop, step) != (0, iterations, 1):
+                rxtime = np.arange(start, stop, step) * dt
+                rxdt = step * dt
+
         # If only a single output is required, create one subplot
         if len(outputs) == 1:
 
@@ -85,7 +95,7 @@ def mpl_plot(filename, outputs=Rx.defaultoutputs, fft=False):
             # Plotting if FFT required
             if fft:
                 # FFT
-                freqs, power = fft_power(outputdata, dt)
+                freqs, power = fft_power(outputdata, rxdt)
                 freqmaxpower = np.where(np.isclose(power, 0))[0][0]
 
                 # Set plotting range to -60dB from maximum power or 4 times
@@ -99,10 +109,10 @@ def mpl_plot(filename, outputs=Rx.defaultoutputs, fft=False):
 
                 # Plot time history of output component
                 fig, (ax1, ax2) = plt.subplots(nrows=1, ncols=2, num='rx' + str(rx), figsize=(20, 10), facecolor='w', edgecolor='w')
-                line1 = ax1.plot(time, outputdata, 'r', lw=2, label=outputtext)
+                line1 = ax1.plot(rxtime, outputdata, 'r', lw=2, label=outputtext)
                 ax1.set_xlabel('Time [s]')
                 ax1.set_ylabel(outputtext + ' field strength [V/m]')
-                ax1.set_xlim([0, np.amax(time)])
+                ax1.set_xlim([0, np.amax(rxtime)])
                 ax1.grid(which='both', axis='both', linestyle='-.')
 
                 # Plot frequency spectra
@@ -134,8 +144,8 @@ def mpl_plot(filename, outputs=Rx.defaultoutputs, fft=False):
             # Plotting if no FFT required
             else:
                 fig, ax = plt.subplots(subplot_kw=dict(xlabel='Time [s]', ylabel=outputtext + ' field strength [V/m]'), num='rx' + str(rx), figsize=(20, 10), facecolor='w', edgecolor='w')
-                line = ax.plot(time, outputdata, 'r', lw=2, label=outputtext)
-                ax.set_xlim([0, np.amax(time)])
+                line = ax.plot(rxtime, outputdata, 'r', lw=2, label=outputtext)
+                ax.set_xlim([0, np.amax(rxtime)])
                 # ax.set_ylim([-15, 20])
                 ax.grid(which='both', axis='both', linestyle='-.')
 
@@ -172,48 +182,48 @@ def mpl_plot(filename, outputs=Rx.defaultoutputs, fft=False):
 
                 if output == 'Ex':
                     ax = plt.subplot(gs[0, 0])
-                    ax.plot(time, outputdata, 'r', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'r', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', field strength [V/m]')
                 # ax.set_ylim([-15, 20])
                 elif output == 'Ey':
                     ax = plt.subplot(gs[1, 0])
-                    ax.plot(time, outputdata, 'r', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'r', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', field strength [V/m]')
                 # ax.set_ylim([-15, 20])
                 elif output == 'Ez':
                     ax = plt.subplot(gs[2, 0])
-                    ax.plot(time, outputdata, 'r', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'r', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', field strength [V/m]')
                 # ax.set_ylim([-15, 20])
                 elif output == 'Hx':
                     ax = plt.subplot(gs[0, 1])
-                    ax.plot(time, outputdata, 'g', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'g', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', field strength [A/m]')
                 # ax.set_ylim([-0.03, 0.03])
                 elif output == 'Hy':
                     ax = plt.subplot(gs[1, 1])
-                    ax.plot(time, outputdata, 'g', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'g', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', field strength [A/m]')
                 # ax.set_ylim([-0.03, 0.03])
                 elif output == 'Hz':
                     ax = plt.subplot(gs[2, 1])
-                    ax.plot(time, outputdata, 'g', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'g', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', field strength [A/m]')
                 # ax.set_ylim([-0.03, 0.03])
                 elif output == 'Ix':
                     ax = plt.subplot(gs[0, 2])
-                    ax.plot(time, outputdata, 'b', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'b', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', current [A]')
                 elif output == 'Iy':
                     ax = plt.subplot(gs[1, 2])
-                    ax.plot(time, outputdata, 'b', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'b', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', current [A]')
                 elif output == 'Iz':
                     ax = plt.subplot(gs[2, 2])
-                    ax.plot(time, outputdata, 'b', lw=2, label=outputtext)
+                    ax.plot(rxtime, outputdata, 'b', lw=2, label=outputtext)
                     ax.set_ylabel(outputtext + ', current [A]')
             for ax in fig.axes:
-                ax.set_xlim([0, np.amax(time)])
+                ax.set_xlim([0, np.amax(rxtime)])
                 ax.grid(which='both', axis='both', linestyle='-.')
 
         # Save a PDF/PNG of the figure